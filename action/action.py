@@ -3,16 +3,13 @@
 
 """Base Action class and registry for all Spellbook actions."""
 
-import os
 import time
 from abc import abstractmethod, ABCMeta
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from helpers.jsonhelpers import save_to_json_file
-from validators.validators import valid_action_type
-
-ACTIONS_DIR = 'json/public/actions'
+from helpers.storagehelpers import ACTION_STORE
+from validators.validators import valid_action_type, valid_actions
 
 
 class Action(object):
@@ -29,6 +26,7 @@ class Action(object):
         self.id = action_id
         self.action_type: Optional[str] = None
         self.created: Optional[datetime] = None
+        self.depends_on: List[str] = []
 
     def configure(self, **config):
         """
@@ -37,18 +35,21 @@ class Action(object):
         :param config: A dict containing the configuration settings
                        - config['created']     : A timestamp when the action was created
                        - config['action_type'] : The type of action ['Command', 'SpawnProcess', 'RevealSecret', 'SendMail', 'SendTransaction', 'Webhook']
+                       - config['depends_on']  : A list of action ids that must succeed before this action runs (only used by triggers with parallel_actions)
         """
         self.created = datetime.fromtimestamp(config['created']) if 'created' in config else datetime.now()
 
         if 'action_type' in config and valid_action_type(config['action_type']):
             self.action_type = config['action_type']
 
+        if 'depends_on' in config and valid_actions(config['depends_on']):
+            self.depends_on = config['depends_on']
+
     def save(self):
         """
-        Save the action as a json file
+        Save the config of the action in the action store
         """
-        print('save action to json file: %s' % os.path.join(ACTIONS_DIR, '%s.json' % self.id))
-        save_to_json_file(os.path.join(ACTIONS_DIR, '%s.json' % self.id), self.json_encodable())
+        ACTION_STORE.save(self.id, self.json_encodable())
 
     def json_encodable(self):
         """
@@ -61,6 +62,7 @@ class Action(object):
 
         return {'id': self.id,
                 'action_type': self.action_type,
+                'depends_on': self.depends_on,
                 'created': int(time.mktime(self.created.timetuple()))}
 
     @abstractmethod
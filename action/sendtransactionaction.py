@@ -58,6 +58,7 @@ class SendTransactionAction(Action):
         self.unspent_outputs = None
 
         self.utxo_confirmations = 1
+        self.utxo_quorum = False
         self.private_key = None
 
         # Used to store the txid after it has been sent
@@ -147,6 +148,9 @@ class SendTransactionAction(Action):
         if 'utxo_confirmations' in config and valid_amount(config['utxo_confirmations']):
             self.utxo_confirmations = config['utxo_confirmations']
 
+        if 'utxo_quorum' in config and isinstance(config['utxo_quorum'], bool):
+            self.utxo_quorum = config['utxo_quorum']
+
         if 'private_key' in config and valid_private_key(private_key=config['private_key']):
             self.private_key = config['private_key']
 
@@ -181,6 +185,7 @@ class SendTransactionAction(Action):
                     'tx_fee_type': self.tx_fee_type,
                     'tx_fee': self.tx_fee,
                     'utxo_confirmations': self.utxo_confirmations,
+                    'utxo_quorum': self.utxo_quorum,
                     'distribution': self.distribution,
                     'private_key': self.private_key})
         return ret
@@ -203,7 +208,7 @@ class SendTransactionAction(Action):
         #
         # The benefit of this is that it will result in automatic consolidation of utxos, in the long run this is preferred otherwise you will end up with many small
         # utxos that might cost more in fees than they are worth
-        data = utxos(address=self.sending_address, confirmations=self.utxo_confirmations)
+        data = utxos(address=self.sending_address, confirmations=self.utxo_confirmations, quorum=self.utxo_quorum)
         if 'utxos' in data:
             self.unspent_outputs = [TransactionInput(address=self.sending_address,
                                                      value=utxo['value'],
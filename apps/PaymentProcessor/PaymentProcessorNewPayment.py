@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import functools
 import os
 import requests
 import time
@@ -8,10 +9,12 @@ from datetime import datetime
 from helpers.loghelpers import LOG
 from action.actiontype import ActionType
 from helpers.actionhelpers import get_action
-from helpers.triggerhelpers import get_trigger
+from helpers.triggerhelpers import get_trigger, watch_trigger, http_post_request
 from trigger.triggertype import TriggerType
 from helpers.configurationhelpers import get_host, get_port, get_use_testnet
 from helpers.hotwallethelpers import get_address_from_wallet
+from helpers.listenerhelpers import LISTENER_SERVICE, RECEIVE
+from helpers.eventbus import EVENT_BUS, ADDRESS
 from paymentprocessorscript import PaymentProcessorScript, PaymentRequest, ACCOUNT, LISTENER_TIMEOUT, REQUEST_TIMEOUT
 
 
@@ -94,7 +97,15 @@ class PaymentProcessorNewPayment(PaymentProcessorScript):
             trigger.multi = True
             trigger.save()
 
-            # Spawn up a separate process to listen for the payment transaction
+            # If the transaction listener runs in the server, the transactions of the address arrive on the event bus:
+            # the balance trigger is checked on each of them and the payment is processed in this process
+            if LISTENER_SERVICE.running:
+                watch_trigger(trigger_id=trigger.id)
+                if EVENT_BUS.subscribe(ADDRESS, payment_request.address, subscriber='payment:%s' % payment_request.payment_request_id,
+                                       callback=functools.partial(transaction_received, payment_request.payment_request_id), timeout=LISTENER_TIMEOUT):
+                    return
+
+            # Otherwise spawn up a separate process to listen for the payment transaction
             url = 'http://%s:%s/spellbook/triggers/PaymentProcessorTransactionReceived/post' % (get_host(), get_port())
             notify_program = os.path.join('helpers', 'notify_transaction.py')
             command = r'%s %s %s #txid#' % (notify_program, url, payment_request.payment_request_id)
@@ -116,3 +127,20 @@ class PaymentProcessorNewPayment(PaymentProcessorScript):
 
     def cleanup(self):
         pass
+
+
+def transaction_received(payment_request_id, topic, address, events):
+    """
+    Process the first transaction that pays to the address of a payment request, like notify_transaction.py does for a
+    separate listener process
+
+    :param payment_request_id: The id of the payment request
+    :param topic: ADDRESS
+    :param address: The address of the payment request
+    :param events: A list of events of the event bus
+    """
+    for event in events:
+        if event['event'] == RECEIVE:
+            EVENT_BUS.unsubscribe('payment:%s' % payment_request_id)
+            http_post_request('PaymentProcessorTransactionReceived', payment_request_id=payment_request_id, txid=event['txid'])
+            return
@@ -9,13 +9,18 @@ import hashlib
 import hmac
 import random
 import string
+import threading
 
 import simplejson
 
 from helpers.jsonhelpers import save_to_json_file, load_from_json_file
+from helpers.sqlitehelpers import SQLiteDatabase
 
 API_KEYS_FILE = 'json/private/api_keys.json'
-LAST_NONCES: dict[str, int] = {}
+NONCES_FILE = 'json/private/nonces.db'
+
+SIGNATURE_VERSION_HEADER = 'API_Sign_Version'
+HASH_CHUNK_SIZE = 65536  # Number of bytes of the request body that are hashed at a time
 
 
 class AuthenticationStatus(object):
@@ -30,6 +35,152 @@ class AuthenticationStatus(object):
     INVALID_NONCE = 'Invalid nonce'
 
 
+class NonceStore(object):
+    """
+    The nonce of the last request of each api key, kept in memory
+
+    Checking and updating a nonce is done in a single step under a lock, so concurrent requests with the same nonce
+    can not both be accepted. The nonces are lost on a restart and are not shared with forked processes, the server
+    replaces this store with a PersistentNonceStore at startup (see use_persistent_nonces).
+
+    :param nonces: A dict to keep the nonces in (optional)
+    :param lock: The lock that protects the nonces (optional)
+    """
+    def __init__(self, nonces=None, lock=None):
+        self.nonces = nonces if nonces is not None else {}
+        self.lock = lock if lock is not None else threading.Lock()
+
+    def update(self, api_key, nonce):
+        """
+        Store the nonce of a request if it is higher than the nonce of the previous request of the api key
+
+        :param api_key: The api key of the request
+        :param nonce: The nonce of the request
+        :return: True if the nonce is valid, False otherwise
+        """
+        with self.lock:
+            last_nonce = self.nonces.get(api_key)
+            if last_nonce is not None and last_nonce >= nonce:
+                return False
+
+            self.nonces[api_key] = nonce
+            return True
+
+
+NONCE_STORE = NonceStore()
+
+
+class PersistentNonceStore(SQLiteDatabase):
+    """
+    The nonce of the last request of each api key, stored in a SQLite database
+
+    The nonces survive a restart of the server, so requests that were made before the restart can not be replayed, and
+    they are shared by all processes that use the same database. Checking and updating a nonce is a single statement,
+    which SQLite runs atomically even when multiple processes use the database at the same time.
+
+    :param filename: The filename of the SQLite database
+    """
+    def __init__(self, filename):
+        super(PersistentNonceStore, self).__init__(filename=filename)
+
+    def setup(self, connection):
+        """
+        Create the table of the nonces
+
+        :param connection: A sqlite3 Connection object
+        """
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS nonces (api_key TEXT PRIMARY KEY, nonce INTEGER NOT NULL)')
+
+    def update(self, api_key, nonce):
+        """
+        Store the nonce of a request if it is higher than the nonce of the previous request of the api key
+
+        :param api_key: The api key of the request
+        :param nonce: The nonce of the request
+        :return: True if the nonce is valid, False otherwise
+        """
+        try:
+            with self._lock:
+                cursor = self.connection().execute('INSERT INTO nonces (api_key, nonce) VALUES (?, ?) ON CONFLICT(api_key) '
+                                                   'DO UPDATE SET nonce = excluded.nonce WHERE excluded.nonce > nonces.nonce',
+                                                   (api_key, nonce))
+        except OverflowError:
+            return False
+
+        return cursor.rowcount == 1
+
+
+def use_persistent_nonces(filename=NONCES_FILE):
+    """
+    Keep the nonces in a SQLite database from now on, so they are shared by forked processes and survive restarts
+
+    :param filename: The filename of the SQLite database
+    """
+    global NONCE_STORE
+    NONCE_STORE = PersistentNonceStore(filename=filename)
+
+
+class ApiKeyStore(object):
+    """
+    The api keys of api_keys.json, kept in memory together with the decoded HMAC key of each secret
+
+    The file is only read again when its modification time changes, so changes to the api keys are still picked up
+    without restarting the server.
+
+    :param filename: The filename of the api keys file
+    """
+    def __init__(self, filename=API_KEYS_FILE):
+        self.filename = filename
+        self.api_keys = None
+        self.mtime = None
+        self._lock = threading.Lock()
+
+    def get_mtime(self):
+        """Get the modification time of the api keys file, or None if it can not be accessed."""
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def get_api_keys(self):
+        """
+        Get the api keys
+
+        :return: A dict containing the settings of each api key, or None if the api keys file is invalid
+        """
+        mtime = self.get_mtime()
+        with self._lock:
+            if self.api_keys is not None and mtime is not None and mtime == self.mtime:
+                return self.api_keys
+
+            api_keys = load_from_json_file(self.filename)
+            if not isinstance(api_keys, dict):
+                self.api_keys, self.mtime = None, None
+                return None
+
+            self.api_keys = {}
+            for api_key, settings in api_keys.items():
+                settings = dict(settings) if isinstance(settings, dict) else {}
+                try:
+                    settings['hmac_key'] = decode_secret(settings['secret'])
+                except Exception:
+                    # The secret is decoded again when it is used, which raises the error for the request
+                    pass
+                self.api_keys[api_key] = settings
+
+            self.mtime = mtime
+            return self.api_keys
+
+    def clear(self):
+        """Forget the cached api keys."""
+        with self._lock:
+            self.api_keys, self.mtime = None, None
+
+
+API_KEY_STORE = ApiKeyStore()
+
+
 def initialize_api_keys_file():
     """
     Initialize the api_keys.json file with a new random api key and secret for the admin
@@ -72,6 +223,48 @@ def hash_message(data, nonce):
     return hashlib.sha512(message.encode('utf-8')).digest()
 
 
+def hash_body(body, nonce):
+    """
+    Get the SHA512 hash of the nonce and the raw body of a http request (signature version 2)
+
+    :param body: The body as bytes, or a file-like object that is read in chunks
+    :param nonce: An integer
+    :return: A SHA512 hash
+    """
+    message_hash = hashlib.sha512(str(nonce).encode('utf-8'))
+    if hasattr(body, 'read'):
+        for chunk in iter(lambda: body.read(HASH_CHUNK_SIZE), b''):
+            message_hash.update(chunk)
+    else:
+        message_hash.update(body)
+
+    return message_hash.digest()
+
+
+def decode_secret(secret):
+    """
+    Get the HMAC key of a shared secret
+
+    :param secret: A string containing the shared secret (lenght must be a multiple of 4)
+    :return: The base64 decoded secret
+    """
+    if len(secret) % 4 != 0:
+        raise Exception('The secret must be a string with a length of a multiple of 4!')
+
+    return base64.b64decode(secret)
+
+
+def sign(message_hash, hmac_key):
+    """
+    Sign a hash with a HMAC key
+
+    :param message_hash: A SHA512 hash
+    :param hmac_key: The decoded shared secret
+    :return: A base64 encoded signature
+    """
+    return base64.b64encode(hmac.new(hmac_key, message_hash, hashlib.sha512).digest()).decode()
+
+
 def signature(data, nonce, secret):
     """
     Sign the nonce and data with a shared secret and return the signature
@@ -81,27 +274,39 @@ def signature(data, nonce, secret):
     :param secret: A string containing the shared secret (lenght must be a multiple of 4)
     :return: A signature for the data and nonce
     """
-    if len(secret) % 4 != 0:
-        raise Exception('The secret must be a string with a length of a multiple of 4!')
+    return sign(hash_message(data, nonce), decode_secret(secret))
+
+
+def body_signature(body, nonce, secret):
+    """
+    Sign the nonce and the raw body of a http request with a shared secret (signature version 2)
+
+    The request must also have the header API_Sign_Version: 2. The body is signed exactly as it is sent, so the
+    server does not need to encode the data as json again to check the signature.
 
-    return base64.b64encode(hmac.new(base64.b64decode(secret), hash_message(data, nonce), hashlib.sha512).digest()).decode()
+    :param body: The body as bytes, or a file-like object
+    :param nonce: An integer
+    :param secret: A string containing the shared secret (lenght must be a multiple of 4)
+    :return: A signature for the body and nonce
+    """
+    return sign(hash_body(body, nonce), decode_secret(secret))
 
 
-def check_authentication(headers, data):
+def check_authentication(headers, data, body=None):
     """
     Checks if the headers contain valid authentication information
     This must include the following headers:
     - API_Key: an identifier for the account
     - API_Sign: a signature
     - API_Nonce: an integer, each request must have a nonce that is higher than the nonce of the previous request
+    - API_Sign_Version (optional): 2 if the signature is made over the raw body instead of the json data
 
     :param headers: The headers of the http request
     :param data: The json data of the http request
+    :param body: The raw body of the http request as bytes or a file-like object, needed for signature version 2
     :return: An AuthenticationStatus
     """
-    global LAST_NONCES
-
-    api_keys = load_from_json_file(API_KEYS_FILE)
+    api_keys = API_KEY_STORE.get_api_keys()
     if api_keys is None:
         return AuthenticationStatus.INVALID_JSON_FILE
 
@@ -123,12 +328,20 @@ def check_authentication(headers, data):
     except Exception:
         return AuthenticationStatus.INVALID_NONCE
 
-    if api_key in LAST_NONCES and LAST_NONCES[api_key] >= nonce:
-        return AuthenticationStatus.INVALID_NONCE
+    if str(headers.get(SIGNATURE_VERSION_HEADER, '1')) == '2':
+        message_hash = hash_body(body if body is not None else b'', nonce)
+    else:
+        message_hash = hash_message(data, nonce)
 
-    LAST_NONCES[api_key] = nonce
+    hmac_key = api_keys[api_key].get('hmac_key')
+    if hmac_key is None:
+        hmac_key = decode_secret(api_keys[api_key]['secret'])
 
-    if headers['API_Sign'] == signature(data, nonce, api_keys[api_key]['secret']):
-        return AuthenticationStatus.OK
-    else:
+    # The nonce is only stored for requests with a valid signature, so forged requests can not use up nonces
+    if not hmac.compare_digest(str(headers['API_Sign']).encode('utf-8'), sign(message_hash, hmac_key).encode('utf-8')):
         return AuthenticationStatus.INVALID_SIGNATURE
+
+    if not NONCE_STORE.update(api_key, nonce):
+        return AuthenticationStatus.INVALID_NONCE
+
+    return AuthenticationStatus.OK
@@ -0,0 +1 @@
+"""Benchmark scripts for the performance critical parts of the Spellbook."""
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the logging overhead per request of SpellbookRESTAPI.log_to_logger.
+
+The legacy mode logs every header and every JSON body key synchronously, like log_to_logger did before the access log
+was written by a background thread. The time per request is measured in the request thread, the drain column is the
+time the writer thread needed afterwards to write the records that were still queued.
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+from bottle import request, response  # noqa: E402
+
+import spellbookserver  # noqa: E402
+from helpers.loghelpers import AccessLog, AccessLogFormatter  # noqa: E402
+
+BODY_SIZES = [0, 1024, 10 * 1024 * 1024 - 64]  # the largest body stays below BaseRequest.MEMFILE_MAX of the server
+
+
+def make_environ(body_size):
+    """Make the WSGI environ of a POST request with a JSON body of about the given size."""
+    body = json.dumps({'message': 'x' * body_size}).encode('utf-8') if body_size > 0 else b''
+    return {'REQUEST_METHOD': 'POST', 'PATH_INFO': '/spellbook/triggers/benchmark/message', 'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '42069', 'REMOTE_ADDR': '127.0.0.1', 'wsgi.url_scheme': 'http',
+            'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body),
+            'HTTP_USER_AGENT': 'benchmark', 'HTTP_ACCEPT': '*/*', 'HTTP_API_KEY': 'a' * 64, 'HTTP_API_SIGN': 'b' * 88}
+
+
+def legacy_log_to_logger(logger, fn):
+    """The synchronous logging of every header and JSON body key, as log_to_logger did before."""
+    def _log_to_logger(*args, **kwargs):
+        start_time = int(round(time.time() * 1000))
+        request_time = datetime.now()
+        logger.info('%s | %s | %s | %s' % (request_time, request.remote_addr, request.method, request.url))
+        for key, value in request.headers.items():
+            logger.info('  HEADERS | %s: %s' % (key, str(value).encode('utf-8')))
+        if request.json is not None:
+            for key, value in request.json.items():
+                logger.info('  BODY | %s: %s' % (key, str(value).encode('utf-8')))
+        actual_response = fn(*args, **kwargs)
+        end_time = int(round(time.time() * 1000))
+        logger.info('%s | %s | %s | %s | %s | %s ms' % (request_time, request.remote_addr, request.method, request.url,
+                                                        response.status, end_time - start_time))
+        return actual_response
+
+    return _log_to_logger
+
+
+def measure(mode, body_size, iterations, log_dir):
+    """
+    Measure the logging overhead of one mode
+
+    :param mode: legacy, verbose, compact or sampled
+    :param body_size: The size of the request body in bytes
+    :param iterations: The number of requests
+    :param log_dir: The directory of the log files
+    :return: A tuple containing the microseconds per request and the milliseconds needed to drain the queue
+    """
+    handler = RotatingFileHandler(os.path.join(log_dir, '%s_%s.txt' % (mode, body_size)), maxBytes=10000000, backupCount=1, encoding='utf-8')
+    handler.setFormatter(AccessLogFormatter('%(message)s'))
+    logger = logging.getLogger('bench_access_log_%s_%s' % (mode, body_size))
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    if mode == 'legacy':
+        logger.addHandler(handler)
+        wrapper = legacy_log_to_logger(logger, lambda: 'ok')
+        access_log = None
+    else:
+        access_log = AccessLog(logger=logger, handlers=[handler])
+        access_log.configure(verbose=mode == 'verbose', sample_rate=0.1 if mode == 'sampled' else 1.0)
+        access_log.start()
+        spellbookserver.ACCESS_LOG = access_log
+        spellbookserver.REQUESTS_LOG = logger
+        wrapper = spellbookserver.SpellbookRESTAPI.log_to_logger(None, lambda: 'ok')
+
+    elapsed = 0.0
+    for _ in range(iterations):
+        request.bind(make_environ(body_size))
+        response.bind()
+        start = time.perf_counter()
+        wrapper()
+        elapsed += time.perf_counter() - start
+
+    start = time.perf_counter()
+    if access_log is not None:
+        access_log.stop()
+    drain = time.perf_counter() - start
+    handler.close()
+
+    return elapsed / iterations * 1000000, drain * 1000
+
+
+def run(iterations, large_iterations):
+    """Run the benchmark and print the results."""
+    log_dir = tempfile.mkdtemp()
+    print('%-10s %12s %16s %12s' % ('mode', 'body bytes', 'us per request', 'drain ms'))
+    for body_size in BODY_SIZES:
+        n = large_iterations if body_size >= 1024 * 1024 else iterations
+        for mode in ['legacy', 'verbose', 'compact', 'sampled']:
+            per_request, drain = measure(mode=mode, body_size=body_size, iterations=n, log_dir=log_dir)
+            print('%-10s %12s %16.1f %12.1f' % (mode, body_size, per_request, drain))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the logging overhead per request of the REST API')
+    parser.add_argument('-i', '--iterations', help='Number of requests per measurement', default=2000, type=int)
+    parser.add_argument('-l', '--large_iterations', help='Number of requests per measurement with a 10 MB body', default=10, type=int)
+    args = parser.parse_args()
+
+    run(iterations=args.iterations, large_iterations=args.large_iterations)
+
+    # Importing spellbookserver also started the websocket server thread, which would keep the benchmark running
+    sys.stdout.flush()
+    os._exit(0)
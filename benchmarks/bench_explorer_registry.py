@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of the per-query overhead of looking up explorers, with and without the in-memory ExplorerRegistry."""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+from data.data import ExplorerRegistry, create_explorer_api  # noqa: E402
+from data.explorer import ExplorerType  # noqa: E402
+from helpers.jsonhelpers import save_to_json_file, load_from_json_file  # noqa: E402
+
+
+def lookup_without_registry(filename):
+    """Look up the explorers the way query() did before the registry: parse the file again for every explorer that is tried."""
+    explorers = load_from_json_file(filename)
+    explorer_ids = [explorer[0] for explorer in sorted(explorers.items(), key=lambda x: x[1]['priority'])]
+    for explorer_id in explorer_ids:
+        create_explorer_api(explorer_id, load_from_json_file(filename)[explorer_id])
+
+
+def lookup_with_registry(registry):
+    """Look up the explorers via the registry."""
+    explorers = registry.get_explorers()
+    explorer_ids = [explorer[0] for explorer in sorted(explorers.items(), key=lambda x: x[1]['priority'])]
+    for explorer_id in explorer_ids:
+        registry.get_explorer_api(explorer_id)
+
+
+def run(iterations):
+    """Run the benchmark and print the average time per query."""
+    filename = os.path.join(tempfile.mkdtemp(), 'explorers.json')
+    save_to_json_file(filename, {'blockstream.info': {'type': ExplorerType.BLOCKSTREAM, 'priority': 1, 'url': '', 'api_key': '', 'testnet': False},
+                                 'btc.com': {'type': ExplorerType.BTC_COM, 'priority': 2, 'url': '', 'api_key': '', 'testnet': False},
+                                 'blockchain.info': {'type': ExplorerType.BLOCKCHAIN_INFO, 'priority': 3, 'url': '', 'api_key': '', 'testnet': False}})
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        lookup_without_registry(filename)
+    without_registry = (time.perf_counter() - start) / iterations
+
+    registry = ExplorerRegistry(filename)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        lookup_with_registry(registry)
+    with_registry = (time.perf_counter() - start) / iterations
+
+    print('Explorer lookup overhead per query (%s iterations, 3 explorers)' % iterations)
+    print('  without registry: %8.1f us' % (without_registry * 1e6))
+    print('  with registry:    %8.1f us' % (with_registry * 1e6))
+    print('  speedup:          %8.1fx' % (without_registry / with_registry))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the explorer registry')
+    parser.add_argument('-n', '--iterations', help='Number of iterations', default=2000, type=int)
+    args = parser.parse_args()
+
+    run(iterations=args.iterations)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Benchmark of sequential explorer requests with a new connection per request versus the pooled HTTP sessions."""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+from data.explorer_api import HTTPSessionPool  # noqa: E402
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Serves a small json page, like one page of the transactions of an address."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    body = b'[' + b','.join([b'{"txid": "%064d", "status": {"confirmed": true}}' % i for i in range(25)]) + b']'
+
+    def do_GET(self):
+        """Send the page."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        """Don't log the requests."""
+        pass
+
+
+def timed(get, url, requests_count):
+    """Do a number of sequential GET requests and return the total time in seconds."""
+    start = time.perf_counter()
+    for i in range(requests_count):
+        get('%s/address/abc/txs/chain/%s' % (url, i), timeout=30).json()
+    return time.perf_counter() - start
+
+
+def run(url, requests_count):
+    """Run the benchmark and print the results."""
+    server = None
+    if url is None:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = 'http://127.0.0.1:%s' % server.server_address[1]
+
+    without_pool = timed(requests.get, url, requests_count)
+    with_pool = timed(HTTPSessionPool().get, url, requests_count)
+
+    print('%s sequential requests to %s (like one paginated get_transactions call)' % (requests_count, url))
+    print('  new connection per request: %8.1f ms' % (without_pool * 1000))
+    print('  pooled keep-alive session:  %8.1f ms' % (with_pool * 1000))
+    print('  speedup:                    %8.1fx' % (without_pool / with_pool))
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the pooled HTTP sessions of the explorer clients')
+    parser.add_argument('-n', '--requests', help='Number of sequential requests', default=50, type=int)
+    parser.add_argument('-u', '--url', help='Base url of a real explorer (default: a local stand-in server, without TLS)', default=None)
+    args = parser.parse_args()
+
+    run(url=args.url, requests_count=args.requests)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the transaction listener with recorded or generated mempool traffic.
+
+The messages are fed through listeners/transaction_listener.on_message as if they came from the websocket. The legacy
+column parses every message and starts a RunCommandProcess for every match, like on_message did before the address
+prefilter and the BatchDispatcher. The dict and bloom columns look up the address fields of the raw message in the
+watchlist or in a BloomFilter of the watchlist, and queue the matches in the dispatcher. The service column replays the
+messages from a file with the ReplayBackend into the TransactionListenerService of the server.
+
+Record real traffic with: bench_listener.py --record mempool.txt --count 10000
+Replay it with: bench_listener.py --replay mempool.txt
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import simplejson
+
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+import listeners.transaction_listener as transaction_listener  # noqa: E402
+from helpers.listenerhelpers import BloomFilter, BatchDispatcher, TransactionListenerService, extract_addresses  # noqa: E402
+from helpers.listenerbackends import ReplayBackend  # noqa: E402
+from helpers.loghelpers import LOG  # noqa: E402
+from helpers.runcommandprocess import RunCommandProcess  # noqa: E402
+
+ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def random_address(rng):
+    return '1' + ''.join(rng.choice(ALPHABET) for _ in range(33))
+
+
+def generate_messages(count, rng):
+    """Generate new-transactions messages with 1 to 3 inputs and 1 to 4 outputs, in the format of block.io."""
+    messages = []
+    for i in range(count):
+        data = {'network': 'BTC', 'txid': '%064x' % rng.getrandbits(256), 'time': 1700000000 + i,
+                'inputs': [{'input_no': j, 'address': random_address(rng), 'amount': '0.%08d' % rng.randint(1, 99999999), 'type': 'pubkeyhash'}
+                           for j in range(rng.randint(1, 3))],
+                'outputs': [{'output_no': j, 'address': random_address(rng), 'amount': '0.%08d' % rng.randint(1, 99999999), 'type': 'pubkeyhash'}
+                            for j in range(rng.randint(1, 4))]}
+        messages.append(simplejson.dumps({'type': 'new-transactions', 'data': data}))
+
+    return messages
+
+
+def record(filename, count, testnet=False):
+    """Record the messages of the block.io websocket to a file, one message per line."""
+    import websocket
+
+    ws = websocket.create_connection('wss://ws.block.io')
+    ws.send(simplejson.dumps({'type': 'new-transactions', 'network': 'BTCTEST' if testnet else 'BTC'}))
+    with open(filename, 'w') as output_file:
+        recorded = 0
+        while recorded < count:
+            message = ws.recv()
+            if '"new-transactions"' in message and '"data"' in message:
+                output_file.write(message.replace('\n', '') + '\n')
+                recorded += 1
+    ws.close()
+
+
+def legacy_on_message(message):
+    """The work on_message did for every message before the prefilter: parse, log every line and fork per match."""
+    transaction = simplejson.loads(message)
+    if transaction.get('type') != 'new-transactions':
+        return
+
+    log = transaction_listener.LISTENER_LOG
+    log.info('New transaction: %s' % transaction['data']['txid'])
+    for event, key in [('SEND', 'inputs'), ('RECEIVE', 'outputs')]:
+        for item in transaction['data'][key]:
+            log.info('\t\t%s -> %s' % (item['address'], item['amount']))
+            if item['address'] in transaction_listener.WATCHLIST and event in transaction_listener.WATCHLIST[item['address']]:
+                RunCommandProcess(command=transaction_listener.WATCHLIST[item['address']][event].replace('#txid#', transaction['data']['txid'])).start()
+
+
+def run(messages, watched, match_rate, seed):
+    """Run the benchmark and print the results."""
+    # Another seed than the generated messages, so the random watched addresses are not in the messages
+    rng = random.Random(seed + 1)
+    transaction_listener.LISTENER_LOG.setLevel(logging.WARNING)
+    LOG.setLevel(logging.WARNING)
+    transaction_listener.args = argparse.Namespace(send=True, receive=True)
+
+    # Watch random addresses, plus the addresses of a fraction of the messages
+    watchlist = {random_address(rng): {'RECEIVE': 'true #txid#'} for _ in range(watched)}
+    for message in messages:
+        if rng.random() < match_rate:
+            watchlist[extract_addresses(message)[-1]] = {'RECEIVE': 'true #txid#'}
+    transaction_listener.WATCHLIST = watchlist
+
+    bloom_filter = BloomFilter.from_addresses(list(watchlist))
+    print('%s messages, %s watched addresses, bloom filter %.1f KB' % (len(messages), len(watchlist), len(bloom_filter.bits) / 1024.0))
+    print('%-8s %14s %10s' % ('mode', 'messages/s', 'us/msg'))
+
+    modes = [('legacy', None), ('dict', None), ('bloom', bloom_filter)]
+    for mode, address_filter in modes:
+        transaction_listener.ADDRESS_FILTER = address_filter
+        dispatcher = transaction_listener.DISPATCHER = BatchDispatcher(batch_window=3600)
+
+        start = time.perf_counter()
+        for message in messages:
+            if mode == 'legacy':
+                legacy_on_message(message)
+            else:
+                transaction_listener.on_message(None, message)
+        elapsed = time.perf_counter() - start
+
+        # The queued matches are not run, only the time to queue them is measured
+        dispatcher.pending.clear()
+        print('%-8s %14.0f %10.2f' % (mode, len(messages) / elapsed, elapsed / len(messages) * 1000000))
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as replay_file:
+        replay_file.write('\n'.join(messages) + '\n')
+
+    service = TransactionListenerService(max_addresses=len(watchlist), backend=ReplayBackend(url=replay_file.name))
+    service.dispatcher = BatchDispatcher(batch_window=3600)
+    for address in watchlist:
+        service.watch(address=address, event='RECEIVE', owner='bench', command='true #txid#')
+
+    start = time.perf_counter()
+    service.backend.run(service)
+    elapsed = time.perf_counter() - start
+    os.remove(replay_file.name)
+    print('%-8s %14.0f %10.2f   (%s matches)' % ('service', len(messages) / elapsed, elapsed / len(messages) * 1000000, service.matches))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the transaction listener with recorded or generated mempool traffic')
+    parser.add_argument('--replay', help='A file with recorded messages, one per line', type=str)
+    parser.add_argument('--record', help='Record messages of block.io to this file instead of running the benchmark', type=str)
+    parser.add_argument('-n', '--count', help='Number of messages to generate or record', default=20000, type=int)
+    parser.add_argument('-w', '--watched', help='Number of watched addresses', default=100000, type=int)
+    parser.add_argument('-m', '--match-rate', help='Fraction of the messages that contain a watched address', default=0.001, type=float)
+    parser.add_argument('--seed', help='Seed of the random generator', default=1, type=int)
+    args = parser.parse_args()
+
+    if args.record is not None:
+        record(filename=args.record, count=args.count)
+        sys.exit()
+
+    if args.replay is not None:
+        with open(args.replay, 'r') as input_file:
+            replay_messages = [line.strip() for line in input_file if line.strip()]
+    else:
+        replay_messages = generate_messages(count=args.count, rng=random.Random(args.seed))
+
+    run(messages=replay_messages, watched=args.watched, match_rate=args.match_rate, seed=args.seed)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Load test of a running Spellbook server: requests per second of a few endpoints at increasing numbers of concurrent clients.
+
+To compare worker counts, run it once for each value of the threads and workers options in the [RESTAPI] section of
+spellbook.conf (restarting the server in between) and pass a --label to tell the results apart, for example:
+
+    python benchmarks/bench_server_load.py --label "workers=1 threads=10" --trigger_id my_http_get_trigger
+    python benchmarks/bench_server_load.py --label "workers=4 threads=10" --trigger_id my_http_get_trigger
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+
+
+def load(url, clients, duration):
+    """
+    Let a number of clients request a url as fast as possible
+
+    :param url: The url to request
+    :param clients: The number of concurrent clients, each client has its own keep-alive session
+    :param duration: The number of seconds to keep requesting
+    :return: A tuple containing the number of successful requests, the number of errors and a sorted list of latencies
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        session = requests.Session()
+        client_latencies = []
+        client_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                client_latencies.append(time.perf_counter() - start)
+            else:
+                client_errors += 1
+
+        with lock:
+            latencies.extend(client_latencies)
+            errors.append(client_errors)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return len(latencies), sum(errors), sorted(latencies)
+
+
+def percentile(values, fraction):
+    """Get a percentile of a sorted list of values in milliseconds."""
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else 0.0
+
+
+def run(url, endpoints, concurrency, duration, label):
+    """Run the benchmark and print the results."""
+    print('Load test of %s%s, %s seconds per measurement' % (url, ' (%s)' % label if label else '', duration))
+    print('%-45s %8s %10s %8s %10s %10s' % ('endpoint', 'clients', 'req/s', 'errors', 'p50 ms', 'p95 ms'))
+
+    for endpoint in endpoints:
+        for clients in concurrency:
+            successes, errors, latencies = load(url=url + endpoint, clients=clients, duration=duration)
+            print('%-45s %8s %10.1f %8s %10.1f %10.1f' % (endpoint, clients, successes / duration, errors,
+                                                         percentile(latencies, 0.5), percentile(latencies, 0.95)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test a running Spellbook server')
+    parser.add_argument('-u', '--url', help='Base url of the Spellbook server', default='http://127.0.0.1:42069')
+    parser.add_argument('-t', '--trigger_id', help='The id of an active HTTPGetRequest trigger, /api/<trigger_id> is skipped if omitted')
+    parser.add_argument('-a', '--address', help='The address for the balance endpoint', default='1BoatSLRHtKNngkdXEeobR76b53LETtpyT')
+    parser.add_argument('-c', '--concurrency', help='Comma separated numbers of concurrent clients', default='1,4,16,64')
+    parser.add_argument('-d', '--duration', help='Seconds per measurement', default=5.0, type=float)
+    parser.add_argument('-l', '--label', help='A label for the server configuration, printed with the results', default='')
+    args = parser.parse_args()
+
+    endpoints = ['/spellbook/ping']
+    if args.trigger_id is not None:
+        endpoints.append('/api/%s' % args.trigger_id)
+    endpoints.append('/spellbook/addresses/%s/balance' % args.address)
+
+    run(url=args.url.rstrip('/'), endpoints=endpoints, concurrency=[int(clients) for clients in args.concurrency.split(',')],
+        duration=args.duration, label=args.label)
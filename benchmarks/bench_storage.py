@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of saving and loading trigger configs with each storage backend and json file setting.
+
+The legacy mode writes the json file in place, like save_to_json_file did before files were replaced atomically.
+The lookup column is the time TriggerRepository.get_config needs for a config that did not change.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import simplejson
+
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+from helpers.jsonhelpers import configure_json_files, JSON_FILES  # noqa: E402
+from helpers.storagehelpers import DocumentStore, StorageDatabase  # noqa: E402
+from helpers.triggerhelpers import TriggerRepository  # noqa: E402
+
+MODES = ['legacy', 'files', 'compact', 'fsync', 'sqlite']
+
+
+def trigger_config(i):
+    """A typical trigger config."""
+    return {'trigger_id': 'trigger%s' % i, 'trigger_type': 'Balance', 'status': 'Active', 'address': '1BoatSLRHtKNngkdXEeobR76b53LETtpyT',
+            'amount': 100000, 'actions': ['action%s' % j for j in range(5)], 'description': 'x' * 200, 'created': 1609459200,
+            'multi': False, 'triggered': 0, 'self_destruct': 0, 'destruct_actions': False, 'visibility': 'Private'}
+
+
+def measure(mode, configs, work_dir):
+    """
+    Measure one mode
+
+    :param mode: legacy, files, compact, fsync or sqlite
+    :param configs: The number of trigger configs
+    :param work_dir: A directory for the files of this mode
+    :return: A tuple containing the microseconds per save, per load and per cached lookup
+    """
+    store = DocumentStore(collection='triggers', directory=os.path.join(work_dir, mode))
+    os.makedirs(store.directory)
+    configure_json_files(compact=mode == 'compact', fsync='file' if mode == 'fsync' else 'never')
+    if mode == 'sqlite':
+        store.database = StorageDatabase(filename=os.path.join(work_dir, 'spellbook.db'))
+
+    start = time.perf_counter()
+    for i in range(configs):
+        if mode == 'legacy':
+            with open(store.filename('trigger%s' % i), 'w') as output_file:
+                simplejson.dump(trigger_config(i), output_file, indent=4, sort_keys=True)
+        else:
+            store.save('trigger%s' % i, trigger_config(i))
+    save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(configs):
+        store.load('trigger%s' % i)
+    load = time.perf_counter() - start
+
+    repository = TriggerRepository(store=store)
+    repository.get_trigger_ids(status='Active')
+    start = time.perf_counter()
+    for i in range(configs):
+        repository.get_config('trigger%s' % i)
+    lookup = time.perf_counter() - start
+
+    return save / configs * 1000000, load / configs * 1000000, lookup / configs * 1000000
+
+
+def run(configs):
+    """Run the benchmark and print the results."""
+    settings = dict(JSON_FILES)
+    work_dir = tempfile.mkdtemp()
+    print('%s trigger configs' % configs)
+    print('%-10s %12s %12s %12s' % ('mode', 'save us', 'load us', 'lookup us'))
+    for mode in MODES:
+        print('%-10s %12.1f %12.1f %12.1f' % ((mode,) + measure(mode=mode, configs=configs, work_dir=work_dir)))
+    JSON_FILES.update(settings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark saving and loading trigger configs with each storage backend')
+    parser.add_argument('-n', '--configs', help='Number of trigger configs', default=1000, type=int)
+    args = parser.parse_args()
+
+    run(configs=args.configs)
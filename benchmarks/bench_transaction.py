@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of building and signing transactions with many inputs.
+
+The legacy column builds the raw transaction with mktx() and signs it with sign() for each input, like make_custom_tx
+did before the TransactionBuilder: every signature deserializes the transaction, copies it for the signature form and
+serializes it twice. The builder column is make_custom_tx() with the TransactionBuilder. Both columns include the ECDSA
+signatures, which take the same time in both, the hashing column is only the signature hashes of the builder.
+The inputs are spent from 10 test keys, so the keys repeat like in a consolidation. The legacy column grows faster than
+quadratically and takes more than an hour at 1000 inputs, it is skipped above --max-legacy inputs.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+from transactionfactory import TransactionBuilder, make_custom_tx, mktx, sign, p2pkh_script  # noqa: E402
+from helpers.privatekeyhelpers import encode_privkey, privkey_to_pubkey  # noqa: E402
+from helpers.publickeyhelpers import pubkey_to_address  # noqa: E402
+
+OUTPUT_ADDRESS = '1PYmZMCgKFKVth5W9kaRpdYq9Lf8eLQ95E'
+
+
+def make_inputs(count, keys):
+    """Make inputs that spend 100000 satoshis each from the addresses of the keys."""
+    addresses = [pubkey_to_address(privkey_to_pubkey(key)) for key in keys]
+    return [{'address': addresses[i % len(keys)], 'value': 100000, 'output': '%064x:%d' % (i + 1, i % 4), 'confirmations': 6}
+            for i in range(count)]
+
+
+def legacy_tx(private_keys, tx_inputs, tx_outputs):
+    tx = mktx(tx_inputs, tx_outputs)
+    for i in range(len(tx_inputs)):
+        tx = sign(tx, i, private_keys[tx_inputs[i]['address']])
+    return tx
+
+
+def signature_hashes(tx_inputs, tx_outputs, script):
+    builder = TransactionBuilder()
+    for tx_input in tx_inputs:
+        builder.add_input(tx_input['output'])
+    for tx_output in tx_outputs:
+        builder.add_output(value=tx_output['value'], address=tx_output['address'])
+    for i in range(len(tx_inputs)):
+        builder.signature_hash(i, script)
+
+
+def timed(function):
+    """Get the seconds of a single call of a function and its result."""
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def run(sizes, max_legacy):
+    """Run the benchmark and print the results."""
+    keys = [encode_privkey(i + 1, 'hex_compressed') for i in range(10)]
+    script = bytes.fromhex(p2pkh_script(OUTPUT_ADDRESS))
+    print('%8s %12s %12s %12s %10s' % ('inputs', 'legacy s', 'builder s', 'hashing s', 'speedup'))
+
+    for size in sizes:
+        tx_inputs = make_inputs(size, keys)
+        fee = 1000 * size
+        tx_outputs = [{'address': OUTPUT_ADDRESS, 'value': sum(tx_input['value'] for tx_input in tx_inputs) - fee}]
+        private_keys = {tx_input['address']: key for tx_input, key in zip(tx_inputs, keys * size)}
+
+        builder_time, builder_tx = timed(lambda: make_custom_tx(private_keys, tx_inputs, tx_outputs, tx_fee=fee))
+        hashing_time, _ = timed(lambda: signature_hashes(tx_inputs, tx_outputs, script))
+
+        if size <= max_legacy:
+            legacy_time, tx = timed(lambda: legacy_tx(private_keys, tx_inputs, tx_outputs))
+            assert tx == builder_tx, 'The builder made another transaction than mktx and sign'
+            print('%8s %12.3f %12.3f %12.4f %9.1fx' % (size, legacy_time, builder_time, hashing_time, legacy_time / builder_time))
+        else:
+            print('%8s %12s %12.3f %12.4f %10s' % (size, '-', builder_time, hashing_time, '-'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark building and signing transactions with many inputs')
+    parser.add_argument('-s', '--sizes', help='The numbers of inputs', default=[1, 10, 100, 1000], type=int, nargs='+')
+    parser.add_argument('--max-legacy', help='Skip the legacy column for transactions with more inputs', default=300, type=int)
+    args = parser.parse_args()
+
+    run(sizes=args.sizes, max_legacy=args.max_legacy)
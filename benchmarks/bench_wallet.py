@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of address lookups and private key derivation from the hot wallet.
+
+The legacy column decrypts the wallet file and derives the seed for every call, like hotwallethelpers did before the
+WalletSession. The session column is the same call on an unlocked session, the first call is not measured. Addresses
+are found with the AddressIndex of the session, in a temporary database.
+A temporary wallet with a test mnemonic and an empty password is used.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import simplejson
+
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+import helpers.hotwallethelpers as hotwallethelpers  # noqa: E402
+from AESCipher import AESCipher  # noqa: E402
+from bips.BIP44 import get_xpub_key, get_xpriv_key, get_address_from_xpub, get_addresses_from_xpub, get_private_key  # noqa: E402
+
+TEST_MNEMONIC = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+
+
+def legacy_hot_wallet():
+    """The hot wallet as hotwallethelpers.get_hot_wallet returns it."""
+    return hotwallethelpers.get_hot_wallet()
+
+
+def legacy_address(account, index):
+    hot_wallet = legacy_hot_wallet()
+    xpub = get_xpub_key(mnemonic=' '.join(hot_wallet['mnemonic']), passphrase=hot_wallet['passphrase'], account=account)
+    return get_address_from_xpub(xpub=xpub, i=index)
+
+
+def legacy_private_key(account, index):
+    hot_wallet = legacy_hot_wallet()
+    xpriv = get_xpriv_key(mnemonic=' '.join(hot_wallet['mnemonic']), passphrase=hot_wallet['passphrase'], account=account)
+    return get_private_key(xpriv=xpriv, i=index)
+
+
+def legacy_find_address(address, accounts, indexes):
+    hot_wallet = legacy_hot_wallet()
+    for account in range(accounts):
+        xpub = get_xpub_key(mnemonic=' '.join(hot_wallet['mnemonic']), passphrase=hot_wallet['passphrase'], account=account)
+        addresses = get_addresses_from_xpub(xpub=xpub, i=indexes)
+        if address in addresses:
+            return account, addresses.index(address)
+
+    return None, None
+
+
+def timed(function, iterations):
+    """Get the average milliseconds per call of a function."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def run(iterations):
+    """Run the benchmark and print the results."""
+    wallet_dir = tempfile.mkdtemp()
+    with open(os.path.join(wallet_dir, 'bench_wallet.enc'), 'w') as output_file:
+        data = simplejson.dumps({'mnemonic': TEST_MNEMONIC.split(), 'passphrase': ''}).encode('utf-8')
+        output_file.write(str(AESCipher(key='').encrypt(data), 'utf-8'))
+
+    hotwallethelpers.get_wallet_dir = lambda: wallet_dir
+    hotwallethelpers.get_default_wallet = lambda: 'bench_wallet'
+
+    session = hotwallethelpers.WalletSession(idle_timeout=0)
+    index = hotwallethelpers.AddressIndex(session=session, filename=os.path.join(wallet_dir, 'address_index.db'))
+    target = session.get_address(1, 19)
+    cases = [('address', lambda: legacy_address(0, 5), lambda: session.get_address(0, 5)),
+             ('private key', lambda: legacy_private_key(0, 5), lambda: session.get_private_key(0, 5)),
+             ('find address', lambda: legacy_find_address(target, 2, 20), lambda: index.find(target, 2, 20))]
+
+    print('%-14s %12s %12s' % ('call', 'legacy ms', 'session ms'))
+    for name, legacy, cached in cases:
+        cached()
+        print('%-14s %12.3f %12.3f' % (name, timed(legacy, iterations), timed(cached, iterations * 100)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark address lookups and private key derivation from the hot wallet')
+    parser.add_argument('-i', '--iterations', help='Number of legacy calls per measurement', default=5, type=int)
+    args = parser.parse_args()
+
+    run(iterations=args.iterations)
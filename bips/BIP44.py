@@ -23,12 +23,22 @@ def get_address_from_xpub(xpub, i):
     :param i: The index of the address
     :return: A Bitcoin Address
     """
-    pub0 = bip32_ckd(xpub, 0)
-    public_key = bip32_ckd(pub0, i)
-    hex_key = encode_pubkey(bip32_extract_key(public_key), 'hex_compressed')
-    address = pubkey_to_address(hex_key, magicbyte=MAGICBYTE)
+    return get_address_from_chain_key(bip32_ckd(xpub, 0), i)
+
 
-    return address
+def get_address_from_chain_key(chain_key, i):
+    """
+    Get a Bitcoin address from the public key of a chain (the receiving or change chain of an account)
+
+    Deriving the chain key once and then the addresses from it saves one derivation per address.
+
+    :param chain_key: The xpub key of the chain
+    :param i: The index of the address
+    :return: A Bitcoin Address
+    """
+    public_key = bip32_ckd(chain_key, i)
+    hex_key = encode_pubkey(bip32_extract_key(public_key), 'hex_compressed')
+    return pubkey_to_address(hex_key, magicbyte=MAGICBYTE)
 
 
 def get_addresses_from_xpub(xpub, i=100):
@@ -78,11 +88,19 @@ def get_xpriv_key(mnemonic, passphrase="", account=0):
     # path for bitcoin mainnet is m/44'/0'/0'/0/0
     # path for bitcoin testnet is m/44'/1'/0'/0/0
 
-    seed = hexlify(get_seed(mnemonic=mnemonic, passphrase=passphrase))
-    master_key = bip32_master_key(unhexlify(seed), vbytes=VERSION_BYTES)
-    xpriv_key = bip32_ckd(bip32_ckd(bip32_ckd(master_key, 44+HARDENED), HARDENED+COIN_TYPE), HARDENED+account)
+    return get_account_xpriv_key(seed=get_seed(mnemonic=mnemonic, passphrase=passphrase), account=account)
 
-    return xpriv_key
+
+def get_account_xpriv_key(seed, account=0):
+    """
+    Derive the xpriv key for a given BIP44 account from a BIP39 seed
+
+    :param seed: The seed (bytes or bytearray)
+    :param account: The number of the account
+    :return: The xpriv key of the account
+    """
+    master_key = bip32_master_key(seed, vbytes=VERSION_BYTES)
+    return bip32_ckd(bip32_ckd(bip32_ckd(master_key, 44+HARDENED), HARDENED+COIN_TYPE), HARDENED+account)
 
 
 def get_xpriv_keys(mnemonic, passphrase="", i=1):
@@ -136,12 +154,19 @@ def get_private_key(xpriv, i, k=0):
     :param k: 0=normal addresses, 1=change addresses
     :return: A dict with the address as the key and the private key as the value
     """
-    private_keys = {}
-    priv0 = bip32_ckd(xpriv, k)
+    return get_private_key_from_chain_key(bip32_ckd(xpriv, k), i)
+
+
+def get_private_key_from_chain_key(chain_key, i):
+    """
+    Get a private key derived from the xpriv key of a chain (the receiving or change chain of an account)
 
-    private_key = bip32_ckd(priv0, i)
+    :param chain_key: The xpriv key of the chain
+    :param i: The index of the address
+    :return: A dict with the address as the key and the private key as the value
+    """
+    private_key = bip32_ckd(chain_key, i)
     wif_key = encode_privkey(bip32_extract_key(private_key), 'wif_compressed', vbyte=MAGICBYTE)
     address_from_private_key = privkey_to_address(wif_key, magicbyte=MAGICBYTE)
-    private_keys[address_from_private_key] = wif_key
 
-    return private_keys
+    return {address_from_private_key: wif_key}
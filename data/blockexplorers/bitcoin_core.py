@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Bitcoin Core JSON-RPC client, for using a self-hosted node as explorer."""
+import threading
+
+from helpers.loghelpers import LOG
+from data.transaction import TX, TxInput, TxOutput
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
+from transactionfactory import address_to_script
+
+# Bitcoin Core can only run one scantxoutset at a time, concurrent scans fail with 'Scan already in progress'
+SCAN_LOCK = threading.Lock()
+
+
+class JSONRPCError(Exception):
+    """Error returned by a JSON-RPC server."""
+    pass
+
+
+def btc_to_satoshis(value):
+    """Convert a BTC amount as returned by the JSON-RPC interface (a float) to an integer number of satoshis."""
+    return int(round(value * 1e8))
+
+
+def get_script_address(script_pub_key):
+    """Get the address of a decoded scriptPubKey, older versions of Bitcoin Core return a list of addresses."""
+    if 'address' in script_pub_key:
+        return script_pub_key['address']
+    elif script_pub_key.get('addresses'):
+        return script_pub_key['addresses'][0]
+
+
+def get_prevout_txids(transactions):
+    """Get the txids of the previous transactions that are needed to know the address and value of the inputs."""
+    txids = []
+    for data in transactions:
+        for item in data['vin']:
+            if 'coinbase' not in item and 'prevout' not in item and item['txid'] not in txids:
+                txids.append(item['txid'])
+
+    return txids
+
+
+def parse_verbose_transaction(data, prev_transactions, latest_block_height):
+    """
+    Parse a verbose transaction as returned by getrawtransaction into a TX object
+
+    :param data: The verbose transaction
+    :param prev_transactions: A dict containing the verbose previous transactions of the inputs by txid
+    :param latest_block_height: The block height of the chain tip
+    :return: A TX object
+    """
+    tx = TX()
+    tx.txid = data['txid']
+    tx.wtxid = data.get('hash', data['txid'])
+    tx.lock_time = data['locktime']
+    tx.confirmations = data.get('confirmations', 0)
+    tx.block_height = latest_block_height - tx.confirmations + 1 if tx.confirmations > 0 else None
+
+    for item in data['vin']:
+        tx_input = TxInput()
+        if 'coinbase' in item:
+            tx_input.address = None
+            tx_input.value = 0
+            tx_input.n = None
+            tx_input.txid = '0' * 64
+            tx_input.script = item['coinbase']
+        else:
+            prevout = item['prevout'] if 'prevout' in item else prev_transactions[item['txid']]['vout'][item['vout']]
+            tx_input.address = get_script_address(prevout['scriptPubKey'])
+            tx_input.value = btc_to_satoshis(prevout['value'])
+            tx_input.n = item['vout']
+            tx_input.txid = item['txid']
+            tx_input.script = item['scriptSig']['hex']
+        tx_input.sequence = item['sequence']
+
+        tx.inputs.append(tx_input)
+
+    for item in data['vout']:
+        tx_output = TxOutput()
+        tx_output.address = get_script_address(item['scriptPubKey'])
+        tx_output.value = btc_to_satoshis(item['value'])
+        tx_output.n = item['n']
+        tx_output.spent = None  # A node does not keep track of which outputs have been spent
+        tx_output.script = item['scriptPubKey']['hex']
+        if tx_output.script[:2] == '6a':
+            tx_output.op_return = tx.decode_op_return(tx_output.script)
+
+        tx.outputs.append(tx_output)
+
+    return tx
+
+
+class BitcoinCoreAPI(ExplorerAPI):
+    """
+    Bitcoin Core JSON-RPC client.
+
+    The url is the url of the RPC interface of the node, the key contains the RPC credentials as 'user:password'.
+    Transactions are looked up with getrawtransaction, so the node must run with txindex=1.
+    Bitcoin Core has no address index, balances and utxos are calculated with scantxoutset (a single scan for
+    all addresses of a batch query) and the transaction history of an address is not available.
+    """
+    def __init__(self, url='', key='', testnet=False):
+        super(BitcoinCoreAPI, self).__init__(url=url, key=key, testnet=testnet)
+        if not self.url:
+            self.url = 'http://127.0.0.1:18332' if self.testnet is True else 'http://127.0.0.1:8332'
+        self.auth = tuple(key.split(':', 1)) if key and ':' in key else None
+
+    def rpc_batch(self, calls):
+        """
+        Do multiple JSON-RPC calls in a single request
+
+        :param calls: A list of tuples containing the method and a list of params
+        :return: A list containing the results of the calls in the same order
+        """
+        if not calls:
+            return []
+
+        payload = [{'jsonrpc': '1.0', 'id': i, 'method': method, 'params': params} for i, (method, params) in enumerate(calls)]
+        LOG.info('POST %s (%s)' % (self.url, ', '.join(sorted(set(method for method, _ in calls)))))
+        r = HTTP_SESSIONS.post(self.url, json=payload, auth=self.auth)
+        responses = {response['id']: response for response in r.json()}
+
+        results = []
+        for i, (method, _) in enumerate(calls):
+            response = responses.get(i)
+            if response is None:
+                raise JSONRPCError('No response for %s' % method)
+            if response.get('error') is not None:
+                raise JSONRPCError('%s failed: %s' % (method, response['error'].get('message', response['error'])))
+            results.append(response['result'])
+
+        return results
+
+    def rpc(self, method, *params):
+        """
+        Do a single JSON-RPC call
+
+        :param method: The method
+        :param params: The params of the method
+        :return: The result of the call
+        """
+        return self.rpc_batch([(method, list(params))])[0]
+
+    def get_latest_block(self):
+        """Retrieve the latest block from the node."""
+        try:
+            block_hash = self.rpc('getbestblockhash')
+        except Exception as ex:
+            LOG.error('Unable to get latest block_hash from Bitcoin Core: %s' % ex)
+            return {'error': 'Unable to get latest block_hash from Bitcoin Core'}
+
+        return self.get_block_by_hash(block_hash=block_hash)
+
+    def get_block_by_hash(self, block_hash):
+        """Retrieve a block by its hash from the node."""
+        try:
+            data = self.rpc('getblock', block_hash, 1)
+        except Exception as ex:
+            LOG.error('Unable to get block %s from Bitcoin Core: %s' % (block_hash, ex))
+            return {'error': 'Unable to get block %s from Bitcoin Core' % block_hash}
+
+        if all(key in data for key in ('height', 'hash', 'time', 'merkleroot', 'size')):
+            block = {'height': data['height'],
+                     'hash': data['hash'],
+                     'time': data['time'],
+                     'merkleroot': data['merkleroot'],
+                     'size': data['size']}
+            return {'block': block}
+        else:
+            return {'error': 'Received invalid data: %s' % data}
+
+    def get_block_by_height(self, height):
+        """Retrieve a block by its height from the node."""
+        try:
+            block_hash = self.rpc('getblockhash', height)
+        except Exception as ex:
+            LOG.error('Unable to get block %s from Bitcoin Core: %s' % (height, ex))
+            return {'error': 'Unable to get block %s from Bitcoin Core' % height}
+
+        return self.get_block_by_hash(block_hash=block_hash)
+
+    def get_transactions(self, address, since_height=None):
+        """Bitcoin Core has no address index, so the transactions of an address are not available."""
+        return {'error': 'Bitcoin Core does not provide the transactions of an address'}
+
+    def get_transaction(self, txid):
+        """Retrieve a single transaction by its txid from the node."""
+        try:
+            data, latest_block_height = self.rpc_batch([('getrawtransaction', [txid, True]), ('getblockcount', [])])
+            prev_transactions = self.rpc_batch([('getrawtransaction', [prev_txid, True]) for prev_txid in get_prevout_txids([data])])
+            tx = parse_verbose_transaction(data=data,
+                                           prev_transactions={prev_tx['txid']: prev_tx for prev_tx in prev_transactions},
+                                           latest_block_height=latest_block_height)
+        except Exception as ex:
+            LOG.error('Unable to get transaction %s from Bitcoin Core: %s' % (txid, ex))
+            return {'error': 'Unable to get transaction %s from Bitcoin Core' % txid}
+
+        return {'transaction': tx.json_encodable()}
+
+    def get_prime_input_address(self, txid):
+        """Retrieve the prime input address of a transaction by txid."""
+        transaction_data = self.get_transaction(txid=txid)
+        if 'transaction' not in transaction_data:
+            return transaction_data
+
+        return {'prime_input_address': transaction_data['transaction']['prime_input_address']}
+
+    def scan_utxos(self, addresses):
+        """
+        Scan the utxo set for the utxos of multiple addresses at once
+
+        :param addresses: A list of addresses
+        :return: A tuple containing the block height of the scan and a dict containing the unspents of each address
+        """
+        addresses = list(dict.fromkeys(addresses))
+        scripts = {address_to_script(address): address for address in addresses}
+
+        with SCAN_LOCK:
+            data = self.rpc('scantxoutset', 'start', ['addr(%s)' % address for address in addresses])
+
+        if data.get('success') is not True:
+            raise JSONRPCError('scantxoutset was aborted')
+
+        unspents = {address: [] for address in addresses}
+        for unspent in data['unspents']:
+            if unspent['scriptPubKey'] in scripts:
+                unspents[scripts[unspent['scriptPubKey']]].append(unspent)
+
+        return data['height'], unspents
+
+    def get_balance(self, address):
+        """Retrieve the final balance of an address, the received and sent balance are not available."""
+        balances_data = self.get_balances([address])
+        return {'balance': balances_data['balances'][address]} if 'balances' in balances_data else balances_data
+
+    def get_balances(self, addresses):
+        """Retrieve the final balance of multiple addresses with a single scan of the utxo set."""
+        try:
+            _, unspents = self.scan_utxos(addresses)
+        except Exception as ex:
+            LOG.error('Unable to get balances from Bitcoin Core: %s' % ex)
+            return {'error': 'Unable to get balances from Bitcoin Core'}
+
+        return {'balances': {address: {'final': sum(btc_to_satoshis(unspent['amount']) for unspent in address_unspents)}
+                             for address, address_unspents in unspents.items()}}
+
+    def get_utxos(self, address, confirmations=3):
+        """Retrieve unspent transaction outputs (UTXOs) for a given address."""
+        utxos_data = self.get_utxos_many([address], confirmations=confirmations)
+        return {'utxos': utxos_data['utxos'][address]} if 'utxos' in utxos_data else utxos_data
+
+    def get_utxos_many(self, addresses, confirmations=3):
+        """Retrieve the utxos of multiple addresses with a single scan of the utxo set."""
+        try:
+            height, unspents = self.scan_utxos(addresses)
+        except Exception as ex:
+            LOG.error('Unable to get utxos from Bitcoin Core: %s' % ex)
+            return {'error': 'Unable to get utxos from Bitcoin Core'}
+
+        results = {}
+        for address, address_unspents in unspents.items():
+            utxos = []
+            for unspent in address_unspents:
+                utxo = {'confirmations': height - unspent['height'] + 1,
+                        'output_hash': unspent['txid'],
+                        'output_n': unspent['vout'],
+                        'value': btc_to_satoshis(unspent['amount']),
+                        'script': unspent['scriptPubKey']}
+
+                if utxo['confirmations'] >= confirmations:
+                    utxos.append(utxo)
+
+            results[address] = sorted(utxos, key=lambda k: (k['confirmations'], k['output_hash'], k['output_n']))
+
+        return {'utxos': results}
+
+    def push_tx(self, tx):
+        """Broadcast a signed raw transaction via the node."""
+        try:
+            txid = self.rpc('sendrawtransaction', tx)
+        except Exception as ex:
+            LOG.error('Unable to push tx via Bitcoin Core: %s' % ex)
+            return {'error': 'Unable to push tx via Bitcoin Core: %s' % ex}
+
+        return {'success': True,
+                'txid': txid}
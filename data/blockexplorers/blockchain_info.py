@@ -1,12 +1,15 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """Blockchain.info block explorer API client."""
-import requests
 from time import sleep
 
 from helpers.loghelpers import LOG
 from data.transaction import TX, TxInput, TxOutput
-from data.explorer_api import ExplorerAPI
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
+
+# Maximum number of addresses in a single multiaddr request
+MULTIADDR_CHUNK_SIZE = 200
+MULTIADDR_TX_LIMIT = 100
 
 
 class BlockchainInfoAPI(ExplorerAPI):
@@ -26,7 +29,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/latestblock'.format(api_url=self.url)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get latest block from Blockchain.info: %s' % ex)
@@ -40,7 +43,7 @@ class BlockchainInfoAPI(ExplorerAPI):
             url = '{api_url}/rawblock/{hash}'.format(api_url=self.url, hash=latest_block['hash'])
             try:
                 LOG.info('GET %s' % url)
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except ValueError:
                 LOG.error('Blockchain.info returned invalid json data: %s', r.text)
@@ -63,7 +66,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/rawblock/{hash}'.format(api_url=self.url, hash=block_hash)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Blockchain.info: %s' % (block_hash, ex))
@@ -84,7 +87,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/block-height/{height}?format=json'.format(api_url=self.url, height=height)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Blockchain.info: %s' % (height, ex))
@@ -103,10 +106,16 @@ class BlockchainInfoAPI(ExplorerAPI):
 
         return {'error': 'Received invalid data: %s' % data}
 
-    def get_transactions(self, address):
-        """Retrieve all transactions for a given address from the explorer."""
+    def get_transactions(self, address, since_height=None):
+        """
+        Retrieve the transactions for a given address from the explorer.
+
+        If since_height is given, paging stops as soon as a transaction at or below that block height is reached,
+        so only the newest pages are fetched.
+        """
         limit = 50  # max number of tx given by blockchain.info is 50
         n_tx = None
+        partial = False
         transactions = []
         latest_block_height = self.get_latest_block_height()
         if latest_block_height is None:
@@ -117,7 +126,7 @@ class BlockchainInfoAPI(ExplorerAPI):
             url = '{api_url}/address/{address}?format=json&limit={limit}&offset={offset}'.format(api_url=self.url, address=address, limit=limit, offset=limit * i)
             try:
                 LOG.info('GET %s' % url)
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except Exception as ex:
                 LOG.error('Unable to get transactions of address %s from %s: %s' % (address, url, ex))
@@ -130,6 +139,11 @@ class BlockchainInfoAPI(ExplorerAPI):
             else:
                 return {'error': 'Received Invalid data: %s' % data}
 
+            # Transactions are sorted newest first, older pages are already known
+            if since_height is not None and any(transaction.get('block_height') is not None and transaction['block_height'] <= since_height for transaction in data['txs']):
+                partial = True
+                break
+
             if len(transactions) < n_tx:
                 sleep(1)
 
@@ -171,17 +185,17 @@ class BlockchainInfoAPI(ExplorerAPI):
                 # subtract 1 from total txs because it is unconfirmed
                 n_tx -= 1
 
-        if n_tx != len(txs):
+        if partial is False and n_tx != len(txs):
             return {'error': 'Not all transactions are retrieved! expected {expected} but only got {received}'.format(expected=n_tx, received=len(txs))}
         else:
-            return {'transactions': txs}
+            return {'transactions': txs, 'latest_block_height': latest_block_height}
 
     def get_balance(self, address):
         """Retrieve the balance (final, received, sent) for a given address."""
         url = '{api_url}/q/addressbalance/{address}?confirmations=1'.format(api_url=self.url, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             final_balance = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get balance of address %s from Blockchain.info: %s' % (address, ex))
@@ -190,7 +204,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/q/getreceivedbyaddress/{address}?confirmations=1'.format(api_url=self.url, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             received_balance = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get balance of address %s from Blockchain.info: %s' % (address, ex))
@@ -199,7 +213,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/q/getsentbyaddress/{address}?confirmations=1'.format(api_url=self.url, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             sent_balance = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get balance of address %s from Blockchain.info: %s' % (address, ex))
@@ -210,12 +224,68 @@ class BlockchainInfoAPI(ExplorerAPI):
                    'sent': sent_balance}
         return {'balance': balance}
 
+    def get_balances(self, addresses):
+        """
+        Retrieve the balances of multiple addresses with the multiaddr endpoint (200 addresses per request).
+
+        Multiaddr also counts unconfirmed transactions, so the amounts of the unconfirmed transactions in the response
+        are subtracted to get the same confirmed balances as get_balance. If there are more unconfirmed transactions
+        than the endpoint returns, an error is returned instead.
+        """
+        addresses = list(dict.fromkeys(addresses))
+        balances = {}
+        for i in range(0, len(addresses), MULTIADDR_CHUNK_SIZE):
+            chunk = addresses[i:i + MULTIADDR_CHUNK_SIZE]
+            url = '{api_url}/multiaddr?active={addresses}&n={n}'.format(api_url=self.url, addresses='|'.join(chunk), n=MULTIADDR_TX_LIMIT)
+            try:
+                LOG.info('GET %s' % url)
+                r = HTTP_SESSIONS.get(url)
+                data = r.json()
+            except Exception as ex:
+                LOG.error('Unable to get balances of %s addresses from Blockchain.info: %s' % (len(chunk), ex))
+                return {'error': 'Unable to get balances of %s addresses from Blockchain.info' % len(chunk)}
+
+            if 'addresses' not in data:
+                return {'error': 'Received invalid data: %s' % data}
+
+            unconfirmed = [tx for tx in data.get('txs', []) if tx.get('block_height') is None]
+            if len(unconfirmed) >= MULTIADDR_TX_LIMIT:
+                return {'error': 'Blockchain.info returned too many unconfirmed transactions to get the confirmed balances'}
+
+            chunk_balances = {}
+            for item in data['addresses']:
+                if all(key in item for key in ('address', 'final_balance', 'total_received', 'total_sent')):
+                    chunk_balances[item['address']] = {'final': item['final_balance'],
+                                                       'received': item['total_received'],
+                                                       'sent': item['total_sent']}
+
+            # Subtract the unconfirmed transactions from the balances
+            for tx in unconfirmed:
+                for tx_input in tx.get('inputs', []):
+                    prev_out = tx_input.get('prev_out', {})
+                    if prev_out.get('addr') in chunk_balances:
+                        chunk_balances[prev_out['addr']]['sent'] -= prev_out.get('value', 0)
+                        chunk_balances[prev_out['addr']]['final'] += prev_out.get('value', 0)
+
+                for tx_output in tx.get('out', []):
+                    if tx_output.get('addr') in chunk_balances:
+                        chunk_balances[tx_output['addr']]['received'] -= tx_output.get('value', 0)
+                        chunk_balances[tx_output['addr']]['final'] -= tx_output.get('value', 0)
+
+            balances.update(chunk_balances)
+
+        missing = [address for address in addresses if address not in balances]
+        if missing:
+            return {'error': 'Blockchain.info did not return the balance of %s' % ', '.join(missing)}
+
+        return {'balances': balances}
+
     def get_transaction(self, txid):
         """Retrieve a single transaction by its txid from the explorer."""
         url = '{api_url}/rawtx/{txid}'.format(api_url=self.url, txid=txid)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get tx %s from Blockchain.info: %s' % (txid, ex))
@@ -257,7 +327,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/rawtx/{txid}'.format(api_url=self.url, txid=txid)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get prime input address of tx %s from Blockchain.info: %s' % (txid, ex))
@@ -286,7 +356,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/unspent?active={address}&limit={limit}&confirmations={confirmations}'.format(api_url=self.url, address=address, limit=limit, confirmations=confirmations)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             if r.text == 'No free outputs to spend':
                 return {'utxos': []}
 
@@ -317,7 +387,7 @@ class BlockchainInfoAPI(ExplorerAPI):
         url = '{api_url}/pushtx'.format(api_url=self.url)
         LOG.info('POST %s' % url)
         try:
-            r = requests.post(url, data=dict(tx=tx))
+            r = HTTP_SESSIONS.post(url, data=dict(tx=tx))
         except Exception as ex:
             LOG.error('Unable to push tx via Blockchain.info: %s' % ex)
             return {'error': 'Unable to push tx Blockchain.info: %s' % ex}
@@ -1,13 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """Blockstream.info block explorer API client."""
-import requests
-from time import sleep
-
 from helpers.loghelpers import LOG
 from data.transaction import TX, TxInput, TxOutput
-from data.explorer_api import ExplorerAPI
-
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
 
 
 class BlockstreamAPI(ExplorerAPI):
@@ -16,6 +12,10 @@ class BlockstreamAPI(ExplorerAPI):
 
     Initializes the API client with URL, optional key, and testnet flag.
     """
+    # Blockstream.info returns 429 errors when it gets too many requests, for example when paging through a long history
+    RATE_LIMIT = 2
+    BURST = 5
+
     def __init__(self, url='', key='', testnet=False):
         super(BlockstreamAPI, self).__init__(url=url, testnet=testnet)
         # Set the url of the api depending on testnet or mainnet
@@ -26,7 +26,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/blocks/tip/hash'
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             block_hash = r.text
         except Exception as ex:
             LOG.error('Unable to get latest block_hash from Blockstream.info: %s' % ex)
@@ -39,7 +39,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/block/{hash}'.format(hash=block_hash)
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Blockstream.info: %s' % (block_hash, ex))
@@ -60,7 +60,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/block-height/{height}'.format(height=height)
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             block_hash = r.text
         except Exception as ex:
             LOG.error('Unable to get block %s from Blockstream.info: %s' % (height, ex))
@@ -68,12 +68,17 @@ class BlockstreamAPI(ExplorerAPI):
 
         return self.get_block_by_hash(block_hash=block_hash)
 
-    def get_transactions(self, address):
-        """Retrieve all transactions for a given address from the explorer."""
+    def get_transactions(self, address, since_height=None):
+        """
+        Retrieve the transactions for a given address from the explorer.
+
+        If since_height is given, paging stops as soon as a transaction at or below that block height is reached,
+        so only the newest pages are fetched.
+        """
         url = self.url + '/blocks/tip/height'
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             latest_block_height = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get latest block_height from Blockstream.info: %s' % ex)
@@ -82,7 +87,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/address/{address}/txs'.format(address=address)
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get address transactions for %s from Blockstream.info: %s' % (address, ex))
@@ -93,13 +98,12 @@ class BlockstreamAPI(ExplorerAPI):
             if transaction['status']['confirmed'] is True:
                 txs.append(self.parse_transaction(data=transaction, latest_block_height=latest_block_height).to_dict(address=address))
 
-        while len(data) >= 25:
-            sleep(0.5)
+        while len(data) >= 25 and not self.reached_height(data, since_height):
             last_txid = data[-1]['txid']
             url = self.url + '/address/{address}/txs/chain/{last_txid}'.format(address=address, last_txid=last_txid)
             LOG.info('GET %s' % url)
             try:
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except Exception as ex:
                 LOG.error('Unable to get address transactions for %s from Blockstream.info: %s' % (address, ex))
@@ -110,14 +114,22 @@ class BlockstreamAPI(ExplorerAPI):
                     txs.append(self.parse_transaction(data=transaction, latest_block_height=latest_block_height).to_dict(address=address))
 
         LOG.info('Retrieved %s transactions' % len(txs))
-        return {'transactions': txs}
+        return {'transactions': txs, 'latest_block_height': latest_block_height}
+
+    @staticmethod
+    def reached_height(data, since_height):
+        """Check if a page of transactions contains a confirmed transaction at or below the given block height."""
+        if since_height is None:
+            return False
+
+        return any(transaction['status']['confirmed'] is True and transaction['status']['block_height'] <= since_height for transaction in data)
 
     def get_balance(self, address):
         """Retrieve the balance (final, received, sent) for a given address."""
         url = self.url + '/address/{address}'.format(address=address)
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get address info for %s from Blockstream.info: %s' % (address, ex))
@@ -137,7 +149,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/tx/{txid}'.format(txid=txid)
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get transaction %s from Blockstream.info: %s' % (txid, ex))
@@ -153,7 +165,7 @@ class BlockstreamAPI(ExplorerAPI):
             url = self.url + '/blocks/tip/height'
             LOG.info('GET %s' % url)
             try:
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 latest_block_height = int(r.text)
             except Exception as ex:
                 LOG.error('Unable to get latest block_height from Blockstream.info: %s' % ex)
@@ -200,7 +212,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/blocks/tip/height'
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             latest_block_height = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get latest block_height from Blockstream.info: %s' % ex)
@@ -209,7 +221,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/address/{address}/utxo'.format(address=address)
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get address utxos for %s from Blockstream.info: %s' % (address, ex))
@@ -236,7 +248,7 @@ class BlockstreamAPI(ExplorerAPI):
         url = self.url + '/broadcast?tx={tx}'.format(tx=tx)
         LOG.info('GET %s' % url)
         try:
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
         except Exception as ex:
             LOG.error('Unable to push tx via Blockstream.info: %s' % ex)
             return {'error': 'Unable to push tx Blockstream.info: %s' % ex}
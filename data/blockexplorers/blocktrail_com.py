@@ -2,14 +2,13 @@
 # -*- coding: utf-8 -*-
 """Blocktrail.com blockchain explorer API client."""
 
-import requests
 from datetime import datetime
 import calendar
 from time import sleep
 
 from helpers.loghelpers import LOG
 from data.transaction import TX, TxInput, TxOutput
-from data.explorer_api import ExplorerAPI
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
 
 
 class BlocktrailComAPI(ExplorerAPI):
@@ -29,7 +28,7 @@ class BlocktrailComAPI(ExplorerAPI):
         url = '{api_url}/block/latest?api_key={api_key}'.format(api_url=self.url, api_key=self.key)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get latest block from Blocktrail.com: %s' % ex)
@@ -45,7 +44,7 @@ class BlocktrailComAPI(ExplorerAPI):
         url = '{api_url}/block/{height}?api_key={api_key}'.format(api_url=self.url, height=height, api_key=self.key)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Blocktrail.com: %s' % (height, ex))
@@ -67,7 +66,7 @@ class BlocktrailComAPI(ExplorerAPI):
         url = '{api_url}/block/{hash}?api_key={api_key}'.format(api_url=self.url, hash=block_hash, api_key=self.key)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Blocktrail.com: %s' % (block_hash, ex))
@@ -84,8 +83,8 @@ class BlocktrailComAPI(ExplorerAPI):
         else:
             return {'error': 'Received invalid data: %s' % data}
 
-    def get_transactions(self, address):
-        """Retrieve all transactions for a given address from the explorer."""
+    def get_transactions(self, address, since_height=None):
+        """Retrieve all transactions for a given address from the explorer (since_height is ignored, the full history is always fetched)."""
         limit = 200  # max 200 for Blocktrail.com
         n_tx = None
         transactions = []
@@ -95,7 +94,7 @@ class BlocktrailComAPI(ExplorerAPI):
             url = '{api_url}/address/{address}/transactions?api_key={api_key}&limit={limit}&page={page}&sort_dir=asc'.format(api_url=self.url, address=address, api_key=self.key, limit=limit, page=page)
             try:
                 LOG.info('GET %s' % url)
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except Exception as ex:
                 LOG.error('Unable to get transactions of address %s from Blocktrail.com: %s' % (address, ex))
@@ -162,7 +161,7 @@ class BlocktrailComAPI(ExplorerAPI):
         url = '{api_url}/address/{address}?api_key={api_key}'.format(api_url=self.url, address=address, api_key=self.key)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get balance of address %s from Blocktrail.com: %s' % (address, ex))
@@ -181,7 +180,7 @@ class BlocktrailComAPI(ExplorerAPI):
         url = '{api_url}/transaction/{txid}?api_key={api_key}'.format(api_url=self.url, txid=txid, api_key=self.key)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get transaction %s from Blocktrail.com: %s' % (txid, ex))
@@ -224,7 +223,7 @@ class BlocktrailComAPI(ExplorerAPI):
         url = '{api_url}/transaction/{txid}?api_key={api_key}'.format(api_url=self.url, txid=txid, api_key=self.key)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get prime input address from transaction %s from Blocktrail.com: %s' % (txid, ex))
@@ -254,7 +253,7 @@ class BlocktrailComAPI(ExplorerAPI):
             url = '{api_url}/address/{address}/unspent-outputs?api_key={api_key}&limit={limit}&page={page}&sort_dir=asc'.format(api_url=self.url, address=address, api_key=self.key, limit=limit, page=page)
             try:
                 LOG.info('GET %s' % url)
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except Exception as ex:
                 LOG.error('Unable to get utxos of address %s from Blocktrail.com: %s' % (address, ex))
@@ -297,7 +296,7 @@ class BlocktrailComAPI(ExplorerAPI):
         url = '{api_url}/fee-per-kb?api_key={api_key}'.format(api_url=self.url, api_key=self.key)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get optimal fee per kb from Blocktrail.com: %s' % ex)
@@ -2,12 +2,11 @@
 # -*- coding: utf-8 -*-
 """BTC.com blockchain explorer API client."""
 
-import requests
 from time import sleep
 
 from helpers.loghelpers import LOG
 from data.transaction import TX, TxInput, TxOutput
-from data.explorer_api import ExplorerAPI
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
 
 
 class BTCComAPI(ExplorerAPI):
@@ -27,7 +26,7 @@ class BTCComAPI(ExplorerAPI):
         url = '{api_url}/block/latest'.format(api_url=self.url)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get latest block from BTC.com: %s' % ex)
@@ -50,7 +49,7 @@ class BTCComAPI(ExplorerAPI):
         url = '{api_url}/block/{height}'.format(api_url=self.url, height=height)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Blocktrail.com: %s' % (height, ex))
@@ -73,7 +72,7 @@ class BTCComAPI(ExplorerAPI):
         url = '{api_url}/block/{hash}'.format(api_url=self.url, hash=block_hash)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Blocktrail.com: %s' % (block_hash, ex))
@@ -91,10 +90,16 @@ class BTCComAPI(ExplorerAPI):
         else:
             return {'error': 'Received invalid data: %s' % data}
 
-    def get_transactions(self, address):
-        """Retrieve all transactions for a given address from the explorer."""
+    def get_transactions(self, address, since_height=None):
+        """
+        Retrieve the transactions for a given address from the explorer.
+
+        If since_height is given, paging stops as soon as a transaction at or below that block height is reached,
+        so only the newest pages are fetched.
+        """
         pagesize = 50  # max 50 for BTC.com
         n_tx = None
+        partial = False
         transactions = []
         page = 1
 
@@ -102,7 +107,7 @@ class BTCComAPI(ExplorerAPI):
             url = '{api_url}/address/{address}/tx?page={page}&pagesize={pagesize}&verbose=3'.format(api_url=self.url, address=address, page=page, pagesize=pagesize)
             try:
                 LOG.info('GET %s' % url)
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except Exception as ex:
                 LOG.error('Unable to get transactions of address %s from BTC.com: %s' % (address, ex))
@@ -117,6 +122,11 @@ class BTCComAPI(ExplorerAPI):
             else:
                 return {'error': 'Received invalid data: %s' % data}
 
+            # Transactions are sorted newest first, older pages are already known
+            if since_height is not None and any(transaction['block_height'] != -1 and transaction['block_height'] <= since_height for transaction in data['list']):
+                partial = True
+                break
+
             if len(transactions) < n_tx:
                 sleep(1)
 
@@ -160,7 +170,7 @@ class BTCComAPI(ExplorerAPI):
                 # subtract 1 from total txs because it is unconfirmed
                 n_tx -= 1
 
-        if n_tx != len(txs):
+        if partial is False and n_tx != len(txs):
             return {'error': 'BTC.com: Not all transactions are retrieved! expected {expected} but only got {received}'.format(expected=n_tx, received=len(txs))}
         else:
             return {'transactions': txs}
@@ -170,7 +180,7 @@ class BTCComAPI(ExplorerAPI):
         url = '{api_url}/address/{address}'.format(api_url=self.url, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get balance of address %s from Blocktrail.com: %s' % (address, ex))
@@ -191,7 +201,7 @@ class BTCComAPI(ExplorerAPI):
         url = '{api_url}/tx/{txid}?verbose=3'.format(api_url=self.url, txid=txid)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get transaction %s from BTC.com: %s' % (txid, ex))
@@ -262,7 +272,7 @@ class BTCComAPI(ExplorerAPI):
             url = '{api_url}/address/{address}/unspent?page={page}&pagesize={pagesize}&verbose=3'.format(api_url=self.url, address=address, page=page, pagesize=pagesize)
             try:
                 LOG.info('GET %s' % url)
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except Exception as ex:
                 LOG.error('Unable to get utxos of address %s from BTC.com: %s' % (address, ex))
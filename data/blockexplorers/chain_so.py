@@ -2,14 +2,13 @@
 # -*- coding: utf-8 -*-
 """Chain.so block explorer API client."""
 
-import requests
 import binascii
 from time import sleep
 
 from helpers.loghelpers import LOG
 from helpers.conversionhelpers import btc2satoshis
 from data.transaction import TX, TxInput, TxOutput
-from data.explorer_api import ExplorerAPI
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
 
 
 class ChainSoAPI(ExplorerAPI):
@@ -24,13 +23,13 @@ class ChainSoAPI(ExplorerAPI):
         self.network = 'BTCTEST' if self.testnet else 'BTC'
         self.url = 'https://chain.so/api/v2'
 
-    def get_transactions(self, address):
-        """Retrieve all transactions for a given address from the explorer."""
+    def get_transactions(self, address, since_height=None):
+        """Retrieve all transactions for a given address from the explorer (since_height is ignored, the full history is always fetched)."""
         LOG.warning('DO NOT USE CHAIN.SO TO GET ADDRESS TRANSACTIONS!!!!!!!!!!!!!')
         url = '{api_url}/address/{network}/{address}'.format(api_url=self.url, network=self.network, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get transactions of address %s from Chain.so: %s' % (address, ex))
@@ -59,7 +58,7 @@ class ChainSoAPI(ExplorerAPI):
         url = '{api_url}/get_block/{network}/{height}'.format(api_url=self.url, network=self.network, height=height)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Chain.so: %s' % (height, ex))
@@ -86,7 +85,7 @@ class ChainSoAPI(ExplorerAPI):
         url = '{api_url}/get_info/{network}'.format(api_url=self.url, network=self.network)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get latest block from Chain.so: %s' % ex)
@@ -109,7 +108,7 @@ class ChainSoAPI(ExplorerAPI):
         url = '{api_url}/get_tx_unspent/{network}/{address}'.format(api_url=self.url, network=self.network, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get transaction of address %s from Chain.so: %s' % (address, ex))
@@ -138,7 +137,7 @@ class ChainSoAPI(ExplorerAPI):
         url = '{api_url}/get_block/{network}/{block_hash}'.format(api_url=self.url, network=self.network, block_hash=block_hash)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from Chain.so: %s' % (block_hash, ex))
@@ -165,7 +164,7 @@ class ChainSoAPI(ExplorerAPI):
         url = '{api_url}/address/{network}/{address}'.format(api_url=self.url, network=self.network, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get balance of address %s from Chain.so: %s' % (address, ex))
@@ -209,7 +208,7 @@ class ChainSoAPI(ExplorerAPI):
         url = '{api_url}/get_tx/{network}/{txid}'.format(api_url=self.url, network=self.network, txid=txid)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get transaction %s from Chain.so: %s' % (txid, ex))
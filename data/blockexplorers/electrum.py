@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Electrum server client, for using a self-hosted ElectrumX or Fulcrum server as explorer."""
+import hashlib
+import itertools
+import socket
+import ssl
+import threading
+from urllib.parse import urlsplit
+
+import simplejson
+
+from helpers.loghelpers import LOG
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
+from data.blockexplorers.bitcoin_core import JSONRPCError, get_prevout_txids, parse_verbose_transaction
+from transactionfactory import address_to_script
+
+
+def get_scripthash(address):
+    """Get the scripthash of an address as used by the Electrum protocol (the reversed sha256 of the scriptPubKey)."""
+    return hashlib.sha256(bytes.fromhex(address_to_script(address))).digest()[::-1].hex()
+
+
+def parse_header(header, height):
+    """Parse a raw 80-byte block header into a block dict."""
+    raw = bytes.fromhex(header)
+    return {'height': height,
+            'hash': hashlib.sha256(hashlib.sha256(raw).digest()).digest()[::-1].hex(),
+            'time': int.from_bytes(raw[68:72], 'little'),
+            'merkleroot': raw[36:68][::-1].hex(),
+            'size': None}  # Electrum servers only provide the block header
+
+
+class ElectrumAPI(ExplorerAPI):
+    """
+    Electrum protocol client.
+
+    The url is tcp://host:port or ssl://host:port. All calls of a query are sent as a single batched JSON-RPC
+    request over one persistent connection, so batch queries for many addresses need only one round trip.
+    Transactions are requested in verbose mode, which ElectrumX and Fulcrum support (electrs does not).
+    The received and sent balance of an address are not available, only the final balance.
+    """
+    def __init__(self, url='', key='', testnet=False):
+        super(ElectrumAPI, self).__init__(url=url, key=key, testnet=testnet)
+        if not self.url:
+            self.url = 'tcp://127.0.0.1:60001' if self.testnet is True else 'tcp://127.0.0.1:50001'
+
+        parts = urlsplit(self.url)
+        self.use_ssl = parts.scheme == 'ssl'
+        self.host = parts.hostname
+        self.port = parts.port if parts.port is not None else (50002 if self.use_ssl else 50001)
+        self._connection = None
+        self._file = None
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Open the connection to the server."""
+        connection = socket.create_connection((self.host, self.port), timeout=HTTP_SESSIONS.connect_timeout)
+        if self.use_ssl:
+            # Self-hosted servers usually have a self-signed certificate
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            connection = context.wrap_socket(connection, server_hostname=self.host)
+        connection.settimeout(HTTP_SESSIONS.read_timeout)
+
+        self._connection = connection
+        self._file = connection.makefile('rb')
+
+    def close(self):
+        """Close the connection to the server."""
+        if self._connection is not None:
+            try:
+                self._file.close()
+                self._connection.close()
+            except OSError:
+                pass
+        self._connection = None
+        self._file = None
+
+    def rpc_batch(self, calls):
+        """
+        Do multiple JSON-RPC calls in a single request
+
+        The connection is reopened once if it was closed by the server. Each call gets an id that is unique on the
+        connection, so the responses can not be mixed up with those of an earlier batch.
+
+        :param calls: A list of tuples containing the method and a list of params
+        :return: A list containing the results of the calls in the same order
+        """
+        if not calls:
+            return []
+
+        LOG.info('Electrum %s (%s)' % (self.url, ', '.join(sorted(set(method for method, _ in calls)))))
+
+        with self._lock:
+            ids = [next(self._ids) for _ in calls]
+            payload = [{'jsonrpc': '2.0', 'id': call_id, 'method': method, 'params': params} for call_id, (method, params) in zip(ids, calls)]
+            for attempt in range(2):
+                try:
+                    if self._connection is None:
+                        self.connect()
+                    self._connection.sendall(simplejson.dumps(payload).encode() + b'\n')
+                    data = self.read_batch_response(ids=set(ids))
+                    break
+                except OSError:
+                    self.close()
+                    if attempt == 1:
+                        raise
+
+        responses = {response.get('id'): response for response in data if isinstance(response, dict)}
+        results = []
+        for call_id, (method, _) in zip(ids, calls):
+            response = responses.get(call_id)
+            if response is None:
+                raise JSONRPCError('No response for %s' % method)
+            if response.get('error') is not None:
+                error = response['error']
+                raise JSONRPCError('%s failed: %s' % (method, error.get('message', error) if isinstance(error, dict) else error))
+            results.append(response['result'])
+
+        return results
+
+    def read_batch_response(self, ids):
+        """
+        Read messages from the connection until the response of a batch arrives
+
+        Notifications of the server (a message with a method and without an id) and responses to earlier requests that
+        were abandoned are skipped.
+
+        :param ids: A set with the ids of the calls in the batch
+        :return: A list of responses
+        """
+        while True:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError('Connection closed by server')
+
+            data = simplejson.loads(line)
+            if isinstance(data, list):
+                if any(isinstance(response, dict) and response.get('id') in ids for response in data):
+                    return data
+                continue
+
+            if 'method' in data and data.get('id') is None:
+                continue
+
+            if data.get('id') is None:
+                # Some servers answer a batch with a single error when the request itself is invalid
+                raise JSONRPCError('Batch request failed: %s' % data.get('error'))
+
+    def rpc(self, method, *params):
+        """
+        Do a single JSON-RPC call
+
+        :param method: The method
+        :param params: The params of the method
+        :return: The result of the call
+        """
+        return self.rpc_batch([(method, list(params))])[0]
+
+    def get_tip(self):
+        """Get the block height and the raw header of the chain tip."""
+        data = self.rpc('blockchain.headers.subscribe')
+        return data['height'], data['hex']
+
+    def get_latest_block(self):
+        """Retrieve the latest block header from the server."""
+        try:
+            height, header = self.get_tip()
+        except Exception as ex:
+            LOG.error('Unable to get latest block from Electrum server: %s' % ex)
+            return {'error': 'Unable to get latest block from Electrum server'}
+
+        return {'block': parse_header(header=header, height=height)}
+
+    def get_block_by_height(self, height):
+        """Retrieve a block header by its height from the server."""
+        try:
+            header = self.rpc('blockchain.block.header', height)
+        except Exception as ex:
+            LOG.error('Unable to get block %s from Electrum server: %s' % (height, ex))
+            return {'error': 'Unable to get block %s from Electrum server' % height}
+
+        return {'block': parse_header(header=header, height=height)}
+
+    def get_block_by_hash(self, block_hash):
+        """The Electrum protocol can not look up blocks by hash."""
+        return {'error': 'Electrum server does not provide blocks by hash'}
+
+    def get_verbose_transactions(self, txids):
+        """
+        Get multiple verbose transactions and the verbose previous transactions of their inputs
+
+        :param txids: A list of transaction ids
+        :return: A tuple containing a list of the transactions and a dict containing the previous transactions by txid
+        """
+        transactions = self.rpc_batch([('blockchain.transaction.get', [txid, True]) for txid in txids])
+        prev_transactions = self.rpc_batch([('blockchain.transaction.get', [txid, True]) for txid in get_prevout_txids(transactions)])
+
+        return transactions, {prev_tx['txid']: prev_tx for prev_tx in prev_transactions}
+
+    def get_transactions(self, address, since_height=None):
+        """
+        Retrieve the confirmed transactions of an address from the server.
+
+        The history of an address includes the block height of each transaction, so if since_height is given
+        only the transactions above that block height are fetched.
+        """
+        try:
+            tip, history = self.rpc_batch([('blockchain.headers.subscribe', []),
+                                           ('blockchain.scripthash.get_history', [get_scripthash(address)])])
+            latest_block_height = tip['height']
+            txids = [item['tx_hash'] for item in history if item['height'] > 0 and (since_height is None or item['height'] > since_height)]
+            transactions, prev_transactions = self.get_verbose_transactions(txids)
+        except Exception as ex:
+            LOG.error('Unable to get address transactions for %s from Electrum server: %s' % (address, ex))
+            return {'error': 'Unable to get address transactions for %s from Electrum server' % address}
+
+        txs = [parse_verbose_transaction(data=data, prev_transactions=prev_transactions, latest_block_height=latest_block_height).to_dict(address=address)
+               for data in transactions]
+
+        LOG.info('Retrieved %s transactions' % len(txs))
+        return {'transactions': txs, 'latest_block_height': latest_block_height}
+
+    def get_transaction(self, txid):
+        """Retrieve a single transaction by its txid from the server."""
+        try:
+            latest_block_height, _ = self.get_tip()
+            transactions, prev_transactions = self.get_verbose_transactions([txid])
+            tx = parse_verbose_transaction(data=transactions[0], prev_transactions=prev_transactions, latest_block_height=latest_block_height)
+        except Exception as ex:
+            LOG.error('Unable to get transaction %s from Electrum server: %s' % (txid, ex))
+            return {'error': 'Unable to get transaction %s from Electrum server' % txid}
+
+        return {'transaction': tx.json_encodable()}
+
+    def get_prime_input_address(self, txid):
+        """Retrieve the prime input address of a transaction by txid."""
+        transaction_data = self.get_transaction(txid=txid)
+        if 'transaction' not in transaction_data:
+            return transaction_data
+
+        return {'prime_input_address': transaction_data['transaction']['prime_input_address']}
+
+    def get_balance(self, address):
+        """Retrieve the final balance of an address, the received and sent balance are not available."""
+        balances_data = self.get_balances([address])
+        return {'balance': balances_data['balances'][address]} if 'balances' in balances_data else balances_data
+
+    def get_balances(self, addresses):
+        """Retrieve the final balance of multiple addresses in a single batched request."""
+        addresses = list(dict.fromkeys(addresses))
+        try:
+            data = self.rpc_batch([('blockchain.scripthash.get_balance', [get_scripthash(address)]) for address in addresses])
+        except Exception as ex:
+            LOG.error('Unable to get balances from Electrum server: %s' % ex)
+            return {'error': 'Unable to get balances from Electrum server'}
+
+        return {'balances': {address: {'final': balance['confirmed']} for address, balance in zip(addresses, data)}}
+
+    def get_utxos(self, address, confirmations=3):
+        """Retrieve unspent transaction outputs (UTXOs) for a given address."""
+        utxos_data = self.get_utxos_many([address], confirmations=confirmations)
+        return {'utxos': utxos_data['utxos'][address]} if 'utxos' in utxos_data else utxos_data
+
+    def get_utxos_many(self, addresses, confirmations=3):
+        """Retrieve the utxos of multiple addresses in a single batched request."""
+        addresses = list(dict.fromkeys(addresses))
+        try:
+            data = self.rpc_batch([('blockchain.headers.subscribe', [])] +
+                                  [('blockchain.scripthash.listunspent', [get_scripthash(address)]) for address in addresses])
+        except Exception as ex:
+            LOG.error('Unable to get utxos from Electrum server: %s' % ex)
+            return {'error': 'Unable to get utxos from Electrum server'}
+
+        latest_block_height = data[0]['height']
+        results = {}
+        for address, unspents in zip(addresses, data[1:]):
+            script = address_to_script(address)
+            utxos = []
+            for unspent in unspents:
+                utxo = {'confirmations': latest_block_height - unspent['height'] + 1 if unspent['height'] > 0 else 0,
+                        'output_hash': unspent['tx_hash'],
+                        'output_n': unspent['tx_pos'],
+                        'value': unspent['value'],
+                        'script': script}
+
+                if utxo['confirmations'] >= confirmations:
+                    utxos.append(utxo)
+
+            results[address] = sorted(utxos, key=lambda k: (k['confirmations'], k['output_hash'], k['output_n']))
+
+        return {'utxos': results}
+
+    def push_tx(self, tx):
+        """Broadcast a signed raw transaction via the server."""
+        try:
+            txid = self.rpc('blockchain.transaction.broadcast', tx)
+        except Exception as ex:
+            LOG.error('Unable to push tx via Electrum server: %s' % ex)
+            return {'error': 'Unable to push tx via Electrum server: %s' % ex}
+
+        return {'success': True,
+                'txid': txid}
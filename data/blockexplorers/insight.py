@@ -2,11 +2,10 @@
 # -*- coding: utf-8 -*-
 """Insight block explorer API client."""
 
-import requests
 
 from helpers.loghelpers import LOG
 from data.transaction import TX, TxInput, TxOutput
-from data.explorer_api import ExplorerAPI
+from data.explorer_api import ExplorerAPI, HTTP_SESSIONS
 
 
 class InsightAPI(ExplorerAPI):
@@ -17,7 +16,7 @@ class InsightAPI(ExplorerAPI):
         url = self.url + '/status?q=getBestBlockHash'
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get latest blockhash from %s: %s' % (self.url, ex))
@@ -33,7 +32,7 @@ class InsightAPI(ExplorerAPI):
         url = self.url + '/block/' + block_hash
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get block %s from %s: %s' % (block_hash, self.url, ex))
@@ -55,7 +54,7 @@ class InsightAPI(ExplorerAPI):
         url = self.url + '/block-index/' + str(height)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get hash of block at height %s from %s: %s' % (height, self.url, ex))
@@ -66,8 +65,8 @@ class InsightAPI(ExplorerAPI):
         else:
             return {'error': 'Received invalid data: %s' % data}
 
-    def get_transactions(self, address):
-        """Retrieve all transactions for a given address from the explorer."""
+    def get_transactions(self, address, since_height=None):
+        """Retrieve all transactions for a given address from the explorer (since_height is ignored, the full history is always fetched)."""
         limit = 10  # number of tx given by insight is 10
         n_tx = None
         transactions = []
@@ -77,7 +76,7 @@ class InsightAPI(ExplorerAPI):
             url = self.url + '/addrs/' + address + '/txs?from=' + str(limit*i) + '&to=' + str(limit*(i+1))
             try:
                 LOG.info('GET %s' % url)
-                r = requests.get(url)
+                r = HTTP_SESSIONS.get(url)
                 data = r.json()
             except Exception as ex:
                 LOG.error('Unable to get transactions of address %s from %s: %s' % (address, url, ex))
@@ -141,7 +140,7 @@ class InsightAPI(ExplorerAPI):
         url = '{api_url}/addr/{address}/balance'.format(api_url=self.url, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get balance of %s from %s: %s' % (address, self.url, ex))
@@ -152,7 +151,7 @@ class InsightAPI(ExplorerAPI):
         url = '{api_url}/addr/{address}/totalReceived'.format(api_url=self.url, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get total received of %s from %s: %s' % (address, self.url, ex))
@@ -163,7 +162,7 @@ class InsightAPI(ExplorerAPI):
         url = '{api_url}/addr/{address}/totalSent'.format(api_url=self.url, address=address)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = int(r.text)
         except Exception as ex:
             LOG.error('Unable to get total sent of %s from %s: %s' % (address, self.url, ex))
@@ -203,7 +202,7 @@ class InsightAPI(ExplorerAPI):
         url = self.url + '/tx/' + str(txid)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get transaction %s from %s: %s' % (txid, self.url, ex))
@@ -248,7 +247,7 @@ class InsightAPI(ExplorerAPI):
         url = self.url + '/tx/' + str(txid)
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get prime input address of transaction %s from %s: %s' % (txid, self.url, ex))
@@ -272,7 +271,7 @@ class InsightAPI(ExplorerAPI):
         url = self.url + '/addrs/' + address + '/utxo?noCache=1'
         try:
             LOG.info('GET %s' % url)
-            r = requests.get(url)
+            r = HTTP_SESSIONS.get(url)
             data = r.json()
         except Exception as ex:
             LOG.error('Unable to get utxos of address %s from %s: %s' % (address, url, ex))
@@ -297,7 +296,7 @@ class InsightAPI(ExplorerAPI):
         url = '{api_url}/tx/send'.format(api_url=self.url)
         LOG.info('POST %s' % url)
         try:
-            r = requests.post(url, data=dict(rawtx=tx))
+            r = HTTP_SESSIONS.post(url, data=dict(rawtx=tx))
         except Exception as ex:
             LOG.error('Unable to push tx via %s: %s' % (self.url, ex))
             return {'error': 'Unable to push tx via %s: %s' % (self.url, ex)}
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Circuit breaker that temporarily skips an explorer after repeated errors."""
+
+import threading
+import time
+
+from helpers.loghelpers import LOG
+
+# Number of consecutive errors after which an explorer is skipped
+FAILURE_THRESHOLD = 5
+
+# Number of seconds an explorer is skipped before a single trial request is allowed again
+COOLDOWN = 60
+
+
+class CircuitState(object):
+    """The states of a circuit breaker."""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker for a single explorer
+
+    The circuit opens after 'failure_threshold' consecutive errors, while it is open the explorer is skipped.
+    After 'cooldown' seconds the circuit is half-open and a single trial request is allowed, the other requests are
+    rejected until it resolves: a success closes the circuit, an error opens it again for another cooldown period.
+    A trial request that never reports back is given up after another cooldown period.
+
+    :param name: The name of the explorer (only used in log messages)
+    :param failure_threshold: The number of consecutive errors after which the circuit opens
+    :param cooldown: The number of seconds the circuit stays open
+    """
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        self.times_opened = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """
+        Get the current state of the circuit
+
+        :return: A CircuitState
+        """
+        if self.opened_at is None:
+            return CircuitState.CLOSED
+        elif time.monotonic() - self.opened_at < self.cooldown:
+            return CircuitState.OPEN
+        else:
+            return CircuitState.HALF_OPEN
+
+    def allow(self):
+        """
+        Check if a request to the explorer is allowed, in the half-open state only the first request is allowed
+
+        :return: True or False
+        """
+        with self._lock:
+            state = self.state
+            if state != CircuitState.HALF_OPEN:
+                return state == CircuitState.CLOSED
+
+            now = time.monotonic()
+            if self.probe_started is not None and now - self.probe_started < self.cooldown:
+                return False
+
+            self.probe_started = now
+            return True
+
+    def record_success(self):
+        """
+        Record a successful request, this closes the circuit
+        """
+        with self._lock:
+            if self.opened_at is not None:
+                LOG.info('Circuit breaker of %s is closed again' % self.name)
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self):
+        """
+        Record a failed request, the circuit opens if the threshold is reached or if it was half-open
+        """
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                if self.state != CircuitState.OPEN:
+                    LOG.warning('Circuit breaker of %s is open, skipping it for %s seconds after %s errors' % (self.name, self.cooldown, self.failures))
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+                self.probe_started = None
+
+    def json_encodable(self):
+        """
+        Get the state of the circuit breaker
+
+        :return: A dict containing the state, the number of consecutive errors and the number of times the circuit opened
+        """
+        return {'state': self.state,
+                'failures': self.failures,
+                'times_opened': self.times_opened}
@@ -3,6 +3,9 @@
 """Blockchain data access layer with multi-explorer fallback support."""
 
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from helpers.loghelpers import LOG
 from .blockexplorers.blockchain_info import BlockchainInfoAPI
@@ -11,14 +14,58 @@ from .blockexplorers.insight import InsightAPI
 from .blockexplorers.chain_so import ChainSoAPI
 from .blockexplorers.btc_com import BTCComAPI
 from .blockexplorers.blockstream import BlockstreamAPI
+from .blockexplorers.bitcoin_core import BitcoinCoreAPI
+from .blockexplorers.electrum import ElectrumAPI
 from .explorer import Explorer, ExplorerType
+from .explorer_stats import ExplorerStats
+from .explorer_api import HTTP_SESSIONS
+from .circuit_breaker import CircuitBreaker, CircuitState
+from .query_cache import QueryCache
+from .transaction_store import TransactionStore
 from helpers.jsonhelpers import save_to_json_file, load_from_json_file
 from validators.validators import valid_address
 
 PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
 EXPLORERS_JSON_FILE = os.path.join(PROGRAM_DIR, 'json', 'private', 'explorers.json')
-EXPLORER = None
+
+
+class ExplorerContext(threading.local):
+    """
+    The explorer selected for the current request and the explorer that answered its last query
+
+    Each thread has its own explorer_id, so concurrent requests served by different threads can not change each
+    other's explorer. Only an explicitly selected explorer is stored in explorer_id, the explorer that answered the
+    last query is kept apart in last_explorer_id so it never restricts the queries that follow.
+    """
+    explorer_id = None
+    last_explorer_id = None
+
+
+EXPLORER_CONTEXT = ExplorerContext()
+
+QUERY_CACHE_FILE = os.path.join(PROGRAM_DIR, 'json', 'private', 'query_cache.db')
+QUERY_CACHE = QueryCache(QUERY_CACHE_FILE)
+
+TRANSACTION_STORE_FILE = os.path.join(PROGRAM_DIR, 'json', 'private', 'transactions.db')
+TRANSACTION_STORE = TransactionStore(TRANSACTION_STORE_FILE)
+
+EXPLORER_STATS = ExplorerStats()
+
+# Circuit breakers of the explorers, explorers that keep failing are skipped for a while
+CIRCUIT_BREAKERS = {}
+CIRCUIT_BREAKERS_LOCK = threading.Lock()
+
+# Settings for hedged queries: if an explorer does not answer within HEDGE_DELAY seconds the next one is queried in parallel
+HEDGED = False
+HEDGE_DELAY = 1.0
+
+# Number of explorers that must give the same response for a quorum query
+QUORUM_SIZE = 2
+
+# Maximum number of queries that run in parallel for hedged and quorum queries
+MAX_PARALLEL_QUERIES = 8
+EXECUTOR = None
 
 
 def initialize_explorers_file():
@@ -41,7 +88,121 @@ def initialize_explorers_file():
             'btc.com': second_explorer.json_encodable(),
             'blockchain.info': third_explorer.json_encodable()}
 
-    save_to_json_file(EXPLORERS_JSON_FILE, data)
+    EXPLORER_REGISTRY.update(data)
+
+
+class ExplorerRegistry(object):
+    """
+    In-memory registry of the configured explorers
+
+    The explorers.json file is only parsed again when its modification time changes and the ExplorerAPI objects
+    are created once and reused for all queries.
+
+    :param filename: The filename of the explorers.json file
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.explorers = None
+        self.mtime = None
+        self.explorer_apis = {}
+        self.loads = 0
+        self._lock = threading.RLock()
+
+    def get_mtime(self):
+        """
+        Get the modification time of the explorers.json file
+
+        :return: The modification time in nanoseconds or None if the file does not exist
+        """
+        try:
+            return os.stat(self.filename).st_mtime_ns
+        except OSError:
+            return None
+
+    def get_explorers(self):
+        """
+        Get the configuration of all explorers, the explorers.json file is only read again if it has changed
+
+        :return: A dict containing the configuration of each explorer
+        """
+        with self._lock:
+            mtime = self.get_mtime()
+            if self.explorers is None or mtime != self.mtime:
+                self.explorers = load_from_json_file(self.filename)
+                self.mtime = mtime
+                self.explorer_apis = {}
+                self.loads += 1
+
+            return self.explorers
+
+    def get_explorer_api(self, explorer_id):
+        """
+        Get the ExplorerAPI object of an explorer, the object is created the first time it is needed
+
+        :param explorer_id: The id of the explorer
+        :return: An ExplorerAPI object or None if the explorer is not configured
+        """
+        with self._lock:
+            explorers = self.get_explorers()
+            if explorers is None or explorer_id not in explorers:
+                return
+
+            if explorer_id not in self.explorer_apis:
+                self.explorer_apis[explorer_id] = create_explorer_api(explorer_id, explorers[explorer_id])
+
+            return self.explorer_apis[explorer_id]
+
+    def update(self, explorers):
+        """
+        Save a new configuration of the explorers to the explorers.json file and update the registry
+
+        :param explorers: A dict containing the configuration of each explorer
+        """
+        with self._lock:
+            save_to_json_file(self.filename, explorers)
+            self.explorers = explorers
+            self.mtime = self.get_mtime()
+            self.explorer_apis = {}
+
+    def set(self, explorer_id, explorer_config):
+        """
+        Add or replace the configuration of a single explorer
+
+        :param explorer_id: The id of the explorer
+        :param explorer_config: A dict containing the configuration of the explorer
+        """
+        with self._lock:
+            explorers = dict(self.get_explorers() or {})
+            explorers[explorer_id] = explorer_config
+            self.update(explorers)
+
+    def delete(self, explorer_id):
+        """
+        Delete the configuration of a single explorer
+
+        :param explorer_id: The id of the explorer
+        :return: True if the explorer was deleted, False if it was not configured
+        """
+        with self._lock:
+            explorers = dict(self.get_explorers() or {})
+            if explorer_id not in explorers:
+                return False
+
+            del explorers[explorer_id]
+            self.update(explorers)
+            return True
+
+    def clear(self):
+        """
+        Clear the registry, the explorers.json file will be read again the next time it is needed
+        """
+        with self._lock:
+            self.explorers = None
+            self.mtime = None
+            self.explorer_apis = {}
+
+
+EXPLORER_REGISTRY = ExplorerRegistry(EXPLORERS_JSON_FILE)
 
 
 def get_explorers():
@@ -54,7 +215,7 @@ def get_explorers():
     if not os.path.isfile(EXPLORERS_JSON_FILE):
         initialize_explorers_file()
 
-    explorers = load_from_json_file(EXPLORERS_JSON_FILE)
+    explorers = EXPLORER_REGISTRY.get_explorers()
 
     if explorers is not None and isinstance(explorers, dict):
         # Only return the explorer_ids sorted by priority
@@ -68,7 +229,7 @@ def get_explorer_config(explorer_id):
     :param explorer_id: id of the explorer
     :return: a dict containing the configuration of the explorer
     """
-    explorers = load_from_json_file(EXPLORERS_JSON_FILE)
+    explorers = EXPLORER_REGISTRY.get_explorers()
 
     if explorer_id in explorers:
         return explorers[explorer_id]
@@ -81,8 +242,6 @@ def save_explorer(explorer_id, explorer_config):
     :param explorer_id: The id of the explorer
     :param explorer_config: A dict containing the configuration for the explorer
     """
-    explorers = load_from_json_file(EXPLORERS_JSON_FILE)
-
     explorer = Explorer()
     if 'type' in explorer_config:
         explorer.explorer_type = explorer_config['type']
@@ -94,9 +253,12 @@ def save_explorer(explorer_id, explorer_config):
         explorer.api_key = explorer_config['api_key']
     if 'testnet' in explorer_config:
         explorer.testnet = explorer_config['testnet']
+    if explorer_config.get('rate_limit') is not None:
+        explorer.rate_limit = float(explorer_config['rate_limit'])
+    if explorer_config.get('burst') is not None:
+        explorer.burst = int(explorer_config['burst'])
 
-    explorers[explorer_id] = explorer.json_encodable()
-    save_to_json_file(EXPLORERS_JSON_FILE, explorers)
+    EXPLORER_REGISTRY.set(explorer_id, explorer.json_encodable())
 
 
 def delete_explorer(explorer_id):
@@ -105,11 +267,43 @@ def delete_explorer(explorer_id):
 
     :param explorer_id: The id of the explorer
     """
-    explorers = load_from_json_file(EXPLORERS_JSON_FILE)
+    EXPLORER_REGISTRY.delete(explorer_id)
 
-    if explorer_id in explorers:
-        del explorers[explorer_id]
-        save_to_json_file(EXPLORERS_JSON_FILE, explorers)
+
+def create_explorer_api(name, explorer):
+    """
+    Create a new explorer API object
+
+    :param name: The name of the explorer
+    :param explorer: A dict containing the configuration of the explorer
+    :return: An ExplorerAPI object
+    """
+    if explorer['type'] == ExplorerType.BLOCKCHAIN_INFO:
+        explorer_api = BlockchainInfoAPI(testnet=explorer['testnet'])
+    elif explorer['type'] == ExplorerType.INSIGHT:
+        explorer_api = InsightAPI(url=explorer['url'], testnet=explorer['testnet'])
+    elif explorer['type'] == ExplorerType.BLOCKTRAIL_COM:
+        explorer_api = BlocktrailComAPI(key=explorer['api_key'], testnet=explorer['testnet'])
+    elif explorer['type'] == ExplorerType.CHAIN_SO:
+        explorer_api = ChainSoAPI(url=explorer['url'], testnet=explorer['testnet'])
+    elif explorer['type'] == ExplorerType.BTC_COM:
+        explorer_api = BTCComAPI(url=explorer['url'], testnet=explorer['testnet'])
+    elif explorer['type'] == ExplorerType.BLOCKSTREAM:
+        explorer_api = BlockstreamAPI(url=explorer['url'], testnet=explorer['testnet'])
+    elif explorer['type'] == ExplorerType.BITCOIN_CORE:
+        explorer_api = BitcoinCoreAPI(url=explorer['url'], key=explorer['api_key'], testnet=explorer['testnet'])
+    elif explorer['type'] == ExplorerType.ELECTRUM:
+        explorer_api = ElectrumAPI(url=explorer['url'], testnet=explorer['testnet'])
+    else:
+        raise NotImplementedError('Unknown explorer API: %s' % name)
+
+    # The rate limit in explorers.json overrides the default rate limit of the explorer API
+    rate_limit = explorer.get('rate_limit') if explorer.get('rate_limit') is not None else explorer_api.RATE_LIMIT
+    burst = explorer.get('burst') if explorer.get('burst') is not None else explorer_api.BURST
+    if explorer_api.url:
+        HTTP_SESSIONS.set_rate_limit(explorer_api.url, rate=rate_limit, burst=burst)
+
+    return explorer_api
 
 
 def get_explorer_api(name):
@@ -119,86 +313,309 @@ def get_explorer_api(name):
     :param name: The name of the explorer
     :return: An ExplorerAPI object
     """
-    explorers = load_from_json_file(EXPLORERS_JSON_FILE)
-
-    if name in explorers:
-        explorer = explorers[name]
-        if explorer['type'] == ExplorerType.BLOCKCHAIN_INFO:
-            return BlockchainInfoAPI(testnet=explorer['testnet'])
-        elif explorer['type'] == ExplorerType.INSIGHT:
-            return InsightAPI(url=explorer['url'], testnet=explorer['testnet'])
-        elif explorer['type'] == ExplorerType.BLOCKTRAIL_COM:
-            return BlocktrailComAPI(key=explorer['api_key'], testnet=explorer['testnet'])
-        elif explorer['type'] == ExplorerType.CHAIN_SO:
-            return ChainSoAPI(url=explorer['url'], testnet=explorer['testnet'])
-        elif explorer['type'] == ExplorerType.BTC_COM:
-            return BTCComAPI(url=explorer['url'], testnet=explorer['testnet'])
-        elif explorer['type'] == ExplorerType.BLOCKSTREAM:
-            return BlockstreamAPI(url=explorer['url'], testnet=explorer['testnet'])
+    return EXPLORER_REGISTRY.get_explorer_api(name)
+
+
+def query_explorer(explorer_id, query_type, param):
+    """
+    Do a query on a single explorer and record its latency and success in the EXPLORER_STATS
+
+    :param explorer_id: The id of the explorer
+    :param query_type: The type of query
+    :param param: The parameters for the query
+    :return: The response of the explorer or None if the explorer is not configured
+    """
+    explorer_api = get_explorer_api(explorer_id)
+    if not explorer_api:
+        return
+
+    # The circuit breaker is only asked right before the request, so the single trial request of a half-open circuit
+    # is not given away to an explorer that is never queried
+    if not get_circuit_breaker(explorer_id).allow():
+        return {'error': '%s is temporarily unavailable' % explorer_id}
+
+    start_time = time.time()
+    outcome = HTTP_SESSIONS.track()
+    try:
+        if query_type == 'block':
+            data = explorer_api.get_block(param[0])
+        elif query_type == 'block_by_height':
+            data = explorer_api.get_block_by_height(param[0])
+        elif query_type == 'block_by_hash':
+            data = explorer_api.get_block_by_hash(param[0])
+        elif query_type == 'latest_block':
+            data = explorer_api.get_latest_block()
+        elif query_type == 'transaction':
+            data = explorer_api.get_transaction(param[0])
+        elif query_type == 'prime_input_address':
+            data = explorer_api.get_prime_input_address(param[0])
+        elif query_type == 'balance':
+            data = explorer_api.get_balance(param[0])
+        elif query_type == 'transactions':
+            data = explorer_api.get_transactions(*param)
+        elif query_type == 'utxos':
+            data = explorer_api.get_utxos(*param)
+        elif query_type == 'balances':
+            data = explorer_api.get_balances(param[0])
+        elif query_type == 'utxos_many':
+            data = explorer_api.get_utxos_many(*param)
+        elif query_type == 'prime_input_addresses':
+            data = explorer_api.get_prime_input_addresses(param[0])
+        elif query_type == 'push_tx':
+            data = explorer_api.push_tx(param[0])
         else:
-            raise NotImplementedError('Unknown explorer API: %s' % name)
+            raise NotImplementedError('Unknown query type: %s' % query_type)
+    except NotImplementedError:
+        raise
+    except Exception as ex:
+        data = {'error': 'Exception: %s' % ex}
+
+    EXPLORER_STATS.record(explorer_id, time.time() - start_time, success='error' not in data)
+    # Only errors of the explorer itself count for its circuit breaker, not the errors of the request
+    if 'error' in data and outcome.explorer_failed():
+        get_circuit_breaker(explorer_id).record_failure()
+    else:
+        get_circuit_breaker(explorer_id).record_success()
+
+    if 'error' in data:
+        message = '{explorer} failed to provide data for query: {query_type}'.format(explorer=explorer_id, query_type=query_type)
+        if param != '':
+            message += ' param: ' + str(param)
+        message += ' error: %s' % data['error']
+        LOG.error(message)
+        data = {'error': message}
+
+    return data
+
+
+def get_circuit_breaker(explorer_id):
+    """
+    Get the circuit breaker of an explorer, the circuit breaker is created the first time it is needed
+
+    :param explorer_id: The id of the explorer
+    :return: A CircuitBreaker object
+    """
+    with CIRCUIT_BREAKERS_LOCK:
+        if explorer_id not in CIRCUIT_BREAKERS:
+            CIRCUIT_BREAKERS[explorer_id] = CircuitBreaker(name=explorer_id)
+
+        return CIRCUIT_BREAKERS[explorer_id]
+
+
+def reset_circuit_breakers():
+    """
+    Close all circuit breakers
+    """
+    with CIRCUIT_BREAKERS_LOCK:
+        CIRCUIT_BREAKERS.clear()
 
 
-def query(query_type, param=None):
+def use_testnet():
+    """
+    Check if the spellbook is configured to use testnet, responses of testnet and mainnet are cached apart
+
+    :return: True or False
+    """
+    # Imported here because the configurationhelpers import the decorators, which import this module
+    from helpers.configurationhelpers import get_use_testnet
+    return get_use_testnet()
+
+
+def query(query_type, param=None, quorum=False):
     """
     Do a query
     If an explorer is unavailable, the next explorer in the list will be tried
+    Responses are cached in the QUERY_CACHE, so repeated queries don't need to contact an explorer again,
+    unless a specific explorer is selected
 
+    The explorers are tried in order of their priority, corrected for their measured latency and error rate.
+    Explorers whose circuit breaker is open because of repeated errors are skipped.
+    If HEDGED is True, the next explorer is queried in parallel as soon as an explorer does not answer within HEDGE_DELAY seconds.
 
     :param query_type: The type of query
     :param param:  The parameters for the query
+    :param quorum: If True, the response must be confirmed by 2 explorers and the cache is bypassed (default False)
     :return: The response of the query
     """
-    global EXPLORER
-
     if param is None:
         param = []
 
-    # Get the list of explorers ordered by priority unless a specific explorer is specified
-    explorers = get_explorers() if EXPLORER is None else [EXPLORER]
+    testnet = use_testnet()
+
+    # A quorum and a specified explorer must get a response from the explorers themselves, not from the cache
+    if quorum is False and EXPLORER_CONTEXT.explorer_id is None:
+        cached_response, cached_explorer = QUERY_CACHE.get(query_type, param, testnet=testnet)
+        if cached_response is not None:
+            EXPLORER_CONTEXT.last_explorer_id = cached_explorer
+            return cached_response
+
+    # Get the list of explorers ordered by priority and performance unless a specific explorer is specified,
+    # a quorum needs more than one explorer so it does not use the specified explorer
+    if EXPLORER_CONTEXT.explorer_id is None or quorum is True:
+        explorers = EXPLORER_STATS.order(get_explorers())
+    else:
+        explorers = [EXPLORER_CONTEXT.explorer_id]
+
+    # Skip explorers that are known to be down, whether a half-open explorer may be queried is decided when it is queried
+    explorers = [explorer_id for explorer_id in explorers if get_circuit_breaker(explorer_id).state != CircuitState.OPEN]
+    if not explorers:
+        LOG.error('No explorers available for query %s: all circuit breakers are open' % query_type)
+        return {'error': 'All explorers are temporarily unavailable'}
+
+    if quorum is True and len(explorers) < 2:
+        LOG.error('Not enough explorers available for a quorum on query %s' % query_type)
+        return {'error': 'A quorum needs at least 2 available explorers, only %s available' % len(explorers)}
+
+    if quorum is True:
+        explorer_id, data = query_quorum(explorers, query_type, param)
+    elif HEDGED is True and len(explorers) >= 2:
+        explorer_id, data = query_hedged(explorers, query_type, param)
+    else:
+        explorer_id, data = query_sequential(explorers, query_type, param)
+
+    if explorer_id is None:
+        return data
+
+    EXPLORER_CONTEXT.last_explorer_id = explorer_id
+    QUERY_CACHE.put(query_type, param, data, explorer=explorer_id, testnet=testnet)
+    return data
 
+
+def query_sequential(explorers, query_type, param):
+    """
+    Query the explorers one by one until one of them gives a valid response
+
+    :param explorers: A list of explorer_ids in the order they should be tried
+    :param query_type: The type of query
+    :param param: The parameters for the query
+    :return: A tuple containing the id of the explorer and its response, or None and an error
+    """
     message = ''
-    for i in range(0, len(explorers)):
-        explorer_api = get_explorer_api(explorers[i])
-        if explorer_api:
-            if query_type == 'block':
-                data = explorer_api.get_block(param[0])
-            elif query_type == 'block_by_height':
-                data = explorer_api.get_block_by_height(param[0])
-            elif query_type == 'block_by_hash':
-                data = explorer_api.get_block_by_hash(param[0])
-            elif query_type == 'latest_block':
-                data = explorer_api.get_latest_block()
-            elif query_type == 'transaction':
-                data = explorer_api.get_transaction(param[0])
-            elif query_type == 'prime_input_address':
-                data = explorer_api.get_prime_input_address(param[0])
-            elif query_type == 'balance':
-                data = explorer_api.get_balance(param[0])
-            elif query_type == 'transactions':
-                data = explorer_api.get_transactions(param[0])
-            elif query_type == 'utxos':
-                data = explorer_api.get_utxos(*param)
-            elif query_type == 'push_tx':
-                data = explorer_api.push_tx(param[0])
-            else:
-                raise NotImplementedError('Unknown query type: %s' % query_type)
-
-            if 'error' in data:
-                message = '{explorer} failed to provide data for query: {query_type}'.format(explorer=explorers[i], query_type=query_type)
-                if param != '':
-                    message += ' param: ' + str(param)
-                message += ' error: %s' % data['error']
-                LOG.error(message)
-            else:
-                response = data
-                EXPLORER = explorers[i]
-                return response
+    for explorer_id in explorers:
+        data = query_explorer(explorer_id, query_type, param)
+        if data is None:
+            continue
+
+        if 'error' in data:
+            message = data['error']
+        else:
+            return explorer_id, data
 
     if len(explorers) == 1:
-        return {'error': message}
+        return None, {'error': message}
     else:
-        return {'error': 'Failed to retrieve data from all explorers'}
+        return None, {'error': 'Failed to retrieve data from all explorers'}
+
+
+def get_executor():
+    """
+    Get the thread pool used for hedged and quorum queries, the pool is created the first time it is needed
+
+    :return: A ThreadPoolExecutor object
+    """
+    global EXECUTOR
+
+    if EXECUTOR is None:
+        EXECUTOR = ThreadPoolExecutor(max_workers=MAX_PARALLEL_QUERIES, thread_name_prefix='explorer_query')
+
+    return EXECUTOR
+
+
+def query_hedged(explorers, query_type, param):
+    """
+    Query the explorers in order, but if an explorer has not answered within HEDGE_DELAY seconds,
+    the next explorer is queried in parallel, the first valid response wins
+
+    :param explorers: A list of explorer_ids in the order they should be tried
+    :param query_type: The type of query
+    :param param: The parameters for the query
+    :return: A tuple containing the id of the explorer and its response, or None and an error
+    """
+    pending = {}
+    remaining = list(explorers)
+
+    while remaining or pending:
+        if remaining:
+            explorer_id = remaining.pop(0)
+            pending[get_executor().submit(query_explorer, explorer_id, query_type, param)] = explorer_id
+
+        # Wait for the next response, but only HEDGE_DELAY seconds if there are still explorers left to try
+        done, _ = wait(pending, timeout=HEDGE_DELAY if remaining else None, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            explorer_id = pending.pop(future)
+            data = future.result()
+            if data is not None and 'error' not in data:
+                return explorer_id, data
+
+        if done and remaining:
+            # An explorer failed, don't wait for the hedge delay to try the next one
+            continue
+
+    return None, {'error': 'Failed to retrieve data from all explorers'}
+
+
+def quorum_value(query_type, data):
+    """
+    Get the part of a response that must be equal for 2 explorers to agree
+
+    Explorers are allowed to differ in things like the number of confirmations or the scripts they provide.
+
+    :param query_type: The type of query
+    :param data: The response of an explorer
+    :return: A json-encodable value
+    """
+    if query_type == 'balance':
+        return data['balance']['final']
+    elif query_type == 'utxos':
+        return sorted([(utxo['output_hash'], utxo['output_n'], utxo['value']) for utxo in data['utxos']])
+
+    return data
+
+
+def query_quorum(explorers, query_type, param):
+    """
+    Query the explorers in parallel until 2 of them give the same response
+
+    :param explorers: A list of explorer_ids in the order they should be tried
+    :param query_type: The type of query
+    :param param: The parameters for the query
+    :return: A tuple containing the id of the first explorer and its response, or None and an error
+    """
+    pending = {}
+    remaining = list(explorers)
+    responses = []
+
+    while remaining or pending:
+        # Keep enough explorers busy so a quorum can still be reached if all of them agree with the largest group so far
+        values = [quorum_value(query_type, response[1]) for response in responses]
+        largest_group = max([values.count(value) for value in values] + [0])
+        while remaining and largest_group + len(pending) < QUORUM_SIZE:
+            explorer_id = remaining.pop(0)
+            pending[get_executor().submit(query_explorer, explorer_id, query_type, param)] = explorer_id
+
+        if not pending:
+            break
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            explorer_id = pending.pop(future)
+            data = future.result()
+            if data is None or 'error' in data:
+                continue
+
+            responses.append((explorer_id, data))
+            agreeing = [response for response in responses if quorum_value(query_type, response[1]) == quorum_value(query_type, data)]
+            if len(agreeing) >= QUORUM_SIZE:
+                LOG.info('Explorers %s agree on %s %s' % ([response[0] for response in agreeing], query_type, param))
+                return agreeing[0]
+
+    if len(responses) >= QUORUM_SIZE:
+        LOG.error('Explorers disagree on %s %s' % (query_type, param))
+        return None, {'error': 'Explorers disagree on the response of query %s' % query_type}
+
+    return None, {'error': 'Failed to retrieve a quorum of %s responses for query %s' % (QUORUM_SIZE, query_type)}
 
 
 def block(height_or_hash):
@@ -265,12 +682,20 @@ def transactions(address):
     """
     Get the transactions of an address
 
+    The transactions are kept in the TRANSACTION_STORE, so after the first time only the newest transactions
+    need to be fetched from an explorer.
+
     :param address: The address
     :return: A dict containing info about the transactions of the address
     """
     response = {'success': 0}
     if valid_address(address):
-        response = query('transactions', [address])
+        since_height = TRANSACTION_STORE.since_height(address)
+        response = query('transactions', [address] if since_height is None else [address, since_height])
+        if 'transactions' in response:
+            response = dict(response)
+            response['transactions'] = TRANSACTION_STORE.merge(address, since_height, response['transactions'],
+                                                               latest_block_height=response.pop('latest_block_height', None))
     else:
         response['error'] = 'Invalid address'
 
@@ -280,26 +705,101 @@ def transactions(address):
     return response
 
 
-def balance(address):
+def balance(address, quorum=False):
     """
     Get the balance of an address
     Will return 3 types of balances: final balance, total received and total sent
 
     :param address: The address
+    :param quorum: If True, the balance must be confirmed by multiple explorers (default False)
     :return: A dict containing info about the balance of the address
     """
-    return query('balance', [address])
+    return query('balance', [address], quorum=quorum)
 
 
-def utxos(address, confirmations):
+def utxos(address, confirmations, quorum=False):
     """
     Get the utxos of an address that have at least x confirmations
 
     :param address: The address
     :param confirmations: The number of required confirmations
+    :param quorum: If True, the utxos must be confirmed by multiple explorers (default False)
     :return: A dict containing info about the utxos of the address
     """
-    return query('utxos', [address, confirmations])
+    return query('utxos', [address, confirmations], quorum=quorum)
+
+
+def batch_query(query_type, response_key, single_query_type, items, extra_param=None):
+    """
+    Do a batch query, items that are in the query cache are not requested again
+    The results of the batch query are stored in the query cache as if they were single queries
+
+    :param query_type: The type of the batch query
+    :param response_key: The key of the results in the response of the batch query
+    :param single_query_type: The type of the equivalent query for a single item
+    :param items: A list of items (addresses or txids)
+    :param extra_param: An additional parameter for each item (optional)
+    :return: A dict containing the result for each item
+    """
+    def make_param(value):
+        return [value] if extra_param is None else [value, extra_param]
+
+    testnet = use_testnet()
+    results = {}
+    missing = []
+    for item in dict.fromkeys(items):
+        # A specified explorer must give all results itself
+        cached_response = None
+        if EXPLORER_CONTEXT.explorer_id is None:
+            cached_response, _ = QUERY_CACHE.get(single_query_type, make_param(item), testnet=testnet)
+
+        if cached_response is not None and single_query_type in cached_response:
+            results[item] = cached_response[single_query_type]
+        else:
+            missing.append(item)
+
+    if missing:
+        response = query(query_type, make_param(missing))
+        if 'error' in response:
+            return response
+
+        for item, value in response[response_key].items():
+            QUERY_CACHE.put(single_query_type, make_param(item), {single_query_type: value},
+                            explorer=EXPLORER_CONTEXT.last_explorer_id, testnet=testnet)
+            results[item] = value
+
+    return {response_key: results}
+
+
+def balances(addresses):
+    """
+    Get the balances of multiple addresses with as few requests as possible
+
+    :param addresses: A list of addresses
+    :return: A dict containing the balance of each address
+    """
+    return batch_query('balances', 'balances', 'balance', addresses)
+
+
+def utxos_many(addresses, confirmations):
+    """
+    Get the utxos of multiple addresses that have at least x confirmations with as few requests as possible
+
+    :param addresses: A list of addresses
+    :param confirmations: The number of required confirmations
+    :return: A dict containing the utxos of each address
+    """
+    return batch_query('utxos_many', 'utxos', 'utxos', addresses, extra_param=confirmations)
+
+
+def prime_input_addresses(txids):
+    """
+    Get the prime input addresses of multiple transactions with as few requests as possible
+
+    :param txids: A list of transaction ids
+    :return: A dict containing the prime input address of each transaction
+    """
+    return batch_query('prime_input_addresses', 'prime_input_addresses', 'prime_input_address', txids)
 
 
 def push_tx(tx):
@@ -314,28 +814,70 @@ def push_tx(tx):
 
 def set_explorer(explorer_id):
     """
-    Set a specific explorer to use in a global variable
+    Set a specific explorer to use for the queries of the current thread
 
     :param explorer_id: The id of the explorer
     """
-    global EXPLORER
-    EXPLORER = explorer_id
+    EXPLORER_CONTEXT.explorer_id = explorer_id
 
 
 def clear_explorer():
     """
-    Clear the global variable EXPLORER
+    Clear the explorer of the current thread
     """
-    global EXPLORER
-    EXPLORER = None
+    EXPLORER_CONTEXT.explorer_id = None
+    EXPLORER_CONTEXT.last_explorer_id = None
 
 
 def get_last_explorer():
     """
-    Get the last used explorer
+    Get the last used explorer of the current thread
 
     :return: The id of the last used explorer
     """
-    global EXPLORER
-    return EXPLORER
+    return EXPLORER_CONTEXT.last_explorer_id
+
+
+def cache_stats():
+    """
+    Get the hit and miss counters of the query cache
+
+    :return: A dict containing info about the query cache
+    """
+    return QUERY_CACHE.stats()
+
+
+def new_block(height=None):
+    """
+    Invalidate the volatile entries of the query cache when a new block is announced, so the next queries see the new chain tip
+
+    :param height: The height of the new block (optional), all volatile entries are invalidated if it is not known
+    """
+    if height is None:
+        QUERY_CACHE.invalidate_volatile()
+    else:
+        QUERY_CACHE.observe_height(height)
+
+
+def invalidate_cache(query_type=None, param=None):
+    """
+    Invalidate entries in the query cache
+
+    :param query_type: Only invalidate entries of this query type (optional, default all entries)
+    :param param: Only invalidate the entry with these parameters (optional, requires query_type)
+    """
+    QUERY_CACHE.invalidate(query_type=query_type, param=param)
+
+
+def explorer_stats():
+    """
+    Get the latency and error statistics and the state of the circuit breaker of the explorers
+
+    :return: A dict containing the statistics of each explorer
+    """
+    stats = EXPLORER_STATS.get_stats()
+    with CIRCUIT_BREAKERS_LOCK:
+        for explorer_id, circuit_breaker in CIRCUIT_BREAKERS.items():
+            stats.setdefault(explorer_id, {})['circuit_breaker'] = circuit_breaker.json_encodable()
 
+    return stats
@@ -12,11 +12,14 @@ class ExplorerType(object):
     CHAIN_SO = 'Chain.so'
     BTC_COM = 'BTC.com'
     BLOCKSTREAM = 'Blockstream.info'
+    BITCOIN_CORE = 'Bitcoin Core'
+    ELECTRUM = 'Electrum'
 
 
 class Explorer(object):
     """
     Represents a blockchain explorer configuration with API key, URL, priority, and testnet flag.
+    The rate limit (requests per second) and burst are optional, if they are None the default of the explorer API is used.
     """
     def __init__(self):
         self.api_key = ''
@@ -24,6 +27,8 @@ class Explorer(object):
         self.explorer_type = None
         self.priority = 0
         self.testnet = False
+        self.rate_limit = None
+        self.burst = None
 
     def json_encodable(self):
         """
@@ -35,5 +40,7 @@ class Explorer(object):
                 'priority': self.priority,
                 'url': self.url,
                 'api_key': self.api_key,
-                'testnet': self.testnet}
+                'testnet': self.testnet,
+                'rate_limit': self.rate_limit,
+                'burst': self.burst}
 
@@ -1,8 +1,235 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-"""Abstract base class for blockchain explorer API implementations."""
+"""Abstract base class for blockchain explorer API implementations and the shared HTTP session pool."""
 
+import threading
 from abc import abstractmethod, ABCMeta
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .rate_limiter import TokenBucket
+
+# Default settings for the HTTP connections to the explorers
+POOL_SIZE = 10  # Maximum number of keep-alive connections per host
+CONNECT_TIMEOUT = 5  # Seconds to wait for a connection to be established
+READ_TIMEOUT = 30  # Seconds to wait for the explorer to send data
+RETRIES = 2  # Number of retries on connection errors and 429/5xx responses
+BACKOFF_FACTOR = 0.5  # Retries wait backoff_factor * 2^(retry - 1) seconds
+
+# Maximum number of concurrent requests when a batch query is split into single queries
+BATCH_WORKERS = 8
+
+# Response status codes that mean the explorer itself has a problem, other 4xx responses are errors of the request
+SERVER_ERROR_STATUS_CODES = [429]
+
+
+class RequestOutcome(object):
+    """
+    The outcome of the HTTP requests of a single query to an explorer
+
+    The circuit breaker of an explorer only counts the queries that failed because the explorer is down or overloaded:
+    transport errors (connection errors and timeouts), 5xx and 429 responses. A query that failed although the explorer
+    answered (a 404 for an unknown txid, for example) does not count. A query that did not do any HTTP request (an
+    explorer with another protocol, or a request that was not made) always counts.
+    """
+    def __init__(self):
+        self.responses = 0
+        self.server_errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, status_code=None):
+        """
+        Record the response to a request
+
+        :param status_code: The status code of the response, None if the request failed with a transport error
+        """
+        with self._lock:
+            if status_code is None or status_code >= 500 or status_code in SERVER_ERROR_STATUS_CODES:
+                self.server_errors += 1
+            else:
+                self.responses += 1
+
+    def explorer_failed(self):
+        """
+        Check if a failed query should count as an error of the explorer
+
+        :return: True or False
+        """
+        return self.server_errors > 0 or self.responses == 0
+
+
+class HTTPSessionPool(object):
+    """
+    Shared, per-host pool of keep-alive HTTP sessions for the explorer clients
+
+    Each host gets its own requests.Session with a connection pool, so consecutive requests to the same explorer
+    reuse an open TCP+TLS connection instead of opening a new one for every request.
+    A host can also get a TokenBucket, then requests to that host wait until the rate limit allows them.
+
+    :param pool_size: Maximum number of keep-alive connections per host
+    :param connect_timeout: Seconds to wait for a connection to be established
+    :param read_timeout: Seconds to wait for the explorer to send data
+    :param retries: Number of retries on connection errors and 429/5xx responses (only for idempotent requests)
+    :param backoff_factor: Retries wait backoff_factor * 2^(retry - 1) seconds
+    """
+    def __init__(self, pool_size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, retries=RETRIES, backoff_factor=BACKOFF_FACTOR):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.sessions = {}
+        self.rate_limiters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def get_host(url):
+        """
+        Get the scheme and host of an url
+
+        :param url: The url
+        :return: A string like 'https://blockstream.info'
+        """
+        parts = urlsplit(url)
+        return '%s://%s' % (parts.scheme, parts.netloc)
+
+    def set_rate_limit(self, url, rate, burst=1):
+        """
+        Set the rate limit for the host of an url
+
+        :param url: The url
+        :param rate: The maximum average number of requests per second, None or 0 removes the rate limit
+        :param burst: The maximum number of requests that can be done at once
+        """
+        host = self.get_host(url)
+        with self._lock:
+            if not rate:
+                self.rate_limiters.pop(host, None)
+            elif host not in self.rate_limiters or (self.rate_limiters[host].rate, self.rate_limiters[host].burst) != (float(rate), int(burst)):
+                self.rate_limiters[host] = TokenBucket(rate=rate, burst=burst)
+
+    def wait_for_rate_limit(self, url):
+        """
+        Wait until the rate limit of the host of an url allows a new request
+
+        :param url: The url
+        """
+        rate_limiter = self.rate_limiters.get(self.get_host(url))
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+    def configure(self, **settings):
+        """
+        Change the settings of the pool, existing sessions are closed so the new settings apply to all new requests
+
+        :param settings: pool_size, connect_timeout, read_timeout, retries and/or backoff_factor
+        """
+        for name in ['pool_size', 'connect_timeout', 'read_timeout', 'retries', 'backoff_factor']:
+            if name in settings:
+                setattr(self, name, settings[name])
+
+        self.close()
+
+    def session(self, url):
+        """
+        Get the session for the host of an url, the session is created the first time it is needed
+
+        :param url: The url
+        :return: A requests.Session object
+        """
+        host = self.get_host(url)
+
+        with self._lock:
+            if host not in self.sessions:
+                retry = Retry(total=self.retries,
+                              backoff_factor=self.backoff_factor,
+                              status_forcelist=[429, 500, 502, 503, 504],
+                              raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[host] = session
+
+            return self.sessions[host]
+
+    def track(self, outcome=None):
+        """
+        Record the outcome of the following requests of the current thread
+
+        :param outcome: The RequestOutcome to record them in, a new one if not given
+        :return: The RequestOutcome
+        """
+        self._local.outcome = outcome if outcome is not None else RequestOutcome()
+        return self._local.outcome
+
+    def tracked(self):
+        """
+        Get the RequestOutcome the requests of the current thread are recorded in
+
+        :return: A RequestOutcome or None
+        """
+        return getattr(self._local, 'outcome', None)
+
+    def request(self, method, url, **kwargs):
+        """
+        Do a request via the session of the host and record its outcome
+
+        :param method: 'get' or 'post'
+        :param url: The url
+        :param kwargs: Additional arguments for requests (a default timeout is added if none is given)
+        :return: A requests.Response object
+        """
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        self.wait_for_rate_limit(url)
+        outcome = self.tracked()
+        try:
+            r = getattr(self.session(url), method)(url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if outcome is not None:
+                outcome.record(status_code=None)
+            raise
+
+        if outcome is not None:
+            outcome.record(status_code=r.status_code)
+        return r
+
+    def get(self, url, **kwargs):
+        """
+        Do a GET request via the session of the host
+
+        :param url: The url
+        :param kwargs: Additional arguments for requests (a default timeout is added if none is given)
+        :return: A requests.Response object
+        """
+        return self.request('get', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """
+        Do a POST request via the session of the host (POST requests are never retried)
+
+        :param url: The url
+        :param kwargs: Additional arguments for requests (a default timeout is added if none is given)
+        :return: A requests.Response object
+        """
+        return self.request('post', url, **kwargs)
+
+    def close(self):
+        """
+        Close all sessions and their connections
+        """
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+HTTP_SESSIONS = HTTPSessionPool()
 
 
 class ExplorerAPI(object):
@@ -15,6 +242,10 @@ class ExplorerAPI(object):
     """
     __metaclass__ = ABCMeta
 
+    # Default rate limit of the explorer in requests per second (None means no rate limit), can be overridden in explorers.json
+    RATE_LIMIT = None
+    BURST = 1
+
     def __init__(self, url='', key='', testnet=False):
         self.error = ''
         self.url = url
@@ -47,11 +278,12 @@ class ExplorerAPI(object):
         pass
 
     @abstractmethod
-    def get_transactions(self, address):
+    def get_transactions(self, address, since_height=None):
         """
         Get the transactions of an address
 
         :param address: The address
+        :param since_height: Only transactions above this block height are needed (optional, explorers may return more)
         """
         pass
 
@@ -114,3 +346,67 @@ class ExplorerAPI(object):
         if 'block' in latest_block and 'height' in latest_block['block']:
             return latest_block['block']['height']
 
+    def fan_out(self, function, items, key):
+        """
+        Call a single-item query concurrently for a list of items
+
+        Explorers without a batch endpoint use this for the batch queries, the rate limit of the explorer
+        still applies to each request.
+
+        :param function: The function that queries a single item
+        :param items: A list of items (addresses or txids)
+        :param key: The key of the result in the response of the function
+        :return: A dict containing the result for each item, or a dict containing an error if one of the queries failed
+        """
+        items = list(dict.fromkeys(items))
+        if not items:
+            return {}
+
+        # The requests of the worker threads count for the query of this thread
+        outcome = HTTP_SESSIONS.tracked()
+
+        def query_item(item):
+            HTTP_SESSIONS.track(outcome)
+            return function(item)
+
+        with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(items)), thread_name_prefix='explorer_batch') as executor:
+            responses = list(executor.map(query_item, items))
+
+        results = {}
+        for item, response in zip(items, responses):
+            if key not in response:
+                return {'error': response.get('error', 'Received invalid data: %s' % response)}
+            results[item] = response[key]
+
+        return results
+
+    def get_balances(self, addresses):
+        """
+        Get the balances of multiple addresses
+
+        :param addresses: A list of addresses
+        :return: A dict containing the balance of each address
+        """
+        results = self.fan_out(self.get_balance, addresses, 'balance')
+        return results if 'error' in results else {'balances': results}
+
+    def get_utxos_many(self, addresses, confirmations=3):
+        """
+        Get the utxos of multiple addresses
+
+        :param addresses: A list of addresses
+        :param confirmations: The minimum number of confirmations
+        :return: A dict containing the utxos of each address
+        """
+        results = self.fan_out(lambda address: self.get_utxos(address, confirmations), addresses, 'utxos')
+        return results if 'error' in results else {'utxos': results}
+
+    def get_prime_input_addresses(self, txids):
+        """
+        Get the prime input addresses of multiple transactions
+
+        :param txids: A list of transaction ids
+        :return: A dict containing the prime input address of each transaction
+        """
+        results = self.fan_out(self.get_prime_input_address, txids, 'prime_input_address')
+        return results if 'error' in results else {'prime_input_addresses': results}
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Latency and error statistics of the explorers, used to decide the order in which explorers are queried."""
+
+import threading
+
+# Weight of a new measurement in the exponentially weighted moving averages
+SMOOTHING = 0.2
+
+# Number of seconds of latency that one step in the static priority of explorers.json is worth
+PRIORITY_WEIGHT = 0.5
+
+# How much a 100% error rate multiplies the latency of an explorer
+ERROR_PENALTY = 10
+
+
+class ExplorerStats(object):
+    """
+    Keeps a moving average of the latency and the error rate of each explorer
+
+    Explorers are ordered by their static priority, corrected for the measured latency and error rate, so a slow or
+    failing explorer automatically moves down the list and moves back up once it performs well again.
+
+    :param smoothing: Weight of a new measurement in the moving averages
+    :param priority_weight: Number of seconds of latency that one step in priority is worth
+    :param error_penalty: How much a 100% error rate multiplies the latency of an explorer
+    """
+    def __init__(self, smoothing=SMOOTHING, priority_weight=PRIORITY_WEIGHT, error_penalty=ERROR_PENALTY):
+        self.smoothing = smoothing
+        self.priority_weight = priority_weight
+        self.error_penalty = error_penalty
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, explorer_id, latency, success):
+        """
+        Record the result of a query
+
+        :param explorer_id: The id of the explorer
+        :param latency: The number of seconds the query took
+        :param success: True if the explorer gave a valid response, False otherwise
+        """
+        with self._lock:
+            if explorer_id not in self.stats:
+                self.stats[explorer_id] = {'requests': 0, 'errors': 0, 'latency': latency, 'error_rate': 0.0 if success else 1.0}
+
+            stats = self.stats[explorer_id]
+            stats['requests'] += 1
+            stats['errors'] += 0 if success else 1
+            stats['latency'] += self.smoothing * (latency - stats['latency'])
+            stats['error_rate'] += self.smoothing * ((0.0 if success else 1.0) - stats['error_rate'])
+
+    def score(self, explorer_id, rank):
+        """
+        Get the score of an explorer, lower is better
+
+        :param explorer_id: The id of the explorer
+        :param rank: The position of the explorer in the list sorted by static priority
+        :return: The score as a float
+        """
+        stats = self.stats.get(explorer_id)
+        if stats is None:
+            # Explorers without measurements are only ordered by their priority
+            return rank * self.priority_weight
+
+        return rank * self.priority_weight + stats['latency'] * (1 + self.error_penalty * stats['error_rate'])
+
+    def order(self, explorer_ids):
+        """
+        Order a list of explorers by their score
+
+        :param explorer_ids: A list of explorer_ids sorted by static priority
+        :return: A new list of explorer_ids sorted by score
+        """
+        with self._lock:
+            scores = {explorer_id: self.score(explorer_id, rank) for rank, explorer_id in enumerate(explorer_ids)}
+
+        return sorted(explorer_ids, key=lambda explorer_id: scores[explorer_id])
+
+    def get_stats(self):
+        """
+        Get the statistics of all explorers
+
+        :return: A dict containing the number of requests and errors, the average latency and the error rate of each explorer
+        """
+        with self._lock:
+            return {explorer_id: dict(stats) for explorer_id, stats in self.stats.items()}
+
+    def reset(self):
+        """
+        Forget all measurements
+        """
+        with self._lock:
+            self.stats = {}
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Persistent, confirmation-aware cache for the results of explorer queries."""
+
+import time
+
+import simplejson
+
+from helpers.loghelpers import LOG
+from helpers.sqlitehelpers import SQLiteDatabase
+
+# Number of confirmations after which a transaction or block is considered final and is cached forever
+FINAL_CONFIRMATIONS = 6
+
+# Number of seconds that volatile data (balances, utxos, the chain tip, ...) stays valid if no new block arrives
+VOLATILE_TTL = 60
+
+# Results of these queries never change once they are final
+IMMUTABLE_QUERIES = ['prime_input_address', 'transaction', 'block', 'block_by_height', 'block_by_hash']
+
+# Results of these queries change whenever a new block is found
+VOLATILE_QUERIES = ['latest_block', 'balance', 'transactions', 'utxos']
+
+
+class QueryCache(SQLiteDatabase):
+    """
+    Cache for the responses of data.query, stored in a SQLite database so it survives restarts
+
+    Deeply confirmed transactions and blocks are cached forever, volatile data like balances, utxos and the chain tip
+    is cached for a short time and is invalidated as soon as a new block is seen.
+
+    :param filename: The filename of the SQLite database
+    :param ttl: The number of seconds volatile data stays valid
+    :param final_confirmations: The number of confirmations after which data is cached forever
+    """
+    def __init__(self, filename, ttl=VOLATILE_TTL, final_confirmations=FINAL_CONFIRMATIONS):
+        super(QueryCache, self).__init__(filename=filename)
+        self.ttl = ttl
+        self.final_confirmations = final_confirmations
+        self.enabled = True
+        self.hits = {}
+        self.misses = {}
+        self._tip_height = None
+
+    def setup(self, connection):
+        """
+        Create the tables of the cache and load the known chain tip
+
+        :param connection: A sqlite3 Connection object
+        """
+        connection.execute('CREATE TABLE IF NOT EXISTS query_cache (key TEXT PRIMARY KEY, query_type TEXT, response TEXT, '
+                           'explorer TEXT, stored_at REAL, expires_at REAL, volatile INTEGER)')
+        connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+
+        row = connection.execute("SELECT value FROM meta WHERE name = 'tip_height'").fetchone()
+        self._tip_height = int(row[0]) if row is not None else None
+
+    @staticmethod
+    def make_key(query_type, param, testnet=False):
+        """
+        Make the key of a query, the same query on testnet and mainnet has a different key
+
+        :param query_type: The type of query
+        :param param: The parameters for the query
+        :param testnet: True if the query is done on testnet (default False)
+        :return: A string
+        """
+        return '%s:%s:%s' % ('testnet' if testnet is True else 'mainnet', query_type, simplejson.dumps(param if param is not None else []))
+
+    def get(self, query_type, param, testnet=False):
+        """
+        Get the cached response of a query
+
+        :param query_type: The type of query
+        :param param: The parameters for the query
+        :param testnet: True if the query is done on testnet (default False)
+        :return: A tuple containing the response and the explorer that gave it, or (None, None) if there is no valid entry
+        """
+        if not self.enabled or query_type not in IMMUTABLE_QUERIES + VOLATILE_QUERIES:
+            return None, None
+
+        try:
+            with self._lock:
+                row = self.connection().execute('SELECT response, explorer, expires_at FROM query_cache WHERE key = ?',
+                                                (self.make_key(query_type, param, testnet),)).fetchone()
+        except Exception as ex:
+            LOG.error('Unable to read from query cache: %s' % ex)
+            return None, None
+
+        if row is None or (row[2] is not None and row[2] <= time.time()):
+            self.misses[query_type] = self.misses.get(query_type, 0) + 1
+            return None, None
+
+        self.hits[query_type] = self.hits.get(query_type, 0) + 1
+        response = simplejson.loads(row[0])
+
+        # Transactions that are cached forever still need an up-to-date number of confirmations
+        if query_type == 'transaction' and self._tip_height is not None:
+            tx = response.get('transaction', {})
+            if isinstance(tx.get('block_height'), int) and tx['block_height'] > 0:
+                tx['confirmations'] = max(tx.get('confirmations', 0), self._tip_height - tx['block_height'] + 1)
+
+        return response, row[1]
+
+    def put(self, query_type, param, response, explorer=None, testnet=False):
+        """
+        Store the response of a query
+
+        :param query_type: The type of query
+        :param param: The parameters for the query
+        :param response: The response of the query (responses containing an error are never cached)
+        :param explorer: The id of the explorer that gave the response
+        :param testnet: True if the query was done on testnet (default False)
+        """
+        if not self.enabled or not isinstance(response, dict) or 'error' in response:
+            return
+
+        if query_type not in IMMUTABLE_QUERIES + VOLATILE_QUERIES:
+            # Pushing a transaction changes balances and utxos
+            if query_type == 'push_tx':
+                self.invalidate_volatile()
+            return
+
+        self.observe_height(self.height_of(query_type, response))
+
+        now = time.time()
+        expires_at = None if self.is_final(query_type, response) else now + self.ttl
+
+        try:
+            with self._lock:
+                self.connection().execute('INSERT OR REPLACE INTO query_cache VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                          (self.make_key(query_type, param, testnet), query_type, simplejson.dumps(response),
+                                           explorer, now, expires_at, 0 if expires_at is None else 1))
+        except Exception as ex:
+            LOG.error('Unable to write to query cache: %s' % ex)
+
+    def is_final(self, query_type, response):
+        """
+        Check if the response of a query will never change anymore
+
+        :param query_type: The type of query
+        :param response: The response of the query
+        :return: True or False
+        """
+        if query_type == 'prime_input_address':
+            # The inputs of a transaction are part of its txid, so they can never change
+            return True
+
+        elif query_type == 'transaction':
+            tx = response.get('transaction', {})
+            return isinstance(tx, dict) and isinstance(tx.get('confirmations'), int) and tx['confirmations'] >= self.final_confirmations
+
+        elif query_type in ['block', 'block_by_height', 'block_by_hash']:
+            height = self.height_of(query_type, response)
+            return height is not None and self._tip_height is not None and self._tip_height - height + 1 >= self.final_confirmations
+
+        return False
+
+    @staticmethod
+    def height_of(query_type, response):
+        """
+        Get the chain tip height implied by the response of a query, or the height of a block
+
+        :param query_type: The type of query
+        :param response: The response of the query
+        :return: A block height or None
+        """
+        if query_type in ['latest_block', 'block', 'block_by_height', 'block_by_hash']:
+            block = response.get('block', {})
+            return block.get('height') if isinstance(block, dict) and isinstance(block.get('height'), int) else None
+
+        elif query_type == 'transaction':
+            tx = response.get('transaction', {})
+            if isinstance(tx, dict) and isinstance(tx.get('block_height'), int) and isinstance(tx.get('confirmations'), int) and tx['confirmations'] > 0:
+                return tx['block_height'] + tx['confirmations'] - 1
+
+    def observe_height(self, height):
+        """
+        Register a block height, if it is higher than the known chain tip then a new block has arrived
+        and all volatile entries are invalidated
+
+        :param height: A block height
+        """
+        if height is None:
+            return
+
+        try:
+            with self._lock:
+                connection = self.connection()
+                if self._tip_height is not None and height <= self._tip_height:
+                    return
+
+                if self._tip_height is not None:
+                    LOG.info('New block %s detected, invalidating volatile query cache entries' % height)
+
+                with connection:
+                    connection.execute('BEGIN')
+                    connection.execute('DELETE FROM query_cache WHERE volatile = 1')
+                    connection.execute("INSERT OR REPLACE INTO meta VALUES ('tip_height', ?)", (str(height),))
+                self._tip_height = height
+        except Exception as ex:
+            LOG.error('Unable to update chain tip in query cache: %s' % ex)
+
+    def invalidate(self, query_type=None, param=None):
+        """
+        Invalidate entries in the cache
+
+        :param query_type: Only invalidate entries of this query type (optional, default all entries)
+        :param param: Only invalidate the entries with these parameters, on testnet and mainnet (optional, requires query_type)
+        """
+        with self._lock:
+            if query_type is None:
+                self.connection().execute('DELETE FROM query_cache')
+            elif param is None:
+                self.connection().execute('DELETE FROM query_cache WHERE query_type = ?', (query_type,))
+            else:
+                self.connection().execute('DELETE FROM query_cache WHERE key IN (?, ?)',
+                                          (self.make_key(query_type, param, False), self.make_key(query_type, param, True)))
+
+    def invalidate_volatile(self):
+        """
+        Invalidate all entries that are not cached forever
+        """
+        with self._lock:
+            self.connection().execute('DELETE FROM query_cache WHERE volatile = 1')
+
+    def stats(self):
+        """
+        Get the hit and miss counters of the cache
+
+        :return: A dict containing the hits and misses per query type and the total number of entries
+        """
+        with self._lock:
+            entries = self.connection().execute('SELECT COUNT(*) FROM query_cache').fetchone()[0]
+
+        return {'enabled': self.enabled,
+                'hits': dict(self.hits),
+                'misses': dict(self.misses),
+                'entries': entries,
+                'tip_height': self._tip_height}
+
+    def reset_stats(self):
+        """
+        Reset the hit and miss counters
+        """
+        self.hits = {}
+        self.misses = {}
+
+    def close(self):
+        """
+        Close the connection to the database
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Token-bucket rate limiter for the requests to an explorer."""
+
+import threading
+import time
+
+
+class TokenBucket(object):
+    """
+    Token bucket that allows on average 'rate' requests per second with bursts of at most 'burst' requests
+
+    :param rate: The number of tokens that are added per second
+    :param burst: The maximum number of tokens in the bucket
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def refill(self):
+        """
+        Add the tokens that were earned since the last update
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self):
+        """
+        Take a token from the bucket without waiting
+
+        :return: True if a token was taken, False if the bucket is empty
+        """
+        with self._lock:
+            self.refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+
+            return False
+
+    def acquire(self):
+        """
+        Take a token from the bucket, waits until a token is available
+
+        :return: The number of seconds that were waited
+        """
+        with self._lock:
+            self.refill()
+            # Reserve the token right away, so concurrent callers queue up behind each other
+            self.tokens -= 1
+            delay = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+            self.waited += delay
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return delay
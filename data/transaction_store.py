@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Local store of the transaction history of addresses, so only new transactions need to be fetched from an explorer."""
+
+import time
+
+import simplejson
+
+from helpers.loghelpers import LOG
+from helpers.sqlitehelpers import SQLiteDatabase
+
+# Number of blocks below the last synced block height that are fetched again on every sync to handle reorgs
+RECHECK_DEPTH = 6
+
+
+class TransactionStore(SQLiteDatabase):
+    """
+    Per-address store of transactions, stored in a SQLite database so it survives restarts
+
+    The first time the transactions of an address are requested, the full history is fetched from an explorer.
+    After that only the transactions above the last synced block height minus the re-check depth are fetched
+    and merged with the stored transactions. All stored transactions above that height are rolled back before
+    merging, so transactions that disappeared because of a reorg are removed.
+
+    :param filename: The filename of the SQLite database
+    :param recheck_depth: The number of blocks that are fetched again on every sync
+    """
+    def __init__(self, filename, recheck_depth=RECHECK_DEPTH):
+        super(TransactionStore, self).__init__(filename=filename)
+        self.recheck_depth = recheck_depth
+        self.enabled = True
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+
+    def setup(self, connection):
+        """
+        Create the tables of the sync state and the transactions of the addresses
+
+        :param connection: A sqlite3 Connection object
+        """
+        connection.execute('CREATE TABLE IF NOT EXISTS address_sync (address TEXT PRIMARY KEY, synced_height INTEGER, '
+                           'last_txid TEXT, synced_at REAL)')
+        connection.execute('CREATE TABLE IF NOT EXISTS address_txs (address TEXT, txid TEXT, block_height INTEGER, '
+                           'tx TEXT, PRIMARY KEY (address, txid))')
+
+    def get_sync_state(self, address):
+        """
+        Get the sync state of an address
+
+        :param address: The address
+        :return: A dict containing the synced_height, last_txid and synced_at or None if the address was never synced
+        """
+        with self._lock:
+            row = self.connection().execute('SELECT synced_height, last_txid, synced_at FROM address_sync WHERE address = ?', (address,)).fetchone()
+
+        if row is not None:
+            return {'synced_height': row[0], 'last_txid': row[1], 'synced_at': row[2]}
+
+    def since_height(self, address):
+        """
+        Get the block height above which the transactions of an address must be fetched again
+
+        :param address: The address
+        :return: A block height or None if the full history must be fetched
+        """
+        if not self.enabled:
+            return
+
+        try:
+            sync_state = self.get_sync_state(address)
+        except Exception as ex:
+            LOG.error('Unable to read from transaction store: %s' % ex)
+            return
+
+        if sync_state is None or sync_state['synced_height'] is None:
+            return
+
+        return max(0, sync_state['synced_height'] - self.recheck_depth)
+
+    @staticmethod
+    def tip_height(transactions):
+        """
+        Get the chain tip height implied by the confirmations of a list of transactions
+
+        :param transactions: A list of transactions
+        :return: A block height or None
+        """
+        heights = [tx['block_height'] + tx['confirmations'] - 1 for tx in transactions
+                   if isinstance(tx.get('block_height'), int) and isinstance(tx.get('confirmations'), int) and tx['confirmations'] > 0]
+
+        return max(heights) if heights else None
+
+    def merge(self, address, since_height, transactions, latest_block_height=None):
+        """
+        Merge newly fetched transactions with the stored transactions of an address
+
+        :param address: The address
+        :param since_height: The block height above which the transactions were fetched (None if the full history was fetched)
+        :param transactions: The fetched transactions
+        :param latest_block_height: The block height of the chain tip (optional, derived from the transactions if not given)
+        :return: A list containing all transactions of the address
+        """
+        if not self.enabled:
+            return transactions
+
+        if latest_block_height is None:
+            latest_block_height = self.tip_height(transactions)
+
+        try:
+            with self._lock:
+                connection = self.connection()
+                sync_state = self.get_sync_state(address)
+
+                if latest_block_height is None and sync_state is not None:
+                    latest_block_height = sync_state['synced_height']
+
+                last_txid = transactions[0]['txid'] if transactions else (sync_state['last_txid'] if sync_state is not None else None)
+
+                with connection:
+                    connection.execute('BEGIN')
+                    # Roll back everything above the re-check height, the explorer just gave the current view of those blocks
+                    if since_height is None:
+                        connection.execute('DELETE FROM address_txs WHERE address = ?', (address,))
+                    else:
+                        connection.execute('DELETE FROM address_txs WHERE address = ? AND (block_height IS NULL OR block_height > ?)', (address, since_height))
+
+                    connection.executemany('INSERT OR REPLACE INTO address_txs VALUES (?, ?, ?, ?)',
+                                           [(address, tx['txid'], tx.get('block_height'), simplejson.dumps(tx)) for tx in transactions
+                                            if since_height is None or tx.get('block_height') is None or tx['block_height'] > since_height])
+                    connection.execute('INSERT OR REPLACE INTO address_sync VALUES (?, ?, ?, ?)', (address, latest_block_height, last_txid, time.time()))
+
+                if since_height is None:
+                    self.full_syncs += 1
+                else:
+                    self.incremental_syncs += 1
+
+                return self.get_transactions(address)
+        except Exception as ex:
+            LOG.error('Unable to write to transaction store: %s' % ex)
+            return transactions
+
+    def get_transactions(self, address):
+        """
+        Get the stored transactions of an address, the confirmations are updated to the last synced block height
+
+        :param address: The address
+        :return: A list of transactions
+        """
+        with self._lock:
+            sync_state = self.get_sync_state(address)
+            rows = self.connection().execute('SELECT tx FROM address_txs WHERE address = ?', (address,)).fetchall()
+
+        synced_height = sync_state['synced_height'] if sync_state is not None else None
+
+        transactions = []
+        for row in rows:
+            tx = simplejson.loads(row[0])
+            if synced_height is not None and isinstance(tx.get('block_height'), int):
+                tx['confirmations'] = max(tx.get('confirmations', 0), synced_height - tx['block_height'] + 1)
+            transactions.append(tx)
+
+        return transactions
+
+    def invalidate(self, address=None):
+        """
+        Forget the transactions of an address, the full history will be fetched again on the next sync
+
+        :param address: The address (optional, default all addresses)
+        """
+        with self._lock:
+            connection = self.connection()
+            with connection:
+                connection.execute('BEGIN')
+                if address is None:
+                    connection.execute('DELETE FROM address_txs')
+                    connection.execute('DELETE FROM address_sync')
+                else:
+                    connection.execute('DELETE FROM address_txs WHERE address = ?', (address,))
+                    connection.execute('DELETE FROM address_sync WHERE address = ?', (address,))
+
+    def stats(self):
+        """
+        Get statistics about the store
+
+        :return: A dict containing the number of addresses and transactions and the number of full and incremental syncs
+        """
+        with self._lock:
+            addresses = self.connection().execute('SELECT COUNT(*) FROM address_sync').fetchone()[0]
+            transactions = self.connection().execute('SELECT COUNT(*) FROM address_txs').fetchone()[0]
+
+        return {'enabled': self.enabled,
+                'addresses': addresses,
+                'transactions': transactions,
+                'full_syncs': self.full_syncs,
+                'incremental_syncs': self.incremental_syncs}
+
+    def close(self):
+        """
+        Close the connection to the database
+        """
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
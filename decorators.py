@@ -9,7 +9,7 @@ from bottle import request
 from configparser import ConfigParser
 from functools import wraps
 
-from authentication import check_authentication, AuthenticationStatus
+from authentication import check_authentication, AuthenticationStatus, SIGNATURE_VERSION_HEADER
 from data.data import set_explorer, clear_explorer, get_last_explorer
 from helpers.loghelpers import LOG
 
@@ -26,7 +26,11 @@ def authentication_required(f):
 
     def decorated_function(*args, **kwargs):
         """Execute the decorated function if authentication succeeds."""
-        authentication_status = check_authentication(request.headers, request.json)
+        if request.headers.get(SIGNATURE_VERSION_HEADER) == '2':
+            # The signature is checked over the raw body, so the json data does not need to be parsed and encoded again
+            authentication_status = check_authentication(request.headers, None, body=request.body)
+        else:
+            authentication_status = check_authentication(request.headers, request.json)
         if authentication_status == AuthenticationStatus.OK:
             return f(*args, **kwargs)
         else:
@@ -37,8 +41,8 @@ def authentication_required(f):
 
 def use_explorer(f):
     """
-    Decorator that sets the specified explorer (if one is given) as a global variable before a request is executed
-    and sets the global variable back to None at the end
+    Decorator that sets the specified explorer (if one is given) for the thread that handles the request before the
+    request is executed and clears it again at the end
 
     :param f: The function that requires an explorer
     :return: The result of the function
@@ -48,12 +52,17 @@ def use_explorer(f):
         """Set explorer, execute function, and append explorer info to the result."""
         if request.query.explorer != '':
             set_explorer(request.query.explorer)
+        else:
+            # Threads of the webserver handle many requests, don't use the explorer of a previous request
+            clear_explorer()
 
-        ret = f(*args, **kwargs)
-        if isinstance(ret, dict):
-            ret['explorer'] = get_last_explorer()
+        try:
+            ret = f(*args, **kwargs)
+            if isinstance(ret, dict):
+                ret['explorer'] = get_last_explorer()
+        finally:
+            clear_explorer()
 
-        clear_explorer()
         return ret
 
     return decorated_function
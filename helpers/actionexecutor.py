@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Worker pool that runs the actions of activated triggers."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from action.actiontype import ActionType
+from helpers.loghelpers import LOG
+
+MAX_WORKERS = 8  # Number of actions that can run at the same time
+MAX_QUEUE = 64  # Number of actions that can be queued or running before submitting blocks
+ACTION_TIMEOUT = 300  # Seconds an action can run before it is considered failed
+SMOOTHING = 0.2  # Weight of a new measurement in the moving average of the latency
+
+
+class ActionJob(object):
+    """
+    A single action that was submitted to the ActionExecutor
+
+    :param action: An Action object
+    """
+    def __init__(self, action):
+        self.action = action
+        self.future = None
+        self.started = None
+
+
+class ActionExecutor(object):
+    """
+    Runs actions on a pool of worker threads
+
+    The actions of a trigger run one after another by default. If the trigger has parallel_actions enabled, actions
+    only wait for the actions listed in their depends_on, so independent actions (like sending a mail and calling a
+    webhook) run at the same time. SendTransaction actions are always run last, one at a time and only when all
+    other actions succeeded, so funds are never sent when one of the other actions failed.
+
+    An action that fails, raises an exception or runs longer than the timeout stops all actions that depend on it.
+    SendTransaction actions never time out: a worker thread can not be interrupted, so an abandoned transaction could
+    still be broadcast after the trigger was marked as failed or re-armed, and then be sent again at the next check.
+    The number of queued and running actions and the latency and failures per action type are kept for monitoring.
+
+    :param max_workers: The number of worker threads
+    :param max_queue: The maximum number of queued and running actions, submitting more actions blocks until one finishes
+    :param timeout: The number of seconds an action can run before it is considered failed
+    """
+    def __init__(self, max_workers=MAX_WORKERS, max_queue=MAX_QUEUE, timeout=ACTION_TIMEOUT):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.queued = 0
+        self.running = 0
+        self.stats = {}
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """The thread pool, it is created when the first action is submitted."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ActionExecutor')
+            return self._pool
+
+    def submit(self, action):
+        """
+        Queue an action to run on the thread pool
+
+        :param action: An Action object
+        :return: An ActionJob
+        """
+        job = ActionJob(action=action)
+        self._slots.acquire()
+        with self._lock:
+            self.queued += 1
+
+        try:
+            job.future = self.pool.submit(self._run, job)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+
+        return job
+
+    def _run(self, job):
+        """Run an action on a worker thread and record its latency and result."""
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        job.started = time.monotonic()
+
+        try:
+            success = bool(job.action.run())
+        except Exception as ex:
+            LOG.error('Action %s raised an exception: %s' % (job.action.id, ex))
+            success = False
+
+        latency = time.monotonic() - job.started
+        with self._lock:
+            self.running -= 1
+            self.record(action_type=job.action.action_type, latency=latency, success=success, timeout=latency > self.timeout)
+        self._slots.release()
+
+        return success
+
+    def record(self, action_type, latency, success, timeout=False):
+        """
+        Record the result of an action, must be called while holding the lock
+
+        :param action_type: The type of the action
+        :param latency: The number of seconds the action took
+        :param success: True if the action was successful, False otherwise
+        :param timeout: True if the action took longer than the timeout
+        """
+        if action_type not in self.stats:
+            self.stats[action_type] = {'runs': 0, 'failures': 0, 'timeouts': 0, 'latency': latency, 'max_latency': 0.0}
+
+        stats = self.stats[action_type]
+        stats['runs'] += 1
+        stats['failures'] += 0 if success and not timeout else 1
+        stats['timeouts'] += 1 if timeout else 0
+        stats['latency'] += SMOOTHING * (latency - stats['latency'])
+        stats['max_latency'] = max(stats['max_latency'], latency)
+
+    def get_stats(self):
+        """
+        Get the queue depth and the statistics per action type
+
+        :return: A dict containing the statistics
+        """
+        with self._lock:
+            return {'queued': self.queued,
+                    'running': self.running,
+                    'max_workers': self.max_workers,
+                    'timeout': self.timeout,
+                    'action_types': {str(action_type): dict(stats) for action_type, stats in self.stats.items()}}
+
+    @staticmethod
+    def get_dependencies(actions, parallel):
+        """
+        Get the actions each action has to wait for
+
+        Actions are referred to by their position in the list, so the same action can be used twice in a trigger.
+
+        :param actions: A list of Action objects, SendTransaction actions excluded
+        :param parallel: If False, each action waits for the previous one
+        :return: A list containing the set of positions each action waits for
+        """
+        if parallel is not True:
+            return [{i - 1} if i > 0 else set() for i in range(len(actions))]
+
+        positions = {}
+        for i, action in enumerate(actions):
+            positions.setdefault(action.id, set()).add(i)
+
+        dependencies = []
+        for i, action in enumerate(actions):
+            depends_on = action.depends_on if isinstance(getattr(action, 'depends_on', None), list) else []
+            waits_for = set()
+            for action_id in depends_on:
+                if action_id not in positions:
+                    LOG.warning('Action %s depends on action %s which is not part of the trigger' % (action.id, action_id))
+                waits_for.update(positions.get(action_id, set()) - {i})
+            dependencies.append(waits_for)
+
+        return dependencies
+
+    def run_actions(self, actions, parallel=False):
+        """
+        Run the actions of a trigger
+
+        :param actions: A list of Action objects
+        :param parallel: Run actions that do not depend on each other at the same time
+        :return: True if all actions were successful, False otherwise
+        """
+        barrier = [action for action in actions if action.action_type == ActionType.SENDTRANSACTION]
+        actions = [action for action in actions if action.action_type != ActionType.SENDTRANSACTION]
+
+        if not self.run_graph(actions=actions, dependencies=self.get_dependencies(actions=actions, parallel=parallel)):
+            return False
+
+        # SendTransaction actions are a serialized barrier after all other actions
+        for action in barrier:
+            if not self.run_graph(actions=[action], dependencies=[set()]):
+                return False
+
+        return True
+
+    def run_graph(self, actions, dependencies):
+        """
+        Run actions as soon as all actions they depend on were successful
+
+        :param actions: A list of Action objects
+        :param dependencies: A list containing the set of positions in the list of actions each action waits for
+        :return: True if all actions were successful, False otherwise
+        """
+        pending = set(range(len(actions)))
+        succeeded = set()
+        jobs = {}
+        all_successful = True
+
+        while pending or jobs:
+            if all_successful:
+                for i in sorted(i for i in pending if dependencies[i] <= succeeded):
+                    LOG.info('Running action %s: %s' % (i + 1, actions[i].id))
+                    pending.remove(i)
+                    jobs[i] = self.submit(actions[i])
+
+            if not jobs:
+                # Nothing is running anymore, the remaining actions depend on a failed action or on each other
+                for i in sorted(pending):
+                    LOG.error('Action %s was not run because the actions it depends on did not succeed' % actions[i].id)
+                return False
+
+            done, _ = wait([job.future for job in jobs.values()], timeout=self.time_left(jobs.values()), return_when=FIRST_COMPLETED)
+
+            for i, job in list(jobs.items()):
+                if job.future in done:
+                    del jobs[i]
+                    if job.future.result() is True:
+                        succeeded.add(i)
+                    else:
+                        LOG.error('Action %s failed' % actions[i].id)
+                        all_successful = False
+
+                elif self.can_time_out(job) and time.monotonic() - job.started > self.timeout:
+                    # A worker thread can not be interrupted, the action is abandoned and counted as a timeout when it finishes
+                    LOG.error('Action %s did not finish within %s seconds' % (actions[i].id, self.timeout))
+                    del jobs[i]
+                    all_successful = False
+
+        return all_successful
+
+    @staticmethod
+    def can_time_out(job):
+        """
+        Check if a job is running and can be abandoned when it reaches the timeout
+
+        :param job: An ActionJob
+        :return: True or False
+        """
+        return job.started is not None and job.action.action_type != ActionType.SENDTRANSACTION
+
+    def time_left(self, jobs):
+        """Get the number of seconds until the first of the started jobs reaches the timeout."""
+        started = [job.started for job in jobs if self.can_time_out(job)]
+        if not started:
+            # Check again shortly, a queued job might have started in the meantime
+            return 1.0
+
+        return max(0.0, min(started) + self.timeout - time.monotonic())
+
+    def shutdown(self):
+        """Stop the worker threads after the queued actions have finished."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+ACTION_EXECUTOR = ActionExecutor()
@@ -2,22 +2,17 @@
 # -*- coding: utf-8 -*-
 """Helper functions for creating, configuring, and running actions."""
 
-import glob
-import os
-
 from action.actiontype import ActionType
 from action.commandaction import CommandAction
 from action.spawnprocessaction import SpawnProcessAction
 from action.launchevolveraction import LaunchEvolverAction
-from helpers.jsonhelpers import load_from_json_file
+from helpers.storagehelpers import ACTION_STORE
 from action.revealsecretaction import RevealSecretAction
 from action.sendmailaction import SendMailAction
 from action.sendtransactionaction import SendTransactionAction
 from action.webhookaction import WebhookAction
 from action.deletetriggeraction import DeleteTriggerAction
-
-
-ACTIONS_DIR = 'json/public/actions'
+from helpers.actionexecutor import ACTION_EXECUTOR
 
 
 def get_actions():
@@ -26,9 +21,7 @@ def get_actions():
 
     :return: A list of action_ids
     """
-    actions = glob.glob(os.path.join(ACTIONS_DIR, '*.json'))
-
-    return [os.path.splitext(os.path.basename(action))[0] for action in actions]
+    return ACTION_STORE.ids()
 
 
 def get_action_config(action_id):
@@ -38,13 +31,10 @@ def get_action_config(action_id):
     :param action_id: id of the action
     :return: a dict containing the configuration of the action
     """
-    try:
-        action_config = load_from_json_file(os.path.join(ACTIONS_DIR, '%s.json' % action_id))
-    except IOError:
-        # Action does not exist yet, return empty dict
-        action_config = {}
+    action_config = ACTION_STORE.load(action_id)
 
-    return action_config
+    # Return an empty dict if the action does not exist yet
+    return action_config if action_config is not None else {}
 
 
 def get_action(action_id, action_type=None):
@@ -117,10 +107,7 @@ def delete_action(action_id):
 
     :param action_id: The id of the action to delete
     """
-    filename = os.path.join(ACTIONS_DIR, '%s.json' % action_id)
-    if os.path.isfile(filename):
-        os.remove(filename)
-    else:
+    if not ACTION_STORE.delete(action_id):
         return {'error': 'Unknown action id: %s' % action_id}
 
 
@@ -134,6 +121,15 @@ def run_action(action_id):
     return action.run()
 
 
+def action_stats():
+    """
+    Get the statistics of the actions that were run by triggers
+
+    :return: A dict containing the number of queued and running actions and the runs, failures and latency per action type
+    """
+    return ACTION_EXECUTOR.get_stats()
+
+
 def get_reveal(action_id):
     """
     Get a revealed text and/or link from a RevealSecret Action.
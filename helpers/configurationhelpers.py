@@ -69,6 +69,51 @@ def get_websocket_port():
     return spellbook_config().get('RESTAPI', 'websocket_port')
 
 
+def get_server_threads():
+    """Get the number of threads of the webserver from the configuration (default: 10)."""
+    return spellbook_config().getint('RESTAPI', 'threads', fallback=10)
+
+
+def get_server_workers():
+    """Get the number of webserver processes from the configuration (default: 1)."""
+    return spellbook_config().getint('RESTAPI', 'workers', fallback=1)
+
+
+def get_preload_scripts():
+    """Get whether the scripts of active triggers are imported at startup from the configuration (default: false)."""
+    return spellbook_config().getboolean('RESTAPI', 'preload_scripts', fallback=False)
+
+
+def get_access_log_verbose():
+    """Get whether all headers and JSON body keys of each request are logged from the configuration (default: false)."""
+    return spellbook_config().getboolean('RESTAPI', 'access_log_verbose', fallback=False)
+
+
+def get_access_log_body_size():
+    """Get the maximum number of characters of a request body in the requests log from the configuration (default: 256)."""
+    return spellbook_config().getint('RESTAPI', 'access_log_body_size', fallback=256)
+
+
+def get_access_log_sample_rate():
+    """Get the fraction of successful requests that is logged from the configuration (default: 1.0)."""
+    return spellbook_config().getfloat('RESTAPI', 'access_log_sample_rate', fallback=1.0)
+
+
+def get_storage_backend():
+    """Get where the triggers and actions are stored (files or sqlite) from the configuration (default: files)."""
+    return spellbook_config().get('RESTAPI', 'storage_backend', fallback='files')
+
+
+def get_compact_json():
+    """Get whether json files are written without indentation from the configuration (default: false)."""
+    return spellbook_config().getboolean('RESTAPI', 'compact_json', fallback=False)
+
+
+def get_fsync_policy():
+    """Get the fsync policy for saved json files (never, file or always) from the configuration (default: never)."""
+    return spellbook_config().get('RESTAPI', 'fsync', fallback='never')
+
+
 @verify_config('Authentication', 'key')
 def get_key():
     """Get the API authentication key from the configuration."""
@@ -105,6 +150,36 @@ def get_use_testnet():
     return True if spellbook_config().get('Wallet', 'use_testnet') in ['True', 'true'] else False
 
 
+def get_wallet_idle_timeout():
+    """Get the number of seconds after which an unused hot wallet is locked again from the configuration (default: 300)."""
+    return spellbook_config().getint('Wallet', 'idle_timeout', fallback=300)
+
+
+def get_wallet_gap_limit():
+    """Get the number of unused addresses of each chain of the hot wallet that are kept in the address index from the configuration (default: 20)."""
+    return spellbook_config().getint('Wallet', 'gap_limit', fallback=20)
+
+
+def get_enable_listener():
+    """Get whether the transaction listener runs inside the server from the configuration (default: false)."""
+    return spellbook_config().getboolean('Listener', 'enable_listener', fallback=False)
+
+
+def get_max_watched_addresses():
+    """Get the maximum number of addresses the transaction listener watches from the configuration (default: 100000)."""
+    return spellbook_config().getint('Listener', 'max_watched_addresses', fallback=100000)
+
+
+def get_listener_backend():
+    """Get the name of the backend the transaction listener gets new transactions and blocks from, from the configuration (default: blockio)."""
+    return spellbook_config().get('Listener', 'backend', fallback='blockio')
+
+
+def get_listener_backend_url():
+    """Get the url of the backend of the transaction listener from the configuration, None for the default url of the backend."""
+    return spellbook_config().get('Listener', 'backend_url', fallback='') or None
+
+
 @verify_config('Transactions', 'max_tx_fee_percentage')
 def get_max_tx_fee_percentage():
     """Get the maximum transaction fee percentage from the configuration."""
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""An in-process bus for the address, transaction and block events of the transaction listener."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers.loghelpers import LOG
+
+# The topics of the bus: a transaction of an address, a transaction with a txid and a new block
+ADDRESS = 'address'
+TXID = 'txid'
+BLOCK = 'block'
+TOPICS = [ADDRESS, TXID, BLOCK]
+
+# The maximum number of subscriptions and the maximum number of events that wait for a single delivery
+MAX_SUBSCRIPTIONS = 100000
+MAX_COALESCED_EVENTS = 100
+DELIVERY_WORKERS = 4
+
+
+class EventBus(object):
+    """
+    Delivers the events of the transaction listener to the parts of the spellbook that subscribed to them
+
+    A subscriber subscribes to a key of a topic: an address, a txid, or None for the new blocks. Publishing an event
+    without subscribers is a single dict lookup, so the listener can publish every event it sees. The callbacks run on a
+    small pool of threads and get the topic, the key and a list of events. While a delivery waits for a thread, new
+    events for the same subscriber and key are added to it instead of queueing another delivery, so a burst of events
+    only causes one call of a slow callback (a trigger that queries an explorer, for example).
+
+    :param workers: The number of threads that run the callbacks
+    :param max_subscriptions: The maximum number of subscriptions
+    """
+    def __init__(self, workers=DELIVERY_WORKERS, max_subscriptions=MAX_SUBSCRIPTIONS):
+        self.workers = workers
+        self.max_subscriptions = max_subscriptions
+        self.topics = {topic: {} for topic in TOPICS}
+        self.subscribers = {}
+        self.pending = {}
+        self.count = 0
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._executor = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.count
+
+    def subscribe(self, topic, key, subscriber, callback, timeout=None, once=False):
+        """
+        Subscribe to the events of a key, an existing subscription of the same subscriber is replaced
+
+        :param topic: ADDRESS, TXID or BLOCK
+        :param key: The address or the txid, None for the new blocks
+        :param subscriber: The id of the subscriber
+        :param callback: The function to call with the topic, the key and a list of events
+        :param timeout: The number of seconds after which the subscription is removed (optional)
+        :param once: Remove the subscription after the first event
+        :return: True if subscribed, False if the bus is full
+        """
+        if topic not in TOPICS:
+            raise ValueError('Unknown topic %s, must be one of %s' % (topic, TOPICS))
+
+        expires = time.time() + timeout if timeout is not None else None
+        with self._lock:
+            subscriptions = self.topics[topic].setdefault(key, {})
+            if subscriber not in subscriptions:
+                if self.count >= self.max_subscriptions:
+                    LOG.warning('Event bus has the maximum of %s subscriptions, %s can not subscribe to %s %s' % (self.max_subscriptions, subscriber, topic, key))
+                    if not subscriptions:
+                        del self.topics[topic][key]
+                    return False
+                self.count += 1
+
+            subscriptions[subscriber] = (callback, expires, once)
+            self.subscribers.setdefault(subscriber, set()).add((topic, key))
+
+        return True
+
+    def unsubscribe(self, subscriber, topic=None, key=None):
+        """
+        Remove the subscriptions of a subscriber
+
+        :param subscriber: The id of the subscriber
+        :param topic: Only remove the subscriptions to this topic (optional)
+        :param key: Only remove the subscription to this key, requires topic (optional)
+        :return: The number of removed subscriptions
+        """
+        with self._lock:
+            keys = [(subscribed_topic, subscribed_key) for subscribed_topic, subscribed_key in self.subscribers.get(subscriber, [])
+                    if (topic is None or subscribed_topic == topic) and (key is None or subscribed_key == key)]
+            for subscribed_topic, subscribed_key in keys:
+                subscriptions = self.topics[subscribed_topic][subscribed_key]
+                del subscriptions[subscriber]
+                if not subscriptions:
+                    del self.topics[subscribed_topic][subscribed_key]
+
+                self.subscribers[subscriber].discard((subscribed_topic, subscribed_key))
+                self.count -= 1
+
+            if not self.subscribers.get(subscriber, True):
+                del self.subscribers[subscriber]
+
+        return len(keys)
+
+    def subscribed(self, topic):
+        """
+        Get the keys of a topic that have subscribers, as a dict so a key is found with a single lookup
+
+        :param topic: ADDRESS, TXID or BLOCK
+        :return: A dict with the keys
+        """
+        return self.topics[topic]
+
+    def publish(self, topic, key, **event):
+        """
+        Deliver an event to the subscribers of its key
+
+        :param topic: ADDRESS, TXID or BLOCK
+        :param key: The address or the txid, None for a new block
+        :param event: The data of the event
+        :return: The number of new deliveries, an event that is added to a waiting delivery is not counted
+        """
+        if key not in self.topics[topic]:
+            return 0
+
+        now = time.time()
+        deliveries = []
+        with self._lock:
+            self.published += 1
+            for subscriber, (callback, expires, once) in list(self.topics[topic].get(key, {}).items()):
+                if expires is not None and expires <= now:
+                    self.unsubscribe(subscriber, topic=topic, key=key)
+                    continue
+
+                if once is True:
+                    self.unsubscribe(subscriber, topic=topic, key=key)
+
+                delivery = (subscriber, topic, key)
+                if delivery in self.pending:
+                    if len(self.pending[delivery]) < MAX_COALESCED_EVENTS:
+                        self.pending[delivery].append(event)
+                        self.coalesced += 1
+                    else:
+                        self.dropped += 1
+                    continue
+
+                self.pending[delivery] = [event]
+                deliveries.append((delivery, callback))
+
+            if deliveries and self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='EventBus')
+
+        for delivery, callback in deliveries:
+            self._executor.submit(self.deliver, delivery, callback)
+
+        return len(deliveries)
+
+    def deliver(self, delivery, callback):
+        """
+        Call the function of a subscriber with the events that are waiting for it
+
+        :param delivery: A tuple containing the subscriber, the topic and the key
+        :param callback: The function
+        """
+        # Events that arrive while the callback runs are delivered again, the callback might have missed them
+        with self._lock:
+            events = self.pending.pop(delivery, [])
+            self.delivered += len(events)
+
+        subscriber, topic, key = delivery
+        try:
+            callback(topic, key, events)
+        except Exception as ex:
+            LOG.error('Event bus callback of %s for %s %s failed: %s' % (subscriber, topic, key, ex))
+
+    def expire(self, now=None):
+        """
+        Remove the subscriptions that are expired
+
+        :param now: The current time (optional)
+        :return: The number of removed subscriptions
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            for topic, keys in self.topics.items():
+                for key, subscriptions in list(keys.items()):
+                    for subscriber in [subscriber for subscriber, (_, expires, _) in subscriptions.items() if expires is not None and expires <= now]:
+                        removed += self.unsubscribe(subscriber, topic=topic, key=key)
+
+        return removed
+
+    def after_fork(self):
+        """The callbacks of the subscribers only run in the process that subscribed them."""
+        self._lock = threading.RLock()
+        self._executor = None
+        self.topics = {topic: {} for topic in TOPICS}
+        self.subscribers = {}
+        self.pending = {}
+        self.count = 0
+
+    def stats(self):
+        """
+        Get the number of subscriptions and the number of published, delivered and coalesced events
+
+        :return: A dict
+        """
+        with self._lock:
+            return {'subscriptions': len(self),
+                    'addresses': len(self.topics[ADDRESS]),
+                    'txids': len(self.topics[TXID]),
+                    'block_subscribers': len(self.topics[BLOCK].get(None, {})),
+                    'published': self.published,
+                    'delivered': self.delivered,
+                    'coalesced': self.coalesced,
+                    'dropped': self.dropped,
+                    'pending': len(self.pending)}
+
+
+EVENT_BUS = EventBus()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=EVENT_BUS.after_fork)
@@ -2,17 +2,35 @@
 # -*- coding: utf-8 -*-
 """Helper functions for managing the encrypted hot wallet (keys, addresses, seeds)."""
 
+import ctypes
+import hashlib
 import os
 import getpass
+import threading
+import time
+from collections import OrderedDict
+
 import simplejson
 
 from AESCipher import AESCipher
-from bips.BIP44 import get_address_from_xpub, get_addresses_from_xpub, get_xpriv_key, get_xpub_key, get_private_key
+from bips.BIP32 import bip32_ckd, bip32_privtopub
+from bips.BIP44 import get_account_xpriv_key, get_address_from_chain_key, get_private_key_from_chain_key
 from helpers.configurationhelpers import get_wallet_dir, get_default_wallet
+from helpers.sqlitehelpers import SQLiteDatabase
 from bips.BIP39 import get_seed
 
 HOT_WALLET_PASSWORD = None
 
+# Seconds after the last use at which an unlocked wallet session is locked again
+WALLET_IDLE_TIMEOUT = 300
+
+# The maximum number of derived addresses that are kept in memory
+ADDRESS_CACHE_SIZE = 10000
+
+# The reverse index of the addresses of the hot wallet, and the number of unused addresses it contains after the last used one
+ADDRESS_INDEX_FILE = 'json/private/address_index.db'
+GAP_LIMIT = 20
+
 
 def get_hot_wallet():
     """Decrypt and return the hot wallet data, prompting for password if needed."""
@@ -47,89 +65,526 @@ def prompt_decryption_password():
     HOT_WALLET_PASSWORD = getpass.getpass('Enter the password to decrypt the hot wallet: ')
 
 
+def set_memory_lock(buffer, locked):
+    """
+    Lock a bytearray in memory so it is never written to swap, or unlock it again
+
+    This uses mlock/munlock of the C library, on platforms without them (Windows) nothing is locked.
+
+    :param buffer: A bytearray
+    :param locked: True to lock the memory, False to unlock it
+    :return: True if the call succeeded, False otherwise
+    """
+    if len(buffer) == 0:
+        return False
+
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        function = libc.mlock if locked is True else libc.munlock
+        address = ctypes.addressof(ctypes.c_char.from_buffer(buffer))
+        return function(ctypes.c_void_p(address), ctypes.c_size_t(len(buffer))) == 0
+    except (OSError, AttributeError, TypeError):
+        return False
+
+
+class SecretBuffer(object):
+    """
+    Secret bytes in a bytearray that is locked in memory and overwritten with zeros when the secret is no longer needed
+
+    :param data: The secret bytes
+    """
+    def __init__(self, data):
+        self.value = bytearray(data)
+        self.locked = set_memory_lock(self.value, locked=True)
+
+    def wipe(self):
+        """
+        Overwrite the secret with zeros and unlock its memory
+        """
+        self.value[:] = bytes(len(self.value))
+        if self.locked is True:
+            set_memory_lock(self.value, locked=False)
+            self.locked = False
+
+
+class LRUCache(object):
+    """
+    A dict with a maximum size, the least recently used items are removed first
+
+    :param maxsize: The maximum number of items
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Get an item and mark it as recently used
+
+        :param key: The key of the item
+        :param default: The value if the item is not in the cache
+        :return: The value of the item
+        """
+        with self._lock:
+            try:
+                self.items.move_to_end(key)
+            except KeyError:
+                return default
+
+            return self.items[key]
+
+    def put(self, key, value):
+        """
+        Add an item, the least recently used item is removed if the cache is full
+
+        :param key: The key of the item
+        :param value: The value of the item
+        """
+        with self._lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            if len(self.items) > self.maxsize:
+                self.items.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all items
+        """
+        with self._lock:
+            self.items.clear()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class WalletSession(object):
+    """
+    The hot wallet, decrypted once and kept in memory until it has not been used for a while
+
+    Unlocking decrypts the wallet file and derives the BIP39 seed (2048 rounds of PBKDF2) once. The seed is kept in a
+    SecretBuffer, the xpriv keys of the accounts and the private keys of the addresses are derived from it when they are
+    needed and kept until the session is locked (the private keys in an LRU cache). Locking wipes the seed and forgets all
+    private keys; the next use unlocks the wallet again with the password that was entered when the server started.
+
+    The xpub keys and the addresses that were derived are public, they are kept when the session is locked (the addresses
+    in an LRU cache), so looking up an address or an account that was seen before does not need to unlock the wallet.
+
+    :param idle_timeout: Seconds after the last use at which the session is locked, 0 never locks it
+    :param cache_size: The maximum number of addresses and of private keys in the caches
+    """
+    def __init__(self, idle_timeout=WALLET_IDLE_TIMEOUT, cache_size=ADDRESS_CACHE_SIZE):
+        self.idle_timeout = idle_timeout
+        self.unlocked = False
+        self.seed = None
+        self.single_keys = {}
+        self.xprivs = {}
+        self.private_keys = LRUCache(maxsize=cache_size)
+        self.xpubs = {}
+        self.addresses = LRUCache(maxsize=cache_size)
+        self.unlocks = 0
+        self.last_used = 0.0
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def configure(self, idle_timeout):
+        """
+        Set the idle timeout of the session
+
+        :param idle_timeout: Seconds after the last use at which the session is locked, 0 never locks it
+        """
+        self.idle_timeout = idle_timeout
+
+    def unlock(self):
+        """
+        Decrypt the hot wallet and derive the seed, unless the session is already unlocked
+        """
+        with self._lock:
+            if self.unlocked is False:
+                hot_wallet = get_hot_wallet()
+                if 'mnemonic' in hot_wallet:
+                    self.seed = SecretBuffer(get_seed(mnemonic=' '.join(hot_wallet['mnemonic']), passphrase=hot_wallet['passphrase']))
+                self.single_keys = {key: value for key, value in hot_wallet.items() if key not in ['mnemonic', 'passphrase']}
+
+                # Explicitly delete the local variable hot wallet from memory as soon as possible for security reasons
+                del hot_wallet
+
+                self.unlocked = True
+                self.unlocks += 1
+
+            self.touch()
+
+    def lock(self):
+        """
+        Wipe the seed and forget the private keys, the public keys and addresses are kept
+        """
+        with self._lock:
+            if self.seed is not None:
+                self.seed.wipe()
+            self.seed = None
+            self.single_keys = {}
+            self.xprivs = {}
+            self.private_keys.clear()
+            self.unlocked = False
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def clear(self):
+        """
+        Lock the session and also forget the public keys and addresses, for example when another wallet is used
+        """
+        with self._lock:
+            self.lock()
+            self.xpubs = {}
+            self.addresses.clear()
+
+    def after_fork(self):
+        """
+        Lock the copy of the session in a forked process, the timer thread of the parent does not exist in the child
+        """
+        self._lock = threading.RLock()
+        self._timer = None
+        self.lock()
+
+    def touch(self):
+        """
+        Remember the time of the last use and make sure the session is locked when it stays unused
+        """
+        self.last_used = time.monotonic()
+        if self.idle_timeout > 0 and self._timer is None:
+            self._start_timer(self.idle_timeout)
+
+    def _start_timer(self, delay):
+        self._timer = threading.Timer(delay, self._check_idle)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _check_idle(self):
+        """
+        Lock the session if it was not used during the idle timeout, otherwise check again when it would expire
+        """
+        with self._lock:
+            self._timer = None
+            if self.unlocked is False:
+                return
+
+            idle = time.monotonic() - self.last_used
+            if idle >= self.idle_timeout:
+                self.lock()
+            else:
+                self._start_timer(self.idle_timeout - idle)
+
+    def get_seed(self):
+        """
+        Get the BIP39 seed of the wallet
+
+        :return: The seed as bytes
+        """
+        with self._lock:
+            self.unlock()
+            if self.seed is None:
+                raise Exception('The hot wallet does not contain a mnemonic')
+
+            return bytes(self.seed.value)
+
+    def get_single_keys(self):
+        """
+        Get the private keys of the single addresses in the wallet
+
+        :return: A dict with the addresses as keys and the private keys as values
+        """
+        with self._lock:
+            self.unlock()
+            return dict(self.single_keys)
+
+    def get_xpriv_key(self, account, change=None):
+        """
+        Get the xpriv key of an account, or of the receiving or change chain of the account
+
+        :param account: The number of the account
+        :param change: 0 for the receiving chain, 1 for the change chain (optional)
+        :return: The xpriv key
+        """
+        with self._lock:
+            self.unlock()
+            if self.seed is None:
+                raise Exception('The hot wallet does not contain a mnemonic')
+
+            if account not in self.xprivs:
+                self.xprivs[account] = get_account_xpriv_key(seed=self.seed.value, account=account)
+
+            if change is None:
+                return self.xprivs[account]
+
+            if (account, change) not in self.xprivs:
+                self.xprivs[(account, change)] = bip32_ckd(self.xprivs[account], change)
+
+            return self.xprivs[(account, change)]
+
+    def get_xpub_key(self, account, change=None):
+        """
+        Get the xpub key of an account, or of the receiving or change chain of the account
+
+        :param account: The number of the account
+        :param change: 0 for the receiving chain, 1 for the change chain (optional)
+        :return: The xpub key
+        """
+        if account not in self.xpubs:
+            self.xpubs[account] = bip32_privtopub(self.get_xpriv_key(account))
+
+        if change is None:
+            return self.xpubs[account]
+
+        if (account, change) not in self.xpubs:
+            self.xpubs[(account, change)] = bip32_ckd(self.xpubs[account], change)
+
+        return self.xpubs[(account, change)]
+
+    def get_address(self, account, index, change=0):
+        """
+        Get the address of an account at an index
+
+        :param account: The number of the account
+        :param index: The index of the address
+        :param change: 0 for a receiving address, 1 for a change address
+        :return: The address
+        """
+        key = (account, change, index)
+        address = self.addresses.get(key)
+        if address is None:
+            address = get_address_from_chain_key(self.get_xpub_key(account, change=change), index)
+            self.addresses.put(key, address)
+
+        return address
+
+    def get_private_key(self, account, index, change=0):
+        """
+        Get the private key of the address of an account at an index
+
+        :param account: The number of the account
+        :param index: The index of the address
+        :param change: 0 for a receiving address, 1 for a change address
+        :return: A dict with the address as the key and the private key as the value
+        """
+        key = (account, change, index)
+        with self._lock:
+            private_key = self.private_keys.get(key) if self.unlocked is True else None
+            if private_key is None:
+                private_key = get_private_key_from_chain_key(self.get_xpriv_key(account, change=change), index)
+                self.private_keys.put(key, private_key)
+            else:
+                self.touch()
+
+        return dict(private_key)
+
+    def find_account(self, xpub, n=20):
+        """
+        Find the account of an xpub key
+
+        :param xpub: The xpub key
+        :param n: The number of accounts to search
+        :return: The number of the account or None if the xpub key is not found
+        """
+        for account in range(n):
+            if self.get_xpub_key(account) == xpub:
+                return account
+
+
+WALLET_SESSION = WalletSession()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=WALLET_SESSION.after_fork)
+
+
+class AddressIndex(SQLiteDatabase):
+    """
+    Reverse index of the addresses of the hot wallet: the account, chain and index of each address
+
+    The receiving (0) and change (1) chain of each account are derived up to gap_limit addresses after the highest used
+    index, so finding an address is a dict lookup instead of deriving every address of every account. An index counts as
+    used when its address is handed out by get_address_from_wallet or found by a lookup, the chain is then extended to
+    keep the gap. The derived addresses are stored in a SQLite database, per wallet (identified by the xpub key of its
+    first account), so they are only derived once.
+
+    :param session: The WalletSession of the hot wallet
+    :param filename: The filename of the SQLite database
+    :param gap_limit: The number of addresses after the highest used index of each chain
+    """
+    def __init__(self, session, filename=ADDRESS_INDEX_FILE, gap_limit=GAP_LIMIT):
+        super(AddressIndex, self).__init__(filename=filename)
+        self.session = session
+        self.gap_limit = gap_limit
+        self.wallet = None
+        self.paths = {}
+        self.chains = {}
+
+    def configure(self, gap_limit):
+        """
+        Set the gap limit of the index
+
+        :param gap_limit: The number of addresses after the highest used index of each chain
+        """
+        self.gap_limit = gap_limit
+
+    def setup(self, connection):
+        """
+        Create the tables of the addresses and the chains
+
+        :param connection: A sqlite3 Connection object
+        """
+        connection.execute('CREATE TABLE IF NOT EXISTS addresses (wallet TEXT NOT NULL, address TEXT NOT NULL, account INTEGER NOT NULL, '
+                           'change INTEGER NOT NULL, idx INTEGER NOT NULL, PRIMARY KEY (wallet, address))')
+        connection.execute('CREATE TABLE IF NOT EXISTS chains (wallet TEXT NOT NULL, account INTEGER NOT NULL, change INTEGER NOT NULL, '
+                           'derived INTEGER NOT NULL, used INTEGER NOT NULL, PRIMARY KEY (wallet, account, change))')
+
+    def load(self):
+        """
+        Load the index of the wallet from the database, the first time it is needed or when another wallet is used
+        """
+        with self._lock:
+            wallet = hashlib.sha256(self.session.get_xpub_key(0).encode('utf-8')).hexdigest()[:16]
+            if wallet == self.wallet:
+                return
+
+            connection = self.connection()
+            self.paths = {row[0]: (row[1], row[2], row[3]) for row in
+                          connection.execute('SELECT address, account, change, idx FROM addresses WHERE wallet = ?', (wallet,))}
+            self.chains = {(row[0], row[1]): [row[2], row[3]] for row in
+                           connection.execute('SELECT account, change, derived, used FROM chains WHERE wallet = ?', (wallet,))}
+            self.wallet = wallet
+
+    def extend(self, account, change, used=0, minimum=0):
+        """
+        Derive the addresses of a chain up to gap_limit addresses after the highest used index
+
+        :param account: The number of the account
+        :param change: 0 for the receiving chain, 1 for the change chain
+        :param used: The number of used addresses, the index of the highest used address + 1
+        :param minimum: The minimum number of addresses to derive
+        """
+        with self._lock:
+            self.load()
+            chain = self.chains.get((account, change), [0, 0])
+            derived, used = chain[0], max(chain[1], used)
+            target = max(used + self.gap_limit, minimum)
+            if (account, change) in self.chains and derived >= target and used == chain[1]:
+                return
+
+            rows = []
+            for index in range(derived, target):
+                address = self.session.get_address(account, index, change=change)
+                self.paths[address] = (account, change, index)
+                rows.append((self.wallet, address, account, change, index))
+
+            self.chains[(account, change)] = [max(derived, target), used]
+
+            connection = self.connection()
+            with connection:
+                connection.execute('BEGIN')
+                connection.executemany('INSERT OR IGNORE INTO addresses (wallet, address, account, change, idx) VALUES (?, ?, ?, ?, ?)', rows)
+                connection.execute('INSERT OR REPLACE INTO chains (wallet, account, change, derived, used) VALUES (?, ?, ?, ?, ?)',
+                                   (self.wallet, account, change, max(derived, target), used))
+
+    def mark_used(self, account, change, index):
+        """
+        Remember that an address is used, the chain is extended if needed
+
+        :param account: The number of the account
+        :param change: 0 for the receiving chain, 1 for the change chain
+        :param index: The index of the address
+        """
+        self.extend(account, change, used=index + 1)
+
+    def find(self, address, accounts=1, indexes=0):
+        """
+        Find the path of an address of the wallet
+
+        :param address: The address
+        :param accounts: The number of accounts that must be indexed, accounts with used addresses are always indexed
+        :param indexes: The minimum number of addresses of each chain that must be indexed
+        :return: A tuple containing the account, the chain and the index, or None if the address is not found
+        """
+        with self._lock:
+            for account in range(accounts):
+                for change in [0, 1]:
+                    self.extend(account, change, minimum=indexes)
+
+            path = self.paths.get(address)
+
+        if path is not None:
+            self.mark_used(*path)
+
+        return path
+
+    def clear(self):
+        """
+        Forget the index in memory, for example when another wallet is used
+        """
+        with self._lock:
+            self.wallet = None
+            self.paths = {}
+            self.chains = {}
+
+
+ADDRESS_INDEX = AddressIndex(session=WALLET_SESSION)
+
+
 def get_address_from_wallet(account, index):
-    """Derive a Bitcoin address from the hot wallet for the given account and index."""
-    xpub_key = get_xpub_key_from_wallet(account)
-    return get_address_from_xpub(xpub=xpub_key, i=index)
+    """Derive a Bitcoin address from the hot wallet for the given account and index, the index is marked as used."""
+    address = WALLET_SESSION.get_address(account, index)
+    ADDRESS_INDEX.mark_used(account, 0, index)
+    return address
 
 
 def get_xpub_key_from_wallet(account):
     """Derive the xpub key for the given account from the hot wallet."""
-    hot_wallet = get_hot_wallet()
-    xpub_key = get_xpub_key(mnemonic=' '.join(hot_wallet['mnemonic']),
-                            passphrase=hot_wallet['passphrase'],
-                            account=account)
-
-    # Explicitly delete the local variable hot wallet from memory as soon as possible for security reasons
-    del hot_wallet
-
-    return xpub_key
+    return WALLET_SESSION.get_xpub_key(account)
 
 
 def get_xpriv_key_from_wallet(account):
     """Derive the xpriv key for the given account from the hot wallet."""
-    hot_wallet = get_hot_wallet()
-    xpriv_key = get_xpriv_key(mnemonic=' '.join(hot_wallet['mnemonic']),
-                              passphrase=hot_wallet['passphrase'],
-                              account=account)
+    return WALLET_SESSION.get_xpriv_key(account)
 
-    # Explicitly delete the local variable hot wallet from memory as soon as possible for security reasons
-    del hot_wallet
 
-    return xpriv_key
-
-
-def get_private_key_from_wallet(account, index):
-    """Derive the private key for the given account and index from the hot wallet."""
-    xpriv_key = get_xpriv_key_from_wallet(account=account)
-    return get_private_key(xpriv=xpriv_key, i=index)
+def get_private_key_from_wallet(account, index, change=0):
+    """Derive the private key for the given account, chain and index from the hot wallet."""
+    return WALLET_SESSION.get_private_key(account, index, change=change)
 
 
 def get_single_address_private_key(address):
     """Retrieve the private key for a single address stored directly in the hot wallet."""
-    hot_wallet = get_hot_wallet()
+    single_keys = WALLET_SESSION.get_single_keys()
 
-    if address in hot_wallet:
-        return {address: hot_wallet[address]}
+    if address in single_keys:
+        return {address: single_keys[address]}
 
 
 def find_address_in_wallet(address, accounts=1, indexes=20):
-    """Search the hot wallet for the given address across accounts and indexes."""
-    hot_wallet = get_hot_wallet()
+    """Search the receiving addresses of the hot wallet for the given address across accounts and indexes."""
+    path = ADDRESS_INDEX.find(address, accounts=accounts, indexes=indexes)
+    if path is None or path[1] != 0:
+        return None, None
 
-    for account in range(accounts):
-        xpub_key = get_xpub_key(mnemonic=' '.join(hot_wallet['mnemonic']),
-                                passphrase=hot_wallet['passphrase'],
-                                account=account)
+    return path[0], path[2]
 
-        addresses = get_addresses_from_xpub(xpub=xpub_key, i=indexes)
 
-        if address in addresses:
-            return account, addresses.index(address)
-
-    return None, None
+def find_address_path(address, accounts=1):
+    """Find the account, chain (0=receiving, 1=change) and index of an address of the hot wallet, or None."""
+    return ADDRESS_INDEX.find(address, accounts=accounts)
 
 
 def find_single_address_in_wallet(address):
     """Check if a single address exists directly in the hot wallet."""
-    hot_wallet = get_hot_wallet()
-
-    return hot_wallet[address] if address in hot_wallet else None
+    return WALLET_SESSION.get_single_keys().get(address)
 
 
 def hot_wallet_seed():
     """Derive the seed from the hot wallet mnemonic and passphrase."""
-    hot_wallet = get_hot_wallet()
-    return get_seed(mnemonic=' '.join(hot_wallet['mnemonic']), passphrase=hot_wallet['passphrase'])
+    return WALLET_SESSION.get_seed()
 
 
 def find_account_by_xpub(xpub, n=20):
     """Find the account index that matches the given xpub by scanning up to n accounts."""
-    hot_wallet = get_hot_wallet()
-
-    for i in range(n):
-        account_xpub = get_xpub_key(mnemonic=' '.join(hot_wallet['mnemonic']),
-                                    passphrase=hot_wallet['passphrase'],
-                                    account=i)
-        if xpub == account_xpub:
-            return i
+    return WALLET_SESSION.find_account(xpub, n=n)
@@ -1,29 +1,128 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-"""Helper functions for saving and loading JSON files with error handling."""
+"""Helper functions for saving and loading JSON files with error handling, files are replaced atomically."""
 
 import os
+import tempfile
 import time
 
 import simplejson
 
 from helpers.loghelpers import LOG
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# The fsync policies of save_to_json_file
+FSYNC_NEVER = 'never'  # the operating system decides when the data is written to disk
+FSYNC_FILE = 'file'  # the new file is on disk before it replaces the old file
+FSYNC_ALWAYS = 'always'  # the directory is also synced, so the rename itself survives a power failure
+FSYNC_POLICIES = [FSYNC_NEVER, FSYNC_FILE, FSYNC_ALWAYS]
+
+# Seconds to wait before a json file that could not be parsed is read again
+LOAD_RETRY_DELAY = 0.1
+
+# How save_to_json_file writes the json files, see configure_json_files()
+JSON_FILES = {'compact': False, 'fsync': FSYNC_NEVER}
+
+# Temporary files are created with mode 0600, new json files get the permissions that open() would give them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def configure_json_files(compact=False, fsync=FSYNC_NEVER):
+    """
+    Set how save_to_json_file writes the json files
+
+    :param compact: Write json without whitespace instead of indented with sorted keys
+    :param fsync: The fsync policy: never, file or always
+    """
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError('Unknown fsync policy: %s (must be one of %s)' % (fsync, ', '.join(FSYNC_POLICIES)))
+
+    JSON_FILES['compact'] = compact
+    JSON_FILES['fsync'] = fsync
+
+
+def dumps_json(data, compact=False):
+    """
+    Encode data as json
+
+    Compact json is encoded with orjson if it is installed, which is several times faster than simplejson.
+
+    :param data: The json-encodable data
+    :param compact: Encode without whitespace instead of indented with sorted keys
+    :return: A string containing the json
+    """
+    if compact is False:
+        return simplejson.dumps(data, indent=4, sort_keys=True)
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            # orjson can not encode every type that simplejson can, Decimal for example
+            pass
+
+    return simplejson.dumps(data, separators=(',', ':'))
+
+
+def fsync_directory(directory):
+    """
+    Write the entries of a directory to disk, so a file that was renamed into it is not lost after a power failure
+
+    :param directory: The directory
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        # Directories can not be opened on Windows, NTFS journals the rename
+        return
+
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
 
 def save_to_json_file(filename, data):
     """
     Save data to a json file
+
+    The data is written to a temporary file in the same directory, which then replaces the json file in a single rename.
+    Readers always see either the old or the new file, never a partially written one.
+
     :param filename: The filename of the json file
     :param data: A dict containing the data to save (must be json-encodable)
     """
+    directory = os.path.dirname(filename)
 
     # Make sure the destination directory exists
-    if not os.path.isdir(os.path.dirname(filename)):
-        os.makedirs(os.path.dirname(filename))
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
 
     try:
-        with open(filename, 'w') as output_file:
-            simplejson.dump(data, output_file, indent=4, sort_keys=True)
+        text = dumps_json(data, compact=JSON_FILES['compact'])
+        mode = os.stat(filename).st_mode & 0o777 if os.path.isfile(filename) else FILE_MODE
+
+        fd, temp_filename = tempfile.mkstemp(prefix='.%s.' % os.path.basename(filename), suffix='.tmp', dir=directory or '.')
+        try:
+            with os.fdopen(fd, 'w') as output_file:
+                output_file.write(text)
+                if JSON_FILES['fsync'] != FSYNC_NEVER:
+                    output_file.flush()
+                    os.fsync(output_file.fileno())
+
+            os.chmod(temp_filename, mode)
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+
+        if JSON_FILES['fsync'] == FSYNC_ALWAYS:
+            fsync_directory(directory or '.')
     except Exception as ex:
         LOG.error('Failed to save data to json file %s: %s' % (filename, ex))
 
@@ -32,21 +131,39 @@ def load_from_json_file(filename):
     """
     Load data from a json file
 
-    :return: a dict containing the data from the json file
+    A file that can not be parsed is opened and read again once after a short delay, in case it was being written by a
+    program that does not replace it atomically.
+
+    :return: a dict containing the data from the json file, or None if the file can not be parsed
     """
-    data = None
-    # Load the json file
+    # Raises an IOError if the file does not exist
     with open(filename, 'r') as input_file:
         try:
-            data = simplejson.load(input_file)
+            return simplejson.load(input_file)
         except Exception as ex:
             LOG.error('Failed to load %s: %s' % (filename, ex))
-            LOG.error('Sleeping for 1 second before retrying')
-            time.sleep(1)
-            LOG.error('Retrying to load %s' % filename)
-            try:
-                data = simplejson.load(input_file)
-            except Exception as ex:
-                LOG.error('Failed to load twice %s: %s' % (filename, ex))
-
-    return data
+
+    time.sleep(LOAD_RETRY_DELAY)
+    LOG.error('Retrying to load %s' % filename)
+    try:
+        with open(filename, 'r') as input_file:
+            return simplejson.load(input_file)
+    except Exception as ex:
+        LOG.error('Failed to load twice %s: %s' % (filename, ex))
+
+
+def iter_json_list(items):
+    """
+    Encode items as a json list one item at a time, so a long list can be sent while the items are still being found
+
+    The result is the same as simplejson.dumps(list(items), indent=4).
+
+    :param items: An iterable of json-encodable items
+    :return: A generator of strings
+    """
+    empty = True
+    for item in items:
+        yield ('[\n    ' if empty else ',\n    ') + simplejson.dumps(item, indent=4).replace('\n', '\n    ')
+        empty = False
+
+    yield '[]' if empty else '\n]'
@@ -0,0 +1,606 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""The upstream sources of new transactions and new blocks of the transaction listener."""
+
+import functools
+import hashlib
+import re
+import socket
+import time
+
+import simplejson
+
+from helpers.bech32 import encode as encode_witness_program
+from helpers.loghelpers import LOG
+from helpers.publickeyhelpers import bin_hash160
+from helpers.py3specials import bin_to_b58check
+
+BLOCKIO_URL = 'wss://ws.block.io'
+BLOCKCHAIN_INFO_URL = 'wss://ws.blockchain.info/inv'
+ZMQ_URL = 'tcp://127.0.0.1:28332'
+ELECTRUM_URL = 'tcp://127.0.0.1:50001'
+
+# The address fields of a new-transactions message of block.io and of an utx message of blockchain.info, found without parsing the whole message
+ADDRESS_FIELD = re.compile(r'"address"\s*:\s*"([^"]+)"')
+ADDR_FIELD = re.compile(r'"addr"\s*:\s*"([^"]+)"')
+
+# Seconds a backend waits for a message before it checks if it must stop
+POLL_INTERVAL = 1.0
+
+
+def extract_addresses(message):
+    """
+    Get all addresses in a new-transactions message of block.io, without parsing the json
+
+    :param message: The message as a string
+    :return: A list of addresses
+    """
+    return ADDRESS_FIELD.findall(message)
+
+
+def parse_transaction(message):
+    """
+    Get the txid and the input and output addresses of a new-transactions message of block.io
+
+    :param message: The message as a string
+    :return: A tuple containing the txid, a list of input addresses and a list of output addresses, or None if the message is not a new transaction
+    """
+    try:
+        transaction = simplejson.loads(message)
+    except ValueError:
+        return
+
+    if not isinstance(transaction, dict) or transaction.get('type') != 'new-transactions' or 'data' not in transaction:
+        return
+
+    data = transaction['data']
+    return (data['txid'],
+            [tx_input['address'] for tx_input in data.get('inputs', []) if tx_input.get('address')],
+            [tx_output['address'] for tx_output in data.get('outputs', []) if tx_output.get('address')])
+
+
+def script_to_address(script, testnet=False):
+    """
+    Get the address of an output script
+
+    :param script: The script as bytes
+    :param testnet: Make a testnet address
+    :return: The address or None if the script is not a P2PKH, P2SH, P2WPKH or P2WSH script
+    """
+    if len(script) == 25 and script[:3] == b'\x76\xa9\x14' and script[23:] == b'\x88\xac':
+        return bin_to_b58check(script[3:23], 111 if testnet else 0)
+    elif len(script) == 23 and script[:2] == b'\xa9\x14' and script[22:] == b'\x87':
+        return bin_to_b58check(script[2:22], 196 if testnet else 5)
+    elif (len(script) == 22 and script[:2] == b'\x00\x14') or (len(script) == 34 and script[:2] == b'\x00\x20'):
+        return encode_witness_program('tb' if testnet else 'bc', 0, script[2:])
+
+
+def script_pushes(script):
+    """
+    Get the data pushed by a scriptSig
+
+    :param script: The script as bytes
+    :return: A list of bytes, or None if the script contains something else than pushes
+    """
+    pushes = []
+    i = 0
+    while i < len(script):
+        opcode = script[i]
+        if 0 < opcode < 76:
+            size, i = opcode, i + 1
+        elif opcode == 76:
+            size, i = script[i + 1], i + 2
+        elif opcode == 77:
+            size, i = int.from_bytes(script[i + 1:i + 3], 'little'), i + 3
+        elif opcode == 0:
+            pushes.append(b'')
+            i += 1
+            continue
+        else:
+            return
+
+        pushes.append(script[i:i + size])
+        i += size
+
+    return pushes
+
+
+def is_pubkey(data):
+    """Check if pushed data looks like a compressed or uncompressed public key."""
+    return (len(data) == 33 and data[0] in (2, 3)) or (len(data) == 65 and data[0] == 4)
+
+
+def input_address(script_sig, witness, testnet=False):
+    """
+    Get the address that is spent by an input, from its scriptSig and witness
+
+    The address of the spent output is not part of a raw transaction, but it can be derived from the public key or the
+    redeem script that the input reveals. That works for P2PKH, P2SH (including wrapped segwit), P2WPKH and P2WSH inputs,
+    taproot and bare P2PK inputs are not recognized.
+
+    :param script_sig: The scriptSig as bytes
+    :param witness: A list containing the witness items as bytes
+    :param testnet: Make a testnet address
+    :return: The address or None
+    """
+    pushes = script_pushes(script_sig)
+    if pushes:
+        if len(pushes) == 2 and is_pubkey(pushes[1]) and not witness:
+            return bin_to_b58check(bin_hash160(pushes[1]), 111 if testnet else 0)
+        elif pushes[-1] and not (len(pushes) == 1 and pushes[0][:1] == b'\x30'):
+            return bin_to_b58check(bin_hash160(pushes[-1]), 196 if testnet else 5)
+    elif witness and not script_sig:
+        last = witness[-1]
+        if len(witness) == 2 and is_pubkey(last):
+            return encode_witness_program('tb' if testnet else 'bc', 0, bin_hash160(last))
+        elif len(witness) > 1 and not (last[:1] in (b'\xc0', b'\xc1') and len(last) >= 33 and (len(last) - 33) % 32 == 0):
+            # The last witness item of a taproot script path spend is the control block
+            return encode_witness_program('tb' if testnet else 'bc', 0, hashlib.sha256(last).digest())
+
+
+def parse_raw_transaction(raw, testnet=False):
+    """
+    Get the txid and the input and output addresses of a raw transaction, with or without witness data
+
+    :param raw: The raw transaction as bytes
+    :param testnet: Make testnet addresses
+    :return: A tuple containing the txid, a list of input addresses and a list of output addresses
+    """
+    position = [0]
+
+    def read(size):
+        position[0] += size
+        return raw[position[0] - size:position[0]]
+
+    def read_var_int():
+        value = read(1)[0]
+        if value < 253:
+            return value
+        return int.from_bytes(read(2 ** (value - 252)), 'little')
+
+    def read_var_bytes():
+        return read(read_var_int())
+
+    read(4)
+    segwit = raw[4:6] == b'\x00\x01'
+    if segwit:
+        read(2)
+    start = position[0]
+
+    script_sigs = []
+    for _ in range(read_var_int()):
+        read(36)
+        script_sigs.append(read_var_bytes())
+        read(4)
+
+    outputs = []
+    for _ in range(read_var_int()):
+        read(8)
+        outputs.append(script_to_address(read_var_bytes(), testnet=testnet))
+    end = position[0]
+
+    witnesses = [[read_var_bytes() for _ in range(read_var_int())] for _ in script_sigs] if segwit else [[] for _ in script_sigs]
+
+    # The txid is the hash of the transaction without the marker, the flag and the witnesses
+    stripped = raw[:4] + raw[start:end] + raw[-4:]
+    txid = hashlib.sha256(hashlib.sha256(stripped).digest()).digest()[::-1].hex()
+    inputs = [input_address(script_sig, witness, testnet=testnet) for script_sig, witness in zip(script_sigs, witnesses)]
+
+    return txid, [address for address in inputs if address], [address for address in outputs if address]
+
+
+class ListenerBackend(object):
+    """
+    A source of new transactions and new blocks for the transaction listener
+
+    A backend connects to its upstream in run() and delivers the events to the listener until stop() is called or the
+    connection is lost, the listener reconnects by calling run() again. The listener must have the methods:
+
+    - on_transaction(addresses, load): called for every new transaction with the addresses that are known without
+      decoding the transaction, load() returns a tuple containing the txid, the input addresses and the output addresses
+    - on_block(height, block_hash): called for every new block, the height is None if the upstream only gives the hash
+    - refresh(): called regularly, also when there are no events
+    - watched_addresses(): the list of watched addresses, for upstreams that need a subscription per address
+
+    :param url: The url of the upstream (optional, the default of the backend)
+    :param testnet: Listen to testnet instead of mainnet
+    :param blocks_only: Only deliver new blocks
+    """
+    name = None
+    default_url = None
+
+    # Whether the listener must call run() again when it returns
+    reconnect = True
+
+    def __init__(self, url=None, testnet=False, blocks_only=False):
+        self.url = url if url else self.default_url
+        self.testnet = testnet
+        self.blocks_only = blocks_only
+        self.listener = None
+        self.running = False
+
+    def run(self, listener):
+        """
+        Connect to the upstream and deliver its events to the listener
+
+        :param listener: The listener
+        """
+        raise NotImplementedError('Listener backend %s does not implement run()' % self.name)
+
+    def stop(self):
+        """Stop delivering events, run() returns as soon as possible."""
+        self.running = False
+
+
+class WebSocketBackend(ListenerBackend):
+    """A backend that subscribes to the new transactions and blocks of a public websocket."""
+    def subscriptions(self):
+        """
+        Get the messages that subscribe to the new transactions and blocks
+
+        :return: A list of messages
+        """
+        return []
+
+    def run(self, listener):
+        import websocket
+
+        self.listener = listener
+        self.running = True
+        self._websocket = websocket.WebSocketApp(url=self.url, on_open=self.on_open, on_message=self.on_message,
+                                                 on_error=lambda ws, error: LOG.warning('Listener backend %s error: %s' % (self.name, error)))
+        self._websocket.run_forever(ping_interval=30, ping_timeout=10)
+
+    def stop(self):
+        super(WebSocketBackend, self).stop()
+        if getattr(self, '_websocket', None) is not None:
+            self._websocket.close()
+
+    def on_open(self, ws):
+        """Subscribe to the new transactions and blocks when the websocket is opened."""
+        LOG.info('Listener backend %s connected to %s' % (self.name, self.url))
+        for message in self.subscriptions():
+            ws.send(message)
+
+    def on_message(self, ws, message):
+        """Deliver a message of the websocket to the listener."""
+        raise NotImplementedError
+
+
+class BlockIOBackend(WebSocketBackend):
+    """
+    The websocket of block.io, each new transaction comes with the addresses of its inputs and outputs
+
+    Only a message that contains a watched address is parsed, the addresses are found with a regular expression first.
+    """
+    name = 'blockio'
+    default_url = BLOCKIO_URL
+
+    def subscriptions(self):
+        network = 'BTCTEST' if self.testnet is True else 'BTC'
+        messages = [simplejson.dumps({'type': 'new-blocks', 'network': network})]
+        if self.blocks_only is False:
+            messages.insert(0, simplejson.dumps({'type': 'new-transactions', 'network': network}))
+        return messages
+
+    def on_message(self, ws, message):
+        if '"new-blocks"' in message:
+            try:
+                data = simplejson.loads(message)['data']
+                self.listener.on_block(data.get('block_no'), data.get('block_hash'))
+            except (ValueError, KeyError, TypeError):
+                pass
+        else:
+            self.listener.on_transaction(extract_addresses(message), functools.partial(parse_transaction, message))
+
+        self.listener.refresh()
+
+
+class BlockchainInfoBackend(WebSocketBackend):
+    """The websocket of blockchain.info, the utx messages contain the addresses of the previous outputs and the outputs."""
+    name = 'blockchain.info'
+    default_url = BLOCKCHAIN_INFO_URL
+
+    def subscriptions(self):
+        return ['{"op":"blocks_sub"}'] if self.blocks_only is True else ['{"op":"unconfirmed_sub"}', '{"op":"blocks_sub"}']
+
+    @staticmethod
+    def parse_utx(message):
+        """
+        Get the txid and the input and output addresses of an utx message
+
+        :param message: The message as a string
+        :return: A tuple containing the txid, a list of input addresses and a list of output addresses, or None
+        """
+        try:
+            data = simplejson.loads(message)['x']
+        except (ValueError, KeyError, TypeError):
+            return
+
+        return (data['hash'],
+                [tx_input['prev_out']['addr'] for tx_input in data.get('inputs', []) if (tx_input.get('prev_out') or {}).get('addr')],
+                [tx_output['addr'] for tx_output in data.get('out', []) if tx_output.get('addr')])
+
+    def on_message(self, ws, message):
+        if '"utx"' in message:
+            self.listener.on_transaction(ADDR_FIELD.findall(message), functools.partial(self.parse_utx, message))
+        elif '"block"' in message:
+            try:
+                data = simplejson.loads(message)['x']
+                self.listener.on_block(data.get('height'), data.get('hash'))
+            except (ValueError, KeyError, TypeError):
+                pass
+
+        self.listener.refresh()
+
+
+class ReplayBackend(BlockIOBackend):
+    """
+    Replays a file with recorded block.io messages, one message per line, for tests and benchmarks
+
+    Messages can be recorded with benchmarks/bench_listener.py --record, new blocks are lines like
+    {"type": "new-blocks", "data": {"block_no": 800000, "block_hash": "..."}}. The file is replayed once.
+
+    :param url: The filename
+    :param delay: The number of seconds to wait between the messages
+    """
+    name = 'replay'
+    reconnect = False
+
+    def __init__(self, url=None, testnet=False, blocks_only=False, delay=0):
+        super(ReplayBackend, self).__init__(url=url, testnet=testnet, blocks_only=blocks_only)
+        self.delay = delay
+        self.replayed = 0
+
+    def run(self, listener):
+        self.listener = listener
+        self.running = True
+        with open(self.url, 'r') as input_file:
+            for line in input_file:
+                if self.running is False:
+                    break
+
+                line = line.strip()
+                if not line or (self.blocks_only is True and '"new-blocks"' not in line):
+                    continue
+
+                self.on_message(None, line)
+                self.replayed += 1
+                if self.delay:
+                    time.sleep(self.delay)
+
+        LOG.info('Listener backend replay: %s messages of %s replayed' % (self.replayed, self.url))
+
+
+class BitcoinCoreZMQBackend(ListenerBackend):
+    """
+    The rawtx and hashblock notifications of a Bitcoin Core node, which must run with
+    zmqpubrawtx=tcp://127.0.0.1:28332 and zmqpubhashblock=tcp://127.0.0.1:28332
+
+    The addresses of the inputs are derived from their scriptSig and witness (see input_address), the height of a new
+    block is not part of the notification. Needs the pyzmq package.
+    """
+    name = 'zmq'
+    default_url = ZMQ_URL
+
+    def run(self, listener):
+        import zmq
+
+        self.listener = listener
+        self.running = True
+        context = zmq.Context.instance()
+        subscriber = context.socket(zmq.SUB)
+        subscriber.setsockopt(zmq.RCVTIMEO, int(POLL_INTERVAL * 1000))
+        subscriber.setsockopt(zmq.SUBSCRIBE, b'hashblock')
+        if self.blocks_only is False:
+            subscriber.setsockopt(zmq.SUBSCRIBE, b'rawtx')
+        subscriber.connect(self.url)
+        LOG.info('Listener backend %s connected to %s' % (self.name, self.url))
+
+        try:
+            while self.running:
+                try:
+                    topic, body = subscriber.recv_multipart()[:2]
+                except zmq.Again:
+                    listener.refresh()
+                    continue
+
+                self.on_notification(topic, body)
+                listener.refresh()
+        finally:
+            subscriber.close(linger=0)
+
+    def on_notification(self, topic, body):
+        """
+        Deliver a notification of the node to the listener
+
+        :param topic: rawtx or hashblock
+        :param body: The raw transaction or the hash of the block
+        """
+        if topic == b'hashblock':
+            self.listener.on_block(None, body.hex())
+        elif topic == b'rawtx':
+            try:
+                transaction = parse_raw_transaction(body, testnet=self.testnet)
+            except (IndexError, ValueError) as ex:
+                LOG.warning('Listener backend %s: unable to parse raw transaction: %s' % (self.name, ex))
+                return
+
+            self.listener.on_transaction(transaction[1] + transaction[2], lambda: transaction)
+
+
+class ElectrumBackend(ListenerBackend):
+    """
+    The subscriptions of an Electrum server (ElectrumX or Fulcrum)
+
+    An Electrum server does not announce all new transactions, each watched address gets a subscription instead. When the
+    status of an address changes, the new transactions in its history are fetched and delivered. The new block headers
+    are subscribed as well. The url is tcp://host:port or ssl://host:port.
+    """
+    name = 'electrum'
+    default_url = ELECTRUM_URL
+
+    def __init__(self, url=None, testnet=False, blocks_only=False):
+        super(ElectrumBackend, self).__init__(url=url, testnet=testnet, blocks_only=blocks_only)
+        self.subscribed = {}
+        self.history = {}
+        self._requests = {}
+        self._next_id = 0
+        self._last_update = 0
+        self._api = None
+
+    def run(self, listener):
+        from data.blockexplorers.electrum import ElectrumAPI
+
+        self.listener = listener
+        self.running = True
+        self.subscribed, self.history, self._requests, self._last_update = {}, {}, {}, 0
+        self._api = ElectrumAPI(url=self.url, testnet=self.testnet)
+        self._api.connect()
+        self._api._connection.settimeout(POLL_INTERVAL)
+        LOG.info('Listener backend %s connected to %s' % (self.name, self.url))
+
+        buffer = b''
+        try:
+            self.request('blockchain.headers.subscribe', [], 'headers')
+            while self.running:
+                self.update_subscriptions()
+                try:
+                    data = self._api._connection.recv(65536)
+                except socket.timeout:
+                    listener.refresh()
+                    continue
+
+                if not data:
+                    raise ConnectionError('Connection closed by server')
+
+                buffer += data
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    if line.strip():
+                        self.on_response(simplejson.loads(line))
+                listener.refresh()
+        finally:
+            self._api.close()
+
+    def request(self, method, params, kind, *context):
+        """
+        Send a request to the server, the response is handled by on_response
+
+        :param method: The method
+        :param params: The params of the method
+        :param kind: What the response is for
+        :param context: Extra values that on_response needs
+        """
+        self._next_id += 1
+        self._requests[self._next_id] = (kind,) + context
+        self._api._connection.sendall(simplejson.dumps({'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': params}).encode() + b'\n')
+
+    def update_subscriptions(self):
+        """Subscribe to the addresses that are watched since the last call and unsubscribe from the others."""
+        from data.blockexplorers.electrum import get_scripthash
+
+        if self.blocks_only is True or time.monotonic() - self._last_update < POLL_INTERVAL:
+            return
+
+        self._last_update = time.monotonic()
+        watched = set(self.listener.watched_addresses())
+        for address in watched.difference(self.subscribed):
+            try:
+                scripthash = get_scripthash(address)
+            except Exception:
+                self.subscribed[address] = None
+                continue
+            self.subscribed[address] = scripthash
+            self.request('blockchain.scripthash.subscribe', [scripthash], 'status', address)
+
+        for address in set(self.subscribed).difference(watched):
+            scripthash = self.subscribed.pop(address)
+            self.history.pop(address, None)
+            if scripthash is not None:
+                self.request('blockchain.scripthash.unsubscribe', [scripthash], 'ignore')
+
+    def on_response(self, response):
+        """
+        Handle a response or a notification of the server
+
+        :param response: The response as a dict
+        """
+        method = response.get('method')
+        if method == 'blockchain.headers.subscribe':
+            self.on_header(response['params'][0])
+        elif method == 'blockchain.scripthash.subscribe':
+            for address in [address for address, scripthash in self.subscribed.items() if scripthash == response['params'][0]]:
+                self.request('blockchain.scripthash.get_history', [response['params'][0]], 'history', address)
+        elif response.get('id') in self._requests:
+            kind, *context = self._requests.pop(response['id'])
+            if response.get('error') is not None:
+                if kind != 'ignore':
+                    LOG.warning('Listener backend %s: %s request failed: %s' % (self.name, kind, response['error']))
+                return
+
+            self.on_result(kind, response.get('result'), *context)
+
+    def on_result(self, kind, result, address=None):
+        """
+        Handle the result of a request
+
+        The first history of an address is only remembered, the transactions that are new in a later history are
+        fetched and delivered to the listener. A watched address that is not an output of such a transaction spent it.
+
+        :param kind: What the request was for, see request()
+        :param result: The result of the request
+        :param address: The address the request was for (optional)
+        """
+        if kind in ('status', 'history', 'transaction') and address not in self.subscribed:
+            return
+
+        if kind == 'status':
+            if result is None:
+                self.history[address] = set()
+            else:
+                self.request('blockchain.scripthash.get_history', [self.subscribed[address]], 'history', address)
+
+        elif kind == 'history':
+            txids = [item['tx_hash'] for item in result]
+            known = self.history.get(address)
+            self.history[address] = set(txids) if known is None else known.union(txids)
+            if known is not None:
+                for txid in dict.fromkeys(txid for txid in txids if txid not in known):
+                    self.request('blockchain.transaction.get', [txid], 'transaction', address)
+
+        elif kind == 'transaction':
+            txid, inputs, outputs = parse_raw_transaction(bytes.fromhex(result), testnet=self.testnet)
+            if address not in outputs and address not in inputs:
+                inputs.append(address)
+            self.listener.on_transaction(inputs + outputs, lambda: (txid, inputs, outputs))
+
+    def on_header(self, header):
+        """
+        Deliver a new block header to the listener
+
+        :param header: A dict containing the hex of the header and the height
+        """
+        from data.blockexplorers.electrum import parse_header
+
+        block = parse_header(header['hex'], header['height'])
+        self.listener.on_block(block['height'], block['hash'])
+
+
+LISTENER_BACKENDS = {backend.name: backend for backend in [BlockIOBackend, BlockchainInfoBackend, BitcoinCoreZMQBackend, ElectrumBackend, ReplayBackend]}
+
+
+def make_listener_backend(name, url=None, testnet=False, blocks_only=False):
+    """
+    Make a listener backend
+
+    :param name: The name of the backend: blockio, blockchain.info, zmq, electrum or replay
+    :param url: The url of the upstream or the filename for replay (optional)
+    :param testnet: Listen to testnet instead of mainnet
+    :param blocks_only: Only deliver new blocks
+    :return: A ListenerBackend object
+    """
+    if name not in LISTENER_BACKENDS:
+        raise ValueError('Unknown listener backend %s, must be one of %s' % (name, sorted(LISTENER_BACKENDS)))
+
+    return LISTENER_BACKENDS[name](url=url, testnet=testnet, blocks_only=blocks_only)
@@ -0,0 +1,702 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""A single long-lived transaction listener that watches all addresses of the spellbook over one upstream connection."""
+
+import math
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+import simplejson
+
+from helpers.eventbus import EVENT_BUS, ADDRESS, TXID, BLOCK
+from helpers.listenerbackends import ListenerBackend, BlockIOBackend, extract_addresses, parse_transaction  # noqa: F401
+from helpers.loghelpers import LOG
+from helpers.platformhelpers import format_args
+from helpers.runcommandprocess import PROCESS_LOG
+from listeners.watchlist import WATCHLIST_FILE
+
+# The events of a watched address
+SEND = 'SEND'
+RECEIVE = 'RECEIVE'
+EVENTS = [SEND, RECEIVE]
+
+# The maximum number of watched addresses and the maximum number of subscriptions to a single address
+MAX_WATCHED_ADDRESSES = 100000
+MAX_SUBSCRIPTIONS_PER_ADDRESS = 16
+
+# Seconds between the checks for expired subscriptions and changes of the watchlist file, and before reconnecting
+REFRESH_INTERVAL = 10
+RECONNECT_DELAY = 5
+
+# Matches that arrive within the batch window are dispatched together, at most MAX_PENDING_EVENTS wait for dispatch
+BATCH_WINDOW = 0.5
+MAX_PENDING_EVENTS = 10000
+DISPATCH_WORKERS = 4
+COMMAND_TIMEOUT = 300
+
+
+class BloomFilter(object):
+    """
+    A compact probabilistic set of addresses: an address that was added is always found, an address that was not added
+    is found with a probability of about error_rate
+
+    A watchlist of a million addresses needs about 1.8 MB at an error rate of 0.1%, so the filter can stay in memory
+    when the addresses themselves are kept elsewhere (a file or a database) and only the rare hits need a real lookup.
+    Addresses can not be removed, build a new filter instead.
+
+    :param capacity: The expected number of addresses
+    :param error_rate: The probability of a false positive when the filter holds capacity addresses
+    """
+    def __init__(self, capacity=MAX_WATCHED_ADDRESSES, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    @staticmethod
+    def _hashes(address):
+        # The hash of a str is cached by python, it differs between processes so a filter can not be shared
+        value = hash(address) & 0xFFFFFFFFFFFFFFFF
+        return value & 0xFFFFFFFF, (value >> 32) | 1
+
+    def add(self, address):
+        """
+        Add an address to the filter
+
+        :param address: The address
+        """
+        first, second = self._hashes(address)
+        for i in range(self.hashes):
+            position = (first + i * second) % self.size
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, address):
+        # Most addresses are not in the filter, those stop at the first bit that is not set
+        first, second = self._hashes(address)
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (first + i * second) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+
+        return True
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def from_addresses(cls, addresses, error_rate=0.001):
+        """
+        Build a filter that holds the given addresses
+
+        :param addresses: A list of addresses
+        :param error_rate: The probability of a false positive
+        :return: A BloomFilter object
+        """
+        bloom_filter = cls(capacity=len(addresses), error_rate=error_rate)
+        for address in addresses:
+            bloom_filter.add(address)
+
+        return bloom_filter
+
+
+class BatchDispatcher(object):
+    """
+    Runs the commands and webhooks of matched transactions on a bounded pool of threads instead of a new process per match
+
+    Matches that arrive within batch_window seconds of each other are coalesced per target: a webhook (a target that
+    starts with http:// or https://) gets a single POST with the list of events, a command that contains #txids# runs
+    once with the space-separated txids and identical commands run once. When more than max_pending events are waiting
+    new events are dropped, so a burst of matches can not exhaust the memory.
+
+    :param workers: The number of threads that run the commands and webhooks
+    :param batch_window: The number of seconds to wait for more matches before dispatching
+    :param max_pending: The maximum number of events that wait for dispatch
+    """
+    def __init__(self, workers=DISPATCH_WORKERS, batch_window=BATCH_WINDOW, max_pending=MAX_PENDING_EVENTS):
+        self.workers = workers
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.pending = {}
+        self.pending_events = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self._executor = None
+        self._thread = None
+        self._condition = threading.Condition()
+
+    def submit(self, target, address, event, txid):
+        """
+        Queue the dispatch of a match
+
+        :param target: A command or the url of a webhook
+        :param address: The watched address
+        :param event: SEND or RECEIVE
+        :param txid: The txid of the transaction
+        :return: True if the match is queued, False if it is dropped
+        """
+        with self._condition:
+            if self.pending_events >= self.max_pending:
+                self.dropped += 1
+                return False
+
+            self.pending.setdefault(target, []).append({'address': address, 'event': event, 'txid': txid})
+            self.pending_events += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='BatchDispatcher', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+        return True
+
+    def take(self):
+        """
+        Take all pending events. Must be called while holding the condition.
+
+        :return: A dict containing the list of events for each target
+        """
+        pending, self.pending, self.pending_events = self.pending, {}, 0
+        return pending
+
+    def run(self):
+        """Main loop of the dispatcher thread, waits for the batch window to fill and dispatches the batch."""
+        while True:
+            with self._condition:
+                while not self.pending:
+                    self._condition.wait()
+
+            time.sleep(self.batch_window)
+            with self._condition:
+                batch = self.take()
+
+            self.dispatch_batch(batch)
+
+    def flush(self):
+        """Dispatch the pending events now and wait until they are done, for example before the program exits."""
+        with self._condition:
+            batch = self.take()
+
+        wait(self.dispatch_batch(batch))
+
+    def dispatch_batch(self, batch):
+        """
+        Submit the targets of a batch to the pool of threads
+
+        :param batch: A dict containing the list of events for each target
+        :return: A list of futures
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ListenerDispatch')
+
+        futures = []
+        for target, events in batch.items():
+            if target.startswith(('http://', 'https://')):
+                futures.append(self._executor.submit(self.post_webhook, target, events))
+            else:
+                for command in self.commands(target, events):
+                    futures.append(self._executor.submit(self.run_command, command))
+            self.dispatched += len(events)
+
+        return futures
+
+    @staticmethod
+    def commands(target, events):
+        """
+        Get the commands to run for the events of a command target
+
+        :param target: The command, with #txid#, #address# or #txids# placeholders
+        :param events: A list of events
+        :return: A list of commands, without duplicates
+        """
+        if '#txids#' in target:
+            return [target.replace('#txids#', ' '.join(dict.fromkeys(event['txid'] for event in events)))]
+
+        return list(dict.fromkeys(target.replace('#txid#', event['txid']).replace('#address#', event['address']) for event in events))
+
+    @staticmethod
+    def run_command(command):
+        """
+        Run a command and log its output
+
+        :param command: The command
+        """
+        PROCESS_LOG.info('Running command: %s' % command)
+        try:
+            process = subprocess.run(format_args(command), shell=True, capture_output=True, universal_newlines=True, timeout=COMMAND_TIMEOUT)
+        except Exception as ex:
+            PROCESS_LOG.error('Command %s failed: %s' % (command, ex))
+            return
+
+        for line in process.stdout.splitlines():
+            PROCESS_LOG.info(line)
+        for line in process.stderr.splitlines():
+            PROCESS_LOG.error(line)
+
+    @staticmethod
+    def post_webhook(url, events):
+        """
+        Post the events of a batch to a webhook
+
+        :param url: The url of the webhook
+        :param events: A list of events
+        """
+        try:
+            requests.post(url=url, json={'events': events}, timeout=10)
+        except Exception as ex:
+            LOG.error('Unable to post %s events to webhook %s: %s' % (len(events), url, ex))
+
+
+class Subscription(object):
+    """
+    Something that wants to know when a watched address sends or receives a transaction
+
+    A match either runs a command (with #txid# and #address# replaced) or calls a function with the address and txid.
+
+    :param owner: The id of the owner, an address has one subscription per owner and event
+    :param event: SEND or RECEIVE
+    :param command: The command to run (optional)
+    :param callback: The function to call with the address and the txid (optional)
+    :param expires: The timestamp after which the subscription is removed (optional)
+    :param once: Remove the subscription after the first match
+    """
+    __slots__ = ('owner', 'event', 'command', 'callback', 'expires', 'once')
+
+    def __init__(self, owner, event, command=None, callback=None, expires=None, once=False):
+        self.owner = owner
+        self.event = event
+        self.command = command
+        self.callback = callback
+        self.expires = expires
+        self.once = once
+
+    def json_encodable(self):
+        """
+        Get the subscription as a dict, the callback is left out
+
+        :return: A dict
+        """
+        return {'owner': self.owner, 'event': self.event, 'command': self.command, 'expires': self.expires, 'once': self.once}
+
+
+class TransactionListenerService(object):
+    """
+    Watches the addresses of the watchlist, the triggers and the registration api with a single upstream subscription
+    and announces the new blocks of the upstream
+
+    The watched addresses are the keys of a dict, so each output and input of a new transaction is checked with a single
+    lookup and adding or removing an address never needs a restart. The addresses of each owner are indexed as well, so
+    all subscriptions of a trigger or a payment request can be removed without going through all addresses. Each address
+    holds at most MAX_SUBSCRIPTIONS_PER_ADDRESS subscriptions and at most max_addresses addresses are watched, so the
+    memory used by the listener is bounded. Only a transaction that contains a watched address is parsed. The commands
+    of the matches are coalesced by a BatchDispatcher and the callbacks run on a small pool of threads, so a slow command
+    or callback does not hold up the upstream connection.
+
+    The upstream is a ListenerBackend (block.io by default). Besides the subscriptions of the service itself, the
+    transactions of the addresses and txids that have subscribers on the event bus are published on the bus, as are
+    the new blocks the backend sees.
+
+    :param max_addresses: The maximum number of watched addresses
+    :param testnet: Subscribe to the transactions of testnet instead of mainnet
+    :param backend: A ListenerBackend object (optional)
+    """
+    def __init__(self, max_addresses=MAX_WATCHED_ADDRESSES, testnet=False, backend=None):
+        self.max_addresses = max_addresses
+        self.testnet = testnet
+        self.backend = backend if backend is not None else BlockIOBackend(testnet=testnet)
+        self.event_bus = EVENT_BUS
+        self.last_block = None
+        self.blocks = 0
+        self.addresses = {}
+        self.owners = {}
+        self.running = False
+        self.transactions = 0
+        self.matches = 0
+        self.watchlist_version = None
+        self.dispatcher = BatchDispatcher()
+        self._thread = None
+        self._executor = None
+        self._last_refresh = 0
+        self._lock = threading.RLock()
+
+    def configure(self, max_addresses=None, testnet=None, backend=None):
+        """
+        Change the settings of the listener, before it is started
+
+        :param max_addresses: The maximum number of watched addresses (optional)
+        :param testnet: Subscribe to the transactions of testnet instead of mainnet (optional)
+        :param backend: A ListenerBackend object (optional)
+        """
+        if max_addresses is not None:
+            self.max_addresses = max_addresses
+
+        if backend is not None:
+            self.backend = backend
+
+        if testnet is not None:
+            self.testnet = testnet
+            self.backend.testnet = testnet
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __contains__(self, address):
+        return address in self.addresses
+
+    def watch(self, address, event, owner, command=None, callback=None, timeout=None, once=False):
+        """
+        Watch an address, an existing subscription of the same owner and event is replaced
+
+        :param address: The address to watch
+        :param event: SEND or RECEIVE
+        :param owner: The id of the owner of the subscription
+        :param command: The command to run when the event happens (optional)
+        :param callback: The function to call with the address and the txid when the event happens (optional)
+        :param timeout: The number of seconds after which the subscription is removed (optional)
+        :param once: Remove the subscription after the first match
+        :return: True if the address is watched, False if the listener is full
+        """
+        if event not in EVENTS:
+            raise ValueError('Unknown event %s, must be one of %s' % (event, EVENTS))
+
+        expires = int(time.time()) + timeout if timeout is not None else None
+        subscription = Subscription(owner=owner, event=event, command=command, callback=callback, expires=expires, once=once)
+
+        with self._lock:
+            subscriptions = self.addresses.get(address)
+            if subscriptions is None:
+                if len(self.addresses) >= self.max_addresses:
+                    LOG.warning('Transaction listener is watching the maximum of %s addresses, %s is not watched' % (self.max_addresses, address))
+                    return False
+                subscriptions = self.addresses[address] = {}
+            elif (owner, event) not in subscriptions and len(subscriptions) >= MAX_SUBSCRIPTIONS_PER_ADDRESS:
+                LOG.warning('Address %s already has the maximum of %s subscriptions' % (address, MAX_SUBSCRIPTIONS_PER_ADDRESS))
+                return False
+
+            subscriptions[(owner, event)] = subscription
+            self.owners.setdefault(owner, set()).add(address)
+
+        return True
+
+    def unwatch(self, address, owner=None, event=None):
+        """
+        Remove the subscriptions of an address, the address is no longer watched when it has no subscriptions left
+
+        :param address: The address
+        :param owner: Only remove the subscriptions of this owner (optional)
+        :param event: Only remove the subscriptions to this event (optional)
+        :return: The number of removed subscriptions
+        """
+        with self._lock:
+            subscriptions = self.addresses.get(address)
+            if subscriptions is None:
+                return 0
+
+            keys = [key for key in subscriptions if owner in (None, key[0]) and event in (None, key[1])]
+            for key in keys:
+                del subscriptions[key]
+                if not any(other[0] == key[0] for other in subscriptions):
+                    self.owners[key[0]].discard(address)
+                    if not self.owners[key[0]]:
+                        del self.owners[key[0]]
+
+            if not subscriptions:
+                del self.addresses[address]
+
+        return len(keys)
+
+    def unwatch_owner(self, owner):
+        """
+        Remove all subscriptions of an owner
+
+        :param owner: The id of the owner
+        :return: The number of removed subscriptions
+        """
+        with self._lock:
+            return sum(self.unwatch(address, owner=owner) for address in list(self.owners.get(owner, [])))
+
+    def watched_addresses(self):
+        """
+        Get the watched addresses, including the addresses that have subscribers on the event bus
+
+        :return: A list of addresses
+        """
+        with self._lock:
+            return list(dict.fromkeys(list(self.addresses) + list(self.event_bus.subscribed(ADDRESS))))
+
+    def subscriptions(self, address=None):
+        """
+        Get the subscriptions of the watched addresses
+
+        :param address: Only get the subscriptions of this address (optional)
+        :return: A dict containing a list of subscriptions for each address
+        """
+        with self._lock:
+            addresses = [address] if address is not None else list(self.addresses)
+            return {address: [subscription.json_encodable() for subscription in self.addresses[address].values()]
+                    for address in addresses if address in self.addresses}
+
+    def load_watchlist(self, filename=WATCHLIST_FILE):
+        """
+        Watch the addresses in a watchlist file, the previous contents of the file are replaced
+
+        :param filename: The filename of the watchlist, as written by listeners/watchlist.py
+        """
+        try:
+            file_stat = os.stat(filename)
+        except OSError:
+            return
+
+        version = (file_stat.st_mtime_ns, file_stat.st_size)
+        if version == self.watchlist_version:
+            return
+
+        try:
+            with open(filename, 'r') as input_file:
+                watchlist = simplejson.load(input_file)
+        except Exception as ex:
+            LOG.error('Unable to load watchlist %s: %s' % (filename, ex))
+            return
+
+        with self._lock:
+            self.unwatch_owner('watchlist')
+            for address, events in watchlist.items():
+                for event, command in events.items():
+                    if event in EVENTS:
+                        self.watch(address=address, event=event, owner='watchlist', command=command)
+
+        self.watchlist_version = version
+        LOG.info('Transaction listener loaded watchlist %s' % filename)
+
+    def expire(self, now=None):
+        """
+        Remove the subscriptions that are expired
+
+        :param now: The current time (optional)
+        :return: The number of removed subscriptions
+        """
+        now = time.time() if now is None else now
+        removed = 0
+        with self._lock:
+            for address in list(self.addresses):
+                for owner, event in [key for key, subscription in self.addresses[address].items() if subscription.expires is not None and subscription.expires <= now]:
+                    removed += self.unwatch(address, owner=owner, event=event)
+
+        return removed
+
+    def refresh(self):
+        """Remove the expired subscriptions and reload the watchlist if it changed, at most once every REFRESH_INTERVAL seconds."""
+        if time.monotonic() - self._last_refresh < REFRESH_INTERVAL:
+            return
+
+        self._last_refresh = time.monotonic()
+        self.expire()
+        self.event_bus.expire()
+        self.load_watchlist()
+
+    def process_transaction(self, txid, inputs, outputs):
+        """
+        Find the subscriptions that match a new transaction and dispatch them, and publish the transaction on the event bus
+        for the subscribers of its addresses and its txid
+
+        :param txid: The txid of the transaction
+        :param inputs: A list of input addresses
+        :param outputs: A list of output addresses
+        :return: A list of tuples containing the address and the matched Subscription
+        """
+        matches = []
+        with self._lock:
+            for event, addresses in [(SEND, inputs), (RECEIVE, outputs)]:
+                for address in addresses:
+                    subscriptions = self.addresses.get(address)
+                    if subscriptions is None:
+                        continue
+
+                    for (owner, subscription_event), subscription in list(subscriptions.items()):
+                        if subscription_event == event and (address, subscription) not in matches:
+                            matches.append((address, subscription))
+                            if subscription.once is True:
+                                self.unwatch(address, owner=owner, event=event)
+
+        for address, subscription in matches:
+            self.dispatch(address=address, txid=txid, subscription=subscription)
+
+        for event, addresses in [(SEND, inputs), (RECEIVE, outputs)]:
+            for address in dict.fromkeys(addresses):
+                self.event_bus.publish(ADDRESS, address, address=address, event=event, txid=txid)
+        self.event_bus.publish(TXID, txid, txid=txid)
+
+        return matches
+
+    def dispatch(self, address, txid, subscription):
+        """
+        Run the command or call the function of a subscription that matched a transaction
+
+        :param address: The watched address
+        :param txid: The txid of the transaction
+        :param subscription: A Subscription object
+        """
+        self.matches += 1
+        LOG.info('Transaction listener: %s %s in transaction %s' % (address, subscription.event, txid))
+
+        if subscription.command is not None:
+            self.dispatcher.submit(target=subscription.command, address=address, event=subscription.event, txid=txid)
+
+        if subscription.callback is not None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=DISPATCH_WORKERS, thread_name_prefix='TransactionListener')
+            self._executor.submit(self.run_callback, subscription.callback, address, txid)
+
+    @staticmethod
+    def run_callback(callback, address, txid):
+        """
+        Call the function of a subscription
+
+        :param callback: The function
+        :param address: The watched address
+        :param txid: The txid of the transaction
+        """
+        try:
+            callback(address, txid)
+        except Exception as ex:
+            LOG.error('Transaction listener callback for %s failed: %s' % (address, ex))
+
+    def on_transaction(self, addresses, load):
+        """
+        Process a new transaction of the backend, it is only loaded when one of its addresses is watched
+
+        :param addresses: The addresses of the transaction that the backend knows without parsing it
+        :param load: A function that returns the txid, the input addresses and the output addresses, or None
+        """
+        self.transactions += 1
+        watched, published = self.addresses, self.event_bus.subscribed(ADDRESS)
+        # The txid is only known after loading, so every transaction is loaded while a txid has subscribers
+        if self.event_bus.subscribed(TXID) or any(address in watched or address in published for address in addresses):
+            transaction = load()
+            if transaction is not None:
+                self.process_transaction(*transaction)
+
+    def on_block(self, height, block_hash):
+        """
+        Publish a new block of the backend on the event bus
+
+        :param height: The height of the block, or None if the backend does not know it
+        :param block_hash: The hash of the block
+        """
+        self.blocks += 1
+        self.last_block = {'height': height, 'hash': block_hash, 'time': int(time.time())}
+        LOG.info('Transaction listener: new block %s %s' % (height, block_hash))
+        self.event_bus.publish(BLOCK, None, height=height, hash=block_hash)
+
+    def run(self):
+        """Main loop of the listener thread, reconnects when the upstream connection is lost."""
+        while self.running:
+            try:
+                self.backend.run(self)
+            except Exception as ex:
+                LOG.error('Transaction listener backend %s failed: %s' % (self.backend.name, ex))
+
+            if not self.backend.reconnect:
+                break
+
+            if self.running:
+                time.sleep(RECONNECT_DELAY)
+
+    def start(self):
+        """Load the watchlist and start the listener thread."""
+        if self.running:
+            return
+
+        self.load_watchlist()
+        self.running = True
+        self._thread = threading.Thread(target=self.run, name='TransactionListener', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the listener thread."""
+        self.running = False
+        self.backend.stop()
+
+        if self._thread is not None:
+            self._thread.join(timeout=RECONNECT_DELAY + 1)
+            self._thread = None
+
+    def after_fork(self):
+        """The listener thread only runs in the process that started it, a forked process registers addresses in its own copy."""
+        self._lock = threading.RLock()
+        self._thread = None
+        self._executor = None
+        self.dispatcher = BatchDispatcher()
+        self.running = False
+
+    def stats(self):
+        """
+        Get the number of watched addresses, processed transactions and matches
+
+        :return: A dict
+        """
+        with self._lock:
+            return {'running': self.running,
+                    'backend': self.backend.name,
+                    'url': self.backend.url,
+                    'watched_addresses': len(self.addresses),
+                    'subscriptions': sum(len(subscriptions) for subscriptions in self.addresses.values()),
+                    'max_addresses': self.max_addresses,
+                    'transactions': self.transactions,
+                    'matches': self.matches,
+                    'blocks': self.blocks,
+                    'last_block': self.last_block,
+                    'dispatched': self.dispatcher.dispatched,
+                    'dropped': self.dispatcher.dropped,
+                    'event_bus': self.event_bus.stats()}
+
+
+LISTENER_SERVICE = TransactionListenerService()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=LISTENER_SERVICE.after_fork)
+
+
+def watch_address(address, **data):
+    """
+    Watch an address with the listener service, for the registration api
+
+    :param address: The address to watch
+    :param data: A dict containing the event (SEND or RECEIVE), the owner and optionally a command, timeout (in seconds) and once
+    :return: None or a dict with an error
+    """
+    if not LISTENER_SERVICE.running:
+        return {'error': 'The transaction listener is not running in this process'}
+
+    if data.get('event') not in EVENTS:
+        return {'error': 'event must be one of %s' % EVENTS}
+
+    if 'owner' not in data:
+        return {'error': 'Request data does not contain all required keys: event, owner'}
+
+    timeout = data.get('timeout')
+    if timeout is not None and (not isinstance(timeout, int) or timeout <= 0):
+        return {'error': 'timeout must be a positive integer'}
+
+    if not LISTENER_SERVICE.watch(address=address, event=data['event'], owner=str(data['owner']), command=data.get('command'),
+                                  timeout=timeout, once=data.get('once') is True):
+        return {'error': 'The transaction listener can not watch more addresses'}
+
+
+def unwatch_address(address, owner=None, event=None):
+    """
+    Stop watching an address with the listener service, for the registration api
+
+    :param address: The address
+    :param owner: Only remove the subscriptions of this owner (optional)
+    :param event: Only remove the subscriptions to this event (optional)
+    :return: None or a dict with an error
+    """
+    if LISTENER_SERVICE.unwatch(address=address, owner=owner, event=event) == 0:
+        return {'error': 'Address %s is not watched' % address}
@@ -6,9 +6,15 @@ import os
 import io
 import sys
 import glob
+import json
+import queue
+import atexit
+import heapq
+import random
+import itertools
 import platform
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
@@ -43,34 +49,279 @@ LOG.addHandler(file_handler)
 
 LOG.setLevel(logging.DEBUG)
 
-# Create a log file for the http requests to the REST API
+ACCESS_LOG_QUEUE_SIZE = 10000  # Number of records that can wait for the writer thread before new records are dropped
+
+
+class AccessLogFormatter(logging.Formatter):
+    """Formatter that writes access records, which are dicts, as a single line of JSON."""
+    def format(self, record):
+        if isinstance(record.msg, dict):
+            return json.dumps(record.msg, default=str)
+
+        return super(AccessLogFormatter, self).format(record)
+
+
+class AccessLogQueueHandler(QueueHandler):
+    """
+    Handler that hands the records over to the writer thread without blocking
+
+    Records are not formatted here, so formatting happens in the writer thread as well. When the queue is full the
+    record is dropped instead of making the request wait for the disk.
+    """
+    def __init__(self, record_queue):
+        super(AccessLogQueueHandler, self).__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class AccessLog(object):
+    """
+    Settings and background writer of the log of the requests to the REST API
+
+    By default each request is written as one compact JSON record with at most max_body characters of the request
+    body. The verbose mode also writes every header and every key of a JSON body on a separate line, for debugging.
+    Successful requests can be sampled with a sample_rate below 1, failed requests are always logged.
+
+    :param logger: The logger of the requests
+    :param handlers: The handlers that write the records, they are only used by the writer thread
+    :param max_queue: The number of records that can wait for the writer thread
+    """
+    def __init__(self, logger, handlers, max_queue=ACCESS_LOG_QUEUE_SIZE):
+        self.logger = logger
+        self.handlers = handlers
+        self.max_queue = max_queue
+        self.verbose = False
+        self.max_body = 256
+        self.sample_rate = 1.0
+        self.listener = None
+        self.queue_handler = AccessLogQueueHandler(queue.Queue(max_queue))
+        logger.addHandler(self.queue_handler)
+
+    def configure(self, verbose=False, max_body=256, sample_rate=1.0):
+        """
+        Change the settings of the access log
+
+        :param verbose: Also log all headers and all keys of the JSON body of each request
+        :param max_body: The maximum number of characters of the body (or of a header or body value in verbose mode)
+        :param sample_rate: The fraction of successful requests that is logged
+        """
+        self.verbose = verbose
+        self.max_body = max(0, max_body)
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+
+    def start(self):
+        """Start the writer thread."""
+        if self.listener is None:
+            self.listener = QueueListener(self.queue_handler.queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+
+    def stop(self):
+        """Write the remaining records and stop the writer thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def restart_after_fork(self):
+        """Give a forked process its own queue and writer thread, threads are not copied by a fork."""
+        self.queue_handler.queue = queue.Queue(self.max_queue)
+        self.listener = None
+        self.start()
+
+    @property
+    def dropped(self):
+        """The number of records that were dropped because the queue was full."""
+        return self.queue_handler.dropped
+
+    def is_sampled(self, status_code):
+        """
+        Check if a request should be logged
+
+        :param status_code: The status code of the response
+        :return: True if the request should be logged, False otherwise
+        """
+        return status_code >= 400 or self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def truncate(self, value):
+        """
+        Shorten a value to the maximum number of characters
+
+        :param value: A string
+        :return: The string, with everything after max_body characters replaced by the number of characters left out
+        """
+        if len(value) <= self.max_body:
+            return value
+
+        return '%s...(%s more)' % (value[:self.max_body], len(value) - self.max_body)
+
+
+# Create a log file for the http requests to the REST API, written by a background thread
 REQUESTS_LOG = logging.getLogger('api_requests')
 
 file_handler = RotatingFileHandler(os.path.join(logs_dir, 'requests.txt'), maxBytes=10000000, backupCount=backup_count, encoding='utf-8')  # Todo change to concurrent_log_handler.ConcurrentRotatingFileHandler with backupCount 5 after python3 conversion
-file_handler.setFormatter(logging.Formatter('%(message)s'))
-REQUESTS_LOG.addHandler(file_handler)
+file_handler.setFormatter(AccessLogFormatter('%(message)s'))
 
 REQUESTS_LOG.setLevel(logging.DEBUG)
 
+ACCESS_LOG = AccessLog(logger=REQUESTS_LOG, handlers=[file_handler])
+ACCESS_LOG.start()
+atexit.register(ACCESS_LOG.stop)
+if hasattr(os, 'register_at_fork'):  # not available on windows
+    os.register_at_fork(after_in_child=ACCESS_LOG.restart_after_fork)
+
 
-def get_logs(filter_string=''):
+TIMESTAMP_TEMPLATE = '0000-00-00 00:00:00,000'  # Format of the timestamps of the log messages, 0 is any digit
+TIMESTAMP_LENGTH = len(TIMESTAMP_TEMPLATE)
+LOG_LEVELS = {'DEBUG': logging.DEBUG, 'INFO': logging.INFO, 'WARNING': logging.WARNING, 'ERROR': logging.ERROR, 'CRITICAL': logging.CRITICAL}
+
+
+def is_timestamp_prefix(value, min_length=1):
     """
-    Get the combined log messages from all the logs files at a given time
+    Check if a string is the start of a timestamp of a log message
 
-    :param filter_string: A (partial) timestamp (e.g. 2017-07-14 13:) -> will return all log messages that start with 2017-07-14 13
-    :return: A list containing all relevant log messages
+    :param value: A string
+    :param min_length: The minimum length of the string
+    :return: True if the string is a (partial) timestamp, False otherwise
     """
-    # Get a list of all relevant log files
-    log_files = glob.glob('logs/spellbook.txt*')
+    return min_length <= len(value) <= TIMESTAMP_LENGTH and \
+        all(char.isdigit() if template_char == '0' else char == template_char for char, template_char in zip(value, TIMESTAMP_TEMPLATE))
 
-    combined_logs = []
-    for log_file in log_files:
-        with open(log_file, 'r', encoding='utf-8') as input_file:
-            for line in input_file.readlines():
-                if filter_string in line:
-                    combined_logs.append(line.strip())
 
-    # Sort the log messages by the timestamps
-    ret = [line for line in sorted(combined_logs, key=lambda x: x)]
+def get_timestamp(line):
+    """
+    Get the timestamp of a log message
+
+    :param line: A line of a log file
+    :return: The timestamp, or None if the line is the continuation of a multi-line message
+    """
+    if line[TIMESTAMP_LENGTH:TIMESTAMP_LENGTH + 3] == ' | ' and is_timestamp_prefix(line[:TIMESTAMP_LENGTH], min_length=TIMESTAMP_LENGTH):
+        return line[:TIMESTAMP_LENGTH]
 
-    return ret
+
+def seek_timestamp(log_file, timestamp):
+    """
+    Move a log file to the first message at or after a timestamp, with a binary search on the byte offsets
+
+    The messages in a log file are ordered by their timestamp, so only about log2(size of the file) lines are read.
+
+    :param log_file: A log file opened in binary mode
+    :param timestamp: A (partial) timestamp
+    """
+    low, high = 0, os.fstat(log_file.fileno()).st_size
+    while low < high:
+        middle = (low + high) // 2
+        log_file.seek(middle)
+        log_file.readline()  # skip the rest of the line the middle is in
+
+        line_timestamp = None
+        for raw_line in log_file:
+            line_timestamp = get_timestamp(raw_line.decode('utf-8', errors='replace'))
+            if line_timestamp is not None:
+                break
+
+        if line_timestamp is None or line_timestamp >= timestamp:
+            high = middle
+        else:
+            low = middle + 1
+
+    log_file.seek(low)
+    if low > 0:
+        log_file.readline()
+
+
+def read_log_file(filename, start=None, end=None):
+    """
+    Read the messages of a log file between two timestamps
+
+    Lines of multi-line messages (like tracebacks) get the timestamp and level of the message they belong to.
+
+    :param filename: The filename of the log file
+    :param start: Only messages at or after this (partial) timestamp
+    :param end: Only messages before this (partial) timestamp
+    :return: A generator of tuples containing the timestamp, the level and the line
+    """
+    with open(filename, 'rb') as log_file:
+        if start is not None:
+            seek_timestamp(log_file, start)
+
+        timestamp, level = None, None
+        for raw_line in log_file:
+            line = raw_line.decode('utf-8', errors='replace').strip()
+            line_timestamp = get_timestamp(line)
+            if line_timestamp is not None:
+                timestamp, level = line_timestamp, line[TIMESTAMP_LENGTH + 3:].split(' | ', 1)[0]
+            elif timestamp is None:
+                # The rest of a message that started before the start
+                continue
+
+            if end is not None and timestamp >= end:
+                break
+
+            yield timestamp, level, line
+
+
+def get_log_files():
+    """
+    Get the log files, oldest first
+
+    :return: A list of filenames
+    """
+    def rotation(filename):
+        extension = filename.rsplit('.', 1)[-1]
+        return int(extension) if extension.isdigit() else 0
+
+    return sorted(glob.glob(os.path.join(logs_dir, 'spellbook.txt*')), key=rotation, reverse=True)
+
+
+def iter_logs(filter_string='', level=None, start=None, end=None, limit=None):
+    """
+    Get the log messages of all log files in order of their timestamps, as they are found
+
+    The log files are merged (each log file is already in order) instead of sorted, and files are only read from the
+    start of the time range, so a query for a short period of time only reads a small part of the logs.
+
+    :param filter_string: A (partial) timestamp (e.g. 2017-07-14 13:) -> only log messages that start with 2017-07-14 13,
+                          any other string -> only log messages that contain the string
+    :param level: Only log messages of this level or higher (e.g. WARNING)
+    :param start: Only log messages at or after this (partial) timestamp
+    :param end: Only log messages before this (partial) timestamp
+    :param limit: The maximum number of log messages
+    :return: A generator of log messages
+    """
+    if is_timestamp_prefix(filter_string, min_length=len('0000-00')):
+        # Every timestamp that starts with the prefix is between the prefix and the prefix followed by the highest character
+        start = max(start, filter_string) if start is not None else filter_string
+        end = min(end, filter_string + '\uffff') if end is not None else filter_string + '\uffff'
+        filter_string = ''
+
+    if level is not None and level.upper() not in LOG_LEVELS:
+        raise ValueError('Unknown log level: %s' % level)
+    min_level = LOG_LEVELS[level.upper()] if level is not None else None
+
+    merged = heapq.merge(*[read_log_file(filename, start=start, end=end) for filename in get_log_files()], key=lambda message: message[0])
+
+    messages = (line for _, line_level, line in merged
+                if filter_string in line and (min_level is None or LOG_LEVELS.get(line_level, 0) >= min_level))
+
+    return itertools.islice(messages, limit) if limit is not None else messages
+
+
+def get_logs(filter_string='', level=None, start=None, end=None, limit=None):
+    """
+    Get the combined log messages from all the logs files at a given time
+
+    :param filter_string: A (partial) timestamp (e.g. 2017-07-14 13:) -> will return all log messages that start with 2017-07-14 13
+    :param level: Only log messages of this level or higher (e.g. WARNING)
+    :param start: Only log messages at or after this (partial) timestamp
+    :param end: Only log messages before this (partial) timestamp
+    :param limit: The maximum number of log messages
+    :return: A list containing all relevant log messages
+    """
+    return list(iter_logs(filter_string=filter_string, level=level, start=start, end=end, limit=limit))
@@ -94,7 +94,7 @@ if sys.version_info.major == 3:
 
     def from_string_to_bytes(a):
         """Convert a string to bytes, encoding as UTF-8 if necessary."""
-        return a if isinstance(a, bytes) else bytes(a, 'utf-8')
+        return a if isinstance(a, (bytes, bytearray)) else bytes(a, 'utf-8')
 
     def safe_hexlify(a):
         """Hex-encode the input and return a safe UTF-8 hex string."""
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Registry of the Spellbook Script classes used by triggers."""
+
+import importlib
+import os
+import platform
+import threading
+
+from helpers.loghelpers import LOG
+
+SCRIPT_ROOT_DIRS = ['spellbookscripts', 'apps']
+
+
+def get_mtime(path):
+    """Get the modification time of a file in nanoseconds, or None if the file can not be accessed."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ScriptRegistry(object):
+    """
+    Cache of the Spellbook Script classes, so a script is only looked up and imported once
+
+    A cached script only costs a single stat of its source file, if the file was modified the module is reloaded so
+    changes to a script are picked up without restarting the server. Modules that are imported by the script itself
+    are not reloaded.
+    """
+    def __init__(self):
+        self.scripts = {}
+        self.imports = 0
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def resolve(script):
+        """
+        Find a script in the allowed root directories
+
+        :param script: The filename of the script, relative to one of the root directories
+        :return: A tuple containing the path and the module name of the script, or (None, None) if it is not found
+        """
+        script_name = script[:-3]  # script name without the .py extension
+        script_path = None
+        script_module_name = None
+
+        for root_dir in SCRIPT_ROOT_DIRS:
+            if os.path.isfile(os.path.join(root_dir, script)):
+                script_path = os.path.join(root_dir, script)
+                if platform.system() == 'Windows':
+                    script_module_name = '%s.%s' % (root_dir, script_name.replace('\\', '.'))
+                elif platform.system() == 'Linux':
+                    script_module_name = '%s.%s' % (root_dir, script_name.replace('/', '.'))
+                else:
+                    raise NotImplementedError('Unsupported platform: only windows and linux are supported')
+
+        return script_path, script_module_name
+
+    def get_class(self, script):
+        """
+        Get the class of a Spellbook Script, importing or reloading its module if needed
+
+        :param script: The filename of the script, relative to one of the root directories
+        :return: The class of the script, or None if the script is not found
+        """
+        with self._lock:
+            cached = self.scripts.get(script)
+            if cached is not None and get_mtime(cached['path']) == cached['mtime']:
+                return cached['class']
+
+            script_path, script_module_name = self.resolve(script)
+            if script_path is None:
+                self.scripts.pop(script, None)
+                LOG.error('Can not find spellbook script %s' % script)
+                return
+
+            LOG.info('Loading Spellbook Script %s (module %s)' % (script_path, script_module_name))
+            mtime = get_mtime(script_path)
+            script_module = importlib.import_module(script_module_name)
+            if cached is not None and cached['module'] == script_module_name:
+                # The source file was modified since it was imported
+                script_module = importlib.reload(script_module)
+            self.imports += 1
+
+            script_class = getattr(script_module, os.path.basename(script_path)[:-3])
+
+            # Only cache scripts of which the modification time is known, so changes are always noticed
+            if mtime is not None:
+                self.scripts[script] = {'path': script_path, 'module': script_module_name, 'class': script_class, 'mtime': mtime}
+
+            return script_class
+
+    def preload(self, scripts):
+        """
+        Import multiple scripts in advance, so the first activation of their triggers does not have to wait for the import
+
+        :param scripts: A list of script filenames
+        :return: The number of scripts that were loaded
+        """
+        loaded = 0
+        for script in dict.fromkeys(scripts):
+            try:
+                if self.get_class(script) is not None:
+                    loaded += 1
+            except Exception as ex:
+                LOG.error('Failed to preload Spellbook Script %s: %s' % (script, ex))
+
+        return loaded
+
+    def clear(self):
+        """Forget all cached scripts."""
+        with self._lock:
+            self.scripts = {}
+
+
+SCRIPT_REGISTRY = ScriptRegistry()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Base class for the SQLite databases of the spellbook."""
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteDatabase(object):
+    """
+    A SQLite database that the threads of a process use through a single connection
+
+    The connection is opened in autocommit and WAL mode the first time it is needed, so other processes can read while
+    one of them writes. A forked process opens a connection of its own. Subclasses create their tables in setup().
+
+    :param filename: The filename of the SQLite database
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._connection = None
+        self._pid = None
+        self._lock = threading.RLock()
+
+    def connection(self):
+        """
+        Get the connection to the database, a forked process opens a connection of its own
+
+        :return: A sqlite3 Connection object
+        """
+        if self._connection is None or self._pid != os.getpid():
+            if os.path.dirname(self.filename) and not os.path.isdir(os.path.dirname(self.filename)):
+                os.makedirs(os.path.dirname(self.filename))
+
+            connection = sqlite3.connect(self.filename, timeout=10, check_same_thread=False, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self.setup(connection)
+            self._connection = connection
+            self._pid = os.getpid()
+
+        return self._connection
+
+    def setup(self, connection):
+        """
+        Set the pragmas and create the tables of the database, each time a connection is opened
+
+        :param connection: A sqlite3 Connection object
+        """
+        pass
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Storage of the trigger and action configs, as json files or all together in a single SQLite database."""
+
+import glob
+import os
+
+import simplejson
+
+from helpers.jsonhelpers import save_to_json_file, load_from_json_file, dumps_json, JSON_FILES, FSYNC_NEVER
+from helpers.loghelpers import LOG
+from helpers.sqlitehelpers import SQLiteDatabase
+
+TRIGGERS_DIR = 'json/public/triggers'
+ACTIONS_DIR = 'json/public/actions'
+STORAGE_DATABASE_FILE = 'json/public/spellbook.db'
+
+# The storage backends
+BACKEND_FILES = 'files'
+BACKEND_SQLITE = 'sqlite'
+STORAGE_BACKENDS = [BACKEND_FILES, BACKEND_SQLITE]
+
+
+class StorageDatabase(SQLiteDatabase):
+    """
+    A SQLite database containing the configs of all triggers and actions
+
+    Each config is a row with a compact json document, indexed by its collection and id. Every save gives the row a
+    new version, so the configs can be cached in memory and a lookup only needs to read the version from the index.
+
+    :param filename: The filename of the SQLite database
+    """
+    def __init__(self, filename=STORAGE_DATABASE_FILE):
+        super(StorageDatabase, self).__init__(filename=filename)
+
+    def setup(self, connection):
+        """
+        Create the table of the documents
+
+        :param connection: A sqlite3 Connection object
+        """
+        connection.execute('PRAGMA synchronous=%s' % ('NORMAL' if JSON_FILES['fsync'] == FSYNC_NEVER else 'FULL'))
+        # The row_id is never reused, so a deleted and recreated config does not get the version of the old one
+        connection.execute('CREATE TABLE IF NOT EXISTS documents (row_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                           'collection TEXT NOT NULL, id TEXT NOT NULL, version INTEGER NOT NULL, data TEXT NOT NULL, '
+                           'UNIQUE (collection, id))')
+
+    def execute(self, sql, parameters=()):
+        """
+        Execute a sql statement
+
+        :param sql: The sql statement
+        :param parameters: The parameters of the statement
+        :return: A sqlite3 Cursor object
+        """
+        with self._lock:
+            return self.connection().execute(sql, parameters)
+
+    def load(self, collection, document_id):
+        """
+        Load a document
+
+        :param collection: The name of the collection
+        :param document_id: The id of the document
+        :return: A dict or None if the document does not exist
+        """
+        with self._lock:
+            row = self.execute('SELECT data FROM documents WHERE collection = ? AND id = ?', (collection, document_id)).fetchone()
+
+        return simplejson.loads(row[0]) if row is not None else None
+
+    def save(self, collection, document_id, data):
+        """
+        Save a document, replacing the previous version
+
+        :param collection: The name of the collection
+        :param document_id: The id of the document
+        :param data: A json-encodable dict
+        """
+        self.execute('INSERT INTO documents (collection, id, version, data) VALUES (?, ?, 1, ?) ON CONFLICT(collection, id) '
+                     'DO UPDATE SET version = version + 1, data = excluded.data',
+                     (collection, document_id, dumps_json(data, compact=True)))
+
+    def delete(self, collection, document_id):
+        """
+        Delete a document
+
+        :param collection: The name of the collection
+        :param document_id: The id of the document
+        :return: True if the document existed, False otherwise
+        """
+        return self.execute('DELETE FROM documents WHERE collection = ? AND id = ?', (collection, document_id)).rowcount == 1
+
+    def versions(self, collection, document_id=None):
+        """
+        Get the versions of the documents of a collection
+
+        :param collection: The name of the collection
+        :param document_id: Only get the version of this document (optional)
+        :return: A dict containing the version of each document
+        """
+        with self._lock:
+            if document_id is not None:
+                rows = self.execute('SELECT id, row_id, version FROM documents WHERE collection = ? AND id = ?', (collection, document_id)).fetchall()
+            else:
+                rows = self.execute('SELECT id, row_id, version FROM documents WHERE collection = ?', (collection,)).fetchall()
+
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+
+class DocumentStore(object):
+    """
+    The configs of one kind of object, kept as json files in a directory or in the StorageDatabase
+
+    The store starts with the json files, use_sqlite_storage() moves all stores to the database. The json files that are
+    not in the database yet are imported at that moment, so the json/public layout stays usable to add configs by hand.
+
+    :param collection: The name of the collection in the database
+    :param directory: The directory of the json files
+    """
+    def __init__(self, collection, directory):
+        self.collection = collection
+        self.directory = directory
+        self.database = None
+
+    def filename(self, document_id):
+        """
+        Get the filename of the json file of a config
+
+        :param document_id: The id of the config
+        :return: The filename
+        """
+        return os.path.join(self.directory, '%s.json' % document_id)
+
+    def ids(self):
+        """
+        Get the ids of all configs
+
+        :return: A list of ids
+        """
+        if self.database is not None:
+            return list(self.database.versions(self.collection))
+
+        return [os.path.splitext(os.path.basename(filename))[0] for filename in glob.glob(os.path.join(self.directory, '*.json'))]
+
+    def exists(self, document_id):
+        """
+        Check if a config exists
+
+        :param document_id: The id of the config
+        :return: True or False
+        """
+        if self.database is not None:
+            return document_id in self.database.versions(self.collection, document_id)
+
+        return os.path.isfile(self.filename(document_id))
+
+    def version(self, document_id):
+        """
+        Get the version of a config, the version changes every time the config is saved
+
+        :param document_id: The id of the config
+        :return: A hashable version or None if the config does not exist
+        """
+        if self.database is not None:
+            return self.database.versions(self.collection, document_id).get(document_id)
+
+        try:
+            file_stat = os.stat(self.filename(document_id))
+        except OSError:
+            return
+
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def versions(self):
+        """
+        Get the versions of all configs
+
+        :return: A dict containing the version of each config
+        """
+        if self.database is not None:
+            return self.database.versions(self.collection)
+
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json') and entry.is_file()]
+        except OSError:
+            return {}
+
+        versions = {}
+        for entry in entries:
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                continue
+            versions[entry.name[:-5]] = (file_stat.st_mtime_ns, file_stat.st_size)
+
+        return versions
+
+    def load(self, document_id):
+        """
+        Load a config
+
+        :param document_id: The id of the config
+        :return: A dict or None if the config does not exist or can not be parsed
+        """
+        if self.database is not None:
+            return self.database.load(self.collection, document_id)
+
+        try:
+            return load_from_json_file(self.filename(document_id))
+        except IOError:
+            return
+
+    def save(self, document_id, data):
+        """
+        Save a config
+
+        :param document_id: The id of the config
+        :param data: A json-encodable dict
+        """
+        if self.database is not None:
+            self.database.save(self.collection, document_id, data)
+        else:
+            save_to_json_file(self.filename(document_id), data)
+
+    def delete(self, document_id):
+        """
+        Delete a config
+
+        :param document_id: The id of the config
+        :return: True if the config existed, False otherwise
+        """
+        if self.database is not None:
+            return self.database.delete(self.collection, document_id)
+
+        filename = self.filename(document_id)
+        if not os.path.isfile(filename):
+            return False
+
+        os.remove(filename)
+        return True
+
+    def import_files(self):
+        """
+        Copy the json files that are not in the database yet into the database
+
+        :return: The number of imported configs
+        """
+        known = self.database.versions(self.collection)
+        imported = 0
+        for filename in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            document_id = os.path.splitext(os.path.basename(filename))[0]
+            if document_id in known:
+                continue
+
+            try:
+                data = load_from_json_file(filename)
+            except IOError:
+                continue
+
+            if isinstance(data, dict):
+                self.database.save(self.collection, document_id, data)
+                imported += 1
+
+        return imported
+
+
+TRIGGER_STORE = DocumentStore(collection='triggers', directory=TRIGGERS_DIR)
+ACTION_STORE = DocumentStore(collection='actions', directory=ACTIONS_DIR)
+
+
+def use_sqlite_storage(filename=STORAGE_DATABASE_FILE):
+    """
+    Keep the triggers and actions in a SQLite database from now on, the json files that are not in the database yet are imported
+
+    :param filename: The filename of the SQLite database
+    """
+    database = StorageDatabase(filename=filename)
+    for store in [TRIGGER_STORE, ACTION_STORE]:
+        store.database = database
+        imported = store.import_files()
+        if imported > 0:
+            LOG.info('Imported %s %s from %s into %s' % (imported, store.collection, store.directory, filename))
@@ -2,16 +2,22 @@
 # -*- coding: utf-8 -*-
 """Helper functions for creating, configuring, checking, and activating triggers."""
 
-import glob
-import os
+import copy
+import functools
+import heapq
+import itertools
+import threading
 import time
 
 from helpers.loghelpers import LOG
+from helpers.listenerhelpers import LISTENER_SERVICE
+from helpers.eventbus import EVENT_BUS, ADDRESS, TXID, BLOCK
+from helpers.scripthelpers import SCRIPT_REGISTRY
 from trigger.balancetrigger import BalanceTrigger
 from trigger.blockheighttrigger import BlockHeightTrigger
 from trigger.txconfirmationtrigger import TxConfirmationTrigger
 from trigger.deadmansswitchtrigger import DeadMansSwitchTrigger
-from helpers.jsonhelpers import load_from_json_file
+from helpers.storagehelpers import TRIGGER_STORE, TRIGGERS_DIR, DocumentStore
 from trigger.manualtrigger import ManualTrigger
 from trigger.receivedtrigger import ReceivedTrigger
 from trigger.recurringtrigger import RecurringTrigger
@@ -25,22 +31,194 @@ from trigger.httppostrequesttrigger import HTTPPostRequestTrigger
 from trigger.httpdeleterequesttrigger import HTTPDeleteRequestTrigger
 from trigger.triggertype import TriggerType
 from helpers.actionhelpers import delete_action
-from helpers.hotwallethelpers import get_private_key_from_wallet, find_address_in_wallet, find_single_address_in_wallet
+from data.data import balances, latest_block, transaction, new_block, invalidate_cache
+from helpers.hotwallethelpers import get_private_key_from_wallet, find_address_path, find_single_address_in_wallet
 
-from validators.validators import valid_address
+from validators.validators import valid_address, valid_script
 
-TRIGGERS_DIR = 'json/public/triggers'
+# Trigger types that depend on the balance of an address, and trigger types that can only change when a new block arrives
+BALANCE_TRIGGER_TYPES = [TriggerType.BALANCE, TriggerType.RECEIVED, TriggerType.SENT]
+BLOCK_TRIGGER_TYPES = [TriggerType.BLOCK_HEIGHT, TriggerType.TX_CONFIRMATION]
 
+# The query that is cached for the key of each topic of the event bus, it is outdated when an event of the key arrives
+EVENT_QUERY_TYPES = {ADDRESS: 'balance', TXID: 'transaction'}
 
-def get_triggers():
+# Trigger types that only depend on the time, these are checked by the TriggerScheduler when they are due
+TIME_TRIGGER_TYPES = [TriggerType.TIMESTAMP, TriggerType.RECURRING, TriggerType.DEADMANSSWITCH]
+
+# The chain tip and the version of the config at the last check of each block-dependent trigger that was not fulfilled
+BLOCK_TRIGGER_CHECKS = {}
+
+# The address and the number of blocks left of each trigger that has seen a transaction of its address in the mempool,
+# the explorers only count confirmed transactions, so these triggers are checked again on the next blocks
+PENDING_TRIGGERS = {}
+PENDING_TRIGGERS_LOCK = threading.Lock()
+PENDING_BLOCKS = 3
+
+
+class TriggerRepository(object):
+    """
+    In-memory index of the trigger configs in the trigger store
+
+    Each trigger config is parsed once and kept in memory together with its version (the modification time and size of
+    its json file, or the version of its row in the storage database). A lookup only needs to get the version, the config
+    is parsed again only if it was changed (by another process, by Trigger.save() or by hand). Listing the triggers only
+    re-parses the configs that changed since the last listing.
+
+    :param triggers_dir: The directory containing the trigger json files, if no store is given
+    :param store: The DocumentStore of the triggers (optional)
+    """
+    def __init__(self, triggers_dir=TRIGGERS_DIR, store=None):
+        self.store = store if store is not None else DocumentStore(collection='triggers', directory=triggers_dir)
+        self.configs = {}
+        self.versions = {}
+        self.locks = {}
+        self.loads = 0
+        self._lock = threading.RLock()
+
+    def filename(self, trigger_id):
+        """
+        Get the filename of the json file of a trigger
+
+        :param trigger_id: The id of the trigger
+        :return: The filename
+        """
+        return self.store.filename(trigger_id)
+
+    def exists(self, trigger_id):
+        """
+        Check if a trigger exists
+
+        :param trigger_id: The id of the trigger
+        :return: True or False
+        """
+        return self.store.exists(trigger_id)
+
+    def refresh(self, trigger_id, version):
+        """
+        Parse the config of a trigger again if it changed since it was last parsed
+
+        :param trigger_id: The id of the trigger
+        :param version: The current version of the config in the store
+        :return: The config of the trigger (not a copy) or None if the config can not be parsed
+        """
+        with self._lock:
+            if self.versions.get(trigger_id) != version:
+                trigger_config = self.store.load(trigger_id)
+
+                self.loads += 1
+                if not isinstance(trigger_config, dict):
+                    # The file is being written by hand or is corrupt, try again on the next lookup
+                    self.forget(trigger_id)
+                    return
+
+                self.configs[trigger_id] = trigger_config
+                self.versions[trigger_id] = version
+
+            return self.configs[trigger_id]
+
+    def lock(self, trigger_id):
+        """
+        Get the lock of a trigger, it is held while the conditions of the trigger are checked and the trigger is activated
+
+        :param trigger_id: The id of the trigger
+        :return: A threading.Lock
+        """
+        with self._lock:
+            return self.locks.setdefault(trigger_id, threading.Lock())
+
+    def get_config(self, trigger_id):
+        """
+        Get the configuration of a trigger
+
+        :param trigger_id: The id of the trigger
+        :return: A copy of the configuration of the trigger or None if the trigger does not exist
+        """
+        version = self.store.version(trigger_id)
+        if version is None:
+            self.forget(trigger_id)
+            return
+
+        trigger_config = self.refresh(trigger_id, version)
+
+        # Triggers modify their config (for example by extending the list of actions), so never hand out the cached dict
+        return copy.deepcopy(trigger_config) if trigger_config is not None else None
+
+    def get_trigger_ids(self, trigger_type=None, status=None):
+        """
+        Get the ids of the triggers, optionally filtered by trigger type and/or status
+
+        :param trigger_type: Only get triggers of this type (optional)
+        :param status: Only get triggers with this status (optional)
+        :return: A list of trigger_ids
+        """
+        versions = self.store.versions()
+
+        if trigger_type is None and status is None:
+            trigger_ids = list(versions)
+        else:
+            trigger_ids = []
+            for trigger_id, version in versions.items():
+                trigger_config = self.refresh(trigger_id, version)
+                if trigger_config is None:
+                    continue
+
+                if trigger_type is not None and trigger_config.get('trigger_type') != trigger_type:
+                    continue
+
+                if status is not None and trigger_config.get('status') != status:
+                    continue
+
+                trigger_ids.append(trigger_id)
+
+        # Forget the triggers that were deleted
+        with self._lock:
+            for trigger_id in set(self.configs) - set(versions):
+                self.forget(trigger_id)
+
+        return trigger_ids
+
+    def forget(self, trigger_id):
+        """
+        Remove a trigger from the index, it will be parsed again the next time it is needed
+
+        :param trigger_id: The id of the trigger
+        """
+        with self._lock:
+            self.configs.pop(trigger_id, None)
+            self.versions.pop(trigger_id, None)
+
+    def clear(self):
+        """
+        Remove all triggers from the index
+        """
+        with self._lock:
+            self.configs = {}
+            self.versions = {}
+
+
+TRIGGER_REPOSITORY = TriggerRepository(store=TRIGGER_STORE)
+
+
+def get_triggers(trigger_type=None, status=None):
     """
     Get the list of triggers_ids
 
+    :param trigger_type: Only get triggers of this type (optional)
+    :param status: Only get triggers with this status (optional)
     :return: A list of trigger_ids
     """
-    triggers = glob.glob(os.path.join(TRIGGERS_DIR, '*.json'))
+    return TRIGGER_REPOSITORY.get_trigger_ids(trigger_type=trigger_type, status=status)
 
-    return [os.path.splitext(os.path.basename(trigger))[0] for trigger in triggers]
+
+def trigger_exists(trigger_id):
+    """
+    Check if a trigger exists
+
+    :param trigger_id: id of the trigger
+    :return: True or False
+    """
+    return TRIGGER_REPOSITORY.exists(trigger_id)
 
 
 def get_trigger_config(trigger_id):
@@ -50,13 +228,10 @@ def get_trigger_config(trigger_id):
     :param trigger_id: id of the trigger
     :return: a dict containing the configuration of the trigger
     """
-    try:
-        trigger_config = load_from_json_file(os.path.join(TRIGGERS_DIR, '%s.json' % trigger_id))
-    except IOError:
-        # Trigger does not exist yet, return empty dict
-        trigger_config = {}
+    trigger_config = TRIGGER_REPOSITORY.get_config(trigger_id)
 
-    return trigger_config
+    # Trigger does not exist yet, return empty dict
+    return trigger_config if trigger_config is not None else {}
 
 
 def get_trigger(trigger_id, trigger_type=None):
@@ -120,6 +295,23 @@ def get_trigger(trigger_id, trigger_type=None):
     return trigger
 
 
+def preload_trigger_scripts():
+    """
+    Import the Spellbook Scripts of all active triggers in advance
+
+    :return: The number of scripts that were loaded
+    """
+    scripts = []
+    for trigger_id in get_triggers(status='Active'):
+        trigger_config = get_trigger_config(trigger_id)
+        if valid_script(trigger_config.get('script')):
+            scripts.append(trigger_config['script'])
+
+    loaded = SCRIPT_REGISTRY.preload(scripts)
+    LOG.info('Preloaded %s Spellbook Scripts of active triggers' % loaded)
+    return loaded
+
+
 def save_trigger(trigger_id, **trigger_config):
     """
     Save or update a trigger config in the triggers.json file
@@ -134,6 +326,13 @@ def save_trigger(trigger_id, **trigger_config):
 
     trigger.configure(**trigger_config)
     trigger.save()
+    TRIGGER_REPOSITORY.forget(trigger_id)
+
+    if TRIGGER_SCHEDULER.running:
+        TRIGGER_SCHEDULER.schedule(trigger_id)
+
+    if LISTENER_SERVICE.running:
+        watch_trigger(trigger_id)
 
 
 def delete_trigger(trigger_id):
@@ -142,9 +341,13 @@ def delete_trigger(trigger_id):
 
     :param trigger_id: The id of the trigger to delete
     """
-    filename = os.path.join(TRIGGERS_DIR, '%s.json' % trigger_id)
-    if os.path.isfile(filename):
-        os.remove(filename)
+    if TRIGGER_REPOSITORY.store.delete(trigger_id):
+        TRIGGER_REPOSITORY.forget(trigger_id)
+
+        if TRIGGER_SCHEDULER.running:
+            TRIGGER_SCHEDULER.unschedule(trigger_id)
+
+        EVENT_BUS.unsubscribe('trigger:%s' % trigger_id)
     else:
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
@@ -155,7 +358,7 @@ def activate_trigger(trigger_id):
 
     :param trigger_id: The id of the trigger
     """
-    if not os.path.isfile(os.path.join(TRIGGERS_DIR, '%s.json' % trigger_id)):
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -163,32 +366,137 @@ def activate_trigger(trigger_id):
         trigger.activate()
     elif trigger.trigger_type == TriggerType.DEADMANSSWITCH:
         trigger.arm()
+        if TRIGGER_SCHEDULER.running:
+            TRIGGER_SCHEDULER.schedule(trigger_id)
     else:
         return {'error': 'Only triggers of type Manual or DeadmansSwitch can be activated manually'}
 
 
-def check_triggers(trigger_id=None):
+class TriggerSnapshot(object):
+    """
+    The blockchain data needed by a set of triggers, fetched once per check of the triggers
+
+    Triggers are grouped by the data they need: the balances of all addresses of Balance, Received and Sent
+    triggers are fetched with a single batch query, the latest block is fetched once for all BlockHeight triggers
+    and each transaction is fetched once, no matter how many TxConfirmation triggers watch it.
+
+    BlockHeight and TxConfirmation triggers can only change when a new block arrives, so they are skipped if they
+    were already checked at the current chain tip and their config did not change since then.
+
+    :param triggers: A list of Trigger objects
+    :param skip_unchanged: Skip the block-dependent triggers that were already checked at the current chain tip
+    :param block: A dict containing the height and the hash of a new block that the transaction listener has seen, it is used as the latest block (optional)
+    """
+    def __init__(self, triggers, skip_unchanged=True, block=None):
+        self.balances = {}
+        self.latest_block = None
+        self.transactions = {}
+        self.tip = None
+        self.skipped = set()
+
+        active = [trigger for trigger in triggers if trigger.status == 'Active']
+
+        if any(trigger.trigger_type in BLOCK_TRIGGER_TYPES for trigger in active):
+            self.latest_block = {'block': block} if block is not None else latest_block()
+            if isinstance(self.latest_block, dict) and 'block' in self.latest_block:
+                self.tip = self.latest_block['block'].get('hash', self.latest_block['block'].get('height'))
+
+            if skip_unchanged is True and self.tip is not None:
+                self.skipped = set(trigger.id for trigger in active if trigger.trigger_type in BLOCK_TRIGGER_TYPES
+                                   and BLOCK_TRIGGER_CHECKS.get(trigger.id) == (self.tip, TRIGGER_REPOSITORY.versions.get(trigger.id)))
+
+        addresses = list(dict.fromkeys(trigger.address for trigger in active if trigger.trigger_type in BALANCE_TRIGGER_TYPES and trigger.address is not None))
+        if addresses:
+            balances_data = balances(addresses)
+            for address in addresses:
+                if 'balances' in balances_data and address in balances_data['balances']:
+                    self.balances[address] = {'balance': balances_data['balances'][address]}
+                else:
+                    self.balances[address] = balances_data
+
+        for txid in dict.fromkeys(trigger.txid for trigger in active if trigger.trigger_type == TriggerType.TX_CONFIRMATION
+                                  and trigger.txid is not None and trigger.id not in self.skipped):
+            self.transactions[txid] = transaction(txid=txid)
+
+    def conditions_fulfilled(self, trigger):
+        """
+        Check the conditions of a trigger, using the data of the snapshot if the trigger needs blockchain data
+
+        :param trigger: A Trigger object
+        :return: True or False
+        """
+        if trigger.trigger_type in BALANCE_TRIGGER_TYPES:
+            return trigger.evaluate(data=self.balances.get(trigger.address))
+        elif trigger.trigger_type == TriggerType.BLOCK_HEIGHT:
+            return self.record(trigger, trigger.evaluate(data=self.latest_block))
+        elif trigger.trigger_type == TriggerType.TX_CONFIRMATION:
+            return self.record(trigger, trigger.evaluate(data=self.transactions.get(trigger.txid)))
+        else:
+            return trigger.conditions_fulfilled()
+
+    def record(self, trigger, fulfilled):
+        """
+        Remember the chain tip at which the conditions of a block-dependent trigger were not fulfilled
+
+        :param trigger: A Trigger object
+        :param fulfilled: The result of the check
+        :return: The result of the check
+        """
+        if fulfilled is True or self.tip is None:
+            BLOCK_TRIGGER_CHECKS.pop(trigger.id, None)
+        else:
+            BLOCK_TRIGGER_CHECKS[trigger.id] = (self.tip, TRIGGER_REPOSITORY.versions.get(trigger.id))
+
+        return fulfilled
+
+
+def check_triggers(trigger_id=None, trigger_types=None, block=None, trigger_ids=None):
     """Check all active triggers and activate those whose conditions are fulfilled.
 
+    The blockchain data the triggers need is fetched once for all triggers (see TriggerSnapshot).
     Also handles self-destruct logic for triggers that have reached their expiry time.
 
-    :param trigger_id: If given, only check the specified trigger (optional)
+    The polling loop, the TriggerScheduler and the events of the transaction listener can check the same trigger at the
+    same time. The conditions are checked and the trigger is activated while holding the lock of the trigger, and a
+    trigger that was saved since its config was loaded (because another check activated it) is skipped.
+
+    :param trigger_id: If given, only check the specified trigger (optional), it is always checked even if the chain tip did not change
+    :param trigger_types: Only check the triggers of these types (optional)
+    :param block: The new block that the transaction listener has seen, see TriggerSnapshot (optional)
+    :param trigger_ids: Only check these triggers (optional), unknown trigger ids are ignored
     """
-    # Get a list of all trigger_ids that are configured
-    triggers = get_triggers()
+    # A single trigger is always checked, even if the chain tip did not change since its last check
+    skip_unchanged = trigger_id is None
 
-    # If a trigger_id is given, only check that specific trigger
-    if trigger_id is not None and trigger_id in triggers:
-        triggers = [trigger_id]
-    elif trigger_id is not None and trigger_id not in triggers:
+    # If a trigger_id is given, only check that specific trigger, otherwise check all triggers that are configured
+    if trigger_id is not None and trigger_exists(trigger_id):
+        trigger_ids = [trigger_id]
+    elif trigger_id is not None:
         return {'error': 'Unknown trigger id: %s' % trigger_id}
-
-    for trigger_id in triggers:
-        trigger = get_trigger(trigger_id=trigger_id)
-        if trigger.status == 'Active':
-            LOG.info('Checking conditions of trigger %s' % trigger_id)
-            if trigger.conditions_fulfilled() is True:
-                trigger.activate()
+    elif trigger_ids is not None:
+        trigger_ids = [trigger_id for trigger_id in trigger_ids if trigger_exists(trigger_id)]
+    elif trigger_types is not None:
+        trigger_ids = [trigger_id for trigger_type in trigger_types for trigger_id in get_triggers(trigger_type=trigger_type)]
+    else:
+        trigger_ids = get_triggers()
+
+    triggers = []
+    versions = {}
+    for trigger_id in trigger_ids:
+        triggers.append(get_trigger(trigger_id=trigger_id))
+        versions[trigger_id] = TRIGGER_REPOSITORY.versions.get(trigger_id)
+
+    snapshot = TriggerSnapshot(triggers=triggers, skip_unchanged=skip_unchanged, block=block)
+
+    for trigger_id, trigger in zip(trigger_ids, triggers):
+        if trigger.status == 'Active' and trigger_id not in snapshot.skipped:
+            with TRIGGER_REPOSITORY.lock(trigger_id):
+                if TRIGGER_REPOSITORY.store.version(trigger_id) != versions[trigger_id]:
+                    LOG.info('Trigger %s was changed by another check, skipping it' % trigger_id)
+                else:
+                    LOG.info('Checking conditions of trigger %s' % trigger_id)
+                    if snapshot.conditions_fulfilled(trigger) is True:
+                        trigger.activate()
 
         if trigger.self_destruct is not None:
             if trigger.self_destruct <= int(time.time()):
@@ -205,6 +513,302 @@ def check_triggers(trigger_id=None):
                 continue
 
 
+class TriggerScheduler(object):
+    """
+    Checks the time-based triggers at the moment they are due, instead of on every poll of check_triggers
+
+    The next due time of each trigger (the timestamp of a Timestamp trigger, the next activation of a Recurring trigger,
+    the next phase of an armed DeadMansSwitch trigger or the self-destruct time of any trigger) is kept in a min-heap.
+    A single thread sleeps until the earliest due time, checks the due triggers and puts them back in the heap with
+    their new due time. Saving or deleting a trigger updates the heap, replaced entries are discarded when they reach
+    the top of the heap. The heap is rebuilt from the trigger files every resync_interval seconds to pick up changes
+    made by other processes.
+
+    :param retry_interval: Seconds to wait before checking a trigger again if it is still due after being checked
+    :param resync_interval: Seconds between rebuilds of the heap
+    """
+    # Fraction of the timeout that is left when a DeadMansSwitch trigger moves to the next phase
+    SWITCH_PHASE_FRACTIONS = {1: 0.5, 2: 0.25, 3: 0.1, 4: 0}
+
+    def __init__(self, retry_interval=60, resync_interval=300):
+        self.retry_interval = retry_interval
+        self.resync_interval = resync_interval
+        self.heap = []
+        self.due = {}
+        self.fired = 0
+        self.running = False
+        self._thread = None
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def get_due_time(cls, trigger):
+        """
+        Get the next time a trigger needs to be checked
+
+        :param trigger: A Trigger object
+        :return: A timestamp or None if the trigger does not need to be checked at a specific time
+        """
+        due_times = []
+
+        if trigger.status == 'Active':
+            if trigger.trigger_type == TriggerType.TIMESTAMP and trigger.timestamp is not None:
+                due_times.append(trigger.timestamp)
+
+            elif trigger.trigger_type == TriggerType.RECURRING and None not in (trigger.next_activation, trigger.interval, trigger.begin_time):
+                due_times.append(trigger.next_activation if trigger.end_time is None else min(trigger.next_activation, trigger.end_time))
+
+            elif trigger.trigger_type == TriggerType.DEADMANSSWITCH and None not in (trigger.timeout, trigger.activation_time, trigger.warning_email) \
+                    and trigger.phase in cls.SWITCH_PHASE_FRACTIONS:
+                due_times.append(int(trigger.activation_time - trigger.timeout * cls.SWITCH_PHASE_FRACTIONS[trigger.phase]))
+
+        if trigger.self_destruct is not None:
+            due_times.append(trigger.self_destruct)
+
+        return min(due_times) if due_times else None
+
+    def _push(self, trigger_id, due_time):
+        """Put a trigger in the heap, replacing its previous due time. Must be called while holding the condition."""
+        if due_time is None:
+            self.due.pop(trigger_id, None)
+            return
+
+        if self.due.get(trigger_id) == due_time:
+            return
+
+        self.due[trigger_id] = due_time
+        heapq.heappush(self.heap, (due_time, next(self._counter), trigger_id))
+
+        # Drop the replaced entries once they make up most of the heap
+        if len(self.heap) > 2 * len(self.due) + 64:
+            self.heap = [(due, count, heap_id) for due, count, heap_id in self.heap if self.due.get(heap_id) == due]
+            heapq.heapify(self.heap)
+
+        self._condition.notify()
+
+    def schedule(self, trigger_id):
+        """
+        Add a trigger to the schedule or update its due time
+
+        :param trigger_id: The id of the trigger
+        """
+        due_time = self.get_due_time(get_trigger(trigger_id)) if trigger_exists(trigger_id) else None
+        with self._condition:
+            self._push(trigger_id, due_time)
+
+    def unschedule(self, trigger_id):
+        """
+        Remove a trigger from the schedule
+
+        :param trigger_id: The id of the trigger
+        """
+        with self._condition:
+            self.due.pop(trigger_id, None)
+
+    def load(self):
+        """Rebuild the heap from the trigger files."""
+        now = time.time()
+        due = {}
+        for trigger_id in get_triggers():
+            due_time = self.get_due_time(get_trigger(trigger_id))
+            if due_time is not None:
+                due[trigger_id] = due_time
+
+        with self._condition:
+            for trigger_id, due_time in due.items():
+                # Keep the retry time of triggers that are still due after they were checked
+                if due_time <= now and self.due.get(trigger_id, 0) > now:
+                    due[trigger_id] = self.due[trigger_id]
+
+            self.due = due
+            self.heap = [(due_time, next(self._counter), trigger_id) for trigger_id, due_time in due.items()]
+            heapq.heapify(self.heap)
+            self._condition.notify()
+
+        LOG.info('Trigger scheduler loaded %s scheduled triggers' % len(due))
+
+    def pop_due(self, now):
+        """
+        Remove the triggers that are due from the heap. Must be called while holding the condition.
+
+        :param now: The current time
+        :return: A list of trigger ids
+        """
+        trigger_ids = []
+        while self.heap and self.heap[0][0] <= now:
+            due_time, _, trigger_id = heapq.heappop(self.heap)
+            if self.due.get(trigger_id) == due_time:
+                del self.due[trigger_id]
+                trigger_ids.append(trigger_id)
+
+        return trigger_ids
+
+    def fire(self, trigger_id):
+        """
+        Check a trigger that is due and schedule it again
+
+        :param trigger_id: The id of the trigger
+        """
+        try:
+            check_triggers(trigger_id=trigger_id)
+        except Exception as ex:
+            LOG.error('Trigger scheduler failed to check trigger %s: %s' % (trigger_id, ex))
+        self.fired += 1
+
+        due_time = self.get_due_time(get_trigger(trigger_id)) if trigger_exists(trigger_id) else None
+        if due_time is not None and due_time <= time.time():
+            # The trigger stays due, for example a multi Timestamp trigger or an action that failed
+            due_time = time.time() + self.retry_interval
+
+        with self._condition:
+            self._push(trigger_id, due_time)
+
+    def run(self):
+        """Main loop of the scheduler thread."""
+        last_load = time.monotonic()
+        while True:
+            with self._condition:
+                while self.running:
+                    timeout = self.resync_interval - (time.monotonic() - last_load)
+                    if self.heap:
+                        timeout = min(timeout, self.heap[0][0] - time.time())
+                    if timeout <= 0:
+                        break
+                    self._condition.wait(timeout)
+
+                if not self.running:
+                    return
+                trigger_ids = self.pop_due(now=time.time())
+
+            for trigger_id in trigger_ids:
+                self.fire(trigger_id)
+
+            if time.monotonic() - last_load >= self.resync_interval:
+                try:
+                    self.load()
+                except Exception as ex:
+                    LOG.error('Trigger scheduler failed to load the triggers: %s' % ex)
+                last_load = time.monotonic()
+
+    def start(self):
+        """Load the triggers and start the scheduler thread."""
+        if self.running:
+            return
+
+        self.load()
+        self.running = True
+        self._thread = threading.Thread(target=self.run, name='TriggerScheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the scheduler thread."""
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+TRIGGER_SCHEDULER = TriggerScheduler()
+
+
+def watch_trigger(trigger_id):
+    """
+    Subscribe an active trigger to the events of the transaction listener on the event bus, so it is checked as soon as
+    a relevant event arrives instead of at the next poll of check_triggers
+
+    Balance, Received and Sent triggers subscribe to the transactions of their address. A TxConfirmation trigger that
+    needs no confirmations subscribes to the transaction of its txid, the others can only change with a new block and
+    are checked together with the BlockHeight triggers by the block subscription of watch_triggers.
+
+    :param trigger_id: The id of the trigger
+    """
+    subscriber = 'trigger:%s' % trigger_id
+    EVENT_BUS.unsubscribe(subscriber)
+    if not trigger_exists(trigger_id):
+        return
+
+    trigger = get_trigger(trigger_id)
+    if trigger.status != 'Active':
+        return
+
+    callback = functools.partial(check_trigger_event, trigger_id)
+    if trigger.trigger_type in BALANCE_TRIGGER_TYPES and trigger.address is not None:
+        EVENT_BUS.subscribe(ADDRESS, trigger.address, subscriber=subscriber, callback=callback)
+    elif trigger.trigger_type == TriggerType.TX_CONFIRMATION and trigger.txid is not None and trigger.confirmations == 0:
+        EVENT_BUS.subscribe(TXID, trigger.txid, subscriber=subscriber, callback=callback)
+
+
+def watch_triggers():
+    """Subscribe all active triggers to the events of the transaction listener, and check the block-dependent triggers on each new block."""
+    EVENT_BUS.subscribe(BLOCK, None, subscriber='triggers', callback=check_block_event)
+    for trigger_id in get_triggers():
+        watch_trigger(trigger_id)
+
+
+def check_trigger_event(trigger_id, topic, key, events):
+    """
+    Check a trigger after the transaction listener has seen a transaction of its address or its txid
+
+    The cached balance or transaction of the key is outdated by the new transaction, so it is queried again. The
+    explorers only count confirmed transactions in the balance of an address, so a trigger of an address is also checked
+    again on the next PENDING_BLOCKS blocks (see check_block_triggers).
+
+    :param trigger_id: The id of the trigger
+    :param topic: ADDRESS or TXID
+    :param key: The address or the txid
+    :param events: A list of events, each containing the txid of a transaction
+    """
+    LOG.info('Transaction %s of %s, checking trigger %s' % (', '.join(event['txid'] for event in events), key, trigger_id))
+    invalidate_cache(query_type=EVENT_QUERY_TYPES[topic], param=[key])
+    check_triggers(trigger_id=trigger_id)
+    watch_trigger(trigger_id)
+
+    if topic == ADDRESS:
+        with PENDING_TRIGGERS_LOCK:
+            PENDING_TRIGGERS[trigger_id] = (key, PENDING_BLOCKS)
+
+
+def check_block_event(topic, key, events):
+    """
+    Check the block-dependent triggers after the transaction listener has seen one or more new blocks
+
+    :param topic: BLOCK
+    :param key: None
+    :param events: A list of events, each containing the height and the hash of a new block
+    """
+    check_block_triggers(height=events[-1]['height'], block_hash=events[-1]['hash'])
+
+
+def check_block_triggers(height, block_hash):
+    """
+    Check the BlockHeight and TxConfirmation triggers as soon as the transaction listener sees a new block, instead of at
+    the next poll of check_triggers, together with the pending triggers that have seen a transaction of their address
+
+    :param height: The height of the new block, or None if the listener backend only knows its hash
+    :param block_hash: The hash of the new block
+    """
+    LOG.info('New block %s, checking BlockHeight and TxConfirmation triggers' % (height if height is not None else block_hash))
+    new_block(height=height)
+    check_triggers(trigger_types=BLOCK_TRIGGER_TYPES, block={'height': height, 'hash': block_hash} if height is not None else None)
+
+    with PENDING_TRIGGERS_LOCK:
+        pending = dict(PENDING_TRIGGERS)
+        for trigger_id, (address, blocks) in pending.items():
+            if blocks > 1:
+                PENDING_TRIGGERS[trigger_id] = (address, blocks - 1)
+            else:
+                del PENDING_TRIGGERS[trigger_id]
+
+    if pending:
+        LOG.info('New block, checking %s triggers that have seen a transaction of their address' % len(pending))
+        for address in set(address for address, _ in pending.values()):
+            invalidate_cache(query_type=EVENT_QUERY_TYPES[ADDRESS], param=[address])
+        check_triggers(trigger_ids=list(pending))
+
+
 def verify_signed_message(trigger_id, **data):
     """Verify a signed message and activate the corresponding SignedMessage trigger.
 
@@ -215,8 +819,7 @@ def verify_signed_message(trigger_id, **data):
     if not all(key in data for key in ['address', 'message', 'signature']):
         return {'error': 'Request data does not contain all required keys: address, message and signature'}
 
-    triggers = get_triggers()
-    if trigger_id not in triggers:
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -261,14 +864,15 @@ def sign_message(**data):
     if len(message) > 255:
         return {'success': False, 'error': 'Message is too long, can not be longer than 255 characters.'}
 
-    account, index = find_address_in_wallet(address=address)
-    if account is None or index is None:
+    path = find_address_path(address=address)
+    if path is None:
         private_key = find_single_address_in_wallet(address=address)
 
         if private_key is None:
             return {'success': False, 'error': 'Address %s not found in hot wallet' % address}
     else:
-        private_key = get_private_key_from_wallet(account=account, index=index)[address]
+        account, change, index = path
+        private_key = get_private_key_from_wallet(account=account, index=index, change=change)[address]
 
     try:
         signature = sign_and_verify(private_key=private_key, address=address, message=message)
@@ -288,8 +892,7 @@ def http_options_request(trigger_id, **data):
     :param data: Optional data to pass to the trigger
     :return: A dict with the activation result or an error message
     """
-    triggers = get_triggers()
-    if trigger_id not in triggers:
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -310,8 +913,7 @@ def http_get_request(trigger_id, **data):
     :param data: Optional data to pass to the trigger
     :return: A dict with the activation result or an error message
     """
-    triggers = get_triggers()
-    if trigger_id not in triggers:
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -332,8 +934,7 @@ def http_post_request(trigger_id, **data):
     :param data: Optional data to pass to the trigger
     :return: A dict with the activation result or an error message
     """
-    triggers = get_triggers()
-    if trigger_id not in triggers:
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -354,8 +955,7 @@ def http_delete_request(trigger_id, **data):
     :param data: Optional data to pass to the trigger
     :return: A dict with the activation result or an error message
     """
-    triggers = get_triggers()
-    if trigger_id not in triggers:
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -376,8 +976,7 @@ def signed_message_request(trigger_id, **data):
     :param data: Optional data including 'message', 'message_address', and 'message_signature'
     :return: A dict with the activation result or an error message
     """
-    triggers = get_triggers()
-    if trigger_id not in triggers:
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -406,8 +1005,7 @@ def file_download(trigger_id, **data):
     :param data: Optional data to pass to the trigger
     :return: A dict with the activation result or an error message
     """
-    triggers = get_triggers()
-    if trigger_id not in triggers:
+    if not trigger_exists(trigger_id):
         return {'error': 'Unknown trigger id: %s' % trigger_id}
 
     trigger = get_trigger(trigger_id)
@@ -4,6 +4,7 @@
 
 import re
 from data import data
+from helpers.loghelpers import LOG
 from validators.validators import valid_address, valid_op_return, valid_blockprofile_message
 
 
@@ -170,10 +171,21 @@ def utxos_to_sul(utxos):
     """
     sul = []
 
+    # Look up the prime input addresses of all utxos in a single batch query
+    prime_input_addresses_data = data.prime_input_addresses([utxo['output_hash'] for utxo in utxos])
+    if 'error' in prime_input_addresses_data:
+        LOG.warning('Unable to retrieve the prime input addresses in a batch query: %s' % prime_input_addresses_data['error'])
+    prime_input_addresses = prime_input_addresses_data.get('prime_input_addresses', {})
+
     for utxo in utxos:
-        prime_input_address_data = data.prime_input_address(utxo['output_hash'])
-        if 'prime_input_address' in prime_input_address_data:
-            prime_input_address = prime_input_address_data['prime_input_address']
+        if utxo['output_hash'] not in prime_input_addresses:
+            # Retry the transactions that are missing from the batch query one at a time
+            prime_input_address_data = data.prime_input_address(utxo['output_hash'])
+            if 'prime_input_address' in prime_input_address_data:
+                prime_input_addresses[utxo['output_hash']] = prime_input_address_data['prime_input_address']
+
+        if utxo['output_hash'] in prime_input_addresses:
+            prime_input_address = prime_input_addresses[utxo['output_hash']]
             recurring = False
 
             for row in sul:
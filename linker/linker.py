@@ -3,7 +3,7 @@
 
 """Linked list implementation for the Spellbook."""
 
-from data.data import balance
+from data.data import balances
 from bips.BIP44 import get_addresses_from_xpub
 from inputs.inputs import get_sil
 from validators.validators import valid_address, valid_xpub
@@ -32,8 +32,16 @@ def get_lal(address, xpub, block_height=0):
         return {'error': 'Received invalid SIL data: %s' % sil_data}
 
 
-def get_lbl(address, xpub, block_height=0):
-    """Build a Linked Balance List with final balances and proportional shares."""
+def get_linked_list(address, xpub, block_height, balance_type):
+    """
+    Build a linked list of the balances of the linked addresses, all balances are retrieved in a single batch query
+
+    :param address: The address
+    :param xpub: The xpub that is used to derive the linked addresses
+    :param block_height: A block height (optional)
+    :param balance_type: The type of balance: 'final', 'received' or 'sent'
+    :return: A dict containing the linked list or an error
+    """
     lal_data = get_lal(address, xpub, block_height)
 
     if 'error' in lal_data:
@@ -41,67 +49,38 @@ def get_lbl(address, xpub, block_height=0):
 
     lal = lal_data['LAL']
 
-    lbl = []
+    balances_data = balances([row[1] for row in lal])
+    if 'balances' not in balances_data:
+        return {'error': 'Failed to retrieve balances of linked addresses: %s' % balances_data.get('error')}
+
+    linked_list = []
     for i in range(0, len(lal)):
-        address = lal[i][0]
-        linked_balance = balance(lal[i][1])
-        if 'balance' in linked_balance and 'final' in linked_balance['balance']:
-            lbl.append([address, linked_balance['balance']['final']])
+        linked_balance = balances_data['balances'].get(lal[i][1], {})
+        if balance_type in linked_balance:
+            linked_list.append([lal[i][0], linked_balance[balance_type]])
         else:
             return {'error': 'Failed to retrieve balance of %s' % lal[i][1]}
 
-    total = float(sum([row[1] for row in lbl]))
-    for row in lbl:
+    total = float(sum([row[1] for row in linked_list]))
+    for row in linked_list:
         row.append(row[1] / total if total > 0 else 0)
 
-    return {'LBL': lbl}
+    return {'linked_list': linked_list}
 
 
-def get_lrl(address, xpub, block_height=0):
-    """Build a Linked Received List with received balances and proportional shares."""
-    lal_data = get_lal(address, xpub, block_height)
-
-    if 'error' in lal_data:
-        return lal_data['error']
-
-    lal = lal_data['LAL']
-
-    lrl = []
-    for i in range(0, len(lal)):
-        address = lal[i][0]
-        linked_balance = balance(lal[i][1])
-        if 'balance' in linked_balance and 'received' in linked_balance['balance']:
-            lrl.append([address, linked_balance['balance']['received']])
-        else:
-            return {'error': 'Failed to retrieve balance of %s' % lal[i][1]}
+def get_lbl(address, xpub, block_height=0):
+    """Build a Linked Balance List with final balances and proportional shares."""
+    linked_list_data = get_linked_list(address, xpub, block_height, 'final')
+    return {'LBL': linked_list_data['linked_list']} if 'linked_list' in linked_list_data else linked_list_data
 
-    total = float(sum([row[1] for row in lrl]))
-    for row in lrl:
-        row.append(row[1] / total if total > 0 else 0)
 
-    return {'LRL': lrl}
+def get_lrl(address, xpub, block_height=0):
+    """Build a Linked Received List with received balances and proportional shares."""
+    linked_list_data = get_linked_list(address, xpub, block_height, 'received')
+    return {'LRL': linked_list_data['linked_list']} if 'linked_list' in linked_list_data else linked_list_data
 
 
 def get_lsl(address, xpub, block_height=0):
     """Build a Linked Sent List with sent balances and proportional shares."""
-    lal_data = get_lal(address, xpub, block_height)
-
-    if 'error' in lal_data:
-        return lal_data['error']
-
-    lal = lal_data['LAL']
-
-    lsl = []
-    for i in range(0, len(lal)):
-        address = lal[i][0]
-        linked_balance = balance(lal[i][1])
-        if 'balance' in linked_balance and 'sent' in linked_balance['balance']:
-            lsl.append([address, linked_balance['balance']['sent']])
-        else:
-            return {'error': 'Failed to retrieve balance of %s' % lal[i][1]}
-
-    total = float(sum([row[1] for row in lsl]))
-    for row in lsl:
-        row.append(row[1] / total if total > 0 else 0)
-
-    return {'LSL': lsl}
+    linked_list_data = get_linked_list(address, xpub, block_height, 'sent')
+    return {'LSL': linked_list_data['linked_list']} if 'linked_list' in linked_list_data else linked_list_data
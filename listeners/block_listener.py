@@ -3,9 +3,18 @@
 
 """Block listener that monitors new blocks on the blockchain."""
 
+import argparse
+import os
+import sys
+
 import websocket
 import simplejson
 
+PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROGRAM_DIR)
+
+from helpers.listenerbackends import make_listener_backend, LISTENER_BACKENDS  # noqa: E402
+
 
 def on_message(ws, message):
     """Process incoming websocket messages and print new block details."""
@@ -34,7 +43,37 @@ def on_open(ws):
     ws.send('{"op":"blocks_sub"}')
 
 
+class BlockPrinter(object):
+    """Prints the new blocks of a listener backend."""
+    def on_transaction(self, addresses, load):
+        pass
+
+    def on_block(self, height, block_hash):
+        """Print the height and the hash of a new block."""
+        print('\n\nNew block:')
+        print('height:', height)
+        print('hash:', block_hash)
+
+    def refresh(self):
+        pass
+
+    def watched_addresses(self):
+        return []
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Block listener')
+    parser.add_argument('--backend', help='Where to get the new blocks from (default=the blockchain.info websocket)', choices=sorted(LISTENER_BACKENDS), type=str)
+    parser.add_argument('--url', help='The url of the backend or the file to replay (default=the url of the backend)', type=str)
+    parser.add_argument('-t', '--testnet', help='Use testnet instead of mainnet', action='store_true')
+    args = parser.parse_args()
+
+    if args.backend is not None:
+        backend = make_listener_backend(name=args.backend, url=args.url, testnet=args.testnet, blocks_only=True)
+        print('Listening to %s backend %s' % (backend.name, backend.url))
+        backend.run(BlockPrinter())
+        sys.exit()
+
     # websocket.enableTrace(True)
     blockchain_info_websocket = websocket.WebSocketApp("wss://ws.blockchain.info/inv",
                                                        on_open=on_open,
@@ -15,7 +15,8 @@ from logging.handlers import RotatingFileHandler
 PROGRAM_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, PROGRAM_DIR)
 
-from helpers.runcommandprocess import RunCommandProcess  # noqa: E402
+from helpers.listenerhelpers import BloomFilter, BatchDispatcher, extract_addresses  # noqa: E402
+from helpers.listenerbackends import make_listener_backend, LISTENER_BACKENDS  # noqa: E402
 # import mysql.connector  # TODO re-enable mysql functionality
 
 
@@ -43,16 +44,42 @@ WATCHLIST: dict[str, dict[str, str]] = {}
 EXIT_ON_EVENT = False
 EXIT_ON_TIMEOUT = None
 
+# A BloomFilter of the watched addresses (optional), when it is None the addresses are looked up in the watchlist
+ADDRESS_FILTER = None
+
+# The commands (or webhook urls) of matches that arrive close together are dispatched in a single batch
+DISPATCHER = BatchDispatcher()
+
 
 def on_message(ws, message):
-    """Process incoming transaction messages, match against the watchlist, and execute commands."""
+    """
+    Process incoming transaction messages, match against the watchlist, and dispatch the commands.
+
+    The address fields are taken from the raw message first, a message without a watched address is not parsed at all
+    (unless the listener is verbose and logs every transaction).
+    """
+    watched = ADDRESS_FILTER if ADDRESS_FILTER is not None else WATCHLIST
+    event_found = False
+    if LISTENER_LOG.isEnabledFor(logging.INFO) or any(address in watched for address in extract_addresses(message)):
+        event_found = process_transaction(simplejson.loads(message))
+
+    check_exit(ws, event_found)
+
+
+def process_transaction(transaction):
+    """
+    Match the inputs and outputs of a transaction against the watchlist and dispatch the commands
+
+    :param transaction: A new-transactions message as a dict
+    :return: True if a watched address sends or receives the transaction
+    """
     event_found = False
-    transaction = simplejson.loads(message)
     if 'type' not in transaction or transaction['type'] != 'new-transactions':
-        return
+        return event_found
 
+    txid = transaction['data']['txid']
     address_list = []
-    LISTENER_LOG.info('New transaction: %s' % transaction['data']['txid'])
+    LISTENER_LOG.info('New transaction: %s' % txid)
     LISTENER_LOG.info('\tFrom: ')
     for tx_input in transaction['data']['inputs']:
         input_address = tx_input['address']
@@ -65,11 +92,8 @@ def on_message(ws, message):
         if input_address in WATCHLIST and 'SEND' in WATCHLIST[input_address]:
 
             event_found = True
-            command = WATCHLIST[input_address]['SEND']
-            command = command.replace('#txid#', transaction['data']['txid'])
-            LISTENER_LOG.info('Executing command: %s' % command)
-            run_command_process = RunCommandProcess(command=command)
-            run_command_process.start()
+            LISTENER_LOG.info('Dispatching command: %s' % WATCHLIST[input_address]['SEND'])
+            DISPATCHER.submit(target=WATCHLIST[input_address]['SEND'], address=input_address, event='SEND', txid=txid)
 
     LISTENER_LOG.info('\tTo: ')
 
@@ -84,11 +108,8 @@ def on_message(ws, message):
         if output_address in WATCHLIST and 'RECEIVE' in WATCHLIST[output_address]:
 
             event_found = True
-            command = WATCHLIST[output_address]['RECEIVE']
-            command = command.replace('#txid#', transaction['data']['txid'])
-            LISTENER_LOG.info('Executing command: %s' % command)
-            run_command_process = RunCommandProcess(command=command)
-            run_command_process.start()
+            LISTENER_LOG.info('Dispatching command: %s' % WATCHLIST[output_address]['RECEIVE'])
+            DISPATCHER.submit(target=WATCHLIST[output_address]['RECEIVE'], address=output_address, event='RECEIVE', txid=txid)
 
     # if DATABASE is not None:
     #     sql_query = """SELECT Address FROM Addresses
@@ -109,17 +130,61 @@ def on_message(ws, message):
     #         run_command_process = RunCommandProcess(command=curl_command)
     #         run_command_process.start()
 
+    return event_found
+
+
+def check_exit(ws, event_found):
+    """
+    Stop the listener after the first event or when the timeout is reached, the pending commands are dispatched first
+
+    :param ws: The websocket
+    :param event_found: True if the last transaction was sent or received by a watched address
+    """
     if EXIT_ON_EVENT is True and event_found is True:
         LISTENER_LOG.info('Event found, exiting now')
-        ws.send('{"type":"new-transactions", "unsubscribe": true}')
+        if ws is not None:
+            ws.send('{"type":"new-transactions", "unsubscribe": true}')
+        DISPATCHER.flush()
         sys.exit()
 
     if EXIT_ON_TIMEOUT is not None and int(time.time()) >= EXIT_ON_TIMEOUT:
         LISTENER_LOG.info('Timeout occurred, exiting now')
-        ws.send('{"type":"new-transactions", "unsubscribe": true}')
+        if ws is not None:
+            ws.send('{"type":"new-transactions", "unsubscribe": true}')
+        DISPATCHER.flush()
         sys.exit()
 
 
+class WatchlistListener(object):
+    """Receives the new transactions of a listener backend other than the block.io websocket and matches them against the watchlist."""
+    def on_transaction(self, addresses, load):
+        """Process a new transaction of the backend, it is only loaded when one of its addresses is watched."""
+        watched = ADDRESS_FILTER if ADDRESS_FILTER is not None else WATCHLIST
+        event_found = False
+        if LISTENER_LOG.isEnabledFor(logging.INFO) or any(address in watched for address in addresses):
+            transaction = load()
+            if transaction is not None:
+                txid, inputs, outputs = transaction
+                event_found = process_transaction({'type': 'new-transactions',
+                                                   'data': {'txid': txid,
+                                                            'inputs': [{'address': address, 'amount': None} for address in inputs],
+                                                            'outputs': [{'address': address, 'amount': None} for address in outputs]}})
+
+        check_exit(None, event_found)
+
+    def on_block(self, height, block_hash):
+        """Log a new block of the backend."""
+        LISTENER_LOG.info('New block: %s %s' % (height, block_hash))
+
+    def refresh(self):
+        """Stop the listener when the timeout is reached, also when there are no new transactions."""
+        check_exit(None, False)
+
+    def watched_addresses(self):
+        """Get the watched addresses, for backends that subscribe to each address."""
+        return list(WATCHLIST)
+
+
 def on_error(ws, error):
     """Handle websocket errors by logging them."""
     LISTENER_LOG.info('ERROR: %s' % error)  # use info level here instead of error level because for some reason an error is raised when the program exits
@@ -156,6 +221,9 @@ if __name__ == "__main__":
     parser.add_argument('-to', '--timeout', help='Stop listening after x seconds', type=int)
     parser.add_argument('-t', '--testnet', help='Use testnet instead of mainnet', action='store_true')
     parser.add_argument('-v', '--verbose', help='Run the listener in verbose mode ', action='store_true')
+    parser.add_argument('-b', '--bloom', help='Prefilter the addresses with a bloom filter of the watchlist', action='store_true')
+    parser.add_argument('--backend', help='Where to get the new transactions from (default=blockio)', choices=sorted(LISTENER_BACKENDS), default='blockio', type=str)
+    parser.add_argument('--url', help='The url of the backend or the file to replay (default=the url of the backend)', type=str)
 
     parser.add_argument('-i', '--host', help='Ip address of the MySQL server ', default='127.0.0.1', type=str)
     parser.add_argument('-p', '--port', help='Port of the MySQL server ', default=3306, type=int)
@@ -242,6 +310,23 @@ if __name__ == "__main__":
         LISTENER_LOG.info('Watchlist:')
         LISTENER_LOG.info(WATCHLIST)
 
+    if args.bloom is True:
+        ADDRESS_FILTER = BloomFilter.from_addresses(list(WATCHLIST))
+
+    if args.backend != 'blockio' or args.url is not None:
+        backend = make_listener_backend(name=args.backend, url=args.url, testnet=args.testnet)
+        LISTENER_LOG.info('Listening to %s backend %s' % (backend.name, backend.url))
+        while True:
+            try:
+                backend.run(WatchlistListener())
+            except Exception as ex:
+                LISTENER_LOG.error('Listener backend %s failed: %s' % (backend.name, ex))
+
+            if not backend.reconnect:
+                DISPATCHER.flush()
+                sys.exit()
+            time.sleep(5)
+
     url = "wss://ws.block.io"
 
     # Create the websocket
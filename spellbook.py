@@ -7,6 +7,7 @@ import argparse
 import os
 import sys
 import time
+from urllib.parse import urlencode
 
 import requests
 import simplejson
@@ -88,11 +89,11 @@ save_explorer_parser = subparsers.add_parser(name='save_explorer',
                                              epilog=texts.SAVE_EXPLORER_EPILOG)
 
 save_explorer_parser.add_argument('name', help='name of the explorer')
-save_explorer_parser.add_argument('type', help='type of the explorer', choices=['BTC.com', 'Blockchain.info', 'Insight', 'Blocktrail.com', 'Chain.so'])
+save_explorer_parser.add_argument('type', help='type of the explorer', choices=['BTC.com', 'Blockchain.info', 'Insight', 'Blocktrail.com', 'Chain.so', 'Bitcoin Core', 'Electrum'])
 save_explorer_parser.add_argument('priority', help='priority of the explorer')
 save_explorer_parser.add_argument('--testnet', help='use TESTNET instead of mainnet', action='store_true')
-save_explorer_parser.add_argument('-u', '--url', help='URL of the explorer (only needed for Insight explorers)')
-save_explorer_parser.add_argument('-b', '--blocktrail_key', help='API key for the explorer (only needed for blocktrail.com)', default='')
+save_explorer_parser.add_argument('-u', '--url', help='URL of the explorer (needed for Insight explorers, Bitcoin Core and Electrum)')
+save_explorer_parser.add_argument('-b', '--blocktrail_key', help='API key for the explorer (needed for blocktrail.com, or the RPC credentials user:password for Bitcoin Core)', default='')
 save_explorer_parser.add_argument('-k', '--api_key', help='API key for the spellbook REST API', default=key)
 save_explorer_parser.add_argument('-s', '--api_secret', help='API secret for the spellbook REST API', default=secret)
 
@@ -518,6 +519,10 @@ get_logs_parser = subparsers.add_parser(name='get_logs',
                                         epilog=texts.GET_LOGS_EPILOG)
 
 get_logs_parser.add_argument('filter_string', help='A filter string for the log messages', nargs='*')
+get_logs_parser.add_argument('-l', '--level', help='Only log messages of this level or higher (e.g. WARNING)')
+get_logs_parser.add_argument('--start', help='Only log messages at or after this (partial) timestamp')
+get_logs_parser.add_argument('--end', help='Only log messages before this (partial) timestamp')
+get_logs_parser.add_argument('-n', '--limit', help='The maximum number of log messages', type=int)
 get_logs_parser.add_argument('-k', '--api_key', help='API key for the spellbook REST API', default=key)
 get_logs_parser.add_argument('-s', '--api_secret', help='API secret for the spellbook REST API', default=secret)
 
@@ -1039,6 +1044,9 @@ def get_reveal():
 def get_logs():
     """Retrieve and display log messages from the Spellbook server."""
     url = '{spellbook_uri}/spellbook/logs/{filter_string}'.format(spellbook_uri=get_spellbook_uri(), filter_string=" ".join(args.filter_string))
+    query = {name: getattr(args, name, None) for name in ['level', 'start', 'end', 'limit'] if getattr(args, name, None) is not None}
+    if query:
+        url += '?' + urlencode(query)
     do_get_request(url=url, authenticate=True)
 
 
@@ -4,6 +4,7 @@
 
 import argparse
 import logging
+import multiprocessing
 import os
 import subprocess
 import sys
@@ -18,20 +19,30 @@ from logging.handlers import RotatingFileHandler
 
 from bottle import Bottle, BaseRequest, request, response, static_file, ServerAdapter, server_names, HTTPResponse
 
-from authentication import initialize_api_keys_file
+from authentication import initialize_api_keys_file, use_persistent_nonces
 from data.data import get_explorers, get_explorer_config, save_explorer, delete_explorer
 from data.data import latest_block, block_by_height, block_by_hash, prime_input_address, transaction
-from data.data import transactions, balance, utxos
+from data.data import transactions, balance, utxos, balances, utxos_many, prime_input_addresses
+from data.data import cache_stats, invalidate_cache, explorer_stats
 from decorators import authentication_required, use_explorer, output_json
-from helpers.actionhelpers import get_actions, get_action_config, save_action, delete_action, run_action, get_reveal
-from helpers.configurationhelpers import get_host, get_port, get_notification_email, get_mail_on_exception, what_is_my_ip
+from helpers.actionhelpers import get_actions, get_action_config, save_action, delete_action, run_action, get_reveal, action_stats
+from helpers.configurationhelpers import get_host, get_port, get_notification_email, get_mail_on_exception, what_is_my_ip, get_preload_scripts, get_server_threads, get_server_workers
+from helpers.configurationhelpers import get_access_log_verbose, get_access_log_body_size, get_access_log_sample_rate
+from helpers.configurationhelpers import get_storage_backend, get_compact_json, get_fsync_policy
 from helpers.configurationhelpers import get_enable_uploads, get_uploads_dir, get_allowed_extensions, get_max_file_size
 from helpers.configurationhelpers import get_enable_transcribe, get_allowed_extensions_transcribe, get_max_file_size_transcribe, get_model_size_transcribe
 from helpers.configurationhelpers import get_enable_ssl, get_ssl_certificate, get_ssl_private_key, get_ssl_certificate_chain, get_enable_wallet
-from helpers.hotwallethelpers import get_hot_wallet
-from helpers.loghelpers import LOG, REQUESTS_LOG, get_logs
+from helpers.configurationhelpers import get_wallet_idle_timeout, get_wallet_gap_limit, get_use_testnet
+from helpers.configurationhelpers import get_enable_listener, get_max_watched_addresses, get_listener_backend, get_listener_backend_url
+from helpers.hotwallethelpers import WALLET_SESSION, ADDRESS_INDEX
+from helpers.jsonhelpers import iter_json_list, configure_json_files
+from helpers.listenerhelpers import LISTENER_SERVICE, watch_address, unwatch_address
+from helpers.listenerbackends import make_listener_backend
+from helpers.loghelpers import LOG, REQUESTS_LOG, ACCESS_LOG, iter_logs
+from helpers.storagehelpers import use_sqlite_storage, BACKEND_SQLITE
 from helpers.triggerhelpers import get_triggers, get_trigger_config, save_trigger, delete_trigger, activate_trigger, \
-    check_triggers, verify_signed_message, http_get_request, http_post_request, http_delete_request, http_options_request, sign_message, file_download
+    check_triggers, verify_signed_message, http_get_request, http_post_request, http_delete_request, http_options_request, sign_message, file_download, \
+    TRIGGER_SCHEDULER, preload_trigger_scripts, watch_triggers
 from helpers.mailhelpers import sendmail
 from inputs.inputs import get_sil, get_profile, get_sul
 from linker.linker import get_lal, get_lbl, get_lrl, get_lsl
@@ -82,7 +93,7 @@ class SSLWebServer(ServerAdapter):
         from cheroot.wsgi import Server as CherryPyWSGIServer
         from cheroot.ssl.builtin import BuiltinSSLAdapter
 
-        server = CherryPyWSGIServer((self.host, self.port), handler)
+        server = CherryPyWSGIServer((self.host, self.port), handler, **self.options)
 
         server.ssl_adapter = BuiltinSSLAdapter(
             certificate=get_ssl_certificate(),
@@ -111,6 +122,14 @@ class SpellbookRESTAPI(Bottle):
 
         # Log the requests to the REST API in a separate file by installing a custom LoggingPlugin
         self.install(self.log_to_logger)
+        ACCESS_LOG.configure(verbose=get_access_log_verbose(),
+                             max_body=get_access_log_body_size(),
+                             sample_rate=get_access_log_sample_rate())
+
+        # Set how json files are written and where the triggers and actions are kept, before any of them is loaded
+        configure_json_files(compact=get_compact_json(), fsync=get_fsync_policy())
+        if get_storage_backend() == BACKEND_SQLITE:
+            use_sqlite_storage()
 
         # Make sure that an api_keys.json file is present, the first time the server is started
         # a new random api key and secret pair will be generated
@@ -118,11 +137,17 @@ class SpellbookRESTAPI(Bottle):
             LOG.info('Generating new API keys')
             initialize_api_keys_file()
 
+        # The nonces of the api keys are kept in a database, so requests can not be replayed after a restart or in another worker process
+        use_persistent_nonces()
+
         LOG.info('Starting Bitcoin Spellbook')
 
         try:
             if get_enable_wallet() is True:
-                get_hot_wallet()
+                # Ask the password and derive the seed now, instead of at the first request that needs the wallet
+                WALLET_SESSION.configure(idle_timeout=get_wallet_idle_timeout())
+                ADDRESS_INDEX.configure(gap_limit=get_wallet_gap_limit())
+                WALLET_SESSION.unlock()
         except Exception as ex:
             LOG.error('Unable to decrypt hot wallet: %s' % ex)
             sys.exit(1)
@@ -142,6 +167,11 @@ class SpellbookRESTAPI(Bottle):
         self.route(r'/spellbook/explorers/<explorer_id:re:[a-zA-Z0-9_\-.]+>', method='GET', callback=self.get_explorer_config)
         self.route(r'/spellbook/explorers/<explorer_id:re:[a-zA-Z0-9_\-.]+>', method='DELETE', callback=self.delete_explorer)
 
+        # Routes for the cache of explorer queries
+        self.route('/spellbook/cache', method='GET', callback=self.get_cache_stats)
+        self.route('/spellbook/cache', method='DELETE', callback=self.invalidate_cache)
+        self.route('/spellbook/explorer_stats', method='GET', callback=self.get_explorer_stats)
+
         # Routes for managing LLMs
         self.route('/spellbook/llms', method='GET', callback=self.get_llms)
         self.route('/spellbook/llms', method='OPTIONS', callback=self.get_llms)
@@ -161,6 +191,11 @@ class SpellbookRESTAPI(Bottle):
         self.route('/spellbook/addresses/<address:re:[a-zA-Z1-9]+>/balance', method='GET', callback=self.get_balance)
         self.route('/spellbook/addresses/<address:re:[a-zA-Z1-9]+>/utxos', method='GET', callback=self.get_utxos)
 
+        # Routes for retrieving data of multiple addresses or transactions at once
+        self.route('/spellbook/balances', method='POST', callback=self.get_balances)
+        self.route('/spellbook/utxos', method='POST', callback=self.get_utxos_many)
+        self.route('/spellbook/prime_inputs', method='POST', callback=self.get_prime_input_addresses)
+
         # Routes for Simplified Inputs List (SIL)
         self.route('/spellbook/addresses/<address:re:[a-zA-Z1-9]+>/SIL', method='GET', callback=self.get_sil)
 
@@ -218,6 +253,13 @@ class SpellbookRESTAPI(Bottle):
         self.route(r'/spellbook/actions/<action_id:re:[a-zA-Z0-9_\-.]+>', method='POST', callback=self.save_action)
         self.route(r'/spellbook/actions/<action_id:re:[a-zA-Z0-9_\-.]+>', method='DELETE', callback=self.delete_action)
         self.route(r'/spellbook/actions/<action_id:re:[a-zA-Z0-9_\-.]+>/run', method='GET', callback=self.run_action)
+        self.route('/spellbook/action_stats', method='GET', callback=self.get_action_stats)
+
+        # Routes for the transaction listener
+        self.route('/spellbook/listener', method='GET', callback=self.get_listener_stats)
+        self.route('/spellbook/listener/<address:re:[a-zA-Z0-9]+>', method='GET', callback=self.get_watched_address)
+        self.route('/spellbook/listener/<address:re:[a-zA-Z0-9]+>', method='POST', callback=self.watch_address)
+        self.route('/spellbook/listener/<address:re:[a-zA-Z0-9]+>', method='DELETE', callback=self.unwatch_address)
 
         # Routes for retrieving log messages
         self.route('/spellbook/logs/<filter_string>', method='GET', callback=self.get_logs)
@@ -235,12 +277,25 @@ class SpellbookRESTAPI(Bottle):
         if len(get_explorers()) == 0:
             LOG.warning('No block explorers configured!')
 
+        if get_preload_scripts() is True:
+            preload_trigger_scripts()
+
+        threads = get_server_threads()
+        workers = get_server_workers()
+
         try:
             # start the webserver for the REST API
-            if get_enable_ssl() is True:
-                self.run(host=self.host, port=self.port, debug=False, server='sslwebserver')
+            if workers > 1:
+                self.run_workers(workers=workers, threads=threads)
             else:
-                self.run(host=self.host, port=self.port, debug=True, server='cheroot')
+                # Check the Timestamp, Recurring and DeadMansSwitch triggers when they are due
+                TRIGGER_SCHEDULER.start()
+                self.start_listener()
+
+                if get_enable_ssl() is True:
+                    self.run(host=self.host, port=self.port, debug=False, server='sslwebserver', numthreads=threads)
+                else:
+                    self.run(host=self.host, port=self.port, debug=True, server='cheroot', numthreads=threads)
 
         except Exception as ex:
             LOG.error('An exception occurred in the main loop: %s' % ex)
@@ -257,6 +312,68 @@ class SpellbookRESTAPI(Bottle):
                          body_template=body_template,
                          variables=variables)
 
+    def run_workers(self, workers, threads):
+        """
+        Serve the REST API from multiple processes (pre-fork mode)
+
+        The worker processes are forked from this process and all listen on the same port (SO_REUSEPORT), the kernel
+        spreads the connections over them. The workers share the nonces of the api keys through the nonces database,
+        so a nonce that was used in one worker can not be replayed in another. This process only runs the trigger
+        scheduler and waits for the workers.
+
+        The transaction listener is not started in pre-fork mode: it would only run in this process, so the triggers
+        and addresses that are registered through the workers would never be watched.
+
+        :param workers: The number of worker processes
+        :param threads: The number of threads in each worker process
+        """
+        context = multiprocessing.get_context('fork')
+
+        server = 'sslwebserver' if get_enable_ssl() is True else 'cheroot'
+        processes = []
+        for i in range(workers):
+            process = context.Process(target=self.run,
+                                      name='SpellbookWorker-%s' % (i + 1),
+                                      kwargs={'host': self.host, 'port': self.port, 'server': server, 'quiet': i > 0,
+                                              'numthreads': threads, 'reuse_port': True})
+            process.start()
+            processes.append(process)
+
+        LOG.info('Started %s webserver processes with %s threads each' % (workers, threads))
+
+        # Triggers saved by the workers are only noticed when the scheduler reloads the trigger files
+        TRIGGER_SCHEDULER.resync_interval = 10
+        TRIGGER_SCHEDULER.start()
+        if get_enable_listener() is True:
+            LOG.error('Transaction listener is not started: it can not be used with more than 1 worker, set workers = 1 in the [RESTAPI] section to use it')
+
+        try:
+            for process in processes:
+                process.join()
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+            TRIGGER_SCHEDULER.stop()
+            LISTENER_SERVICE.stop()
+
+    @staticmethod
+    def start_listener():
+        """Start the transaction listener if it is enabled and watch the addresses of the triggers."""
+        if get_enable_listener() is not True:
+            return
+
+        try:
+            backend = make_listener_backend(name=get_listener_backend(), url=get_listener_backend_url(), testnet=get_use_testnet())
+        except ValueError as ex:
+            LOG.error('Transaction listener is not started: %s' % ex)
+            return
+
+        LISTENER_SERVICE.configure(max_addresses=get_max_watched_addresses(), testnet=get_use_testnet(), backend=backend)
+        LISTENER_SERVICE.start()
+        watch_triggers()
+        LOG.info('Transaction listener is watching %s addresses' % len(LISTENER_SERVICE))
+
     def index(self):
         """Serve the main dashboard page."""
         return
@@ -285,28 +402,31 @@ class SpellbookRESTAPI(Bottle):
         @wraps(fn)
         def _log_to_logger(*args, **kwargs):
             """ log to logger endpoint."""
-            start_time = int(round(time.time() * 1000))
+            start_time = time.perf_counter()
             request_time = datetime.now()
 
-            # Log information about the request before it is processed for debugging purposes
-            REQUESTS_LOG.info('%s | %s | %s | %s' % (request_time,
-                                                     request.remote_addr,
-                                                     request.method,
-                                                     request.url))
+            if ACCESS_LOG.verbose is True:
+                # Log information about the request before it is processed for debugging purposes
+                REQUESTS_LOG.info('%s | %s | %s | %s' % (request_time,
+                                                         request.remote_addr,
+                                                         request.method,
+                                                         request.url))
 
-            if request.headers is not None:
-                for key, value in request.headers.items():
-                    REQUESTS_LOG.info('  HEADERS | %s: %s' % (key, str(value).encode('utf-8')))
+                if request.headers is not None:
+                    for key, value in request.headers.items():
+                        REQUESTS_LOG.info('  HEADERS | %s: %s' % (key, ACCESS_LOG.truncate(str(value))))
 
-            if request.json is not None:
-                for key, value in request.json.items():
-                    REQUESTS_LOG.info('  BODY | %s: %s' % (key, str(value).encode('utf-8')))
+                if request.json is not None:
+                    for key, value in request.json.items():
+                        REQUESTS_LOG.info('  BODY | %s: %s' % (key, ACCESS_LOG.truncate(str(value))))
 
             actual_response = response
+            error = None
             try:
                 actual_response = fn(*args, **kwargs)
             except Exception as ex:
-                response_status = '500 ' + str(ex)
+                status_code = 500
+                error = str(ex)
                 LOG.error('%s caused an exception: %s' % (request.url, ex))
                 error_traceback = traceback.format_exc()
                 for line in error_traceback.split('\n'):
@@ -322,15 +442,32 @@ class SpellbookRESTAPI(Bottle):
                              variables=variables)
 
             else:
-                response_status = response.status
-
-            end_time = int(round(time.time() * 1000))
-            REQUESTS_LOG.info('%s | %s | %s | %s | %s | %s ms' % (request_time,
-                                                                  request.remote_addr,
-                                                                  request.method,
-                                                                  request.url,
-                                                                  response_status,
-                                                                  end_time - start_time))
+                status_code = response.status_code
+
+            if ACCESS_LOG.is_sampled(status_code):
+                # A single compact record per request, it is formatted and written by the background writer thread
+                record = {'time': request_time,
+                          'remote_addr': request.remote_addr,
+                          'method': request.method,
+                          'url': request.url,
+                          'status': status_code,
+                          'ms': round((time.perf_counter() - start_time) * 1000, 1)}
+
+                content_length = request.content_length
+                if content_length > 0:
+                    record['bytes'] = content_length
+                    if ACCESS_LOG.max_body > 0:
+                        # Only the start of the body is read, large bodies are never copied or encoded as a whole
+                        body = request.body.read(ACCESS_LOG.max_body).decode('utf-8', errors='replace')
+                        if content_length > ACCESS_LOG.max_body:
+                            body += '...(%s more bytes)' % (content_length - ACCESS_LOG.max_body)
+                        record['body'] = body
+
+                if error is not None:
+                    record['error'] = error
+
+                REQUESTS_LOG.info(record)
+
             return actual_response
 
         return _log_to_logger
@@ -421,6 +558,32 @@ class SpellbookRESTAPI(Bottle):
         """Delete a blockchain explorer configuration."""
         delete_explorer(explorer_id)
 
+    @staticmethod
+    @output_json
+    @authentication_required
+    def get_cache_stats():
+        """Return the hit and miss counters of the query cache."""
+        response.content_type = 'application/json'
+        return cache_stats()
+
+    @staticmethod
+    @output_json
+    @authentication_required
+    def invalidate_cache():
+        """Invalidate the query cache, optionally only the entries of a single query type."""
+        response.content_type = 'application/json'
+        query_type = request.query.query_type if request.query.query_type != '' else None
+        invalidate_cache(query_type=query_type)
+        return {'success': True}
+
+    @staticmethod
+    @output_json
+    @authentication_required
+    def get_explorer_stats():
+        """Return the latency and error statistics of the explorers."""
+        response.content_type = 'application/json'
+        return explorer_stats()
+
     @staticmethod
     @output_json
     @use_explorer
@@ -485,6 +648,42 @@ class SpellbookRESTAPI(Bottle):
         response.content_type = 'application/json'
         return utxos(address, int(request.query.confirmations))
 
+    @staticmethod
+    @output_json
+    @use_explorer
+    def get_balances():
+        """Return the balances for a list of addresses."""
+        response.content_type = 'application/json'
+        addresses = request.json.get('addresses') if isinstance(request.json, dict) else None
+        if not isinstance(addresses, list):
+            return {'error': 'Request must contain a list of addresses'}
+
+        return balances(addresses)
+
+    @staticmethod
+    @output_json
+    @use_explorer
+    def get_utxos_many():
+        """Return unspent transaction outputs for a list of addresses."""
+        response.content_type = 'application/json'
+        addresses = request.json.get('addresses') if isinstance(request.json, dict) else None
+        if not isinstance(addresses, list):
+            return {'error': 'Request must contain a list of addresses'}
+
+        return utxos_many(addresses, int(request.json.get('confirmations', 1)))
+
+    @staticmethod
+    @output_json
+    @use_explorer
+    def get_prime_input_addresses():
+        """Return the prime input addresses for a list of transactions."""
+        response.content_type = 'application/json'
+        txids = request.json.get('txids') if isinstance(request.json, dict) else None
+        if not isinstance(txids, list):
+            return {'error': 'Request must contain a list of txids'}
+
+        return prime_input_addresses(txids)
+
     @staticmethod
     @output_json
     @use_explorer
@@ -598,9 +797,9 @@ class SpellbookRESTAPI(Bottle):
     @staticmethod
     @output_json
     def get_triggers():
-        """Return all configured triggers as JSON."""
+        """Return all configured triggers as JSON, optionally filtered by trigger_type and/or status."""
         response.content_type = 'application/json'
-        triggers = get_triggers()
+        triggers = get_triggers(trigger_type=request.query.trigger_type or None, status=request.query.status or None)
         if triggers is not None:
             return triggers
         else:
@@ -810,6 +1009,46 @@ class SpellbookRESTAPI(Bottle):
         response.content_type = 'application/json'
         return run_action(action_id)
 
+    @staticmethod
+    @output_json
+    @authentication_required
+    def get_action_stats():
+        """Return the queue depth of the action executor and the latency and failures per action type."""
+        response.content_type = 'application/json'
+        return action_stats()
+
+    @staticmethod
+    @output_json
+    @authentication_required
+    def get_listener_stats():
+        """Return the number of watched addresses, processed transactions and matches of the transaction listener."""
+        response.content_type = 'application/json'
+        return LISTENER_SERVICE.stats()
+
+    @staticmethod
+    @output_json
+    @authentication_required
+    def get_watched_address(address):
+        """Return the subscriptions of an address that is watched by the transaction listener."""
+        response.content_type = 'application/json'
+        return LISTENER_SERVICE.subscriptions(address=address)
+
+    @staticmethod
+    @output_json
+    @authentication_required
+    def watch_address(address):
+        """Watch an address with the transaction listener."""
+        response.content_type = 'application/json'
+        return watch_address(address, **request.json)
+
+    @staticmethod
+    @output_json
+    @authentication_required
+    def unwatch_address(address):
+        """Stop watching an address with the transaction listener."""
+        response.content_type = 'application/json'
+        return unwatch_address(address, owner=request.query.get('owner'), event=request.query.get('event'))
+
     @staticmethod
     @output_json
     def get_reveal(action_id):
@@ -818,12 +1057,20 @@ class SpellbookRESTAPI(Bottle):
         return get_reveal(action_id)
 
     @staticmethod
-    @output_json
     @authentication_required
     def get_logs(filter_string):
-        """Return the application logs."""
+        """Stream the application logs as a json list, optionally filtered by level, time range and number of messages."""
         response.content_type = 'application/json'
-        return get_logs(filter_string=filter_string)
+        try:
+            log_messages = iter_logs(filter_string=filter_string,
+                                     level=request.query.level or None,
+                                     start=request.query.start or None,
+                                     end=request.query.end or None,
+                                     limit=int(request.query.limit) if request.query.limit else None)
+        except ValueError as ex:
+            return {'error': str(ex)}
+
+        return iter_json_list(log_messages)
 
     @staticmethod
     @enable_cors
@@ -577,6 +577,9 @@ examples:
   - spellbook.py get_logs 2019-08-19 21:
     -> Get all log messages that happened at at certain (partial) time
 
+  - spellbook.py get_logs --level=ERROR --start="2019-08-19 21:00" --end="2019-08-19 22:00" --limit=100
+    -> Get the first 100 log messages of level ERROR or higher in a time range
+
   - spellbook.py get_logs ... -k=<myapikey> -s=<myapisecret>
     -> Use given api key and api secret to authenticate with the REST API
 '''
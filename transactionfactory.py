@@ -2,11 +2,13 @@
 # -*- coding: utf-8 -*-
 """Factory for building and signing Bitcoin transactions."""
 
+import array
 import binascii
 import copy
 import hashlib
 import hmac
 import re
+import struct
 import sys
 from functools import reduce
 
@@ -91,17 +93,22 @@ def make_custom_tx(private_keys, tx_inputs, tx_outputs, tx_fee=0, op_return_data
         return
 
     # All is good, make the transaction
-    tx = mktx(tx_inputs, tx_outputs)
+    builder = TransactionBuilder()
+    for tx_input in tx_inputs:
+        builder.add_input(tx_input['output'])
+
+    for tx_output in tx_outputs:
+        builder.add_output(value=tx_output['value'], address=tx_output.get('address'), script=tx_output.get('script'))
 
     # Add OP_RETURN message if necessary
     if isinstance(op_return_data, string_types):
-        tx = add_op_return(op_return_data, tx)
+        builder.add_op_return(op_return_data)
 
     # Now sign each transaction input with the private key
     for i in range(0, len(tx_inputs)):
-        tx = sign(tx, i, str(private_keys[tx_inputs[i]['address']]))
+        builder.sign(i, str(private_keys[tx_inputs[i]['address']]))
 
-    return tx
+    return builder.serialize()
 
 
 # def send_tx(tx):
@@ -351,6 +358,203 @@ def sign(tx, i, priv, hashcode=SIGHASH_ALL):
     return serialize(txobj)
 
 
+class TransactionBuilder(object):
+    """
+    Builds and signs a transaction without deserializing, copying and serializing it again for every input
+
+    The outpoints of the inputs are kept in a single bytearray and their sequences and the output values in arrays, the
+    scriptSigs are filled in per input when it is signed. The signature form of an input only differs from the others
+    in the scriptCode of that input, so the serialized inputs with empty scripts and the outputs are built once per
+    hashcode and each input is hashed straight from these buffers. Inputs that are signed in order share the sha256
+    state of the inputs before them. The raw transaction is serialized once, by serialize().
+
+    The result is the same as mktx() followed by sign() for each input, only P2PKH scriptSigs are made.
+
+    :param version: The version of the transaction
+    :param locktime: The locktime of the transaction
+    """
+    # The size of an outpoint (txid and index) and of an input with an empty script
+    OUTPOINT_SIZE = 36
+    EMPTY_INPUT_SIZE = 41
+
+    def __init__(self, version=1, locktime=0):
+        self.version = version
+        self.locktime = locktime
+        self.outpoints = bytearray()
+        self.sequences = array.array('L')
+        self.script_sigs = []
+        self.output_values = array.array('Q')
+        self.output_scripts = []
+        self._keys = {}
+        self._signature_parts = {}
+        self._prefix = None
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def add_input(self, output, sequence=0xffffffff):
+        """
+        Add an input
+
+        :param output: The output to spend, formatted as 'txid:i'
+        :param sequence: The sequence number of the input
+        """
+        self.outpoints += binascii.unhexlify(output[:64])[::-1] + struct.pack('<I', int(output[65:]))
+        self.sequences.append(sequence)
+        self.script_sigs.append(b'')
+        self._changed()
+
+    def add_output(self, value, address=None, script=None):
+        """
+        Add an output
+
+        :param value: The value in satoshis
+        :param address: The address to send to (optional)
+        :param script: The output script in hexadecimal format, if no address is given (optional)
+        """
+        if address is not None:
+            script = address_to_script(address)
+        elif script is None:
+            raise Exception("Could not find 'address' or 'script' in output.")
+
+        self.output_values.append(value)
+        self.output_scripts.append(binascii.unhexlify(script))
+        self._changed()
+
+    def add_op_return(self, msg):
+        """
+        Add an OP_RETURN output with a message, like add_op_return() does for a raw transaction
+
+        :param msg: The message
+        """
+        if len(self.output_scripts) == 0 or sum(self.output_values) == 0 or any(script[:1] == b'\x6a' for script in self.output_scripts):
+            raise Exception('Tx limited to *1* OP_RETURN, and only whilst the other outputs send funds')
+
+        self.add_output(value=0, script=op_return_script(hex_data=safe_hexlify(msg.encode())))
+
+    def _changed(self):
+        # Adding an input or an output changes the signature form of every input
+        self._signature_parts = {}
+        self._prefix = None
+
+    def serialize_input(self, i, script):
+        """
+        Serialize an input with a script
+
+        :param i: The index of the input
+        :param script: The script in binary format
+        :return: The serialized input
+        """
+        outpoint = self.outpoints[i * self.OUTPOINT_SIZE:(i + 1) * self.OUTPOINT_SIZE]
+        return bytes(outpoint) + num_to_var_int(len(script)) + script + struct.pack('<I', self.sequences[i])
+
+    def serialize_outputs(self, count=None, blank=0):
+        """
+        Serialize the outputs
+
+        :param count: Only serialize the first count outputs (optional)
+        :param blank: The number of outputs at the start that get the maximum value and an empty script (for SIGHASH_SINGLE)
+        :return: The number of outputs and the outputs
+        """
+        count = len(self.output_values) if count is None else min(count, len(self.output_values))
+        parts = [num_to_var_int(count)]
+        for j in range(count):
+            if j < blank:
+                parts.append(struct.pack('<Q', 2**64 - 1) + num_to_var_int(0))
+            else:
+                parts.append(struct.pack('<Q', self.output_values[j]) + num_to_var_int(len(self.output_scripts[j])) + self.output_scripts[j])
+
+        return b''.join(parts)
+
+    def signature_parts(self, hashcode):
+        """
+        Get the parts of the signature form that are the same for every input, see signature_form()
+
+        :param hashcode: SIGHASH_ALL, SIGHASH_NONE, SIGHASH_SINGLE or SIGHASH_ANYONECANPAY
+        :return: The version and the number of inputs, all inputs with an empty script, and the outputs, locktime and hashcode
+        """
+        parts = self._signature_parts.get(hashcode)
+        if parts is None:
+            count = len(self)
+            if hashcode == SIGHASH_NONE:
+                outputs = self.serialize_outputs(count=0)
+            elif hashcode == SIGHASH_SINGLE:
+                outputs = self.serialize_outputs(count=count, blank=count - 1)
+            else:
+                outputs = self.serialize_outputs()
+
+            head = struct.pack('<I', self.version) + num_to_var_int(1 if hashcode == SIGHASH_ANYONECANPAY else count)
+            inputs = b''.join(self.serialize_input(j, b'') for j in range(count)) if hashcode != SIGHASH_ANYONECANPAY else b''
+            tail = outputs + struct.pack('<I', self.locktime) + struct.pack('<I', hashcode)
+            parts = self._signature_parts[hashcode] = (head, inputs, tail)
+
+        return parts
+
+    def signature_hash(self, i, script, hashcode=SIGHASH_ALL):
+        """
+        Get the hash that is signed for an input, the same as bin_txhash(signature_form(tx, i, script, hashcode), hashcode)
+
+        :param i: The index of the input
+        :param script: The scriptCode in binary format
+        :param hashcode: SIGHASH_ALL, SIGHASH_NONE, SIGHASH_SINGLE or SIGHASH_ANYONECANPAY
+        :return: The hash in binary format
+        """
+        head, inputs, tail = self.signature_parts(hashcode)
+        if hashcode == SIGHASH_ANYONECANPAY:
+            return bin_dbl_sha256(head + self.serialize_input(i, script) + tail)
+
+        # The sha256 state after the inputs before i, it is carried forward when the inputs are signed in order
+        if self._prefix is None or self._prefix[:2] != (hashcode, i):
+            prefix = hashlib.sha256(head)
+            prefix.update(memoryview(inputs)[:i * self.EMPTY_INPUT_SIZE])
+        else:
+            prefix = self._prefix[2]
+
+        sha = prefix.copy()
+        sha.update(self.serialize_input(i, script))
+        sha.update(memoryview(inputs)[(i + 1) * self.EMPTY_INPUT_SIZE:])
+        sha.update(tail)
+
+        prefix.update(memoryview(inputs)[i * self.EMPTY_INPUT_SIZE:(i + 1) * self.EMPTY_INPUT_SIZE])
+        self._prefix = (hashcode, i + 1, prefix)
+
+        return hashlib.sha256(sha.digest()).digest()
+
+    def sign(self, i, priv, hashcode=SIGHASH_ALL):
+        """
+        Sign an input with a private key, the scriptSig of the input is replaced
+
+        :param i: The index of the input
+        :param priv: The private key
+        :param hashcode: SIGHASH_ALL, SIGHASH_NONE, SIGHASH_SINGLE or SIGHASH_ANYONECANPAY
+        """
+        i, hashcode = int(i), int(hashcode)
+        if len(priv) <= 33:
+            priv = safe_hexlify(priv)
+
+        # Consolidations often spend many outputs of the same address, the public key and scriptCode are derived once
+        if priv not in self._keys:
+            pub = privkey_to_pubkey(priv)
+            self._keys[priv] = (pub, binascii.unhexlify(p2pkh_script(pubkey_to_address(pub))))
+        pub, script = self._keys[priv]
+
+        sig = der_encode_sig(*ecdsa_raw_sign(self.signature_hash(i, script, hashcode), priv)) + encode(hashcode, 16, 2)
+        self.script_sigs[i] = binascii.unhexlify(serialize_script([sig, pub]))
+
+    def serialize(self):
+        """
+        Serialize the transaction
+
+        :return: The raw transaction in hexadecimal format
+        """
+        parts = [struct.pack('<I', self.version), num_to_var_int(len(self))]
+        parts.extend(self.serialize_input(i, script_sig) for i, script_sig in enumerate(self.script_sigs))
+        parts.append(self.serialize_outputs())
+        parts.append(struct.pack('<I', self.locktime))
+
+        return safe_hexlify(b''.join(parts))
+
+
 def is_inp(arg):
     """Return True if the argument looks like a transaction input."""
     return len(arg) > 64 or "output" in arg or "outpoint" in arg
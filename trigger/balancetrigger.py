@@ -22,7 +22,18 @@ class BalanceTrigger(Trigger):
         if self.address is None or self.amount is None:
             return False
 
-        data = balance(self.address)
+        return self.evaluate(data=balance(self.address))
+
+    def evaluate(self, data):
+        """
+        Check if the final balance in already retrieved balance data has reached the amount
+
+        :param data: The response of a balance query for the address
+        :return: True or False
+        """
+        if self.address is None or self.amount is None:
+            return False
+
         if isinstance(data, dict) and 'balance' in data and 'final' in data['balance']:
             final_balance = data['balance']['final']
         else:
@@ -22,7 +22,18 @@ class BlockHeightTrigger(Trigger):
         if self.block_height is None:
             return False
 
-        data = latest_block()
+        return self.evaluate(data=latest_block())
+
+    def evaluate(self, data):
+        """
+        Check if an already retrieved latest block is at the block height plus the confirmations
+
+        :param data: The response of a latest_block query
+        :return: True or False
+        """
+        if self.block_height is None:
+            return False
+
         if isinstance(data, dict) and 'block' in data and 'height' in data['block']:
             latest_block_height = data['block']['height']
         else:
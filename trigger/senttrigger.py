@@ -22,7 +22,18 @@ class SentTrigger(Trigger):
         if self.address is None or self.amount is None:
             return False
 
-        data = balance(self.address)
+        return self.evaluate(data=balance(self.address))
+
+    def evaluate(self, data):
+        """
+        Check if the total sent in already retrieved balance data has reached the amount
+
+        :param data: The response of a balance query for the address
+        :return: True or False
+        """
+        if self.address is None or self.amount is None:
+            return False
+
         if isinstance(data, dict) and 'balance' in data and 'sent' in data['balance']:
             total_sent = data['balance']['sent']
         else:
@@ -3,23 +3,20 @@
 
 """Base Trigger class and registry for all Spellbook triggers."""
 
-import importlib
-import os
-import platform
 import time
 from abc import abstractmethod, ABCMeta
 from datetime import datetime
 
+from helpers.actionexecutor import ACTION_EXECUTOR
 from helpers.actionhelpers import get_actions, get_action
-from helpers.jsonhelpers import save_to_json_file
 from helpers.loghelpers import LOG
+from helpers.scripthelpers import SCRIPT_REGISTRY
+from helpers.storagehelpers import TRIGGER_STORE
 from spellbookscripts.spellbookscript import SpellbookScript
 from validators.validators import valid_actions, valid_trigger_type, valid_amount, valid_script
 from validators.validators import valid_description, valid_creator, valid_email, valid_youtube_id
 from validators.validators import valid_status, valid_visibility, valid_timestamp
 
-TRIGGERS_DIR = 'json/public/triggers'
-
 
 class Trigger(object):
     """Base trigger class and registry for all Spellbook triggers."""
@@ -42,6 +39,7 @@ class Trigger(object):
         self.actions = []
         self.self_destruct = None
         self.destruct_actions = False  # When self-destructing, also destruct the attached actions?
+        self.parallel_actions = False  # Run actions that do not depend on each other at the same time?
 
     def configure(self, **config):
         """Configure."""
@@ -97,6 +95,9 @@ class Trigger(object):
         if 'destruct_actions' in config and config['destruct_actions'] in [True, False]:
             self.destruct_actions = config['destruct_actions']
 
+        if 'parallel_actions' in config and config['parallel_actions'] in [True, False]:
+            self.parallel_actions = config['parallel_actions']
+
     @abstractmethod
     def conditions_fulfilled(self):
         """
@@ -111,7 +112,8 @@ class Trigger(object):
         Activate all actions on this trigger, if all actions are successful the 'triggered' status will be True
         If an action fails, the remaining actions will not be executed and the 'triggered' status remains False so another attempt can be made the next time the trigger is checked
 
-        Important: actions of type SendTransaction should always be the last action in the list and there should only be maximum 1 SendTransaction
+        The actions run on the ACTION_EXECUTOR, one after another unless parallel_actions is enabled.
+        Important: actions of type SendTransaction are always run last, after all other actions were successful
 
         :return:
         """
@@ -131,17 +133,12 @@ class Trigger(object):
                 LOG.error('Unknown action id: %s' % action_id)
                 return
 
-        for i, action_id in enumerate(self.actions):
-            LOG.info('Running action %s: %s' % (i+1, action_id))
-
-            action = get_action(action_id)
-            success = action.run()
-
-            if not success:
-                self.triggered += 1
-                self.status = 'Failed' if self.multi is False else 'Active'
-                self.save()
-                return
+        actions = [get_action(action_id) for action_id in self.actions]
+        if not ACTION_EXECUTOR.run_actions(actions=actions, parallel=self.parallel_actions):
+            self.triggered += 1
+            self.status = 'Failed' if self.multi is False else 'Active'
+            self.save()
+            return
 
         # All actions were successful
         self.triggered += 1
@@ -159,7 +156,7 @@ class Trigger(object):
 
     def save(self):
         """Save."""
-        save_to_json_file(os.path.join(TRIGGERS_DIR, '%s.json' % self.id), self.json_encodable())
+        TRIGGER_STORE.save(self.id, self.json_encodable())
 
     def json_encodable(self):
         """Json encodable."""
@@ -178,7 +175,8 @@ class Trigger(object):
                 'created': int(time.mktime(self.created.timetuple())),
                 'actions': self.actions,
                 'self_destruct': self.self_destruct,
-                'destruct_actions': self.destruct_actions}
+                'destruct_actions': self.destruct_actions,
+                'parallel_actions': self.parallel_actions}
 
     def load_script(self):
         """Load script."""
@@ -186,35 +184,17 @@ class Trigger(object):
             if not valid_script(self.script):
                 return
 
-            script_name = self.script[:-3]  # script name without the .py extension
-            script_path = None
-            script_module_name = None
-
-            # Search for the script in the allowed root directories
-            for root_dir in ['spellbookscripts', 'apps']:
-                if os.path.isfile(os.path.join(root_dir, self.script)):
-                    script_path = os.path.join(root_dir, self.script)
-                    if platform.system() == 'Windows':
-                        script_module_name = '%s.%s' % (root_dir, script_name.replace('\\', '.'))
-                    elif platform.system() == 'Linux':
-                        script_module_name = '%s.%s' % (root_dir, script_name.replace('/', '.'))
-                    else:
-                        raise NotImplementedError('Unsupported platform: only windows and linux are supported')
-
-            if script_path is None:
-                LOG.error('Can not find spellbook script %s' % self.script)
-                return
-
-            LOG.info('Loading Spellbook Script %s' % script_path)
-            LOG.info('Script module: %s (%s)' % (script_module_name, type(script_module_name)))
             try:
-                script_module = importlib.import_module(script_module_name)
+                spellbook_script = SCRIPT_REGISTRY.get_class(self.script)
+            except NotImplementedError:
+                raise
             except Exception as ex:
-                LOG.error('Failed to load Spellbook Script %s: %s' % (script_path, ex))
+                LOG.error('Failed to load Spellbook Script %s: %s' % (self.script, ex))
+                return
+
+            if spellbook_script is None:
                 return
 
-            script_class_name = os.path.basename(script_path)[:-3]
-            spellbook_script = getattr(script_module, script_class_name)
             kwargs = self.get_script_variables()
             script = spellbook_script(**kwargs)
 
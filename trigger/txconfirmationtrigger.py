@@ -22,7 +22,18 @@ class TxConfirmationTrigger(Trigger):
         if self.txid is None:
             return False
 
-        data = transaction(txid=self.txid)
+        return self.evaluate(data=transaction(txid=self.txid))
+
+    def evaluate(self, data):
+        """
+        Check if an already retrieved transaction has enough confirmations
+
+        :param data: The response of a transaction query for the txid
+        :return: True or False
+        """
+        if self.txid is None:
+            return False
+
         if isinstance(data, dict) and 'transaction' in data and 'confirmations' in data['transaction']:
             confirmations = data['transaction']['confirmations']
         else:
@@ -86,6 +86,12 @@ class TestAction(object):
         action.configure(action_type='InvalidType')
         assert action.action_type is None
 
+    def test_action_configure_depends_on(self):
+        action = ConcreteAction('test_action_id')
+        action.configure(depends_on=['other_action'])
+        assert action.depends_on == ['other_action']
+        assert action.json_encodable()['depends_on'] == ['other_action']
+
     def test_action_json_encodable(self):
         action = ConcreteAction('test_action_id')
         action.configure(action_type='Command', created=1609459200)
@@ -102,14 +108,14 @@ class TestAction(object):
         after = int(time.mktime(datetime.now().timetuple()))
         assert before <= result['created'] <= after
 
-    @mock.patch('action.action.save_to_json_file')
-    def test_action_save(self, mock_save):
+    @mock.patch('action.action.ACTION_STORE')
+    def test_action_save(self, mock_store):
         action = ConcreteAction('test_action_id')
         action.configure(action_type='Command', created=1609459200)
         action.save()
-        mock_save.assert_called_once()
-        call_args = mock_save.call_args
-        assert 'test_action_id.json' in call_args[0][0]
+        mock_store.save.assert_called_once()
+        call_args = mock_store.save.call_args
+        assert call_args[0][0] == 'test_action_id'
 
     def test_action_run(self):
         action = ConcreteAction('test_action_id')
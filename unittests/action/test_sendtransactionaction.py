@@ -175,6 +175,13 @@ class TestSendTransactionAction(object):
         action.configure(utxo_confirmations=6)
         assert action.utxo_confirmations == 6
 
+    def test_sendtransactionaction_configure_utxo_quorum(self):
+        action = SendTransactionAction('test_send_tx')
+        assert action.utxo_quorum is False
+        action.configure(utxo_quorum=True)
+        assert action.utxo_quorum is True
+        assert action.json_encodable()['utxo_quorum'] is True
+
     @mock.patch('action.sendtransactionaction.valid_private_key')
     def test_sendtransactionaction_configure_private_key(self, mock_valid_private_key):
         mock_valid_private_key.return_value = True
@@ -3,6 +3,7 @@
 """
 Pytest configuration and fixtures for the Valyrian Spellbook test suite.
 """
+import pytest
 from unittest.mock import patch
 
 # Import helpers.websockethelpers before patching so the module attribute exists.
@@ -16,3 +17,25 @@ from unittest.mock import patch
 # so that tests for websockethelpers.py can still use the real classes and functions.
 _patcher = patch('helpers.websockethelpers.init_websocket_server')
 _patcher.start()
+
+# Disable the persistent query cache of data.data so tests never share (or write) cached explorer responses.
+# Tests for the cache itself use their own QueryCache instance in a temporary directory.
+_query_cache_patcher = patch('data.data.QUERY_CACHE.enabled', False)
+_query_cache_patcher.start()
+
+# The same goes for the local store of address transactions.
+_transaction_store_patcher = patch('data.data.TRANSACTION_STORE.enabled', False)
+_transaction_store_patcher.start()
+
+# The network of the cache keys is read from the configuration file, the tests always use mainnet.
+_use_testnet_patcher = patch('data.data.use_testnet', return_value=False)
+_use_testnet_patcher.start()
+
+
+@pytest.fixture(autouse=True)
+def reset_explorer_health():
+    """Start every test with closed circuit breakers and without latency statistics of the explorers."""
+    from data import data
+    data.reset_circuit_breakers()
+    data.EXPLORER_STATS.reset()
+    yield
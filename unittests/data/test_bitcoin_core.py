@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import simplejson
+
+from data.blockexplorers.bitcoin_core import BitcoinCoreAPI, btc_to_satoshis, parse_verbose_transaction
+
+ADDRESS = '1BoatSLRHtKNngkdXEeobR76b53LETtpyT'
+ADDRESS_SCRIPT = '76a9147680adec8eabcabac676be9e83854ade0bd22cdb88ac'
+OTHER_ADDRESS = 'bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq'
+OTHER_SCRIPT = '0014e8df018c7e326cc253faac7e46cdc51e68542c42'
+
+PREV_TX = {'txid': 'aa' * 32, 'hash': 'aa' * 32, 'locktime': 0, 'confirmations': 10,
+           'vin': [{'coinbase': '03aabbcc', 'sequence': 4294967295}],
+           'vout': [{'value': 0.5, 'n': 0, 'scriptPubKey': {'hex': OTHER_SCRIPT, 'address': OTHER_ADDRESS}}]}
+
+TX = {'txid': 'bb' * 32, 'hash': 'cc' * 32, 'locktime': 0, 'confirmations': 3,
+      'vin': [{'txid': 'aa' * 32, 'vout': 0, 'scriptSig': {'hex': ''}, 'sequence': 4294967293}],
+      'vout': [{'value': 0.29, 'n': 0, 'scriptPubKey': {'hex': ADDRESS_SCRIPT, 'address': ADDRESS}},
+               {'value': 0.0, 'n': 1, 'scriptPubKey': {'hex': '6a0568656c6c6f'}}]}
+
+
+class FakeNode(object):
+    """Local stand-in for the JSON-RPC interface of a Bitcoin Core node."""
+    def __init__(self):
+        self.methods = {}
+        self.requests = []
+        self.auth = []
+
+    def handle(self, request):
+        method = self.methods.get(request['method'])
+        if method is None:
+            return {'id': request['id'], 'result': None, 'error': {'code': -32601, 'message': 'Method not found'}}
+        return {'id': request['id'], 'result': method(*request['params']), 'error': None}
+
+
+@pytest.fixture
+def node():
+    fake_node = FakeNode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = simplejson.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            fake_node.requests.append(payload)
+            fake_node.auth.append(self.headers.get('Authorization'))
+            body = simplejson.dumps([fake_node.handle(request) for request in payload]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake_node.url = 'http://127.0.0.1:%s' % server.server_address[1]
+    yield fake_node
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def api(node):
+    return BitcoinCoreAPI(url=node.url, key='user:password')
+
+
+def scan_result(*unspents):
+    return {'success': True, 'height': 100, 'unspents': list(unspents), 'total_amount': sum(unspent['amount'] for unspent in unspents)}
+
+
+class TestBitcoinCoreAPIInit(object):
+    def test_default_url(self):
+        assert BitcoinCoreAPI().url == 'http://127.0.0.1:8332'
+        assert BitcoinCoreAPI(testnet=True).url == 'http://127.0.0.1:18332'
+
+    def test_credentials(self):
+        assert BitcoinCoreAPI(key='user:password').auth == ('user', 'password')
+        assert BitcoinCoreAPI().auth is None
+
+
+class TestRPC(object):
+    def test_batch_is_a_single_request(self, node, api):
+        node.methods['getblockcount'] = lambda: 100
+        node.methods['getbestblockhash'] = lambda: 'hash'
+        assert api.rpc_batch([('getblockcount', []), ('getbestblockhash', [])]) == [100, 'hash']
+        assert len(node.requests) == 1
+        assert node.auth[0].startswith('Basic ')
+
+    def test_error(self, api):
+        with pytest.raises(Exception, match='Method not found'):
+            api.rpc('unknown')
+
+
+class TestBlocks(object):
+    def test_get_latest_block(self, node, api):
+        node.methods['getbestblockhash'] = lambda: 'hash'
+        node.methods['getblock'] = lambda block_hash, verbosity: {'height': 100, 'hash': block_hash, 'time': 123, 'merkleroot': 'm', 'size': 500}
+        assert api.get_latest_block() == {'block': {'height': 100, 'hash': 'hash', 'time': 123, 'merkleroot': 'm', 'size': 500}}
+
+    def test_get_block_by_height(self, node, api):
+        node.methods['getblockhash'] = lambda height: 'hash%s' % height
+        node.methods['getblock'] = lambda block_hash, verbosity: {'height': 10, 'hash': block_hash, 'time': 123, 'merkleroot': 'm', 'size': 500}
+        assert api.get_block_by_height(10)['block']['hash'] == 'hash10'
+
+    def test_node_offline(self):
+        api = BitcoinCoreAPI(url='http://127.0.0.1:1')
+        assert 'error' in api.get_latest_block()
+
+
+class TestTransactions(object):
+    def test_get_transaction(self, node, api):
+        node.methods['getrawtransaction'] = lambda txid, verbose: {'aa' * 32: PREV_TX, 'bb' * 32: TX}[txid]
+        node.methods['getblockcount'] = lambda: 100
+        tx = api.get_transaction('bb' * 32)['transaction']
+        assert tx['wtxid'] == 'cc' * 32
+        assert tx['block_height'] == 98
+        assert tx['confirmations'] == 3
+        assert tx['inputs'][0]['address'] == OTHER_ADDRESS
+        assert tx['inputs'][0]['value'] == 50000000
+        assert tx['outputs'][0]['value'] == 29000000
+        assert tx['outputs'][1]['op_return'] == 'hello'
+        assert tx['prime_input_address'] == OTHER_ADDRESS
+
+    def test_prevouts_are_fetched_in_one_request(self, node, api):
+        node.methods['getrawtransaction'] = lambda txid, verbose: {'aa' * 32: PREV_TX, 'bb' * 32: TX}[txid]
+        node.methods['getblockcount'] = lambda: 100
+        api.get_prime_input_address('bb' * 32)
+        assert len(node.requests) == 2
+
+    def test_coinbase(self):
+        tx = parse_verbose_transaction(data=PREV_TX, prev_transactions={}, latest_block_height=100)
+        assert tx.inputs[0].address is None
+        assert tx.block_height == 91
+
+    def test_get_transactions_is_not_available(self, api):
+        assert 'error' in api.get_transactions(ADDRESS)
+
+    def test_btc_to_satoshis(self):
+        assert btc_to_satoshis(0.29) == 29000000
+        assert btc_to_satoshis(20999999.97690000) == 2099999997690000
+
+
+class TestScanTxOutSet(object):
+    def test_get_utxos(self, node, api):
+        node.methods['scantxoutset'] = lambda action, descriptors: scan_result(
+            {'txid': 'bb' * 32, 'vout': 0, 'scriptPubKey': ADDRESS_SCRIPT, 'amount': 0.29, 'height': 98},
+            {'txid': 'dd' * 32, 'vout': 1, 'scriptPubKey': ADDRESS_SCRIPT, 'amount': 0.01, 'height': 100})
+        assert api.get_utxos(ADDRESS, confirmations=3) == {'utxos': [{'confirmations': 3, 'output_hash': 'bb' * 32, 'output_n': 0,
+                                                                       'value': 29000000, 'script': ADDRESS_SCRIPT}]}
+
+    def test_batch_queries_do_a_single_scan(self, node, api):
+        node.methods['scantxoutset'] = lambda action, descriptors: scan_result(
+            {'txid': 'bb' * 32, 'vout': 0, 'scriptPubKey': ADDRESS_SCRIPT, 'amount': 0.29, 'height': 98},
+            {'txid': 'dd' * 32, 'vout': 1, 'scriptPubKey': OTHER_SCRIPT, 'amount': 0.01, 'height': 90})
+        assert api.get_balances([ADDRESS, OTHER_ADDRESS]) == {'balances': {ADDRESS: {'final': 29000000}, OTHER_ADDRESS: {'final': 1000000}}}
+        assert len(node.requests) == 1
+        assert node.requests[0][0]['params'] == ['start', ['addr(%s)' % ADDRESS, 'addr(%s)' % OTHER_ADDRESS]]
+
+        utxos = api.get_utxos_many([ADDRESS, OTHER_ADDRESS], confirmations=1)['utxos']
+        assert [utxo['value'] for utxo in utxos[ADDRESS]] == [29000000]
+        assert [utxo['confirmations'] for utxo in utxos[OTHER_ADDRESS]] == [11]
+
+    def test_get_balance(self, node, api):
+        node.methods['scantxoutset'] = lambda action, descriptors: scan_result()
+        assert api.get_balance(ADDRESS) == {'balance': {'final': 0}}
+
+    def test_aborted_scan(self, node, api):
+        node.methods['scantxoutset'] = lambda action, descriptors: {'success': False}
+        assert 'error' in api.get_balance(ADDRESS)
+
+
+class TestPushTx(object):
+    def test_success(self, node, api):
+        node.methods['sendrawtransaction'] = lambda tx: 'bb' * 32
+        assert api.push_tx('0100') == {'success': True, 'txid': 'bb' * 32}
+
+    def test_rejected(self, api):
+        assert 'error' in api.push_tx('0100')
@@ -28,7 +28,7 @@ class TestBlockchainInfoAPIInit(object):
 
 
 class TestGetLatestBlock(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_get_latest_block_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'height': 100, 'hash': 'abc', 'time': 12345}),
@@ -41,21 +41,21 @@ class TestGetLatestBlock(object):
         assert result['block']['merkleroot'] == 'merkle'
         assert result['block']['size'] == 1000
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_get_latest_block_request_error(self, mock_get):
         mock_get.side_effect = Exception('Network error')
         api = BlockchainInfoAPI()
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_get_latest_block_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlockchainInfoAPI()
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_get_latest_block_value_error_on_block(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'height': 100, 'hash': 'abc', 'time': 12345}),
@@ -65,7 +65,7 @@ class TestGetLatestBlock(object):
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_get_latest_block_exception_on_block(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'height': 100, 'hash': 'abc', 'time': 12345}),
@@ -75,7 +75,7 @@ class TestGetLatestBlock(object):
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_get_latest_block_missing_keys_in_block(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'height': 100, 'hash': 'abc', 'time': 12345}),
@@ -88,7 +88,7 @@ class TestGetLatestBlock(object):
 
 
 class TestGetBlockByHash(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'height': 100, 'hash': 'abc', 'time': 123, 'mrkl_root': 'm', 'size': 500
@@ -97,14 +97,14 @@ class TestGetBlockByHash(object):
         result = api.get_block_by_hash('abc')
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockchainInfoAPI()
         result = api.get_block_by_hash('abc')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlockchainInfoAPI()
@@ -113,7 +113,7 @@ class TestGetBlockByHash(object):
 
 
 class TestGetBlockByHeight(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'blocks': [{'main_chain': True, 'height': 100, 'hash': 'abc', 'time': 123, 'mrkl_root': 'm', 'size': 500}]
@@ -122,21 +122,21 @@ class TestGetBlockByHeight(object):
         result = api.get_block_by_height(100)
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockchainInfoAPI()
         result = api.get_block_by_height(100)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_no_blocks_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlockchainInfoAPI()
         result = api.get_block_by_height(100)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_no_matching_block(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'blocks': [{'main_chain': False, 'height': 99, 'hash': 'abc', 'time': 123, 'mrkl_root': 'm', 'size': 500}]
@@ -147,7 +147,7 @@ class TestGetBlockByHeight(object):
 
 
 class TestGetTransactions(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_success(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -171,7 +171,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_request_error(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -180,7 +180,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_invalid_data(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -189,7 +189,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_unconfirmed_tx(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -207,7 +207,7 @@ class TestGetTransactions(object):
         assert 'transactions' in result
         assert len(result['transactions']) == 0
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_op_return_output(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -225,7 +225,7 @@ class TestGetTransactions(object):
         assert 'transactions' in result
 
     @mock.patch('data.blockexplorers.blockchain_info.sleep')
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_pagination_with_sleep(self, mock_height, mock_get, mock_sleep):
         mock_height.return_value = 200
@@ -255,7 +255,26 @@ class TestGetTransactions(object):
         assert len(result['transactions']) == 2
         mock_sleep.assert_called_once_with(1)
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
+    @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
+    def test_since_height_stops_paging(self, mock_height, mock_get):
+        mock_height.return_value = 200
+        page1 = {
+            'n_tx': 100,
+            'txs': [{
+                'hash': 'txid%d' % i, 'lock_time': 0, 'block_height': 199 - i,
+                'inputs': [{'script': 'abc', 'sequence': 1, 'prev_out': {'addr': 'addr1', 'value': 100, 'n': 0}}],
+                'out': [{'addr': 'addr2', 'value': 50, 'n': 0, 'spent': True, 'script': '76a9'}]
+            } for i in range(50)]
+        }
+        mock_get.return_value = make_mock_response(json_data=page1)
+        api = BlockchainInfoAPI()
+        result = api.get_transactions('addr1', since_height=190)
+        assert mock_get.call_count == 1
+        assert len(result['transactions']) == 50
+        assert result['latest_block_height'] == 200
+
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_mismatch_count(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -280,8 +299,67 @@ class TestGetTransactions(object):
         assert 'error' in result
 
 
+class TestGetBalances(object):
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
+    def test_multiaddr(self, mock_get):
+        mock_get.return_value = make_mock_response(json_data={'addresses': [
+            {'address': 'addr1', 'final_balance': 100, 'total_received': 200, 'total_sent': 100},
+            {'address': 'addr2', 'final_balance': 0, 'total_received': 50, 'total_sent': 50}]})
+        api = BlockchainInfoAPI()
+        result = api.get_balances(['addr1', 'addr2'])
+        assert mock_get.call_count == 1
+        assert 'active=addr1|addr2' in mock_get.call_args[0][0]
+        assert result == {'balances': {'addr1': {'final': 100, 'received': 200, 'sent': 100},
+                                       'addr2': {'final': 0, 'received': 50, 'sent': 50}}}
+
+    @mock.patch('data.blockexplorers.blockchain_info.MULTIADDR_CHUNK_SIZE', 1)
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
+    def test_multiaddr_chunks(self, mock_get):
+        mock_get.side_effect = [
+            make_mock_response(json_data={'addresses': [{'address': 'addr1', 'final_balance': 1, 'total_received': 1, 'total_sent': 0}]}),
+            make_mock_response(json_data={'addresses': [{'address': 'addr2', 'final_balance': 2, 'total_received': 2, 'total_sent': 0}]})]
+        api = BlockchainInfoAPI()
+        result = api.get_balances(['addr1', 'addr2'])
+        assert mock_get.call_count == 2
+        assert result['balances']['addr2']['final'] == 2
+
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
+    def test_unconfirmed_transactions_are_subtracted(self, mock_get):
+        mock_get.return_value = make_mock_response(json_data={
+            'addresses': [{'address': 'addr1', 'final_balance': 130, 'total_received': 250, 'total_sent': 120},
+                          {'address': 'addr2', 'final_balance': 0, 'total_received': 50, 'total_sent': 50}],
+            'txs': [{'inputs': [{'prev_out': {'addr': 'addr1', 'value': 20}}], 'out': [{'addr': 'other', 'value': 20}]},
+                    {'inputs': [{'prev_out': {'addr': 'other', 'value': 50}}], 'out': [{'addr': 'addr1', 'value': 50}]},
+                    {'block_height': 100, 'inputs': [{'prev_out': {'addr': 'addr2', 'value': 50}}], 'out': [{'addr': 'other', 'value': 50}]}]})
+        api = BlockchainInfoAPI()
+        result = api.get_balances(['addr1', 'addr2'])
+        assert result == {'balances': {'addr1': {'final': 100, 'received': 200, 'sent': 100},
+                                       'addr2': {'final': 0, 'received': 50, 'sent': 50}}}
+
+    @mock.patch('data.blockexplorers.blockchain_info.MULTIADDR_TX_LIMIT', 1)
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
+    def test_too_many_unconfirmed_transactions(self, mock_get):
+        mock_get.return_value = make_mock_response(json_data={
+            'addresses': [{'address': 'addr1', 'final_balance': 50, 'total_received': 50, 'total_sent': 0}],
+            'txs': [{'inputs': [], 'out': [{'addr': 'addr1', 'value': 50}]}]})
+        api = BlockchainInfoAPI()
+        assert 'error' in api.get_balances(['addr1'])
+
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
+    def test_missing_address(self, mock_get):
+        mock_get.return_value = make_mock_response(json_data={'addresses': []})
+        api = BlockchainInfoAPI()
+        assert 'error' in api.get_balances(['addr1'])
+
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
+    def test_request_error(self, mock_get):
+        mock_get.side_effect = Exception('fail')
+        api = BlockchainInfoAPI()
+        assert 'error' in api.get_balances(['addr1'])
+
+
 class TestGetBalance(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='100'),
@@ -294,14 +372,14 @@ class TestGetBalance(object):
         assert result['balance']['received'] == 200
         assert result['balance']['sent'] == 50
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_error_first_request(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockchainInfoAPI()
         result = api.get_balance('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_error_second_request(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='100'),
@@ -311,7 +389,7 @@ class TestGetBalance(object):
         result = api.get_balance('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_error_third_request(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='100'),
@@ -324,7 +402,7 @@ class TestGetBalance(object):
 
 
 class TestGetTransaction(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_success(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -337,14 +415,14 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockchainInfoAPI()
         result = api.get_transaction('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_no_block_height(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -357,7 +435,7 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockchain_info.BlockchainInfoAPI.get_latest_block_height')
     def test_op_return_output(self, mock_height, mock_get):
         mock_height.return_value = 200
@@ -372,7 +450,7 @@ class TestGetTransaction(object):
 
 
 class TestGetPrimeInputAddress(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'inputs': [{'prev_out': {'addr': 'b_addr'}}, {'prev_out': {'addr': 'a_addr'}}]
@@ -381,7 +459,7 @@ class TestGetPrimeInputAddress(object):
         result = api.get_prime_input_address('txid')
         assert result['prime_input_address'] == 'a_addr'
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_coinbase_tx(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'inputs': [{}]
@@ -390,14 +468,14 @@ class TestGetPrimeInputAddress(object):
         result = api.get_prime_input_address('txid')
         assert result['prime_input_address'] is None
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockchainInfoAPI()
         result = api.get_prime_input_address('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_no_inputs_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlockchainInfoAPI()
@@ -406,7 +484,7 @@ class TestGetPrimeInputAddress(object):
 
 
 class TestGetUtxos(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'unspent_outputs': [{
@@ -417,28 +495,28 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert len(result['utxos']) == 1
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_no_free_outputs(self, mock_get):
         mock_get.return_value = make_mock_response(text_data='No free outputs to spend')
         api = BlockchainInfoAPI()
         result = api.get_utxos('addr')
         assert result['utxos'] == []
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockchainInfoAPI()
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_no_unspent_outputs_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlockchainInfoAPI()
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.get')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.get')
     def test_missing_keys_in_output(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'unspent_outputs': [{'confirmations': 5}]
@@ -449,21 +527,21 @@ class TestGetUtxos(object):
 
 
 class TestPushTx(object):
-    @mock.patch('data.blockexplorers.blockchain_info.requests.post')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.post')
     def test_success(self, mock_post):
         mock_post.return_value = make_mock_response(text_data='Transaction Submitted', status_code=200)
         api = BlockchainInfoAPI()
         result = api.push_tx('rawtx')
         assert result['success'] is True
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.post')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.post')
     def test_failure(self, mock_post):
         mock_post.return_value = make_mock_response(text_data='Transaction rejected', status_code=400)
         api = BlockchainInfoAPI()
         result = api.push_tx('rawtx')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockchain_info.requests.post')
+    @mock.patch('data.blockexplorers.blockchain_info.HTTP_SESSIONS.post')
     def test_request_error(self, mock_post):
         mock_post.side_effect = Exception('fail')
         api = BlockchainInfoAPI()
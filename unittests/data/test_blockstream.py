@@ -28,7 +28,7 @@ class TestBlockstreamAPIInit(object):
 
 
 class TestGetLatestBlock(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='blockhash123'),
@@ -38,7 +38,7 @@ class TestGetLatestBlock(object):
         result = api.get_latest_block()
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_request_error_on_hash(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockstreamAPI()
@@ -47,7 +47,7 @@ class TestGetLatestBlock(object):
 
 
 class TestGetBlockByHash(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'height': 100, 'id': 'abc', 'timestamp': 123, 'merkle_root': 'm', 'size': 500
@@ -56,14 +56,14 @@ class TestGetBlockByHash(object):
         result = api.get_block_by_hash('abc')
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockstreamAPI()
         result = api.get_block_by_hash('abc')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlockstreamAPI()
@@ -72,7 +72,7 @@ class TestGetBlockByHash(object):
 
 
 class TestGetBlockByHeight(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='blockhash123'),
@@ -82,7 +82,7 @@ class TestGetBlockByHeight(object):
         result = api.get_block_by_height(100)
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockstreamAPI()
@@ -91,7 +91,7 @@ class TestGetBlockByHeight(object):
 
 
 class TestGetTransactions(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='200'),
@@ -105,7 +105,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_error_getting_height(self, mock_get):
         mock_get.side_effect = [
             mock.MagicMock(text='error', json=mock.MagicMock(side_effect=Exception('fail')))
@@ -114,7 +114,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_error_getting_txs(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='200'),
@@ -124,7 +124,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_unconfirmed_tx_skipped(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='200'),
@@ -137,7 +137,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert result['transactions'] == []
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_pagination(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='200'),
@@ -152,7 +152,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert len(result['transactions']) == 25
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_pagination_error(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='200'),
@@ -167,9 +167,8 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.sleep')
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
-    def test_pagination_with_confirmed_second_page(self, mock_get, mock_sleep):
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
+    def test_pagination_with_confirmed_second_page(self, mock_get):
         first_page = [{
             'txid': 'tx%d' % i, 'locktime': 0, 'status': {'confirmed': True, 'block_height': 100},
             'vin': [{'prevout': {'scriptpubkey_address': 'addr1', 'value': 100}, 'vout': 0, 'is_coinbase': False, 'txid': 'intx', 'scriptsig': 'sig', 'sequence': 1}],
@@ -189,9 +188,26 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert len(result['transactions']) == 26
 
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
+    def test_since_height_stops_paging(self, mock_get):
+        first_page = [{
+            'txid': 'tx%d' % i, 'locktime': 0, 'status': {'confirmed': True, 'block_height': 200 - i},
+            'vin': [{'prevout': {'scriptpubkey_address': 'addr1', 'value': 100}, 'vout': 0, 'is_coinbase': False, 'txid': 'intx', 'scriptsig': 'sig', 'sequence': 1}],
+            'vout': [{'scriptpubkey_address': 'addr2', 'value': 50, 'scriptpubkey': '76a9'}]
+        } for i in range(25)]
+        mock_get.side_effect = [
+            make_mock_response(text_data='210'),
+            make_mock_response(json_data=first_page),
+        ]
+        api = BlockstreamAPI()
+        result = api.get_transactions('addr1', since_height=190)
+        assert mock_get.call_count == 2
+        assert len(result['transactions']) == 25
+        assert result['latest_block_height'] == 210
+
 
 class TestGetBalance(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'chain_stats': {'spent_txo_sum': 50, 'funded_txo_sum': 200}
@@ -202,7 +218,7 @@ class TestGetBalance(object):
         assert result['balance']['received'] == 200
         assert result['balance']['sent'] == 50
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockstreamAPI()
@@ -211,7 +227,7 @@ class TestGetBalance(object):
 
 
 class TestGetTransaction(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     @mock.patch('data.blockexplorers.blockstream.BlockstreamAPI.parse_transaction')
     def test_success(self, mock_parse, mock_get):
         mock_get.return_value = make_mock_response(json_data={'txid': 'tx1'})
@@ -222,7 +238,7 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockstreamAPI()
@@ -231,7 +247,7 @@ class TestGetTransaction(object):
 
 
 class TestParseTransaction(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_with_latest_block_height(self, mock_get):
         data = {
             'txid': 'tx1', 'locktime': 0, 'status': {'block_height': 100},
@@ -244,7 +260,7 @@ class TestParseTransaction(object):
         assert result.block_height == 100
         assert result.confirmations == 101
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_without_latest_block_height(self, mock_get):
         mock_get.return_value = make_mock_response(text_data='200')
         data = {
@@ -256,7 +272,7 @@ class TestParseTransaction(object):
         result = api.parse_transaction(data=data)
         assert result.txid == 'tx1'
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_error_getting_height(self, mock_get):
         mock_get.side_effect = Exception('fail')
         data = {
@@ -267,7 +283,7 @@ class TestParseTransaction(object):
         result = api.parse_transaction(data=data)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_no_block_height(self, mock_get):
         data = {
             'txid': 'tx1', 'locktime': 0, 'status': {},
@@ -296,7 +312,7 @@ class TestGetPrimeInputAddress(object):
 
 
 class TestGetUtxos(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='200'),
@@ -309,7 +325,7 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert len(result['utxos']) == 1
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_error_getting_height(self, mock_get):
         mock_get.side_effect = [
             mock.MagicMock(text='error', json=mock.MagicMock(side_effect=Exception('fail')))
@@ -318,7 +334,7 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_error_getting_utxos(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='200'),
@@ -328,7 +344,7 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_unconfirmed_utxo(self, mock_get):
         # Note: blockstream code reassigns local 'confirmations' variable,
         # so the filter always passes. This test verifies actual behavior.
@@ -346,7 +362,7 @@ class TestGetUtxos(object):
 
 
 class TestPushTx(object):
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(text_data='txid123', status_code=200)
         api = BlockstreamAPI()
@@ -354,14 +370,14 @@ class TestPushTx(object):
         assert result['success'] is True
         assert result['txid'] == 'txid123'
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_failure(self, mock_get):
         mock_get.return_value = make_mock_response(text_data='error', status_code=400)
         api = BlockstreamAPI()
         result = api.push_tx('rawtx')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blockstream.requests.get')
+    @mock.patch('data.blockexplorers.blockstream.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlockstreamAPI()
@@ -27,7 +27,7 @@ class TestBlocktrailComAPIInit(object):
 
 
 class TestGetLatestBlock(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'height': 100, 'hash': 'abc'}),
@@ -40,14 +40,14 @@ class TestGetLatestBlock(object):
         result = api.get_latest_block()
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlocktrailComAPI(key='mykey')
@@ -56,7 +56,7 @@ class TestGetLatestBlock(object):
 
 
 class TestGetBlockByHeight(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'height': 100, 'hash': 'abc', 'block_time': '2020-01-01T00:00:00+0000',
@@ -66,14 +66,14 @@ class TestGetBlockByHeight(object):
         result = api.get_block_by_height(100)
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_block_by_height(100)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlocktrailComAPI(key='mykey')
@@ -82,7 +82,7 @@ class TestGetBlockByHeight(object):
 
 
 class TestGetBlockByHash(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'height': 100, 'hash': 'abc', 'block_time': '2020-01-01T00:00:00+0000',
@@ -92,14 +92,14 @@ class TestGetBlockByHash(object):
         result = api.get_block_by_hash('abc')
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_block_by_hash('abc')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlocktrailComAPI(key='mykey')
@@ -108,7 +108,7 @@ class TestGetBlockByHash(object):
 
 
 class TestGetTransactions(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'total': 1,
@@ -122,21 +122,21 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlocktrailComAPI(key='mykey')
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_unconfirmed_tx(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'total': 1,
@@ -150,7 +150,7 @@ class TestGetTransactions(object):
         assert 'transactions' in result
 
     @mock.patch('data.blockexplorers.blocktrail_com.sleep')
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_mismatch_count(self, mock_get, mock_sleep):
         mock_get.side_effect = [
             make_mock_response(json_data={
@@ -179,7 +179,7 @@ class TestGetTransactions(object):
         assert 'transactions' in result
         assert len(result['transactions']) == 3
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_coinbase_input(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'total': 1,
@@ -193,7 +193,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_op_return_output(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'total': 1,
@@ -209,7 +209,7 @@ class TestGetTransactions(object):
 
 
 class TestGetBalance(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'balance': 100, 'received': 200, 'sent': 100
@@ -218,14 +218,14 @@ class TestGetBalance(object):
         result = api.get_balance('addr')
         assert result['balance']['final'] == 100
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_balance('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlocktrailComAPI(key='mykey')
@@ -234,7 +234,7 @@ class TestGetBalance(object):
 
 
 class TestGetTransaction(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'block_height': 100, 'confirmations': 6,
@@ -245,14 +245,14 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_transaction('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_no_confirmations(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'inputs': [{'address': 'addr1', 'value': 100, 'type': 'normal', 'output_hash': 'intx', 'output_index': 0, 'script_signature': 'sig', 'sequence': 1}],
@@ -262,7 +262,7 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_op_return_output(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'block_height': 100, 'confirmations': 6,
@@ -275,7 +275,7 @@ class TestGetTransaction(object):
 
 
 class TestGetPrimeInputAddress(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'inputs': [{'address': 'b_addr'}, {'address': 'a_addr'}]
@@ -284,14 +284,14 @@ class TestGetPrimeInputAddress(object):
         result = api.get_prime_input_address('txid')
         assert result['prime_input_address'] == 'a_addr'
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_prime_input_address('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_no_inputs(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlocktrailComAPI(key='mykey')
@@ -300,7 +300,7 @@ class TestGetPrimeInputAddress(object):
 
 
 class TestGetUtxos(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'total': 1,
@@ -310,21 +310,21 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert len(result['utxos']) == 1
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = BlocktrailComAPI(key='mykey')
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_mismatch_count(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'total': 1,
@@ -338,7 +338,7 @@ class TestGetUtxos(object):
         assert 'error' in result
 
     @mock.patch('data.blockexplorers.blocktrail_com.sleep')
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_pagination_with_sleep(self, mock_get, mock_sleep):
         mock_get.side_effect = [
             make_mock_response(json_data={
@@ -355,7 +355,7 @@ class TestGetUtxos(object):
         assert len(result['utxos']) == 2
         mock_sleep.assert_called_once_with(1)
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_insufficient_confirmations(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'total': 1,
@@ -367,14 +367,14 @@ class TestGetUtxos(object):
 
 
 class TestGetRecommendedFee(object):
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'optimal': 100})
         api = BlocktrailComAPI(key='mykey')
         result = api.get_recommended_fee()
         assert result == {'optimal': 100}
 
-    @mock.patch('data.blockexplorers.blocktrail_com.requests.get')
+    @mock.patch('data.blockexplorers.blocktrail_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BlocktrailComAPI(key='mykey')
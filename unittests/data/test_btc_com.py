@@ -27,7 +27,7 @@ class TestBTCComAPIInit(object):
 
 
 class TestGetLatestBlock(object):
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'height': 100, 'hash': 'abc', 'timestamp': 123, 'mrkl_root': 'm', 'size': 500}
@@ -36,21 +36,21 @@ class TestGetLatestBlock(object):
         result = api.get_latest_block()
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BTCComAPI()
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_null_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': None})
         api = BTCComAPI()
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': {'foo': 'bar'}})
         api = BTCComAPI()
@@ -59,7 +59,7 @@ class TestGetLatestBlock(object):
 
 
 class TestGetBlockByHeight(object):
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'height': 100, 'hash': 'abc', 'timestamp': 123, 'mrkl_root': 'm', 'size': 500}
@@ -68,14 +68,14 @@ class TestGetBlockByHeight(object):
         result = api.get_block_by_height(100)
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BTCComAPI()
         result = api.get_block_by_height(100)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_null_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': None})
         api = BTCComAPI()
@@ -84,7 +84,7 @@ class TestGetBlockByHeight(object):
 
 
 class TestGetBlockByHash(object):
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'height': 100, 'hash': 'abc', 'timestamp': 123, 'mrkl_root': 'm', 'size': 500}
@@ -93,14 +93,14 @@ class TestGetBlockByHash(object):
         result = api.get_block_by_hash('abc')
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BTCComAPI()
         result = api.get_block_by_hash('abc')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_null_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': None})
         api = BTCComAPI()
@@ -109,7 +109,7 @@ class TestGetBlockByHash(object):
 
 
 class TestGetTransactions(object):
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -125,28 +125,45 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
+    def test_since_height_stops_paging(self, mock_get):
+        mock_get.return_value = make_mock_response(json_data={
+            'data': {
+                'total_count': 100,
+                'list': [{
+                    'hash': 'tx%d' % i, 'block_height': 199 - i, 'confirmations': 2 + i, 'witness_hash': 'wtx', 'lock_time': 0,
+                    'inputs': [{'prev_addresses': ['addr1'], 'prev_value': 100, 'prev_tx_hash': 'intx', 'prev_position': 0, 'script_hex': 'hex', 'sequence': 1}],
+                    'outputs': [{'addresses': ['addr2'], 'value': 50, 'spent_by_tx': None, 'script_hex': '76a9'}]
+                } for i in range(50)]
+            }
+        })
+        api = BTCComAPI()
+        result = api.get_transactions('addr1', since_height=190)
+        assert mock_get.call_count == 1
+        assert len(result['transactions']) == 50
+
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BTCComAPI()
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_null_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': None})
         api = BTCComAPI()
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': {'foo': 'bar'}})
         api = BTCComAPI()
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_unconfirmed_tx(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -161,7 +178,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_empty_prev_addresses(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -177,7 +194,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_mismatch_count(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={
@@ -211,7 +228,7 @@ class TestGetTransactions(object):
 
 
 class TestGetBalance(object):
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'balance': 100, 'received': 200, 'sent': 100, 'unconfirmed_received': 10, 'unconfirmed_sent': 5}
@@ -222,14 +239,14 @@ class TestGetBalance(object):
         assert result['balance']['received'] == 190
         assert result['balance']['sent'] == 95
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BTCComAPI()
         result = api.get_balance('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_null_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': None})
         api = BTCComAPI()
@@ -238,7 +255,7 @@ class TestGetBalance(object):
 
 
 class TestGetTransaction(object):
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -251,14 +268,14 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BTCComAPI()
         result = api.get_transaction('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_null_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': None})
         api = BTCComAPI()
@@ -267,7 +284,7 @@ class TestGetTransaction(object):
         with pytest.raises(KeyError):
             api.get_transaction('txid')
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_no_confirmations(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'witness_hash': 'wtx', 'lock_time': 0, 'block_height': -1,
@@ -278,7 +295,7 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_op_return_output(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -316,7 +333,7 @@ class TestGetPrimeInputAddress(object):
 
 
 class TestGetUtxos(object):
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -328,28 +345,28 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert len(result['utxos']) == 1
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = BTCComAPI()
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_null_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': None})
         api = BTCComAPI()
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': {'foo': 'bar'}})
         api = BTCComAPI()
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_empty_list_stops_pagination(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'total_count': 5, 'list': []}
@@ -358,7 +375,7 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert 'utxos' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_mismatch_count(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={
@@ -379,7 +396,7 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.btc_com.requests.get')
+    @mock.patch('data.blockexplorers.btc_com.HTTP_SESSIONS.get')
     def test_insufficient_confirmations(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -27,7 +27,7 @@ class TestChainSoAPIInit(object):
 
 
 class TestGetLatestBlock(object):
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'data': {'blocks': 100}}),
@@ -39,7 +39,7 @@ class TestGetLatestBlock(object):
         result = api.get_latest_block()
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = ChainSoAPI()
@@ -47,14 +47,14 @@ class TestGetLatestBlock(object):
         assert 'error' in result
         assert 'Unable to get latest block from Chain.so' in result['error']
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_data_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = ChainSoAPI()
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_blocks_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': {'foo': 'bar'}})
         api = ChainSoAPI()
@@ -63,7 +63,7 @@ class TestGetLatestBlock(object):
 
 
 class TestGetBlockByHeight(object):
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'block_no': 100, 'blockhash': 'abc', 'time': 123, 'merkleroot': 'm', 'size': 500}
@@ -72,21 +72,21 @@ class TestGetBlockByHeight(object):
         result = api.get_block_by_height(100)
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = ChainSoAPI()
         result = api.get_block_by_height(100)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_data_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = ChainSoAPI()
         result = api.get_block_by_height(100)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': {'foo': 'bar'}})
         api = ChainSoAPI()
@@ -95,7 +95,7 @@ class TestGetBlockByHeight(object):
 
 
 class TestGetBlockByHash(object):
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'block_no': 100, 'blockhash': 'abc', 'time': 123, 'merkleroot': 'm', 'size': 500}
@@ -104,21 +104,21 @@ class TestGetBlockByHash(object):
         result = api.get_block_by_hash('abc')
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = ChainSoAPI()
         result = api.get_block_by_hash('abc')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_data_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = ChainSoAPI()
         result = api.get_block_by_hash('abc')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'data': {'foo': 'bar'}})
         api = ChainSoAPI()
@@ -129,7 +129,7 @@ class TestGetBlockByHash(object):
 class TestGetTransactions(object):
     @mock.patch('data.blockexplorers.chain_so.sleep')
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_transaction')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_success(self, mock_get, mock_get_tx, mock_sleep):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'txs': [{'txid': 'tx1'}, {'txid': 'tx2'}]}
@@ -140,14 +140,14 @@ class TestGetTransactions(object):
         assert 'transactions' in result
         assert len(result['transactions']) == 2
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = ChainSoAPI()
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_data_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = ChainSoAPI()
@@ -156,7 +156,7 @@ class TestGetTransactions(object):
 
     @mock.patch('data.blockexplorers.chain_so.sleep')
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_transaction')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_transaction_error(self, mock_get, mock_get_tx, mock_sleep):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'txs': [{'txid': 'tx1'}]}
@@ -169,7 +169,7 @@ class TestGetTransactions(object):
 
 
 class TestGetBalance(object):
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'balance': '0.001', 'received_value': '0.002'}
@@ -178,14 +178,14 @@ class TestGetBalance(object):
         result = api.get_balance('addr')
         assert 'balance' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = ChainSoAPI()
         result = api.get_balance('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_data_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = ChainSoAPI()
@@ -194,7 +194,7 @@ class TestGetBalance(object):
 
 
 class TestGetUtxos(object):
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'txs': [{'confirmations': 5, 'txid': 'tx1', 'output_no': 0, 'value': '0.001', 'script_hex': 'hex'}]}
@@ -203,21 +203,21 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert len(result['utxos']) == 1
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = ChainSoAPI()
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_data_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = ChainSoAPI()
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_missing_keys(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'txs': [{'confirmations': 5}]}
@@ -229,7 +229,7 @@ class TestGetUtxos(object):
 
 class TestGetTransaction(object):
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_block_by_hash')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_success(self, mock_get, mock_get_block):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -243,14 +243,14 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = ChainSoAPI()
         result = api.get_transaction('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_no_data_key(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = ChainSoAPI()
@@ -258,7 +258,7 @@ class TestGetTransaction(object):
         assert 'error' in result
 
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_block_by_hash')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_block_error(self, mock_get, mock_get_block):
         mock_get.return_value = make_mock_response(json_data={
             'data': {'blockhash': 'abc', 'confirmations': 6, 'inputs': [], 'outputs': []}
@@ -269,7 +269,7 @@ class TestGetTransaction(object):
         assert 'error' in result
 
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_block_by_hash')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_coinbase_input(self, mock_get, mock_get_block):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -284,7 +284,7 @@ class TestGetTransaction(object):
         assert 'transaction' in result
 
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_block_by_hash')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_nonstandard_output(self, mock_get, mock_get_block):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -299,7 +299,7 @@ class TestGetTransaction(object):
         assert 'transaction' in result
 
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_block_by_hash')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_op_return_cp1252_fallback(self, mock_get, mock_get_block):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -314,7 +314,7 @@ class TestGetTransaction(object):
         assert 'transaction' in result
 
     @mock.patch('data.blockexplorers.chain_so.ChainSoAPI.get_block_by_hash')
-    @mock.patch('data.blockexplorers.chain_so.requests.get')
+    @mock.patch('data.blockexplorers.chain_so.HTTP_SESSIONS.get')
     def test_op_return_decode_error(self, mock_get, mock_get_block):
         mock_get.return_value = make_mock_response(json_data={
             'data': {
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import mock
+
+from data.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class TestCircuitBreaker(object):
+    def setup_method(self, method):
+        self.circuit_breaker = CircuitBreaker(name='explorer1', failure_threshold=3, cooldown=60)
+
+    def test_closed_by_default(self):
+        assert self.circuit_breaker.state == CircuitState.CLOSED
+        assert self.circuit_breaker.allow() is True
+
+    def test_opens_after_threshold(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_failure()
+        assert self.circuit_breaker.allow() is True
+        self.circuit_breaker.record_failure()
+        assert self.circuit_breaker.state == CircuitState.OPEN
+        assert self.circuit_breaker.allow() is False
+        assert self.circuit_breaker.json_encodable() == {'state': 'open', 'failures': 3, 'times_opened': 1}
+
+    def test_success_resets_failures(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_success()
+        self.circuit_breaker.record_failure()
+        assert self.circuit_breaker.state == CircuitState.CLOSED
+
+    def test_half_open_after_cooldown(self):
+        with mock.patch('data.circuit_breaker.time.monotonic', return_value=100.0):
+            for _ in range(3):
+                self.circuit_breaker.record_failure()
+
+        with mock.patch('data.circuit_breaker.time.monotonic', return_value=161.0):
+            assert self.circuit_breaker.state == CircuitState.HALF_OPEN
+            assert self.circuit_breaker.allow() is True
+
+            # A single error in the half-open state opens the circuit again
+            self.circuit_breaker.record_failure()
+            assert self.circuit_breaker.state == CircuitState.OPEN
+            assert self.circuit_breaker.times_opened == 2
+
+    def test_half_open_allows_a_single_trial_request(self):
+        with mock.patch('data.circuit_breaker.time.monotonic', return_value=100.0):
+            for _ in range(3):
+                self.circuit_breaker.record_failure()
+
+        with mock.patch('data.circuit_breaker.time.monotonic', return_value=161.0):
+            assert self.circuit_breaker.allow() is True
+            assert self.circuit_breaker.allow() is False
+
+        # A trial request that never reports back is given up after the cooldown
+        with mock.patch('data.circuit_breaker.time.monotonic', return_value=222.0):
+            assert self.circuit_breaker.allow() is True
+            self.circuit_breaker.record_success()
+            assert self.circuit_breaker.allow() is True
+            assert self.circuit_breaker.allow() is True
+
+    def test_success_in_half_open_state_closes_circuit(self):
+        with mock.patch('data.circuit_breaker.time.monotonic', return_value=100.0):
+            for _ in range(3):
+                self.circuit_breaker.record_failure()
+
+        with mock.patch('data.circuit_breaker.time.monotonic', return_value=161.0):
+            self.circuit_breaker.record_success()
+            assert self.circuit_breaker.state == CircuitState.CLOSED
@@ -1,15 +1,23 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-import pytest
+import threading
+import time
+
 import mock
+import pytest
 
 from data import data
 from data.explorer import ExplorerType
+from data.query_cache import QueryCache
+from data.transaction_store import TransactionStore
 
 
 class TestInitializeExplorersFile(object):
     """Tests for initialize_explorers_file function"""
 
+    def setup_method(self, method):
+        data.EXPLORER_REGISTRY.clear()
+
     @mock.patch('data.data.save_to_json_file')
     def test_initialize_explorers_file(self, mock_save):
         data.initialize_explorers_file()
@@ -26,6 +34,9 @@ class TestInitializeExplorersFile(object):
 class TestGetExplorers(object):
     """Tests for get_explorers function"""
 
+    def setup_method(self, method):
+        data.EXPLORER_REGISTRY.clear()
+
     @mock.patch('data.data.os.path.isfile', return_value=False)
     @mock.patch('data.data.initialize_explorers_file')
     @mock.patch('data.data.load_from_json_file')
@@ -60,6 +71,9 @@ class TestGetExplorers(object):
 class TestGetExplorerConfig(object):
     """Tests for get_explorer_config function"""
 
+    def setup_method(self, method):
+        data.EXPLORER_REGISTRY.clear()
+
     @mock.patch('data.data.load_from_json_file')
     def test_get_explorer_config_exists(self, mock_load):
         mock_load.return_value = {'myexplorer': {'type': 'Blockstream.info', 'priority': 1}}
@@ -76,6 +90,9 @@ class TestGetExplorerConfig(object):
 class TestSaveExplorer(object):
     """Tests for save_explorer function"""
 
+    def setup_method(self, method):
+        data.EXPLORER_REGISTRY.clear()
+
     @mock.patch('data.data.save_to_json_file')
     @mock.patch('data.data.load_from_json_file')
     def test_save_explorer_full_config(self, mock_load, mock_save):
@@ -101,11 +118,24 @@ class TestSaveExplorer(object):
         assert saved['myexplorer']['type'] == 'BTC.com'
         assert saved['myexplorer']['url'] == ''
         assert saved['myexplorer']['priority'] == 0
+        assert saved['myexplorer']['rate_limit'] is None
+
+    @mock.patch('data.data.save_to_json_file')
+    @mock.patch('data.data.load_from_json_file')
+    def test_save_explorer_rate_limit(self, mock_load, mock_save):
+        mock_load.return_value = {}
+        data.save_explorer('myexplorer', {'type': 'BTC.com', 'rate_limit': '0.5', 'burst': '3'})
+        saved = mock_save.call_args[0][1]
+        assert saved['myexplorer']['rate_limit'] == 0.5
+        assert saved['myexplorer']['burst'] == 3
 
 
 class TestDeleteExplorer(object):
     """Tests for delete_explorer function"""
 
+    def setup_method(self, method):
+        data.EXPLORER_REGISTRY.clear()
+
     @mock.patch('data.data.save_to_json_file')
     @mock.patch('data.data.load_from_json_file')
     def test_delete_explorer_exists(self, mock_load, mock_save):
@@ -126,6 +156,9 @@ class TestDeleteExplorer(object):
 class TestGetExplorerAPI(object):
     """Tests for get_explorer_api function"""
 
+    def setup_method(self, method):
+        data.EXPLORER_REGISTRY.clear()
+
     @mock.patch('data.data.load_from_json_file')
     def test_get_explorer_api_blockchain_info(self, mock_load):
         mock_load.return_value = {'test': {'type': ExplorerType.BLOCKCHAIN_INFO, 'testnet': False}}
@@ -162,6 +195,32 @@ class TestGetExplorerAPI(object):
         result = data.get_explorer_api('test')
         assert result is not None
 
+    @mock.patch('data.data.load_from_json_file')
+    def test_get_explorer_api_bitcoin_core(self, mock_load):
+        mock_load.return_value = {'test': {'type': ExplorerType.BITCOIN_CORE, 'url': 'http://127.0.0.1:8332', 'api_key': 'user:password', 'testnet': False}}
+        result = data.get_explorer_api('test')
+        assert result.auth == ('user', 'password')
+
+    @mock.patch('data.data.load_from_json_file')
+    def test_get_explorer_api_electrum(self, mock_load):
+        mock_load.return_value = {'test': {'type': ExplorerType.ELECTRUM, 'url': 'ssl://127.0.0.1:50002', 'testnet': False}}
+        result = data.get_explorer_api('test')
+        assert result.use_ssl is True
+
+    @mock.patch('data.data.HTTP_SESSIONS.set_rate_limit')
+    @mock.patch('data.data.load_from_json_file')
+    def test_get_explorer_api_uses_default_rate_limit(self, mock_load, mock_set_rate_limit):
+        mock_load.return_value = {'test': {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'testnet': False}}
+        result = data.get_explorer_api('test')
+        mock_set_rate_limit.assert_called_once_with(result.url, rate=result.RATE_LIMIT, burst=result.BURST)
+
+    @mock.patch('data.data.HTTP_SESSIONS.set_rate_limit')
+    @mock.patch('data.data.load_from_json_file')
+    def test_get_explorer_api_uses_configured_rate_limit(self, mock_load, mock_set_rate_limit):
+        mock_load.return_value = {'test': {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'testnet': False, 'rate_limit': 10, 'burst': 20}}
+        result = data.get_explorer_api('test')
+        mock_set_rate_limit.assert_called_once_with(result.url, rate=10, burst=20)
+
     @mock.patch('data.data.load_from_json_file')
     def test_get_explorer_api_unknown_type(self, mock_load):
         mock_load.return_value = {'test': {'type': 'UnknownExplorer', 'url': '', 'testnet': False}}
@@ -175,11 +234,63 @@ class TestGetExplorerAPI(object):
         assert result is None
 
 
+class TestExplorerRegistry(object):
+    """Tests for the ExplorerRegistry class"""
+
+    def test_file_is_only_loaded_once(self, tmp_path):
+        filename = str(tmp_path / 'explorers.json')
+        registry = data.ExplorerRegistry(filename)
+        registry.update({'test': {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'priority': 1, 'testnet': False}})
+        with mock.patch('data.data.load_from_json_file') as mock_load:
+            registry.get_explorers()
+            registry.get_explorers()
+            mock_load.assert_not_called()
+
+    def test_file_is_reloaded_when_changed(self, tmp_path):
+        filename = str(tmp_path / 'explorers.json')
+        registry = data.ExplorerRegistry(filename)
+        registry.update({'test': {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'priority': 1, 'testnet': False}})
+        with mock.patch.object(registry, 'get_mtime', return_value=-1):
+            with mock.patch('data.data.load_from_json_file', return_value={'other': {}}) as mock_load:
+                assert registry.get_explorers() == {'other': {}}
+                mock_load.assert_called_once()
+
+    def test_explorer_api_objects_are_reused(self, tmp_path):
+        registry = data.ExplorerRegistry(str(tmp_path / 'explorers.json'))
+        registry.update({'test': {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'priority': 1, 'testnet': False}})
+        api = registry.get_explorer_api('test')
+        assert api is not None
+        assert registry.get_explorer_api('test') is api
+
+    def test_explorer_api_unknown_explorer(self, tmp_path):
+        registry = data.ExplorerRegistry(str(tmp_path / 'explorers.json'))
+        registry.update({})
+        assert registry.get_explorer_api('nonexistent') is None
+
+    def test_set_replaces_explorer_api_objects(self, tmp_path):
+        registry = data.ExplorerRegistry(str(tmp_path / 'explorers.json'))
+        registry.update({'test': {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'priority': 1, 'testnet': False}})
+        api = registry.get_explorer_api('test')
+        registry.set('test', {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'priority': 1, 'testnet': True})
+        new_api = registry.get_explorer_api('test')
+        assert new_api is not api
+        assert new_api.testnet is True
+
+    def test_delete(self, tmp_path):
+        registry = data.ExplorerRegistry(str(tmp_path / 'explorers.json'))
+        registry.update({'test': {'type': ExplorerType.BLOCKSTREAM, 'url': '', 'priority': 1, 'testnet': False}})
+        assert registry.delete('test') is True
+        assert registry.delete('test') is False
+        registry.clear()
+        assert registry.get_explorers() == {}
+
+
 class TestQuery(object):
     """Tests for query function"""
 
     def setup_method(self, method):
-        data.EXPLORER = None
+        data.clear_explorer()
+        data.EXPLORER_STATS.reset()
 
     @mock.patch('data.data.get_explorer_api')
     @mock.patch('data.data.get_explorers')
@@ -327,14 +438,14 @@ class TestQuery(object):
     @mock.patch('data.data.get_explorer_api')
     @mock.patch('data.data.get_explorers')
     def test_query_with_specific_explorer(self, mock_get_explorers, mock_get_api):
-        data.EXPLORER = 'specific_explorer'
+        data.EXPLORER_CONTEXT.explorer_id = 'specific_explorer'
         mock_api = mock.MagicMock()
         mock_api.get_balance.return_value = {'balance': 50}
         mock_get_api.return_value = mock_api
         result = data.query('balance', ['addr'])
         mock_get_explorers.assert_not_called()
         assert result == {'balance': 50}
-        data.EXPLORER = None
+        data.EXPLORER_CONTEXT.explorer_id = None
 
     @mock.patch('data.data.get_explorer_api')
     @mock.patch('data.data.get_explorers')
@@ -357,11 +468,331 @@ class TestQuery(object):
         assert 'error' in result
 
 
+class TestQueryCaching(object):
+    """Tests for the query cache in the query function"""
+
+    def setup_method(self, method):
+        data.clear_explorer()
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_query_uses_cache(self, mock_get_explorers, mock_get_api, tmp_path):
+        mock_get_explorers.return_value = ['explorer1']
+        mock_api = mock.MagicMock()
+        mock_api.get_prime_input_address.return_value = {'prime_input_address': 'addr1'}
+        mock_get_api.return_value = mock_api
+        with mock.patch('data.data.QUERY_CACHE', QueryCache(str(tmp_path / 'cache.db'))):
+            assert data.query('prime_input_address', ['abc']) == {'prime_input_address': 'addr1'}
+            data.EXPLORER_CONTEXT.explorer_id = None
+            assert data.query('prime_input_address', ['abc']) == {'prime_input_address': 'addr1'}
+            assert data.cache_stats()['hits'] == {'prime_input_address': 1}
+            assert data.get_last_explorer() == 'explorer1'
+            assert data.EXPLORER_CONTEXT.explorer_id is None
+        assert mock_api.get_prime_input_address.call_count == 1
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_query_errors_are_not_cached(self, mock_get_explorers, mock_get_api, tmp_path):
+        mock_get_explorers.return_value = ['explorer1']
+        mock_api = mock.MagicMock()
+        mock_api.get_balance.return_value = {'error': 'failed'}
+        mock_get_api.return_value = mock_api
+        with mock.patch('data.data.QUERY_CACHE', QueryCache(str(tmp_path / 'cache.db'))):
+            data.query('balance', ['addr'])
+            data.query('balance', ['addr'])
+        assert mock_api.get_balance.call_count == 2
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_query_does_not_use_the_cache_of_the_other_network(self, mock_get_explorers, mock_get_api, tmp_path):
+        mock_get_explorers.return_value = ['explorer1']
+        mock_get_api.return_value.get_prime_input_address.return_value = {'prime_input_address': 'addr1'}
+        with mock.patch('data.data.QUERY_CACHE', QueryCache(str(tmp_path / 'cache.db'))):
+            data.query('prime_input_address', ['abc'])
+            with mock.patch('data.data.use_testnet', return_value=True):
+                data.query('prime_input_address', ['abc'])
+        assert mock_get_api.return_value.get_prime_input_address.call_count == 2
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_query_with_specific_explorer_bypasses_the_cache(self, mock_get_explorers, mock_get_api, tmp_path):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = {'explorer1': mock.MagicMock(), 'explorer2': mock.MagicMock()}
+        apis['explorer1'].get_prime_input_address.return_value = {'prime_input_address': 'addr1'}
+        apis['explorer2'].get_prime_input_address.return_value = {'prime_input_address': 'addr1'}
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        cache = QueryCache(str(tmp_path / 'cache.db'))
+        cache.put('prime_input_address', ['abc'], {'prime_input_address': 'addr1'}, explorer='explorer1')
+        with mock.patch('data.data.QUERY_CACHE', cache):
+            data.set_explorer('explorer2')
+            assert data.query('prime_input_address', ['abc']) == {'prime_input_address': 'addr1'}
+        apis['explorer2'].get_prime_input_address.assert_called_once_with('abc')
+        assert data.get_last_explorer() == 'explorer2'
+        assert data.EXPLORER_CONTEXT.explorer_id == 'explorer2'
+
+    def test_invalidate_cache(self, tmp_path):
+        cache = QueryCache(str(tmp_path / 'cache.db'))
+        cache.put('balance', ['addr'], {'balance': {'final': 1}})
+        with mock.patch('data.data.QUERY_CACHE', cache):
+            data.invalidate_cache(query_type='balance')
+            assert data.cache_stats()['entries'] == 0
+
+
+class TestHedgedAndQuorumQueries(object):
+    """Tests for adaptive ordering, hedged queries and quorum queries"""
+
+    def setup_method(self, method):
+        data.clear_explorer()
+        data.EXPLORER_STATS.reset()
+
+    @staticmethod
+    def make_apis(balances, delays=None):
+        delays = delays if delays is not None else {}
+        apis = {}
+        for explorer_id, balance in balances.items():
+            def get_balance(address, balance=balance, delay=delays.get(explorer_id, 0)):
+                time.sleep(delay)
+                return balance if isinstance(balance, dict) else {'balance': {'final': balance}}
+            api = mock.MagicMock()
+            api.get_balance.side_effect = get_balance
+            apis[explorer_id] = api
+        return apis
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_query_records_stats(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': {'error': 'fail'}, 'explorer2': 100})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert data.query('balance', ['addr']) == {'balance': {'final': 100}}
+        stats = data.explorer_stats()
+        assert stats['explorer1']['errors'] == 1
+        assert stats['explorer2']['errors'] == 0
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_failing_explorer_moves_down(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': {'error': 'fail'}, 'explorer2': 100})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        data.EXPLORER_STATS.record('explorer1', 1.0, success=False)
+        data.query('balance', ['addr'])
+        apis['explorer1'].get_balance.assert_not_called()
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_exception_in_explorer_tries_next_explorer(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer2': 100})
+        apis['explorer1'] = mock.MagicMock()
+        apis['explorer1'].get_balance.side_effect = ValueError('unexpected response')
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert data.query('balance', ['addr']) == {'balance': {'final': 100}}
+
+    @mock.patch('data.data.HEDGE_DELAY', 0.05)
+    @mock.patch('data.data.HEDGED', True)
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_hedged_query_uses_fastest_explorer(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': 100, 'explorer2': 200}, delays={'explorer1': 1})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        start = time.time()
+        assert data.query('balance', ['addr']) == {'balance': {'final': 200}}
+        assert time.time() - start < 0.9
+        assert data.get_last_explorer() == 'explorer2'
+
+    @mock.patch('data.data.HEDGE_DELAY', 5)
+    @mock.patch('data.data.HEDGED', True)
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_hedged_query_does_not_wait_after_error(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': {'error': 'fail'}, 'explorer2': 200})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        start = time.time()
+        assert data.query('balance', ['addr']) == {'balance': {'final': 200}}
+        assert time.time() - start < 1
+
+    @mock.patch('data.data.HEDGE_DELAY', 0.01)
+    @mock.patch('data.data.HEDGED', True)
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_hedged_query_all_fail(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': {'error': 'fail'}, 'explorer2': {'error': 'fail'}})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert data.query('balance', ['addr']) == {'error': 'Failed to retrieve data from all explorers'}
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_quorum_agreement(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2', 'explorer3']
+        apis = self.make_apis({'explorer1': 100, 'explorer2': 100, 'explorer3': 100})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert data.balance('addr', quorum=True) == {'balance': {'final': 100}}
+        apis['explorer3'].get_balance.assert_not_called()
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_quorum_disagreement_asks_next_explorer(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2', 'explorer3']
+        apis = self.make_apis({'explorer1': 100, 'explorer2': 50, 'explorer3': 50})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert data.balance('addr', quorum=True) == {'balance': {'final': 50}}
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_quorum_disagreement(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': 100, 'explorer2': 50})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert data.balance('addr', quorum=True) == {'error': 'Explorers disagree on the response of query balance'}
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_quorum_not_enough_responses(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': 100, 'explorer2': {'error': 'fail'}})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert 'error' in data.balance('addr', quorum=True)
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_quorum_ignores_the_explorer_of_an_earlier_query(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2', 'explorer3']
+        apis = self.make_apis({'explorer1': 100, 'explorer2': 50, 'explorer3': 50})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        data.EXPLORER_CONTEXT.explorer_id = 'explorer1'
+        assert data.balance('addr', quorum=True) == {'balance': {'final': 50}}
+        apis['explorer2'].get_balance.assert_called_once()
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_quorum_with_a_single_explorer(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1']
+        apis = self.make_apis({'explorer1': 100})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        assert data.balance('addr', quorum=True) == {'error': 'A quorum needs at least 2 available explorers, only 1 available'}
+        apis['explorer1'].get_balance.assert_not_called()
+
+    @mock.patch('data.data.HEDGE_DELAY', 0.05)
+    @mock.patch('data.data.HEDGED', True)
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_hedged_query_uses_the_specified_explorer(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = self.make_apis({'explorer1': 100, 'explorer2': 200}, delays={'explorer2': 0.1})
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        data.set_explorer('explorer2')
+        assert data.query('balance', ['addr']) == {'balance': {'final': 200}}
+        apis['explorer1'].get_balance.assert_not_called()
+
+    def test_quorum_value_of_utxos_ignores_confirmations(self):
+        utxos_1 = {'utxos': [{'output_hash': 'a', 'output_n': 0, 'value': 1, 'confirmations': 1},
+                             {'output_hash': 'b', 'output_n': 1, 'value': 2, 'confirmations': 5}]}
+        utxos_2 = {'utxos': [{'output_hash': 'b', 'output_n': 1, 'value': 2, 'confirmations': 6},
+                             {'output_hash': 'a', 'output_n': 0, 'value': 1, 'confirmations': 2}]}
+        assert data.quorum_value('utxos', utxos_1) == data.quorum_value('utxos', utxos_2)
+
+
+class TestCircuitBreakers(object):
+    """Tests for skipping explorers with an open circuit breaker"""
+
+    def setup_method(self, method):
+        data.clear_explorer()
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_failing_explorer_is_skipped(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = {'explorer1': mock.MagicMock(), 'explorer2': mock.MagicMock()}
+        apis['explorer1'].get_balance.return_value = {'error': 'fail'}
+        apis['explorer2'].get_balance.return_value = {'balance': {'final': 1}}
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        # Keep explorer1 at the top of the list so only the circuit breaker can skip it
+        with mock.patch.object(data.EXPLORER_STATS, 'order', side_effect=lambda explorer_ids: explorer_ids):
+            for _ in range(data.get_circuit_breaker('explorer1').failure_threshold + 3):
+                data.EXPLORER_CONTEXT.explorer_id = None
+                assert data.query('balance', ['addr']) == {'balance': {'final': 1}}
+
+        assert apis['explorer1'].get_balance.call_count == data.get_circuit_breaker('explorer1').failure_threshold
+        assert data.explorer_stats()['explorer1']['circuit_breaker']['state'] == 'open'
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_errors_of_the_request_do_not_open_the_circuit(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1']
+
+        def get_transaction(txid):
+            # The explorer answers with a 404 for an unknown txid
+            data.HTTP_SESSIONS.tracked().record(status_code=404)
+            return {'error': 'Unknown txid'}
+
+        mock_get_api.return_value.get_transaction.side_effect = get_transaction
+        for _ in range(data.get_circuit_breaker('explorer1').failure_threshold + 1):
+            assert 'error' in data.query('transaction', ['unknown'])
+
+        assert data.get_circuit_breaker('explorer1').state == 'closed'
+        assert mock_get_api.return_value.get_transaction.call_count == data.get_circuit_breaker('explorer1').failure_threshold + 1
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_all_explorers_down(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1']
+        circuit_breaker = data.get_circuit_breaker('explorer1')
+        for _ in range(circuit_breaker.failure_threshold):
+            circuit_breaker.record_failure()
+        assert data.query('balance', ['addr']) == {'error': 'All explorers are temporarily unavailable'}
+        mock_get_api.assert_not_called()
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_the_explorer_that_answered_is_not_pinned(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        apis = {'explorer1': mock.MagicMock(), 'explorer2': mock.MagicMock()}
+        apis['explorer1'].get_balance.return_value = {'balance': {'final': 1}}
+        apis['explorer2'].get_balance.return_value = {'balance': {'final': 2}}
+        mock_get_api.side_effect = lambda explorer_id: apis[explorer_id]
+        with mock.patch.object(data.EXPLORER_STATS, 'order', side_effect=lambda explorer_ids: explorer_ids):
+            assert data.query('balance', ['addr1']) == {'balance': {'final': 1}}
+            assert data.get_last_explorer() == 'explorer1'
+
+            # The next query of the same thread moves on to the next explorer when the circuit of explorer1 opens
+            circuit_breaker = data.get_circuit_breaker('explorer1')
+            for _ in range(circuit_breaker.failure_threshold):
+                circuit_breaker.record_failure()
+            assert data.query('balance', ['addr2']) == {'balance': {'final': 2}}
+            assert data.get_last_explorer() == 'explorer2'
+
+        assert data.EXPLORER_CONTEXT.explorer_id is None
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_half_open_explorer_keeps_its_trial_request_if_it_is_not_queried(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1', 'explorer2']
+        mock_get_api.return_value.get_balance.return_value = {'balance': {'final': 1}}
+        circuit_breaker = data.get_circuit_breaker('explorer2')
+        for _ in range(circuit_breaker.failure_threshold):
+            circuit_breaker.record_failure()
+        circuit_breaker.opened_at -= circuit_breaker.cooldown
+        with mock.patch.object(data.EXPLORER_STATS, 'order', side_effect=lambda explorer_ids: explorer_ids):
+            assert data.query('balance', ['addr']) == {'balance': {'final': 1}}
+
+        mock_get_api.assert_called_once_with('explorer1')
+        assert circuit_breaker.allow() is True
+
+    def test_reset_circuit_breakers(self):
+        data.get_circuit_breaker('explorer1').record_failure()
+        data.reset_circuit_breakers()
+        assert data.get_circuit_breaker('explorer1').failures == 0
+
+
 class TestWrapperFunctions(object):
     """Tests for wrapper functions (block, block_by_height, etc.)"""
 
     def setup_method(self, method):
-        data.EXPLORER = None
+        data.clear_explorer()
 
     @mock.patch('data.data.query')
     def test_block(self, mock_query):
@@ -396,12 +827,12 @@ class TestWrapperFunctions(object):
     @mock.patch('data.data.query')
     def test_balance(self, mock_query):
         data.balance('addr')
-        mock_query.assert_called_once_with('balance', ['addr'])
+        mock_query.assert_called_once_with('balance', ['addr'], quorum=False)
 
     @mock.patch('data.data.query')
     def test_utxos(self, mock_query):
         data.utxos('addr', 3)
-        mock_query.assert_called_once_with('utxos', ['addr', 3])
+        mock_query.assert_called_once_with('utxos', ['addr', 3], quorum=False)
 
     @mock.patch('data.data.query')
     def test_push_tx(self, mock_query):
@@ -415,6 +846,64 @@ class TestWrapperFunctions(object):
             result = data.transactions('1validAddress')
         assert result['transactions'] == [{'block_height': 1, 'txid': 'a'}, {'block_height': 2, 'txid': 'b'}]
 
+    @mock.patch('data.data.query')
+    def test_transactions_incremental_sync(self, mock_query, tmp_path):
+        store = TransactionStore(str(tmp_path / 'transactions.db'))
+        mock_query.side_effect = [{'transactions': [{'block_height': 100, 'confirmations': 1, 'txid': 'a'}], 'latest_block_height': 100},
+                                  {'transactions': [{'block_height': 101, 'confirmations': 1, 'txid': 'b'},
+                                                    {'block_height': 100, 'confirmations': 2, 'txid': 'a'}], 'latest_block_height': 101}]
+        with mock.patch('data.data.valid_address', return_value=True), mock.patch('data.data.TRANSACTION_STORE', store):
+            data.transactions('1validAddress')
+            result = data.transactions('1validAddress')
+        assert mock_query.call_args_list == [mock.call('transactions', ['1validAddress']), mock.call('transactions', ['1validAddress', 94])]
+        assert result == {'transactions': [{'block_height': 100, 'confirmations': 2, 'txid': 'a'},
+                                           {'block_height': 101, 'confirmations': 1, 'txid': 'b'}]}
+
+    @mock.patch('data.data.query')
+    def test_balances(self, mock_query):
+        mock_query.return_value = {'balances': {'addr1': {'final': 1}}}
+        assert data.balances(['addr1', 'addr1']) == {'balances': {'addr1': {'final': 1}}}
+        mock_query.assert_called_once_with('balances', [['addr1']])
+
+    @mock.patch('data.data.query')
+    def test_balances_error(self, mock_query):
+        mock_query.return_value = {'error': 'fail'}
+        assert data.balances(['addr1']) == {'error': 'fail'}
+
+    @mock.patch('data.data.query')
+    def test_utxos_many(self, mock_query):
+        mock_query.return_value = {'utxos': {'addr1': []}}
+        assert data.utxos_many(['addr1'], 3) == {'utxos': {'addr1': []}}
+        mock_query.assert_called_once_with('utxos_many', [['addr1'], 3])
+
+    @mock.patch('data.data.query')
+    def test_prime_input_addresses(self, mock_query):
+        mock_query.return_value = {'prime_input_addresses': {'tx1': 'addr1'}}
+        assert data.prime_input_addresses(['tx1']) == {'prime_input_addresses': {'tx1': 'addr1'}}
+        mock_query.assert_called_once_with('prime_input_addresses', [['tx1']])
+
+    @mock.patch('data.data.query')
+    def test_batch_query_uses_single_query_cache(self, mock_query, tmp_path):
+        cache = QueryCache(str(tmp_path / 'cache.db'))
+        cache.put('prime_input_address', ['tx1'], {'prime_input_address': 'addr1'})
+        mock_query.return_value = {'prime_input_addresses': {'tx2': 'addr2'}}
+        with mock.patch('data.data.QUERY_CACHE', cache):
+            result = data.prime_input_addresses(['tx1', 'tx2'])
+            mock_query.assert_called_once_with('prime_input_addresses', [['tx2']])
+            assert result == {'prime_input_addresses': {'tx1': 'addr1', 'tx2': 'addr2'}}
+            # The results of the batch query are cached as single queries
+            assert cache.get('prime_input_address', ['tx2'])[0] == {'prime_input_address': 'addr2'}
+
+    @mock.patch('data.data.get_explorer_api')
+    @mock.patch('data.data.get_explorers')
+    def test_query_balances(self, mock_get_explorers, mock_get_api):
+        mock_get_explorers.return_value = ['explorer1']
+        mock_api = mock.MagicMock()
+        mock_api.get_balances.return_value = {'balances': {'addr1': {'final': 1}}}
+        mock_get_api.return_value = mock_api
+        assert data.query('balances', [['addr1']]) == {'balances': {'addr1': {'final': 1}}}
+        mock_api.get_balances.assert_called_once_with(['addr1'])
+
     @mock.patch('data.data.valid_address', return_value=False)
     def test_transactions_invalid_address(self, mock_valid):
         result = data.transactions('invalid')
@@ -433,21 +922,35 @@ class TestExplorerGlobalFunctions(object):
     """Tests for set_explorer, clear_explorer, get_last_explorer"""
 
     def setup_method(self, method):
-        data.EXPLORER = None
+        data.clear_explorer()
 
     def test_set_explorer(self):
         data.set_explorer('myexplorer')
-        assert data.EXPLORER == 'myexplorer'
+        assert data.EXPLORER_CONTEXT.explorer_id == 'myexplorer'
 
     def test_clear_explorer(self):
-        data.EXPLORER = 'myexplorer'
+        data.EXPLORER_CONTEXT.explorer_id = 'myexplorer'
         data.clear_explorer()
-        assert data.EXPLORER is None
+        assert data.EXPLORER_CONTEXT.explorer_id is None
+
+    def test_clear_explorer_clears_the_last_explorer(self):
+        data.EXPLORER_CONTEXT.last_explorer_id = 'myexplorer'
+        data.clear_explorer()
+        assert data.get_last_explorer() is None
 
     def test_get_last_explorer(self):
-        data.EXPLORER = 'myexplorer'
+        data.EXPLORER_CONTEXT.last_explorer_id = 'myexplorer'
         assert data.get_last_explorer() == 'myexplorer'
 
     def test_get_last_explorer_none(self):
-        data.EXPLORER = None
+        data.EXPLORER_CONTEXT.last_explorer_id = None
         assert data.get_last_explorer() is None
+
+    def test_explorer_is_per_thread(self):
+        data.set_explorer('myexplorer')
+        other_thread = []
+        thread = threading.Thread(target=lambda: other_thread.append(data.EXPLORER_CONTEXT.explorer_id))
+        thread.start()
+        thread.join()
+        assert other_thread == [None]
+        assert data.EXPLORER_CONTEXT.explorer_id == 'myexplorer'
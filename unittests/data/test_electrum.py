@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import socketserver
+import threading
+
+import pytest
+import simplejson
+
+from data.blockexplorers.electrum import ElectrumAPI, get_scripthash, parse_header
+
+ADDRESS = '1BoatSLRHtKNngkdXEeobR76b53LETtpyT'
+ADDRESS_SCRIPT = '76a9147680adec8eabcabac676be9e83854ade0bd22cdb88ac'
+OTHER_ADDRESS = 'bc1qar0srrr7xfkvy5l643lydnw9re59gtzzwf5mdq'
+OTHER_SCRIPT = '0014e8df018c7e326cc253faac7e46cdc51e68542c42'
+
+GENESIS_HEADER = ('0100000000000000000000000000000000000000000000000000000000000000000000003ba3edfd7a7b12b27ac72c3e67768f617fc81bc3888a5132'
+                  '3a9fb8aa4b1e5e4a29ab5f49ffff001d1dac2b7c')
+
+PREV_TX = {'txid': 'aa' * 32, 'hash': 'aa' * 32, 'locktime': 0, 'confirmations': 10,
+           'vin': [{'coinbase': '03aabbcc', 'sequence': 4294967295}],
+           'vout': [{'value': 0.5, 'n': 0, 'scriptPubKey': {'hex': OTHER_SCRIPT, 'address': OTHER_ADDRESS}}]}
+
+TX = {'txid': 'bb' * 32, 'hash': 'bb' * 32, 'locktime': 0, 'confirmations': 3,
+      'vin': [{'txid': 'aa' * 32, 'vout': 0, 'scriptSig': {'hex': ''}, 'sequence': 4294967293}],
+      'vout': [{'value': 0.29, 'n': 0, 'scriptPubKey': {'hex': ADDRESS_SCRIPT, 'address': ADDRESS}}]}
+
+
+class FakeElectrumServer(object):
+    """Local stand-in for an Electrum server, answers line-delimited (batched) JSON-RPC requests."""
+    def __init__(self):
+        self.methods = {'blockchain.headers.subscribe': lambda: {'height': 100, 'hex': GENESIS_HEADER}}
+        self.requests = []
+        self.connections = 0
+        # Messages that are sent before the next response, like the header notifications of a subscription
+        self.pushed = []
+
+    def handle(self, request):
+        method = self.methods.get(request['method'])
+        if method is None:
+            return {'jsonrpc': '2.0', 'id': request['id'], 'error': {'code': -32601, 'message': 'unknown method'}}
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': method(*request['params'])}
+
+
+@pytest.fixture
+def electrum_server():
+    fake_server = FakeElectrumServer()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            fake_server.connections += 1
+            for line in self.rfile:
+                payload = simplejson.loads(line)
+                fake_server.requests.append(payload)
+                response = [fake_server.handle(request) for request in payload] if isinstance(payload, list) else fake_server.handle(payload)
+                while fake_server.pushed:
+                    self.wfile.write(simplejson.dumps(fake_server.pushed.pop(0)).encode() + b'\n')
+                self.wfile.write(simplejson.dumps(response).encode() + b'\n')
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake_server.url = 'tcp://127.0.0.1:%s' % server.server_address[1]
+    yield fake_server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def api(electrum_server):
+    electrum_api = ElectrumAPI(url=electrum_server.url)
+    yield electrum_api
+    electrum_api.close()
+
+
+class TestElectrumAPIInit(object):
+    def test_default_url(self):
+        api = ElectrumAPI()
+        assert (api.host, api.port, api.use_ssl) == ('127.0.0.1', 50001, False)
+
+    def test_ssl_url(self):
+        api = ElectrumAPI(url='ssl://electrum.local:50002')
+        assert (api.host, api.port, api.use_ssl) == ('electrum.local', 50002, True)
+
+
+class TestHelpers(object):
+    def test_get_scripthash(self):
+        # Example from the Electrum protocol documentation
+        assert get_scripthash('1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa') == '8b01df4e368ea28f8dc0423bcf7a4923e3a12d307c875e47a0cfbf90b5c39161'
+
+    def test_parse_header(self):
+        block = parse_header(GENESIS_HEADER, 0)
+        assert block['hash'] == '000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f'
+        assert block['merkleroot'] == '4a5e1e4baab89f3a32518a88c31bc87f618f76673e2cc77ab2127b7afdeda33b'
+        assert block['time'] == 1231006505
+
+
+class TestRPC(object):
+    def test_batch_is_a_single_request_on_one_connection(self, electrum_server, api):
+        electrum_server.methods['server.version'] = lambda *args: ['Fake 1.0', '1.4']
+        assert api.rpc_batch([('server.version', []), ('blockchain.headers.subscribe', [])])[0] == ['Fake 1.0', '1.4']
+        api.rpc('server.version')
+        assert len(electrum_server.requests) == 2
+        assert electrum_server.connections == 1
+
+    def test_reconnects(self, electrum_server, api):
+        api.get_latest_block()
+        api._connection.close()
+        assert api.get_latest_block()['block']['height'] == 100
+
+    def test_notifications_and_stale_responses_are_skipped(self, electrum_server, api):
+        electrum_server.methods['blockchain.scripthash.get_balance'] = lambda scripthash: {'confirmed': 1000, 'unconfirmed': 0}
+        api.get_latest_block()
+        electrum_server.pushed = [{'jsonrpc': '2.0', 'method': 'blockchain.headers.subscribe', 'params': [{'height': 101, 'hex': GENESIS_HEADER}]},
+                                  [{'jsonrpc': '2.0', 'id': 0, 'result': {'confirmed': 5, 'unconfirmed': 0}}]]
+        assert api.get_balances([ADDRESS]) == {'balances': {ADDRESS: {'final': 1000}}}
+        assert [request[0]['id'] for request in electrum_server.requests] == [0, 1]
+
+    def test_error(self, api):
+        with pytest.raises(Exception, match='unknown method'):
+            api.rpc('unknown')
+
+    def test_server_offline(self):
+        assert 'error' in ElectrumAPI(url='tcp://127.0.0.1:1').get_latest_block()
+
+
+class TestBlocks(object):
+    def test_get_latest_block(self, api):
+        block = api.get_latest_block()['block']
+        assert block['height'] == 100
+        assert block['hash'] == '000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f'
+
+    def test_get_block_by_height(self, electrum_server, api):
+        electrum_server.methods['blockchain.block.header'] = lambda height: GENESIS_HEADER
+        assert api.get_block_by_height(0)['block']['height'] == 0
+
+    def test_get_block_by_hash_is_not_available(self, api):
+        assert 'error' in api.get_block_by_hash('hash')
+
+
+class TestTransactions(object):
+    def test_get_transaction(self, electrum_server, api):
+        electrum_server.methods['blockchain.transaction.get'] = lambda txid, verbose: {'aa' * 32: PREV_TX, 'bb' * 32: TX}[txid]
+        tx = api.get_transaction('bb' * 32)['transaction']
+        assert tx['block_height'] == 98
+        assert tx['inputs'][0]['value'] == 50000000
+        assert tx['prime_input_address'] == OTHER_ADDRESS
+
+    def test_get_transactions(self, electrum_server, api):
+        electrum_server.methods['blockchain.scripthash.get_history'] = lambda scripthash: [{'tx_hash': 'aa' * 32, 'height': 91},
+                                                                                         {'tx_hash': 'bb' * 32, 'height': 98},
+                                                                                         {'tx_hash': 'ee' * 32, 'height': 0}]
+        electrum_server.methods['blockchain.transaction.get'] = lambda txid, verbose: {'aa' * 32: PREV_TX, 'bb' * 32: TX}[txid]
+        data = api.get_transactions(ADDRESS)
+        assert data['latest_block_height'] == 100
+        assert [tx['txid'] for tx in data['transactions']] == ['aa' * 32, 'bb' * 32]
+
+    def test_get_transactions_since_height(self, electrum_server, api):
+        electrum_server.methods['blockchain.scripthash.get_history'] = lambda scripthash: [{'tx_hash': 'aa' * 32, 'height': 91},
+                                                                                         {'tx_hash': 'bb' * 32, 'height': 98}]
+        electrum_server.methods['blockchain.transaction.get'] = lambda txid, verbose: {'aa' * 32: PREV_TX, 'bb' * 32: TX}[txid]
+        data = api.get_transactions(ADDRESS, since_height=95)
+        assert [tx['txid'] for tx in data['transactions']] == ['bb' * 32]
+        assert data['transactions'][0]['receivedValue'] == 29000000
+
+
+class TestBalancesAndUtxos(object):
+    def test_get_balances_is_a_single_request(self, electrum_server, api):
+        balances = {get_scripthash(ADDRESS): {'confirmed': 100, 'unconfirmed': 5}, get_scripthash(OTHER_ADDRESS): {'confirmed': 200, 'unconfirmed': 0}}
+        electrum_server.methods['blockchain.scripthash.get_balance'] = lambda scripthash: balances[scripthash]
+        assert api.get_balances([ADDRESS, OTHER_ADDRESS]) == {'balances': {ADDRESS: {'final': 100}, OTHER_ADDRESS: {'final': 200}}}
+        assert api.get_balance(ADDRESS) == {'balance': {'final': 100}}
+        assert len(electrum_server.requests) == 2
+
+    def test_get_utxos(self, electrum_server, api):
+        electrum_server.methods['blockchain.scripthash.listunspent'] = lambda scripthash: [{'tx_hash': 'bb' * 32, 'tx_pos': 0, 'height': 98, 'value': 29000000},
+                                                                                         {'tx_hash': 'dd' * 32, 'tx_pos': 1, 'height': 0, 'value': 1000}]
+        assert api.get_utxos(ADDRESS, confirmations=1) == {'utxos': [{'confirmations': 3, 'output_hash': 'bb' * 32, 'output_n': 0,
+                                                                       'value': 29000000, 'script': ADDRESS_SCRIPT}]}
+        assert len(api.get_utxos_many([ADDRESS, OTHER_ADDRESS], confirmations=0)['utxos'][OTHER_ADDRESS]) == 2
+
+
+class TestPushTx(object):
+    def test_success(self, electrum_server, api):
+        electrum_server.methods['blockchain.transaction.broadcast'] = lambda tx: 'bb' * 32
+        assert api.push_tx('0100') == {'success': True, 'txid': 'bb' * 32}
+
+    def test_rejected(self, api):
+        assert 'error' in api.push_tx('0100')
@@ -14,6 +14,8 @@ class TestExplorerType(object):
         assert ExplorerType.CHAIN_SO == 'Chain.so'
         assert ExplorerType.BTC_COM == 'BTC.com'
         assert ExplorerType.BLOCKSTREAM == 'Blockstream.info'
+        assert ExplorerType.BITCOIN_CORE == 'Bitcoin Core'
+        assert ExplorerType.ELECTRUM == 'Electrum'
 
 
 class TestExplorer(object):
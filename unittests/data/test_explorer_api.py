@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import threading
+
 import mock
+import pytest
+import requests
 
-from data.explorer_api import ExplorerAPI
+from data.explorer_api import ExplorerAPI, HTTPSessionPool, RequestOutcome
 
 
 class ConcreteExplorerAPI(ExplorerAPI):
@@ -88,3 +92,139 @@ class TestExplorerAPI(object):
         assert api.get_utxos('addr') is None
         assert api.get_transaction('txid') is None
         assert api.get_prime_input_address('txid') is None
+
+
+class TestBatchQueries(object):
+    """Tests for the default batch queries that fan out to single queries"""
+
+    def setup_method(self, method):
+        self.api = ConcreteExplorerAPI()
+
+    def test_get_balances(self):
+        self.api.get_balance = mock.MagicMock(side_effect=lambda address: {'balance': {'final': len(address)}})
+        result = self.api.get_balances(['a', 'bb', 'a'])
+        assert result == {'balances': {'a': {'final': 1}, 'bb': {'final': 2}}}
+        assert self.api.get_balance.call_count == 2
+
+    def test_get_balances_error(self):
+        self.api.get_balance = mock.MagicMock(side_effect=lambda address: {'error': 'fail'} if address == 'b' else {'balance': {'final': 1}})
+        assert self.api.get_balances(['a', 'b']) == {'error': 'fail'}
+
+    def test_get_balances_empty(self):
+        assert self.api.get_balances([]) == {'balances': {}}
+
+    def test_get_utxos_many(self):
+        self.api.get_utxos = mock.MagicMock(side_effect=lambda address, confirmations: {'utxos': [{'address': address, 'confirmations': confirmations}]})
+        result = self.api.get_utxos_many(['a', 'b'], confirmations=6)
+        assert result['utxos']['b'] == [{'address': 'b', 'confirmations': 6}]
+
+    def test_get_prime_input_addresses(self):
+        self.api.get_prime_input_address = mock.MagicMock(side_effect=lambda txid: {'prime_input_address': 'addr_%s' % txid})
+        result = self.api.get_prime_input_addresses(['tx1', 'tx2'])
+        assert result == {'prime_input_addresses': {'tx1': 'addr_tx1', 'tx2': 'addr_tx2'}}
+
+    def test_fan_out_runs_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def get_balance(address):
+            barrier.wait()
+            return {'balance': {'final': 1}}
+
+        self.api.get_balance = get_balance
+        assert len(self.api.get_balances(['a', 'b', 'c'])['balances']) == 3
+
+
+class TestHTTPSessionPool(object):
+    """Tests for the shared pool of HTTP sessions"""
+
+    def test_one_session_per_host(self):
+        pool = HTTPSessionPool()
+        session = pool.session('https://blockstream.info/api/blocks/tip/height')
+        assert pool.session('https://blockstream.info/api/tx/abc') is session
+        assert pool.session('https://blockchain.info/latestblock') is not session
+        assert len(pool.sessions) == 2
+
+    def test_adapter_settings(self):
+        pool = HTTPSessionPool(pool_size=4, retries=5, backoff_factor=0.1)
+        adapter = pool.session('https://example.com').get_adapter('https://example.com')
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 5
+        assert adapter.max_retries.backoff_factor == 0.1
+        assert 429 in adapter.max_retries.status_forcelist
+
+    def test_get_adds_default_timeout(self):
+        pool = HTTPSessionPool(connect_timeout=2, read_timeout=7)
+        session = mock.MagicMock()
+        with mock.patch.object(pool, 'session', return_value=session):
+            pool.get('https://example.com/a')
+        session.get.assert_called_once_with('https://example.com/a', timeout=(2, 7))
+
+    def test_get_keeps_given_timeout(self):
+        pool = HTTPSessionPool()
+        session = mock.MagicMock()
+        with mock.patch.object(pool, 'session', return_value=session):
+            pool.get('https://example.com/a', timeout=1)
+        session.get.assert_called_once_with('https://example.com/a', timeout=1)
+
+    def test_post(self):
+        pool = HTTPSessionPool(connect_timeout=2, read_timeout=7)
+        session = mock.MagicMock()
+        with mock.patch.object(pool, 'session', return_value=session):
+            pool.post('https://example.com/pushtx', data={'tx': 'abc'})
+        session.post.assert_called_once_with('https://example.com/pushtx', data={'tx': 'abc'}, timeout=(2, 7))
+
+    def test_rate_limit_per_host(self):
+        pool = HTTPSessionPool()
+        pool.set_rate_limit('https://blockstream.info/api', rate=2, burst=5)
+        assert pool.rate_limiters['https://blockstream.info'].rate == 2
+        rate_limiter = pool.rate_limiters['https://blockstream.info']
+        pool.set_rate_limit('https://blockstream.info/api', rate=2, burst=5)
+        assert pool.rate_limiters['https://blockstream.info'] is rate_limiter
+        pool.set_rate_limit('https://blockstream.info/api', rate=None)
+        assert pool.rate_limiters == {}
+
+    def test_get_waits_for_rate_limit(self):
+        pool = HTTPSessionPool()
+        pool.set_rate_limit('https://example.com', rate=1, burst=1)
+        session = mock.MagicMock()
+        with mock.patch.object(pool, 'session', return_value=session), mock.patch('data.rate_limiter.time.sleep') as mock_sleep:
+            pool.get('https://example.com/a')
+            mock_sleep.assert_not_called()
+            pool.get('https://example.com/b')
+            assert mock_sleep.call_count == 1
+            pool.get('https://other.com/c')
+            assert mock_sleep.call_count == 1
+
+    def test_request_outcome(self):
+        pool = HTTPSessionPool()
+        session = mock.MagicMock()
+        outcome = pool.track()
+        with mock.patch.object(pool, 'session', return_value=session):
+            session.get.return_value = mock.MagicMock(status_code=404)
+            pool.get('https://example.com/tx/unknown')
+            assert (outcome.responses, outcome.server_errors) == (1, 0)
+            assert outcome.explorer_failed() is False
+
+            session.get.return_value = mock.MagicMock(status_code=429)
+            pool.get('https://example.com/tx/abc')
+            session.get.return_value = mock.MagicMock(status_code=503)
+            pool.get('https://example.com/tx/abc')
+            session.get.side_effect = requests.exceptions.ConnectionError('down')
+            with pytest.raises(requests.exceptions.ConnectionError):
+                pool.get('https://example.com/tx/abc')
+
+        assert (outcome.responses, outcome.server_errors) == (1, 3)
+        assert outcome.explorer_failed() is True
+        assert pool.tracked() is outcome
+
+    def test_query_without_requests_counts_as_failed(self):
+        assert RequestOutcome().explorer_failed() is True
+
+    def test_configure_closes_existing_sessions(self):
+        pool = HTTPSessionPool()
+        session = pool.session('https://example.com')
+        pool.configure(pool_size=20, read_timeout=60, unknown=1)
+        assert pool.pool_size == 20
+        assert pool.read_timeout == 60
+        assert pool.sessions == {}
+        assert pool.session('https://example.com') is not session
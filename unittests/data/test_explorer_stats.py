@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from data.explorer_stats import ExplorerStats
+
+
+class TestExplorerStats(object):
+    def setup_method(self, method):
+        self.stats = ExplorerStats(smoothing=0.5, priority_weight=0.5, error_penalty=10)
+
+    def test_order_without_measurements_keeps_priority(self):
+        assert self.stats.order(['a', 'b', 'c']) == ['a', 'b', 'c']
+
+    def test_record(self):
+        self.stats.record('a', 1.0, success=True)
+        self.stats.record('a', 2.0, success=False)
+        stats = self.stats.get_stats()['a']
+        assert stats['requests'] == 2
+        assert stats['errors'] == 1
+        assert stats['latency'] == 1.5
+        assert stats['error_rate'] == 0.5
+
+    def test_slow_explorer_moves_down(self):
+        self.stats.record('a', 3.0, success=True)
+        self.stats.record('b', 0.1, success=True)
+        assert self.stats.order(['a', 'b']) == ['b', 'a']
+
+    def test_small_latency_difference_keeps_priority(self):
+        self.stats.record('a', 0.3, success=True)
+        self.stats.record('b', 0.2, success=True)
+        assert self.stats.order(['a', 'b']) == ['a', 'b']
+
+    def test_failing_explorer_moves_down_and_recovers(self):
+        self.stats.record('a', 0.2, success=False)
+        self.stats.record('b', 0.2, success=True)
+        assert self.stats.order(['a', 'b']) == ['b', 'a']
+        for _ in range(10):
+            self.stats.record('a', 0.2, success=True)
+        assert self.stats.order(['a', 'b']) == ['a', 'b']
+
+    def test_reset(self):
+        self.stats.record('a', 1.0, success=True)
+        self.stats.reset()
+        assert self.stats.get_stats() == {}
@@ -22,7 +22,7 @@ class TestInsightAPIInit(object):
 
 
 class TestGetLatestBlock(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'bestblockhash': 'abc'}),
@@ -32,14 +32,14 @@ class TestGetLatestBlock(object):
         result = api.get_latest_block()
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_latest_block()
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_no_bestblockhash(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = InsightAPI(url='http://example.com')
@@ -48,7 +48,7 @@ class TestGetLatestBlock(object):
 
 
 class TestGetBlockByHash(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'height': 100, 'hash': 'abc', 'time': 123, 'merkleroot': 'm', 'size': 500
@@ -57,14 +57,14 @@ class TestGetBlockByHash(object):
         result = api.get_block_by_hash('abc')
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_block_by_hash('abc')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = InsightAPI(url='http://example.com')
@@ -73,7 +73,7 @@ class TestGetBlockByHash(object):
 
 
 class TestGetBlockByHeight(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={'blockHash': 'abc'}),
@@ -83,14 +83,14 @@ class TestGetBlockByHeight(object):
         result = api.get_block_by_height(100)
         assert result['block']['height'] == 100
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_block_by_height(100)
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_no_blockhash(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = InsightAPI(url='http://example.com')
@@ -99,7 +99,7 @@ class TestGetBlockByHeight(object):
 
 
 class TestGetTransactions(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'totalItems': 1,
@@ -113,21 +113,21 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_invalid_data(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = InsightAPI(url='http://example.com')
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_unconfirmed_tx(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'totalItems': 1,
@@ -140,7 +140,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_mismatch_count(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(json_data={
@@ -168,7 +168,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_coinbase_input(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'totalItems': 1,
@@ -182,7 +182,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_op_return_output(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'totalItems': 1,
@@ -196,7 +196,7 @@ class TestGetTransactions(object):
         result = api.get_transactions('addr1')
         assert 'transactions' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_no_addresses_in_vout(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'totalItems': 1,
@@ -212,7 +212,7 @@ class TestGetTransactions(object):
 
 
 class TestGetBalance(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='100'),
@@ -225,14 +225,14 @@ class TestGetBalance(object):
         assert result['balance']['received'] == 200
         assert result['balance']['sent'] == 50
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_error_first_request(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_balance('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_error_second_request(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='100'),
@@ -242,7 +242,7 @@ class TestGetBalance(object):
         result = api.get_balance('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_error_third_request(self, mock_get):
         mock_get.side_effect = [
             make_mock_response(text_data='100'),
@@ -255,7 +255,7 @@ class TestGetBalance(object):
 
 
 class TestGetTransaction(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'blockheight': 100, 'locktime': 0, 'confirmations': 6,
@@ -266,14 +266,14 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_transaction('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_no_blockheight(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'locktime': 0,
@@ -284,7 +284,7 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_coinbase_input(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'blockheight': 100, 'locktime': 0, 'confirmations': 6,
@@ -295,7 +295,7 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_no_confirmations(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'blockheight': 100, 'locktime': 0,
@@ -306,7 +306,7 @@ class TestGetTransaction(object):
         result = api.get_transaction('txid')
         assert 'transaction' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_op_return_output(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'blockheight': 100, 'locktime': 0, 'confirmations': 6,
@@ -319,7 +319,7 @@ class TestGetTransaction(object):
 
 
 class TestGetPrimeInputAddress(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={
             'vin': [{'addr': 'b_addr'}, {'addr': 'a_addr'}]
@@ -328,14 +328,14 @@ class TestGetPrimeInputAddress(object):
         result = api.get_prime_input_address('txid')
         assert result['prime_input_address'] == 'a_addr'
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_prime_input_address('txid')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_no_vin(self, mock_get):
         mock_get.return_value = make_mock_response(json_data={'foo': 'bar'})
         api = InsightAPI(url='http://example.com')
@@ -344,7 +344,7 @@ class TestGetPrimeInputAddress(object):
 
 
 class TestGetUtxos(object):
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_success(self, mock_get):
         mock_get.return_value = make_mock_response(json_data=[{
             'confirmations': 5, 'txid': 'tx1', 'vout': 0, 'satoshis': 100, 'scriptPubKey': 'hex'
@@ -353,21 +353,21 @@ class TestGetUtxos(object):
         result = api.get_utxos('addr')
         assert len(result['utxos']) == 1
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_request_error(self, mock_get):
         mock_get.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
         result = api.get_utxos('addr')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_missing_keys(self, mock_get):
         mock_get.return_value = make_mock_response(json_data=[{'confirmations': 5}])
         api = InsightAPI(url='http://example.com')
         result = api.get_utxos('addr')
         assert len(result['utxos']) == 0
 
-    @mock.patch('data.blockexplorers.insight.requests.get')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.get')
     def test_insufficient_confirmations(self, mock_get):
         mock_get.return_value = make_mock_response(json_data=[{
             'confirmations': 1, 'txid': 'tx1', 'vout': 0, 'satoshis': 100, 'scriptPubKey': 'hex'
@@ -378,35 +378,35 @@ class TestGetUtxos(object):
 
 
 class TestPushTx(object):
-    @mock.patch('data.blockexplorers.insight.requests.post')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.post')
     def test_success(self, mock_post):
         mock_post.return_value = make_mock_response(json_data={'txid': 'newtx'}, status_code=200)
         api = InsightAPI(url='http://example.com')
         result = api.push_tx('rawtx')
         assert result['success'] is True
 
-    @mock.patch('data.blockexplorers.insight.requests.post')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.post')
     def test_failure_status_code(self, mock_post):
         mock_post.return_value = make_mock_response(json_data={'error': 'bad tx'}, status_code=400)
         api = InsightAPI(url='http://example.com')
         result = api.push_tx('rawtx')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.post')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.post')
     def test_no_txid_in_response(self, mock_post):
         mock_post.return_value = make_mock_response(json_data={'foo': 'bar'}, status_code=200)
         api = InsightAPI(url='http://example.com')
         result = api.push_tx('rawtx')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.post')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.post')
     def test_value_error_on_json(self, mock_post):
         mock_post.return_value = mock.MagicMock(status_code=400, text='error text', json=mock.MagicMock(side_effect=ValueError('bad json')))
         api = InsightAPI(url='http://example.com')
         result = api.push_tx('rawtx')
         assert 'error' in result
 
-    @mock.patch('data.blockexplorers.insight.requests.post')
+    @mock.patch('data.blockexplorers.insight.HTTP_SESSIONS.post')
     def test_request_error(self, mock_post):
         mock_post.side_effect = Exception('fail')
         api = InsightAPI(url='http://example.com')
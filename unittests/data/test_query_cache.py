@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import mock
+import pytest
+
+from data.query_cache import QueryCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    query_cache = QueryCache(str(tmp_path / 'cache' / 'query_cache.db'))
+    yield query_cache
+    query_cache.close()
+
+
+def make_tx(block_height, confirmations):
+    return {'transaction': {'txid': 'abc', 'block_height': block_height, 'confirmations': confirmations}}
+
+
+class TestQueryCacheGetPut(object):
+    def test_miss(self, cache):
+        assert cache.get('balance', ['addr']) == (None, None)
+        assert cache.stats()['misses'] == {'balance': 1}
+
+    def test_hit(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}}, explorer='blockstream.info')
+        response, explorer = cache.get('balance', ['addr'])
+        assert response == {'balance': {'final': 100}}
+        assert explorer == 'blockstream.info'
+        assert cache.stats()['hits'] == {'balance': 1}
+
+    def test_hit_returns_a_copy(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        response, _ = cache.get('balance', ['addr'])
+        response['explorer'] = 'modified'
+        assert cache.get('balance', ['addr'])[0] == {'balance': {'final': 100}}
+
+    def test_different_params_are_different_entries(self, cache):
+        cache.put('utxos', ['addr', 1], {'utxos': [1]})
+        assert cache.get('utxos', ['addr', 3]) == (None, None)
+
+    def test_networks_are_different_entries(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}}, testnet=True)
+        assert cache.get('balance', ['addr']) == (None, None)
+        assert cache.get('balance', ['addr'], testnet=True)[0] == {'balance': {'final': 100}}
+
+    def test_invalidate_an_entry_on_both_networks(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        cache.put('balance', ['addr'], {'balance': {'final': 200}}, testnet=True)
+        cache.invalidate(query_type='balance', param=['addr'])
+        assert cache.stats()['entries'] == 0
+
+    def test_errors_are_not_cached(self, cache):
+        cache.put('balance', ['addr'], {'error': 'failed'})
+        assert cache.stats()['entries'] == 0
+
+    def test_push_tx_is_not_cached_and_invalidates_volatile_entries(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        cache.put('push_tx', ['rawtx'], {'success': True, 'txid': 'abc'})
+        assert cache.get('push_tx', ['rawtx']) == (None, None)
+        assert cache.get('balance', ['addr']) == (None, None)
+
+    def test_disabled(self, cache):
+        cache.enabled = False
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        assert cache.get('balance', ['addr']) == (None, None)
+        assert cache.stats()['misses'] == {}
+
+    def test_persists_across_instances(self, cache):
+        cache.put('prime_input_address', ['abc'], {'prime_input_address': 'addr1'})
+        cache.close()
+        other = QueryCache(cache.filename)
+        assert other.get('prime_input_address', ['abc'])[0] == {'prime_input_address': 'addr1'}
+        other.close()
+
+    def test_forked_process_opens_its_own_connection(self, cache):
+        cache.put('latest_block', [], {'block': {'height': 100}})
+        connection = cache.connection()
+        with mock.patch('helpers.sqlitehelpers.os.getpid', return_value=os.getpid() + 1):
+            assert cache.connection() is not connection
+            assert cache.get('latest_block', [])[0] == {'block': {'height': 100}}
+            assert cache.stats()['tip_height'] == 100
+
+
+class TestQueryCacheExpiry(object):
+    def test_volatile_entry_expires(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        with mock.patch('data.query_cache.time.time', return_value=time.time() + cache.ttl + 1):
+            assert cache.get('balance', ['addr']) == (None, None)
+
+    def test_new_block_invalidates_volatile_entries(self, cache):
+        cache.put('latest_block', [], {'block': {'height': 100}})
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        cache.put('latest_block', [], {'block': {'height': 101}})
+        assert cache.get('balance', ['addr']) == (None, None)
+        assert cache.get('latest_block', [])[0] == {'block': {'height': 101}}
+        assert cache.stats()['tip_height'] == 101
+
+    def test_same_block_keeps_volatile_entries(self, cache):
+        cache.put('latest_block', [], {'block': {'height': 100}})
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        cache.put('latest_block', [], {'block': {'height': 100}})
+        assert cache.get('balance', ['addr'])[0] == {'balance': {'final': 100}}
+
+    def test_final_transaction_is_cached_forever(self, cache):
+        cache.put('transaction', ['abc'], make_tx(block_height=100, confirmations=10))
+        with mock.patch('data.query_cache.time.time', return_value=time.time() + 365 * 24 * 3600):
+            assert cache.get('transaction', ['abc'])[0] is not None
+
+    def test_final_transaction_confirmations_follow_the_chain_tip(self, cache):
+        cache.put('transaction', ['abc'], make_tx(block_height=100, confirmations=10))
+        cache.put('latest_block', [], {'block': {'height': 120}})
+        assert cache.get('transaction', ['abc'])[0]['transaction']['confirmations'] == 21
+
+    def test_unconfirmed_transaction_is_volatile(self, cache):
+        cache.put('transaction', ['abc'], make_tx(block_height=100, confirmations=1))
+        cache.put('latest_block', [], {'block': {'height': 101}})
+        assert cache.get('transaction', ['abc']) == (None, None)
+
+    def test_deep_block_is_cached_forever(self, cache):
+        cache.put('latest_block', [], {'block': {'height': 1000}})
+        cache.put('block_by_height', [10], {'block': {'height': 10}})
+        cache.put('latest_block', [], {'block': {'height': 1001}})
+        assert cache.get('block_by_height', [10])[0] == {'block': {'height': 10}}
+
+    def test_recent_block_is_volatile(self, cache):
+        cache.put('latest_block', [], {'block': {'height': 1000}})
+        cache.put('block_by_height', [999], {'block': {'height': 999}})
+        cache.put('latest_block', [], {'block': {'height': 1001}})
+        assert cache.get('block_by_height', [999]) == (None, None)
+
+
+class TestQueryCacheInvalidate(object):
+    def test_invalidate_all(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        cache.put('prime_input_address', ['abc'], {'prime_input_address': 'addr1'})
+        cache.invalidate()
+        assert cache.stats()['entries'] == 0
+
+    def test_invalidate_query_type(self, cache):
+        cache.put('balance', ['addr'], {'balance': {'final': 100}})
+        cache.put('prime_input_address', ['abc'], {'prime_input_address': 'addr1'})
+        cache.invalidate(query_type='balance')
+        assert cache.get('balance', ['addr']) == (None, None)
+        assert cache.get('prime_input_address', ['abc'])[0] is not None
+
+    def test_invalidate_single_entry(self, cache):
+        cache.put('balance', ['addr1'], {'balance': {'final': 100}})
+        cache.put('balance', ['addr2'], {'balance': {'final': 200}})
+        cache.invalidate(query_type='balance', param=['addr1'])
+        assert cache.get('balance', ['addr1']) == (None, None)
+        assert cache.get('balance', ['addr2'])[0] is not None
+
+    def test_reset_stats(self, cache):
+        cache.get('balance', ['addr'])
+        cache.reset_stats()
+        assert cache.stats()['misses'] == {}
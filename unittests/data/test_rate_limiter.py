@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import mock
+
+from data.rate_limiter import TokenBucket
+
+
+class TestTokenBucket(object):
+    def test_burst(self):
+        bucket = TokenBucket(rate=1, burst=3)
+        assert bucket.try_acquire() is True
+        assert bucket.try_acquire() is True
+        assert bucket.try_acquire() is True
+        assert bucket.try_acquire() is False
+
+    def test_refill(self):
+        with mock.patch('data.rate_limiter.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(rate=2, burst=1)
+            assert bucket.try_acquire() is True
+            assert bucket.try_acquire() is False
+
+        with mock.patch('data.rate_limiter.time.monotonic', return_value=100.5):
+            assert bucket.try_acquire() is True
+
+    def test_refill_does_not_exceed_burst(self):
+        with mock.patch('data.rate_limiter.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(rate=10, burst=2)
+
+        with mock.patch('data.rate_limiter.time.monotonic', return_value=200.0):
+            bucket.refill()
+            assert bucket.tokens == 2
+
+    @mock.patch('data.rate_limiter.time.sleep')
+    def test_acquire_waits(self, mock_sleep):
+        with mock.patch('data.rate_limiter.time.monotonic', return_value=100.0):
+            bucket = TokenBucket(rate=2, burst=1)
+            assert bucket.acquire() == 0
+            assert bucket.acquire() == 0.5
+            # Concurrent callers queue up behind each other
+            assert bucket.acquire() == 1.0
+
+        assert mock_sleep.call_args_list == [mock.call(0.5), mock.call(1.0)]
+        assert bucket.waited == 1.5
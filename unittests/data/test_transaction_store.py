@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+
+import mock
+import pytest
+
+from data.transaction_store import TransactionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    transaction_store = TransactionStore(str(tmp_path / 'store' / 'transactions.db'), recheck_depth=6)
+    yield transaction_store
+    transaction_store.close()
+
+
+def make_tx(txid, block_height, tip_height):
+    return {'txid': txid, 'block_height': block_height, 'confirmations': tip_height - block_height + 1, 'receiving': True}
+
+
+class TestTransactionStore(object):
+    def test_never_synced(self, store):
+        assert store.since_height('addr') is None
+
+    def test_full_sync(self, store):
+        txs = [make_tx('b', 105, 110), make_tx('a', 100, 110)]
+        merged = store.merge('addr', None, txs, latest_block_height=110)
+        assert sorted(tx['txid'] for tx in merged) == ['a', 'b']
+        assert store.since_height('addr') == 104
+        assert store.get_sync_state('addr')['last_txid'] == 'b'
+        assert store.stats()['full_syncs'] == 1
+
+    def test_incremental_sync_merges_new_transactions(self, store):
+        store.merge('addr', None, [make_tx('b', 105, 110), make_tx('a', 100, 110)], latest_block_height=110)
+        merged = store.merge('addr', 104, [make_tx('c', 112, 112), make_tx('b', 105, 112)], latest_block_height=112)
+        assert sorted(tx['txid'] for tx in merged) == ['a', 'b', 'c']
+        assert store.since_height('addr') == 106
+        assert store.stats()['incremental_syncs'] == 1
+
+    def test_confirmations_follow_the_chain_tip(self, store):
+        store.merge('addr', None, [make_tx('a', 100, 110)], latest_block_height=110)
+        merged = store.merge('addr', 104, [], latest_block_height=120)
+        assert merged[0]['confirmations'] == 21
+
+    def test_reorg_rolls_back_transactions_above_recheck_height(self, store):
+        store.merge('addr', None, [make_tx('b', 108, 110), make_tx('a', 100, 110)], latest_block_height=110)
+        # Transaction b disappeared from the chain and c was mined in a competing block
+        merged = store.merge('addr', 104, [make_tx('c', 109, 110)], latest_block_height=110)
+        assert sorted(tx['txid'] for tx in merged) == ['a', 'c']
+
+    def test_older_transactions_in_response_are_ignored(self, store):
+        store.merge('addr', None, [make_tx('a', 100, 110)], latest_block_height=110)
+        merged = store.merge('addr', 104, [make_tx('x', 50, 110)], latest_block_height=110)
+        assert [tx['txid'] for tx in merged] == ['a']
+
+    def test_tip_height_from_transactions(self, store):
+        store.merge('addr', None, [make_tx('a', 100, 110)])
+        assert store.get_sync_state('addr')['synced_height'] == 110
+
+    def test_disabled(self, store):
+        store.enabled = False
+        txs = [make_tx('a', 100, 110)]
+        assert store.merge('addr', None, txs, latest_block_height=110) is txs
+        assert store.since_height('addr') is None
+
+    def test_invalidate(self, store):
+        store.merge('addr1', None, [make_tx('a', 100, 110)], latest_block_height=110)
+        store.merge('addr2', None, [make_tx('b', 100, 110)], latest_block_height=110)
+        store.invalidate('addr1')
+        assert store.since_height('addr1') is None
+        assert store.since_height('addr2') == 104
+        store.invalidate()
+        assert store.stats()['transactions'] == 0
+
+    def test_persists_across_instances(self, store):
+        store.merge('addr', None, [make_tx('a', 100, 110)], latest_block_height=110)
+        store.close()
+        other = TransactionStore(store.filename)
+        assert [tx['txid'] for tx in other.get_transactions('addr')] == ['a']
+        other.close()
+
+    def test_failed_merge_keeps_the_stored_transactions(self, store):
+        store.merge('addr', None, [make_tx('a', 100, 110)], latest_block_height=110)
+        assert store.merge('addr', 99, [{'block_height': 111}], latest_block_height=111) == [{'block_height': 111}]
+        assert [tx['txid'] for tx in store.get_transactions('addr')] == ['a']
+        assert store.get_sync_state('addr')['synced_height'] == 110
+
+    def test_forked_process_opens_its_own_connection(self, store):
+        store.merge('addr', None, [make_tx('a', 100, 110)], latest_block_height=110)
+        connection = store.connection()
+        with mock.patch('helpers.sqlitehelpers.os.getpid', return_value=os.getpid() + 1):
+            assert store.connection() is not connection
+            assert [tx['txid'] for tx in store.get_transactions('addr')] == ['a']
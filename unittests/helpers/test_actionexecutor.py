@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from action.actiontype import ActionType
+from helpers.actionexecutor import ActionExecutor
+
+
+class FakeAction(object):
+    """Action that records when it ran, optionally waiting for an event first."""
+    def __init__(self, action_id, action_type=ActionType.WEBHOOK, success=True, depends_on=None, wait_for=None, log=None):
+        self.id = action_id
+        self.action_type = action_type
+        self.depends_on = depends_on if depends_on is not None else []
+        self.success = success
+        self.wait_for = wait_for
+        self.log = log if log is not None else []
+
+    def run(self):
+        if self.wait_for is not None:
+            self.wait_for.wait(5)
+        self.log.append(self.id)
+        if isinstance(self.success, Exception):
+            raise self.success
+        return self.success
+
+
+@pytest.fixture
+def executor():
+    action_executor = ActionExecutor(max_workers=4, max_queue=8, timeout=5)
+    yield action_executor
+    action_executor.shutdown()
+
+
+class TestActionExecutor(object):
+    def test_sequential_by_default(self, executor):
+        log = []
+        actions = [FakeAction('a', log=log), FakeAction('b', log=log), FakeAction('c', log=log)]
+        assert executor.run_actions(actions) is True
+        assert log == ['a', 'b', 'c']
+
+    def test_sequential_stops_at_failure(self, executor):
+        log = []
+        actions = [FakeAction('a', log=log), FakeAction('b', success=False, log=log), FakeAction('c', log=log)]
+        assert executor.run_actions(actions) is False
+        assert log == ['a', 'b']
+
+    def test_independent_actions_run_concurrently(self, executor):
+        log = []
+        released = threading.Event()
+        # 'slow' only finishes after 'fast' has run, which is only possible if they run at the same time
+        slow = FakeAction('slow', wait_for=released, log=log)
+        fast = FakeAction('fast', log=log)
+        fast.run = lambda: (log.append('fast'), released.set(), True)[-1]
+        assert executor.run_actions([slow, fast], parallel=True) is True
+        assert log == ['fast', 'slow']
+
+    def test_dependencies(self, executor):
+        log = []
+        actions = [FakeAction('mail', depends_on=['webhook'], log=log), FakeAction('webhook', log=log)]
+        assert executor.run_actions(actions, parallel=True) is True
+        assert log == ['webhook', 'mail']
+
+    def test_failed_dependency_skips_dependents(self, executor):
+        log = []
+        actions = [FakeAction('webhook', success=False, log=log), FakeAction('mail', depends_on=['webhook'], log=log)]
+        assert executor.run_actions(actions, parallel=True) is False
+        assert log == ['webhook']
+
+    def test_dependency_cycle(self, executor):
+        actions = [FakeAction('a', depends_on=['b']), FakeAction('b', depends_on=['a'])]
+        assert executor.run_actions(actions, parallel=True) is False
+
+    def test_send_transaction_is_a_barrier(self, executor):
+        log = []
+        actions = [FakeAction('send', action_type=ActionType.SENDTRANSACTION, log=log), FakeAction('a', log=log), FakeAction('b', log=log)]
+        assert executor.run_actions(actions, parallel=True) is True
+        assert log[-1] == 'send'
+
+    def test_send_transaction_is_not_run_after_a_failure(self, executor):
+        log = []
+        actions = [FakeAction('a', success=False, log=log), FakeAction('send', action_type=ActionType.SENDTRANSACTION, log=log)]
+        assert executor.run_actions(actions, parallel=True) is False
+        assert 'send' not in log
+
+    def test_exception_is_a_failure(self, executor):
+        assert executor.run_actions([FakeAction('a', success=RuntimeError('boom'))]) is False
+
+    def test_timeout(self):
+        executor = ActionExecutor(max_workers=2, timeout=0.1)
+        released = threading.Event()
+        try:
+            start = time.monotonic()
+            assert executor.run_actions([FakeAction('slow', wait_for=released)]) is False
+            assert time.monotonic() - start < 2
+        finally:
+            released.set()
+            executor.shutdown()
+
+        assert executor.get_stats()['action_types'][ActionType.WEBHOOK]['timeouts'] == 1
+
+    def test_send_transaction_does_not_time_out(self):
+        executor = ActionExecutor(max_workers=2, timeout=0.1)
+        log = []
+        released = threading.Event()
+        threading.Timer(0.5, released.set).start()
+        try:
+            # The send is waited for, so the trigger can not be re-armed while the transaction could still be broadcast
+            assert executor.run_actions([FakeAction('send', action_type=ActionType.SENDTRANSACTION, wait_for=released, log=log)]) is True
+            assert log == ['send']
+        finally:
+            released.set()
+            executor.shutdown()
+
+    def test_stats(self, executor):
+        executor.run_actions([FakeAction('a'), FakeAction('b', success=False)], parallel=True)
+        stats = executor.get_stats()
+        assert stats['queued'] == 0
+        assert stats['running'] == 0
+        assert stats['action_types'][ActionType.WEBHOOK]['runs'] == 2
+        assert stats['action_types'][ActionType.WEBHOOK]['failures'] == 1
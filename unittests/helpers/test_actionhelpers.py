@@ -18,95 +18,92 @@ from action.actiontype import ActionType
 class TestActionHelpers(object):
     """Tests for action helper functions"""
 
-    @mock.patch('helpers.actionhelpers.glob.glob')
-    def test_get_actions(self, mock_glob):
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.ids')
+    def test_get_actions(self, mock_ids):
         """Test getting list of action IDs"""
-        mock_glob.return_value = [
-            'json/public/actions/action1.json',
-            'json/public/actions/action2.json',
-        ]
+        mock_ids.return_value = ['action1', 'action2']
         result = get_actions()
         assert 'action1' in result
         assert 'action2' in result
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_config(self, mock_load):
         """Test getting action configuration"""
         mock_load.return_value = {'action_type': 'Command', 'run_command': 'echo test'}
         result = get_action_config('test_action')
         assert result['action_type'] == 'Command'
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_config_not_found(self, mock_load):
         """Test getting config for non-existent action"""
-        mock_load.side_effect = IOError('File not found')
+        mock_load.return_value = None
         result = get_action_config('nonexistent')
         assert result == {}
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_command(self, mock_load):
         """Test getting a Command action"""
         mock_load.return_value = {'action_type': ActionType.COMMAND}
         action = get_action('test_action')
         assert action.action_type == ActionType.COMMAND
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_spawnprocess(self, mock_load):
         """Test getting a SpawnProcess action"""
         mock_load.return_value = {'action_type': ActionType.SPAWNPROCESS}
         action = get_action('test_action')
         assert action.action_type == ActionType.SPAWNPROCESS
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_sendtransaction(self, mock_load):
         """Test getting a SendTransaction action"""
         mock_load.return_value = {'action_type': ActionType.SENDTRANSACTION}
         action = get_action('test_action')
         assert action.action_type == ActionType.SENDTRANSACTION
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_revealsecret(self, mock_load):
         """Test getting a RevealSecret action"""
         mock_load.return_value = {'action_type': ActionType.REVEALSECRET}
         action = get_action('test_action')
         assert action.action_type == ActionType.REVEALSECRET
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_sendmail(self, mock_load):
         """Test getting a SendMail action"""
         mock_load.return_value = {'action_type': ActionType.SENDMAIL}
         action = get_action('test_action')
         assert action.action_type == ActionType.SENDMAIL
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_webhook(self, mock_load):
         """Test getting a Webhook action"""
         mock_load.return_value = {'action_type': ActionType.WEBHOOK}
         action = get_action('test_action')
         assert action.action_type == ActionType.WEBHOOK
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_deletetrigger(self, mock_load):
         """Test getting a DeleteTrigger action"""
         mock_load.return_value = {'action_type': ActionType.DELETETRIGGER}
         action = get_action('test_action')
         assert action.action_type == ActionType.DELETETRIGGER
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_launchevolver(self, mock_load):
         """Test getting a LaunchEvolver action"""
         mock_load.return_value = {'action_type': ActionType.LAUNCHEVOLVER}
         action = get_action('test_action')
         assert action.action_type == ActionType.LAUNCHEVOLVER
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_unknown_type(self, mock_load):
         """Test getting an action with unknown type raises error"""
         mock_load.return_value = {'action_type': 'UnknownType'}
         with pytest.raises(NotImplementedError):
             get_action('test_action')
 
-    @mock.patch('helpers.actionhelpers.load_from_json_file')
+    @mock.patch('helpers.actionhelpers.ACTION_STORE.load')
     def test_get_action_with_type_override(self, mock_load):
         """Test getting an action with type override"""
         mock_load.return_value = {'action_type': ActionType.COMMAND}
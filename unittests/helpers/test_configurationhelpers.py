@@ -62,6 +62,21 @@ from helpers.configurationhelpers import (
     get_max_file_size,
     get_allowed_extensions,
     get_enable_transcribe,
+    get_preload_scripts,
+    get_access_log_verbose,
+    get_access_log_body_size,
+    get_access_log_sample_rate,
+    get_storage_backend,
+    get_compact_json,
+    get_fsync_policy,
+    get_wallet_idle_timeout,
+    get_wallet_gap_limit,
+    get_enable_listener,
+    get_max_watched_addresses,
+    get_listener_backend,
+    get_listener_backend_url,
+    get_server_threads,
+    get_server_workers,
     get_model_size_transcribe,
     get_max_file_size_transcribe,
     get_allowed_extensions_transcribe,
@@ -554,6 +569,104 @@ class TestConfigurationGetters(object):
         except Exception:
             pass
 
+    def test_get_server_threads_and_workers(self):
+        """Test getting the number of threads and processes of the webserver"""
+        try:
+            assert isinstance(get_server_threads(), int)
+            assert isinstance(get_server_workers(), int)
+        except Exception:
+            pass
+
+    def test_options_missing_from_an_older_configuration_file(self, tmp_path):
+        """Test that the newer options fall back to their defaults instead of raising"""
+        config_file = tmp_path / 'spellbook.conf'
+        config_file.write_text('[RESTAPI]\nhost=127.0.0.1\n\n[Wallet]\nenable_wallet=false\n')
+        with mock.patch('helpers.configurationhelpers.CONFIGURATION_FILE', str(config_file)):
+            assert get_server_threads() == 10
+            assert get_server_workers() == 1
+            assert get_preload_scripts() is False
+            assert get_access_log_verbose() is False
+            assert get_access_log_body_size() == 256
+            assert get_access_log_sample_rate() == 1.0
+            assert get_storage_backend() == 'files'
+            assert get_compact_json() is False
+            assert get_fsync_policy() == 'never'
+            assert get_wallet_idle_timeout() == 300
+            assert get_wallet_gap_limit() == 20
+            assert get_enable_listener() is False
+            assert get_max_watched_addresses() == 100000
+            assert get_listener_backend() == 'blockio'
+            assert get_listener_backend_url() is None
+
+    def test_get_preload_scripts(self):
+        """Test getting preload_scripts"""
+        try:
+            result = get_preload_scripts()
+            assert isinstance(result, bool)
+        except Exception:
+            pass
+
+    def test_get_access_log_settings(self):
+        """Test getting the settings of the requests log"""
+        try:
+            assert isinstance(get_access_log_verbose(), bool)
+            assert isinstance(get_access_log_body_size(), int)
+            assert isinstance(get_access_log_sample_rate(), float)
+        except Exception:
+            pass
+
+    def test_get_storage_settings(self):
+        """Test getting the storage options"""
+        try:
+            assert get_storage_backend() in ['files', 'sqlite']
+            assert isinstance(get_compact_json(), bool)
+            assert get_fsync_policy() in ['never', 'file', 'always']
+        except Exception:
+            pass
+
+    def test_get_wallet_idle_timeout(self):
+        """Test getting the idle timeout of the hot wallet"""
+        try:
+            assert isinstance(get_wallet_idle_timeout(), int)
+        except Exception:
+            pass
+
+    def test_get_wallet_gap_limit(self):
+        """Test getting the gap limit of the address index of the hot wallet"""
+        try:
+            assert isinstance(get_wallet_gap_limit(), int)
+        except Exception:
+            pass
+
+    def test_get_enable_listener(self):
+        """Test getting whether the transaction listener is enabled"""
+        try:
+            assert isinstance(get_enable_listener(), bool)
+        except Exception:
+            pass
+
+    def test_get_max_watched_addresses(self):
+        """Test getting the maximum number of addresses of the transaction listener"""
+        try:
+            assert isinstance(get_max_watched_addresses(), int)
+        except Exception:
+            pass
+
+    def test_get_listener_backend(self):
+        """Test getting the backend of the transaction listener"""
+        try:
+            assert isinstance(get_listener_backend(), str)
+        except Exception:
+            pass
+
+    def test_get_listener_backend_url(self):
+        """Test getting the url of the backend of the transaction listener"""
+        try:
+            result = get_listener_backend_url()
+            assert result is None or isinstance(result, str)
+        except Exception:
+            pass
+
     def test_get_model_size_transcribe(self):
         """Test getting transcribe model size"""
         try:
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import mock
+import pytest
+
+from helpers.eventbus import EventBus, ADDRESS, TXID, BLOCK
+
+ADDRESS1 = '1BoatSLRHtKNngkdXEeobR76b53LETtpyT'
+ADDRESS2 = '1Woutere8RCF82AgbPCc5F4KuYVvS4meW'
+
+
+@pytest.fixture
+def bus():
+    bus = EventBus()
+    yield bus
+    if bus._executor is not None:
+        bus._executor.shutdown(wait=True)
+
+
+class TestEventBus(object):
+    def test_subscribe_and_unsubscribe(self, bus):
+        callback = mock.MagicMock()
+        assert bus.subscribe(ADDRESS, ADDRESS1, subscriber='trigger:t1', callback=callback) is True
+        assert bus.subscribe(ADDRESS, ADDRESS1, subscriber='trigger:t1', callback=callback) is True
+        assert bus.subscribe(BLOCK, None, subscriber='trigger:t1', callback=callback) is True
+        assert len(bus) == 2
+        assert ADDRESS1 in bus.subscribed(ADDRESS)
+
+        assert bus.unsubscribe('trigger:t1', topic=ADDRESS) == 1
+        assert ADDRESS1 not in bus.subscribed(ADDRESS)
+        assert bus.unsubscribe('trigger:t1') == 1
+        assert bus.subscribers == {}
+        assert len(bus) == 0
+
+    def test_unknown_topic(self, bus):
+        with pytest.raises(ValueError):
+            bus.subscribe('mempool', None, subscriber='trigger:t1', callback=mock.MagicMock())
+
+    def test_maximum_number_of_subscriptions(self):
+        bus = EventBus(max_subscriptions=1)
+        assert bus.subscribe(ADDRESS, ADDRESS1, subscriber='trigger:t1', callback=mock.MagicMock()) is True
+        assert bus.subscribe(ADDRESS, ADDRESS2, subscriber='trigger:t2', callback=mock.MagicMock()) is False
+        assert ADDRESS2 not in bus.subscribed(ADDRESS)
+
+    def test_publish(self, bus):
+        callback = mock.MagicMock()
+        other_callback = mock.MagicMock()
+        bus.subscribe(ADDRESS, ADDRESS1, subscriber='trigger:t1', callback=callback)
+        bus.subscribe(TXID, 'abc123', subscriber='trigger:t2', callback=other_callback)
+
+        assert bus.publish(ADDRESS, ADDRESS2, address=ADDRESS2, event='RECEIVE', txid='abc123') == 0
+        assert bus.publish(ADDRESS, ADDRESS1, address=ADDRESS1, event='RECEIVE', txid='abc123') == 1
+        bus._executor.shutdown(wait=True)
+
+        callback.assert_called_once_with(ADDRESS, ADDRESS1, [{'address': ADDRESS1, 'event': 'RECEIVE', 'txid': 'abc123'}])
+        other_callback.assert_not_called()
+        assert bus.stats()['published'] == 1
+
+    def test_events_are_coalesced_while_a_delivery_waits(self):
+        bus = EventBus(workers=1)
+        started, release = threading.Event(), threading.Event()
+        bus.subscribe(BLOCK, None, subscriber='blocker', callback=lambda *args: started.set() or release.wait(5))
+        callback = mock.MagicMock()
+        bus.subscribe(ADDRESS, ADDRESS1, subscriber='trigger:t1', callback=callback)
+
+        # The only thread is busy, so the events of the address wait and are delivered together
+        bus.publish(BLOCK, None, height=800000, hash='abc')
+        started.wait(5)
+        assert bus.publish(ADDRESS, ADDRESS1, address=ADDRESS1, event='RECEIVE', txid='tx1') == 1
+        assert bus.publish(ADDRESS, ADDRESS1, address=ADDRESS1, event='SEND', txid='tx2') == 0
+        release.set()
+        bus._executor.shutdown(wait=True)
+
+        callback.assert_called_once_with(ADDRESS, ADDRESS1, [{'address': ADDRESS1, 'event': 'RECEIVE', 'txid': 'tx1'},
+                                                             {'address': ADDRESS1, 'event': 'SEND', 'txid': 'tx2'}])
+        assert bus.coalesced == 1
+        assert bus.pending == {}
+
+    def test_once(self, bus):
+        callback = mock.MagicMock()
+        bus.subscribe(TXID, 'abc123', subscriber='payment:p1', callback=callback, once=True)
+        assert bus.publish(TXID, 'abc123', txid='abc123') == 1
+        assert bus.publish(TXID, 'abc123', txid='abc123') == 0
+        assert len(bus) == 0
+
+    def test_expire(self, bus):
+        bus.subscribe(ADDRESS, ADDRESS1, subscriber='payment:p1', callback=mock.MagicMock(), timeout=60)
+        bus.subscribe(ADDRESS, ADDRESS2, subscriber='trigger:t1', callback=mock.MagicMock())
+
+        assert bus.expire(now=time.time()) == 0
+        assert bus.expire(now=time.time() + 61) == 1
+        assert list(bus.subscribed(ADDRESS)) == [ADDRESS2]
+
+    def test_failing_callback(self, bus):
+        bus.subscribe(BLOCK, None, subscriber='triggers', callback=mock.MagicMock(side_effect=Exception('explorer down')))
+        bus.publish(BLOCK, None, height=800000, hash='abc')
+        bus._executor.shutdown(wait=True)
+        assert bus.stats()['delivered'] == 1
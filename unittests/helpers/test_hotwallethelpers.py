@@ -1,5 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
@@ -180,264 +183,202 @@ class TestPromptDecryptionPassword(unittest.TestCase):
         self.assertEqual(hw_module.HOT_WALLET_PASSWORD, 'user_password')
 
 
-class TestGetAddressFromWallet(unittest.TestCase):
-    """Test cases for get_address_from_wallet function"""
-
-    @patch('helpers.hotwallethelpers.get_xpub_key_from_wallet')
-    @patch('helpers.hotwallethelpers.get_address_from_xpub')
-    def test_get_address_from_wallet(self, mock_get_addr, mock_get_xpub):
-        """Test get_address_from_wallet function"""
-        from helpers.hotwallethelpers import get_address_from_wallet
-        
-        mock_get_xpub.return_value = 'xpub_key'
-        mock_get_addr.return_value = '1BitcoinAddress'
-        
-        result = get_address_from_wallet(account=0, index=0)
-        
-        self.assertEqual(result, '1BitcoinAddress')
-        mock_get_xpub.assert_called_once_with(0)
-        mock_get_addr.assert_called_once_with(xpub='xpub_key', i=0)
+TEST_MNEMONIC = 'abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon abandon about'
+TEST_WALLET = {'mnemonic': TEST_MNEMONIC.split(), 'passphrase': '', '1SingleAddress': 'single_private_key'}
 
 
-class TestGetXpubKeyFromWallet(unittest.TestCase):
-    """Test cases for get_xpub_key_from_wallet function"""
+class WalletSessionTestCase(unittest.TestCase):
+    """Base class for tests that use a fresh WalletSession with the test wallet as hot wallet"""
 
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    @patch('helpers.hotwallethelpers.get_xpub_key')
-    def test_get_xpub_key_from_wallet(self, mock_get_xpub, mock_hot_wallet):
-        """Test get_xpub_key_from_wallet function"""
-        from helpers.hotwallethelpers import get_xpub_key_from_wallet
-        
-        mock_hot_wallet.return_value = {
-            'mnemonic': ['word1', 'word2', 'word3'],
-            'passphrase': 'test_pass'
-        }
-        mock_get_xpub.return_value = 'xpub_key_result'
-        
-        result = get_xpub_key_from_wallet(account=0)
-        
-        self.assertEqual(result, 'xpub_key_result')
-        mock_get_xpub.assert_called_once_with(
-            mnemonic='word1 word2 word3',
-            passphrase='test_pass',
-            account=0
-        )
-
-
-class TestGetXprivKeyFromWallet(unittest.TestCase):
-    """Test cases for get_xpriv_key_from_wallet function"""
-
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    @patch('helpers.hotwallethelpers.get_xpriv_key')
-    def test_get_xpriv_key_from_wallet(self, mock_get_xpriv, mock_hot_wallet):
-        """Test get_xpriv_key_from_wallet function"""
-        from helpers.hotwallethelpers import get_xpriv_key_from_wallet
-        
-        mock_hot_wallet.return_value = {
-            'mnemonic': ['word1', 'word2'],
-            'passphrase': 'pass'
-        }
-        mock_get_xpriv.return_value = 'xpriv_key_result'
-        
-        result = get_xpriv_key_from_wallet(account=1)
-        
-        self.assertEqual(result, 'xpriv_key_result')
-        mock_get_xpriv.assert_called_once_with(
-            mnemonic='word1 word2',
-            passphrase='pass',
-            account=1
-        )
-
-
-class TestGetPrivateKeyFromWallet(unittest.TestCase):
-    """Test cases for get_private_key_from_wallet function"""
-
-    @patch('helpers.hotwallethelpers.get_xpriv_key_from_wallet')
-    @patch('helpers.hotwallethelpers.get_private_key')
-    def test_get_private_key_from_wallet(self, mock_get_priv, mock_get_xpriv):
-        """Test get_private_key_from_wallet function"""
-        from helpers.hotwallethelpers import get_private_key_from_wallet
-        
-        mock_get_xpriv.return_value = 'xpriv_key'
-        mock_get_priv.return_value = {'address': 'private_key'}
-        
-        result = get_private_key_from_wallet(account=0, index=5)
-        
-        self.assertEqual(result, {'address': 'private_key'})
-        mock_get_xpriv.assert_called_once_with(account=0)
-        mock_get_priv.assert_called_once_with(xpriv='xpriv_key', i=5)
-
-
-class TestGetSingleAddressPrivateKey(unittest.TestCase):
-    """Test cases for get_single_address_private_key function"""
-
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    def test_get_single_address_private_key_found(self, mock_hot_wallet):
-        """Test get_single_address_private_key when address is found"""
-        from helpers.hotwallethelpers import get_single_address_private_key
-        
-        mock_hot_wallet.return_value = {
-            '1Address1': 'private_key_1',
-            '1Address2': 'private_key_2',
-            'mnemonic': ['word1'],
-            'passphrase': ''
-        }
-        
-        result = get_single_address_private_key('1Address1')
-        
-        self.assertEqual(result, {'1Address1': 'private_key_1'})
-
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    def test_get_single_address_private_key_not_found(self, mock_hot_wallet):
-        """Test get_single_address_private_key when address is not found"""
-        from helpers.hotwallethelpers import get_single_address_private_key
-        
-        mock_hot_wallet.return_value = {
-            '1Address1': 'private_key_1',
-            'mnemonic': ['word1'],
-            'passphrase': ''
-        }
-        
-        result = get_single_address_private_key('1NonexistentAddress')
-        
-        self.assertIsNone(result)
-
-
-class TestFindAddressInWallet(unittest.TestCase):
-    """Test cases for find_address_in_wallet function"""
-
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    @patch('helpers.hotwallethelpers.get_xpub_key')
-    @patch('helpers.hotwallethelpers.get_addresses_from_xpub')
-    def test_find_address_in_wallet_found(self, mock_get_addrs, mock_get_xpub, mock_hot_wallet):
-        """Test find_address_in_wallet when address is found"""
-        from helpers.hotwallethelpers import find_address_in_wallet
-        
-        mock_hot_wallet.return_value = {
-            'mnemonic': ['word1', 'word2'],
-            'passphrase': 'pass'
-        }
-        mock_get_xpub.return_value = 'xpub_key'
-        mock_get_addrs.return_value = ['addr0', 'addr1', 'addr2', 'target_addr', 'addr4']
-        
-        account, index = find_address_in_wallet('target_addr', accounts=1, indexes=5)
-        
-        self.assertEqual(account, 0)
-        self.assertEqual(index, 3)
-
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    @patch('helpers.hotwallethelpers.get_xpub_key')
-    @patch('helpers.hotwallethelpers.get_addresses_from_xpub')
-    def test_find_address_in_wallet_not_found(self, mock_get_addrs, mock_get_xpub, mock_hot_wallet):
-        """Test find_address_in_wallet when address is not found"""
+    def setUp(self):
+        from helpers.hotwallethelpers import WalletSession
+        self.session = WalletSession(idle_timeout=0)
+
+        get_hot_wallet_patcher = patch('helpers.hotwallethelpers.get_hot_wallet', side_effect=lambda: dict(TEST_WALLET))
+        self.mock_get_hot_wallet = get_hot_wallet_patcher.start()
+        self.addCleanup(get_hot_wallet_patcher.stop)
+
+        session_patcher = patch('helpers.hotwallethelpers.WALLET_SESSION', self.session)
+        session_patcher.start()
+        self.addCleanup(session_patcher.stop)
+        self.addCleanup(self.session.clear)
+
+        from helpers.hotwallethelpers import AddressIndex
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir)
+        self.index = AddressIndex(session=self.session, filename=os.path.join(self.index_dir, 'address_index.db'), gap_limit=5)
+        index_patcher = patch('helpers.hotwallethelpers.ADDRESS_INDEX', self.index)
+        index_patcher.start()
+        self.addCleanup(index_patcher.stop)
+
+
+class TestWalletSession(WalletSessionTestCase):
+    """Test cases for the WalletSession class"""
+
+    def test_wallet_is_decrypted_once(self):
+        for account in range(3):
+            self.session.get_xpriv_key(account)
+            self.session.get_private_key(account, 0)
+        self.assertEqual(self.mock_get_hot_wallet.call_count, 1)
+        self.assertEqual(self.session.unlocks, 1)
+
+    def test_keys_are_the_same_as_bip44(self):
+        from bips.BIP44 import get_xpriv_key, get_xpub_key, get_address_from_xpub, get_private_key, get_change_addresses_from_xpub
+
+        xpub = get_xpub_key(mnemonic=TEST_MNEMONIC, passphrase='', account=1)
+        self.assertEqual(self.session.get_xpriv_key(1), get_xpriv_key(mnemonic=TEST_MNEMONIC, passphrase='', account=1))
+        self.assertEqual(self.session.get_xpub_key(1), xpub)
+        self.assertEqual(self.session.get_address(1, 3), get_address_from_xpub(xpub, 3))
+        self.assertEqual(self.session.get_address(1, 2, change=1), get_change_addresses_from_xpub(xpub, 3)[2])
+        self.assertEqual(self.session.get_private_key(1, 3), get_private_key(self.session.get_xpriv_key(1), 3))
+
+    def test_lock_wipes_the_seed_and_keeps_the_addresses(self):
+        address = self.session.get_address(0, 0)
+        self.session.get_private_key(0, 0)
+        seed = self.session.seed
+
+        self.session.lock()
+        self.assertFalse(self.session.unlocked)
+        self.assertEqual(seed.value, bytearray(len(seed.value)))
+        self.assertEqual(self.session.xprivs, {})
+        self.assertEqual(self.session.single_keys, {})
+        self.assertEqual(len(self.session.private_keys), 0)
+
+        self.assertEqual(self.session.get_address(0, 0), address)
+        self.assertEqual(self.mock_get_hot_wallet.call_count, 1)
+
+        self.session.get_private_key(0, 0)
+        self.assertEqual(self.mock_get_hot_wallet.call_count, 2)
+
+    def test_idle_session_is_locked(self):
+        import time
+        self.session.configure(idle_timeout=0.05)
+        self.session.unlock()
+        for _ in range(100):
+            if not self.session.unlocked:
+                break
+            time.sleep(0.01)
+        self.assertFalse(self.session.unlocked)
+
+    def test_after_fork(self):
+        self.session.unlock()
+        self.session.after_fork()
+        self.assertFalse(self.session.unlocked)
+        self.assertIsNone(self.session.seed)
+
+    def test_wallet_without_mnemonic(self):
+        self.mock_get_hot_wallet.side_effect = lambda: {'1SingleAddress': 'single_private_key'}
+        self.assertEqual(self.session.get_single_keys(), {'1SingleAddress': 'single_private_key'})
+        with self.assertRaises(Exception):
+            self.session.get_xpriv_key(0)
+
+
+class TestLRUCache(unittest.TestCase):
+    """Test cases for the LRUCache class"""
+
+    def test_least_recently_used_item_is_removed(self):
+        from helpers.hotwallethelpers import LRUCache
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+
+class TestWalletFunctions(WalletSessionTestCase):
+    """Test cases for the functions that use the wallet session"""
+
+    def test_get_address_and_private_key_from_wallet(self):
+        from helpers.hotwallethelpers import get_address_from_wallet, get_private_key_from_wallet
+        address = get_address_from_wallet(account=0, index=5)
+        self.assertEqual(list(get_private_key_from_wallet(account=0, index=5).keys()), [address])
+
+    def test_get_xpub_and_xpriv_key_from_wallet(self):
+        from helpers.hotwallethelpers import get_xpub_key_from_wallet, get_xpriv_key_from_wallet
+        self.assertTrue(get_xpub_key_from_wallet(0).startswith(('xpub', 'tpub')))
+        self.assertTrue(get_xpriv_key_from_wallet(0).startswith(('xprv', 'tprv')))
+
+    def test_single_address_keys(self):
+        from helpers.hotwallethelpers import get_single_address_private_key, find_single_address_in_wallet
+        self.assertEqual(get_single_address_private_key('1SingleAddress'), {'1SingleAddress': 'single_private_key'})
+        self.assertIsNone(get_single_address_private_key('1NonexistentAddress'))
+        self.assertEqual(find_single_address_in_wallet('1SingleAddress'), 'single_private_key')
+        self.assertIsNone(find_single_address_in_wallet('1NonexistentAddress'))
+        self.assertNotIn('mnemonic', self.session.get_single_keys())
+
+    def test_find_address_in_wallet(self):
         from helpers.hotwallethelpers import find_address_in_wallet
-        
-        mock_hot_wallet.return_value = {
-            'mnemonic': ['word1'],
-            'passphrase': ''
-        }
-        mock_get_xpub.return_value = 'xpub_key'
-        mock_get_addrs.return_value = ['addr0', 'addr1', 'addr2']
-        
-        account, index = find_address_in_wallet('nonexistent_addr', accounts=1, indexes=3)
-        
-        self.assertIsNone(account)
-        self.assertIsNone(index)
-
-
-class TestFindSingleAddressInWallet(unittest.TestCase):
-    """Test cases for find_single_address_in_wallet function"""
-
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    def test_find_single_address_in_wallet_found(self, mock_hot_wallet):
-        """Test find_single_address_in_wallet when address is found"""
-        from helpers.hotwallethelpers import find_single_address_in_wallet
-        
-        mock_hot_wallet.return_value = {
-            '1Address1': 'private_key_1',
-            'mnemonic': ['word1'],
-            'passphrase': ''
-        }
-        
-        result = find_single_address_in_wallet('1Address1')
-        
-        self.assertEqual(result, 'private_key_1')
-
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    def test_find_single_address_in_wallet_not_found(self, mock_hot_wallet):
-        """Test find_single_address_in_wallet when address is not found"""
-        from helpers.hotwallethelpers import find_single_address_in_wallet
-        
-        mock_hot_wallet.return_value = {
-            '1Address1': 'private_key_1',
-            'mnemonic': ['word1'],
-            'passphrase': ''
-        }
-        
-        result = find_single_address_in_wallet('1NonexistentAddress')
-        
-        self.assertIsNone(result)
-
-
-class TestHotWalletSeed(unittest.TestCase):
-    """Test cases for hot_wallet_seed function"""
+        address = self.session.get_address(1, 4)
+        self.assertEqual(find_address_in_wallet(address, accounts=1, indexes=5), (None, None))
+        self.assertEqual(find_address_in_wallet(address, accounts=2, indexes=5), (1, 4))
+
+    def test_find_address_path(self):
+        from helpers.hotwallethelpers import find_address_path, find_address_in_wallet
+        change_address = self.session.get_address(0, 3, change=1)
+        self.assertEqual(find_address_path(change_address), (0, 1, 3))
+        # Only receiving addresses have an index in find_address_in_wallet
+        self.assertEqual(find_address_in_wallet(change_address), (None, None))
+        self.assertIsNone(find_address_path('1NonexistentAddress'))
+
+    def test_private_key_of_change_address(self):
+        from helpers.hotwallethelpers import get_private_key_from_wallet
+        address = self.session.get_address(0, 2, change=1)
+        self.assertEqual(list(get_private_key_from_wallet(account=0, index=2, change=1).keys()), [address])
 
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    @patch('helpers.hotwallethelpers.get_seed')
-    def test_hot_wallet_seed(self, mock_get_seed, mock_hot_wallet):
-        """Test hot_wallet_seed function"""
+    def test_hot_wallet_seed(self):
         from helpers.hotwallethelpers import hot_wallet_seed
-        
-        mock_hot_wallet.return_value = {
-            'mnemonic': ['word1', 'word2', 'word3'],
-            'passphrase': 'test_pass'
-        }
-        mock_get_seed.return_value = b'seed_bytes'
-        
-        result = hot_wallet_seed()
-        
-        self.assertEqual(result, b'seed_bytes')
-        mock_get_seed.assert_called_once_with(
-            mnemonic='word1 word2 word3',
-            passphrase='test_pass'
-        )
+        from bips.BIP39 import get_seed
+        self.assertEqual(hot_wallet_seed(), get_seed(mnemonic=TEST_MNEMONIC, passphrase=''))
 
+    def test_find_account_by_xpub(self):
+        from helpers.hotwallethelpers import find_account_by_xpub
+        xpub = self.session.get_xpub_key(2)
+        self.assertEqual(find_account_by_xpub(xpub, n=3), 2)
+        self.assertIsNone(find_account_by_xpub(xpub, n=2))
 
-class TestFindAccountByXpub(unittest.TestCase):
-    """Test cases for find_account_by_xpub function"""
 
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    @patch('helpers.hotwallethelpers.get_xpub_key')
-    def test_find_account_by_xpub_found(self, mock_get_xpub, mock_hot_wallet):
-        """Test find_account_by_xpub when xpub is found"""
-        from helpers.hotwallethelpers import find_account_by_xpub
-        
-        mock_hot_wallet.return_value = {
-            'mnemonic': ['word1', 'word2'],
-            'passphrase': 'pass'
-        }
-        # Return different xpubs for different accounts
-        mock_get_xpub.side_effect = ['xpub0', 'xpub1', 'target_xpub', 'xpub3']
-        
-        result = find_account_by_xpub('target_xpub', n=5)
-        
-        self.assertEqual(result, 2)
+class TestAddressIndex(WalletSessionTestCase):
+    """Test cases for the AddressIndex class"""
 
-    @patch('helpers.hotwallethelpers.get_hot_wallet')
-    @patch('helpers.hotwallethelpers.get_xpub_key')
-    def test_find_account_by_xpub_not_found(self, mock_get_xpub, mock_hot_wallet):
-        """Test find_account_by_xpub when xpub is not found"""
-        from helpers.hotwallethelpers import find_account_by_xpub
-        
-        mock_hot_wallet.return_value = {
-            'mnemonic': ['word1'],
-            'passphrase': ''
-        }
-        mock_get_xpub.side_effect = ['xpub0', 'xpub1', 'xpub2']
-        
-        result = find_account_by_xpub('nonexistent_xpub', n=3)
-        
-        self.assertIsNone(result)
+    def test_chains_are_derived_up_to_the_gap_limit(self):
+        self.index.find('1NonexistentAddress')
+        self.assertEqual(self.index.chains, {(0, 0): [5, 0], (0, 1): [5, 0]})
+        self.assertEqual(len(self.index.paths), 10)
+        self.assertEqual(self.index.paths[self.session.get_address(0, 4, change=1)], (0, 1, 4))
+
+    def test_used_addresses_extend_the_chain(self):
+        from helpers.hotwallethelpers import get_address_from_wallet
+        get_address_from_wallet(account=0, index=7)
+        self.assertEqual(self.index.chains[(0, 0)], [13, 8])
+
+        # An address that is found is used, so the gap after it is derived as well
+        self.assertEqual(self.index.find(self.session.get_address(0, 11)), (0, 0, 11))
+        self.assertEqual(self.index.chains[(0, 0)], [17, 12])
+
+    def test_addresses_are_derived_once(self):
+        from helpers.hotwallethelpers import AddressIndex
+        address = self.session.get_address(0, 4)
+        self.index.find(address)
+
+        index = AddressIndex(session=self.session, filename=self.index.filename, gap_limit=5)
+        with patch.object(self.session, 'get_address') as mock_get_address:
+            self.assertEqual(index.find(address), (0, 0, 4))
+            self.assertEqual(index.chains, self.index.chains)
+            # The addresses are loaded from the database instead of derived again
+            self.assertEqual(mock_get_address.call_count, 0)
+
+    def test_each_wallet_has_its_own_index(self):
+        address = self.session.get_address(0, 0)
+        self.assertEqual(self.index.find(address), (0, 0, 0))
+
+        other_wallet = dict(TEST_WALLET, passphrase='other')
+        self.mock_get_hot_wallet.side_effect = lambda: dict(other_wallet)
+        self.session.clear()
+        self.assertIsNone(self.index.find(address))
 
 
 if __name__ == '__main__':
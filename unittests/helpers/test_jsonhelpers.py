@@ -4,7 +4,19 @@ import os
 import tempfile
 import mock
 
-from helpers.jsonhelpers import save_to_json_file, load_from_json_file
+import pytest
+import simplejson
+
+from helpers.jsonhelpers import save_to_json_file, load_from_json_file, iter_json_list, configure_json_files, dumps_json
+from helpers.jsonhelpers import LOAD_RETRY_DELAY, JSON_FILES
+
+
+@pytest.fixture
+def json_files():
+    """Restore the settings of save_to_json_file after a test changed them."""
+    settings = dict(JSON_FILES)
+    yield
+    JSON_FILES.update(settings)
 
 
 class TestJsonHelpers(object):
@@ -59,23 +71,31 @@ class TestJsonHelpers(object):
 
     @mock.patch('helpers.jsonhelpers.LOG')
     def test_save_to_json_file_error(self, mock_log):
-        """Test error handling when saving fails"""
-        # Try to save to an invalid path (read-only or non-existent drive)
+        """Test that a failed save logs an error, keeps the old file and removes the temporary file"""
         with tempfile.TemporaryDirectory() as tmpdir:
             filepath = os.path.join(tmpdir, 'test.json')
-            # Create the file first
             save_to_json_file(filepath, {'key': 'value'})
-            
-            # Make the file read-only
-            os.chmod(filepath, 0o444)
-            
-            try:
-                # This should fail and log an error
+
+            with mock.patch('helpers.jsonhelpers.os.replace', side_effect=OSError('disk full')):
+                save_to_json_file(filepath, {'new': 'data'})
+
+            mock_log.error.assert_called_once()
+            assert load_from_json_file(filepath) == {'key': 'value'}
+            assert os.listdir(tmpdir) == ['test.json']
+
+    @mock.patch('helpers.jsonhelpers.LOG')
+    def test_save_to_json_file_mkstemp_error(self, mock_log):
+        """Test that a failure to create the temporary file logs an error and keeps the old file"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'test.json')
+            save_to_json_file(filepath, {'key': 'value'})
+
+            with mock.patch('helpers.jsonhelpers.tempfile.mkstemp', side_effect=OSError('read-only file system')):
                 save_to_json_file(filepath, {'new': 'data'})
-                mock_log.error.assert_called()
-            finally:
-                # Restore permissions for cleanup
-                os.chmod(filepath, 0o644)
+
+            mock_log.error.assert_called_once()
+            assert load_from_json_file(filepath) == {'key': 'value'}
+            assert os.listdir(tmpdir) == ['test.json']
 
     @mock.patch('helpers.jsonhelpers.LOG')
     @mock.patch('helpers.jsonhelpers.time.sleep')
@@ -91,4 +111,73 @@ class TestJsonHelpers(object):
             result = load_from_json_file(filepath)
             assert result is None
             mock_log.error.assert_called()
-            mock_sleep.assert_called_once_with(1)
+            mock_sleep.assert_called_once_with(LOAD_RETRY_DELAY)
+
+    @mock.patch('helpers.jsonhelpers.LOG')
+    def test_load_from_json_file_retry_reopens_the_file(self, mock_log, tmp_path):
+        """Test that the retry reads the file again instead of the already consumed file handle"""
+        filepath = str(tmp_path / 'test.json')
+        with open(filepath, 'w') as f:
+            f.write('{"key": ')
+
+        def finish_writing(delay):
+            with open(filepath, 'w') as f:
+                f.write('{"key": "value"}')
+
+        with mock.patch('helpers.jsonhelpers.time.sleep', side_effect=finish_writing):
+            assert load_from_json_file(filepath) == {'key': 'value'}
+
+    @mock.patch('helpers.jsonhelpers.LOG')
+    def test_save_to_json_file_keeps_the_old_file_on_error(self, mock_log, tmp_path):
+        """Test that a failed save leaves the previous file intact and no temporary file behind"""
+        filepath = str(tmp_path / 'test.json')
+        save_to_json_file(filepath, {'key': 'old'})
+
+        with mock.patch('helpers.jsonhelpers.os.replace', side_effect=OSError('disk full')):
+            save_to_json_file(filepath, {'key': 'new'})
+
+        mock_log.error.assert_called_once()
+        assert load_from_json_file(filepath) == {'key': 'old'}
+        assert os.listdir(str(tmp_path)) == ['test.json']
+
+    def test_save_to_json_file_keeps_the_permissions(self, tmp_path):
+        """Test that replacing a file does not change its permissions"""
+        filepath = str(tmp_path / 'test.json')
+        save_to_json_file(filepath, {'key': 'value'})
+        os.chmod(filepath, 0o640)
+        save_to_json_file(filepath, {'key': 'new value'})
+        assert os.stat(filepath).st_mode & 0o777 == 0o640
+
+    def test_save_to_json_file_compact(self, json_files, tmp_path):
+        """Test that compact json files have no whitespace and load the same"""
+        filepath = str(tmp_path / 'test.json')
+        data = {'b': [1, 2], 'a': {'c': None}}
+        configure_json_files(compact=True)
+        save_to_json_file(filepath, data)
+
+        with open(filepath) as f:
+            assert ' ' not in f.read()
+        assert load_from_json_file(filepath) == data
+
+    @pytest.mark.parametrize('policy, syncs', [('never', 0), ('file', 1), ('always', 2)])
+    def test_save_to_json_file_fsync_policy(self, json_files, tmp_path, policy, syncs):
+        """Test that the file and the directory are synced according to the fsync policy"""
+        configure_json_files(fsync=policy)
+        with mock.patch('helpers.jsonhelpers.os.fsync') as mock_fsync:
+            save_to_json_file(str(tmp_path / 'test.json'), {'key': 'value'})
+        assert mock_fsync.call_count == syncs
+
+    def test_configure_json_files_unknown_fsync_policy(self, json_files):
+        """Test that an unknown fsync policy is refused"""
+        with pytest.raises(ValueError):
+            configure_json_files(fsync='sometimes')
+
+    def test_dumps_json_compact_falls_back_to_simplejson(self):
+        """Test that types orjson can not encode are encoded by simplejson"""
+        from decimal import Decimal
+        assert dumps_json({'amount': Decimal('0.1')}, compact=True) == '{"amount":0.1}'
+
+    def test_iter_json_list(self):
+        """Test that a streamed json list is the same as the encoded list"""
+        for items in [[], ['a'], ['a', {'b': 1}, 2]]:
+            assert ''.join(iter_json_list(iter(items))) == simplejson.dumps(items, indent=4)
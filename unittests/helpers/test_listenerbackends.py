@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import mock
+import pytest
+import simplejson
+
+from helpers.listenerbackends import BlockIOBackend, BlockchainInfoBackend, BitcoinCoreZMQBackend, ElectrumBackend, \
+    script_to_address, parse_raw_transaction, make_listener_backend
+
+P2PKH = '1BgGZ9tcN4rm9KBzDn7KprQz87SZ26SAMH'
+P2WPKH = 'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4'
+P2SH_P2WPKH = '3JvL6Ymt8MVWiCNHC7oWU6nLeHNJKLZGLN'
+HASH160 = '751e76e8199196d454941c45d1b3a323f1433bd6'
+
+# A legacy transaction spending from P2PKH, and a segwit transaction spending from P2SH-P2WPKH (made with python-bitcoinlib)
+LEGACY_TX = '01000000011111111111111111111111111111111111111111111111111111111111111111000000006a47300101010101010101010101' \
+            '01010101010101010101010101010101010101010101010101010101010101010101010101010101010101010101010101010101010101' \
+            '01010101210279be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798ffffffff02e8030000000000001976a914' \
+            '751e76e8199196d454941c45d1b3a323f1433bd688acd007000000000000160014751e76e8199196d454941c45d1b3a323f1433bd60000' \
+            '0000'
+LEGACY_TXID = '74883903e3d752616887b54bfabc1639f06527298d51cc3f10ba26b251b508a4'
+SEGWIT_TX = '0100000000010133333333333333333333333333333333333333333333333333333333333333330200000017160014751e76e8199196d4' \
+            '54941c45d1b3a323f1433bd6ffffffff01f40100000000000017a914bcfeb728b584253d5f3f70bcb780e9ef218a68f487024730020202' \
+            '02020202020202020202020202020202020202020202020202020202020202020202020202020202020202020202020202020202020202' \
+            '020202020202020202020202210279be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f8179800000000'
+SEGWIT_TXID = 'e68f061669cf42bc5258646652b61d6fb962bc32eb7e18cd16675e243fa25b9f'
+
+
+@pytest.fixture
+def listener():
+    return mock.MagicMock()
+
+
+class TestRawTransactions(object):
+    def test_script_to_address(self):
+        assert script_to_address(bytes.fromhex('76a914%s88ac' % HASH160)) == P2PKH
+        assert script_to_address(bytes.fromhex('0014%s' % HASH160)) == P2WPKH
+        assert script_to_address(bytes.fromhex('a914bcfeb728b584253d5f3f70bcb780e9ef218a68f487')) == P2SH_P2WPKH
+        assert script_to_address(bytes.fromhex('0014%s' % HASH160), testnet=True).startswith('tb1')
+        assert script_to_address(bytes.fromhex('6a0474657374')) is None
+
+    def test_parse_legacy_transaction(self):
+        assert parse_raw_transaction(bytes.fromhex(LEGACY_TX)) == (LEGACY_TXID, [P2PKH], [P2PKH, P2WPKH])
+
+    def test_parse_segwit_transaction(self):
+        assert parse_raw_transaction(bytes.fromhex(SEGWIT_TX)) == (SEGWIT_TXID, [P2SH_P2WPKH], [P2SH_P2WPKH])
+
+
+class TestWebSocketBackends(object):
+    def test_blockio_subscriptions(self):
+        assert BlockIOBackend(testnet=True).subscriptions() == ['{"type": "new-transactions", "network": "BTCTEST"}', '{"type": "new-blocks", "network": "BTCTEST"}']
+        assert BlockIOBackend(blocks_only=True).subscriptions() == ['{"type": "new-blocks", "network": "BTC"}']
+
+    def test_blockio_messages(self, listener):
+        backend = BlockIOBackend()
+        backend.listener = listener
+        message = simplejson.dumps({'type': 'new-transactions', 'data': {'txid': 'tx1', 'inputs': [{'address': P2PKH}], 'outputs': [{'address': P2WPKH}]}})
+
+        backend.on_message(None, message)
+        addresses, load = listener.on_transaction.call_args[0]
+        assert addresses == [P2PKH, P2WPKH]
+        assert load() == ('tx1', [P2PKH], [P2WPKH])
+
+        backend.on_message(None, simplejson.dumps({'type': 'new-blocks', 'data': {'block_no': 800000, 'block_hash': 'abc'}}))
+        listener.on_block.assert_called_once_with(800000, 'abc')
+        assert listener.refresh.call_count == 2
+
+    def test_blockchain_info_messages(self, listener):
+        backend = BlockchainInfoBackend()
+        backend.listener = listener
+        message = simplejson.dumps({'op': 'utx', 'x': {'hash': 'tx1', 'inputs': [{'prev_out': {'addr': P2PKH}}], 'out': [{'addr': P2WPKH}, {'addr': None}]}})
+
+        backend.on_message(None, message)
+        addresses, load = listener.on_transaction.call_args[0]
+        assert addresses == [P2PKH, P2WPKH]
+        assert load() == ('tx1', [P2PKH], [P2WPKH])
+
+        backend.on_message(None, simplejson.dumps({'op': 'block', 'x': {'height': 800000, 'hash': 'abc'}}))
+        listener.on_block.assert_called_once_with(800000, 'abc')
+
+
+class TestBitcoinCoreZMQBackend(object):
+    def test_notifications(self, listener):
+        backend = BitcoinCoreZMQBackend()
+        backend.listener = listener
+
+        backend.on_notification(b'rawtx', bytes.fromhex(SEGWIT_TX))
+        addresses, load = listener.on_transaction.call_args[0]
+        assert addresses == [P2SH_P2WPKH, P2SH_P2WPKH]
+        assert load()[0] == SEGWIT_TXID
+
+        backend.on_notification(b'hashblock', bytes.fromhex('00' * 31 + 'ff'))
+        listener.on_block.assert_called_once_with(None, '00' * 31 + 'ff')
+
+    def test_invalid_transaction(self, listener):
+        backend = BitcoinCoreZMQBackend()
+        backend.listener = listener
+        backend.on_notification(b'rawtx', b'\x01\x00')
+        listener.on_transaction.assert_not_called()
+
+
+class TestElectrumBackend(object):
+    def test_new_transactions_of_a_subscribed_address(self, listener):
+        backend = ElectrumBackend()
+        backend.listener = listener
+        backend.subscribed = {P2PKH: 'scripthash1'}
+        backend.request = mock.MagicMock()
+
+        # The first history is only remembered
+        backend.on_result('status', 'status1', P2PKH)
+        backend.request.assert_called_once_with('blockchain.scripthash.get_history', ['scripthash1'], 'history', P2PKH)
+        backend.on_result('history', [{'tx_hash': 'old', 'height': 700000}], P2PKH)
+
+        backend.request.reset_mock()
+        backend.on_response({'method': 'blockchain.scripthash.subscribe', 'params': ['scripthash1', 'status2']})
+        backend.on_result('history', [{'tx_hash': 'old', 'height': 700000}, {'tx_hash': LEGACY_TXID, 'height': 0}], P2PKH)
+        assert backend.request.call_args_list[-1] == mock.call('blockchain.transaction.get', [LEGACY_TXID], 'transaction', P2PKH)
+
+        backend.on_result('transaction', LEGACY_TX, P2PKH)
+        assert listener.on_transaction.call_args[0][1]() == (LEGACY_TXID, [P2PKH], [P2PKH, P2WPKH])
+
+    def test_spent_address_is_an_input(self, listener):
+        backend = ElectrumBackend()
+        backend.listener = listener
+        backend.subscribed = {'1Spender': 'scripthash1'}
+
+        backend.on_result('transaction', LEGACY_TX, '1Spender')
+        assert listener.on_transaction.call_args[0][1]() == (LEGACY_TXID, [P2PKH, '1Spender'], [P2PKH, P2WPKH])
+
+    def test_new_header(self, listener):
+        backend = ElectrumBackend()
+        backend.listener = listener
+        backend.on_response({'method': 'blockchain.headers.subscribe', 'params': [{'hex': '00' * 80, 'height': 800000}]})
+        assert listener.on_block.call_args[0][0] == 800000
+
+
+class TestMakeListenerBackend(object):
+    def test_make_listener_backend(self):
+        backend = make_listener_backend('electrum', url='ssl://electrum.example.com:50002', testnet=True)
+        assert isinstance(backend, ElectrumBackend)
+        assert backend.url == 'ssl://electrum.example.com:50002'
+        assert make_listener_backend('zmq').url == 'tcp://127.0.0.1:28332'
+
+        with pytest.raises(ValueError):
+            make_listener_backend('carrier pigeon')
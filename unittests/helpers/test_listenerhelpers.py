@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import time
+
+import mock
+import pytest
+import simplejson
+
+from helpers.listenerhelpers import TransactionListenerService, BloomFilter, BatchDispatcher, SEND, RECEIVE, MAX_SUBSCRIPTIONS_PER_ADDRESS, \
+    watch_address, unwatch_address, extract_addresses, parse_transaction
+from helpers.listenerbackends import ReplayBackend
+from helpers.eventbus import EventBus, BLOCK, TXID, ADDRESS as ADDRESS_TOPIC
+
+ADDRESS = '1BoatSLRHtKNngkdXEeobR76b53LETtpyT'
+OTHER_ADDRESS = '1Woutere8RCF82AgbPCc5F4KuYVvS4meW'
+
+
+def make_message(txid='abc123', inputs=None, outputs=None):
+    """A new-transactions message of block.io."""
+    return simplejson.dumps({'type': 'new-transactions',
+                             'data': {'txid': txid,
+                                      'inputs': [{'address': address, 'amount': 1000} for address in inputs or []],
+                                      'outputs': [{'address': address, 'amount': 1000} for address in outputs or []]}})
+
+
+@pytest.fixture
+def service():
+    """A listener service that does not dispatch anything."""
+    service = TransactionListenerService(max_addresses=3)
+    service.event_bus = EventBus()
+    with mock.patch.object(service, 'dispatch') as mock_dispatch:
+        service.mock_dispatch = mock_dispatch
+        yield service
+
+
+class TestTransactionListenerService(object):
+    def test_watch_and_unwatch(self, service):
+        assert service.watch(ADDRESS, RECEIVE, owner='payment1') is True
+        assert ADDRESS in service
+        assert service.owners == {'payment1': {ADDRESS}}
+
+        assert service.unwatch(ADDRESS) == 1
+        assert ADDRESS not in service
+        assert service.owners == {}
+        assert service.unwatch(ADDRESS) == 0
+
+    def test_unknown_event(self, service):
+        with pytest.raises(ValueError):
+            service.watch(ADDRESS, 'SPEND', owner='payment1')
+
+    def test_maximum_number_of_addresses(self, service):
+        for i in range(3):
+            assert service.watch('address%s' % i, RECEIVE, owner='payment%s' % i) is True
+        assert service.watch(ADDRESS, RECEIVE, owner='payment3') is False
+        # Another subscription to an address that is already watched does not need room
+        assert service.watch('address0', SEND, owner='payment0') is True
+        assert len(service) == 3
+
+    def test_maximum_number_of_subscriptions_per_address(self, service):
+        for i in range(MAX_SUBSCRIPTIONS_PER_ADDRESS):
+            assert service.watch(ADDRESS, RECEIVE, owner='owner%s' % i) is True
+        assert service.watch(ADDRESS, RECEIVE, owner='one_too_many') is False
+        assert service.watch(ADDRESS, RECEIVE, owner='owner0', command='echo replaced') is True
+
+    def test_unwatch_owner(self, service):
+        service.watch(ADDRESS, RECEIVE, owner='trigger:trigger1')
+        service.watch(ADDRESS, SEND, owner='trigger:trigger1')
+        service.watch(OTHER_ADDRESS, RECEIVE, owner='trigger:trigger1')
+        service.watch(OTHER_ADDRESS, RECEIVE, owner='payment1')
+
+        assert service.unwatch_owner('trigger:trigger1') == 3
+        assert ADDRESS not in service
+        assert service.subscriptions() == {OTHER_ADDRESS: [{'owner': 'payment1', 'event': RECEIVE, 'command': None, 'expires': None, 'once': False}]}
+
+    def test_matching_transaction_is_dispatched(self, service):
+        service.watch(ADDRESS, RECEIVE, owner='payment1')
+        service.watch(OTHER_ADDRESS, RECEIVE, owner='payment2')
+
+        service.on_transaction([OTHER_ADDRESS, ADDRESS, 'unknown'], lambda: ('abc123', [OTHER_ADDRESS], [ADDRESS, 'unknown']))
+        assert service.mock_dispatch.call_count == 1
+        assert service.mock_dispatch.call_args[1]['address'] == ADDRESS
+        assert service.mock_dispatch.call_args[1]['txid'] == 'abc123'
+        assert service.transactions == 1
+
+    def test_transactions_that_can_not_be_loaded_are_ignored(self, service):
+        service.watch(ADDRESS, RECEIVE, owner='payment1')
+        service.on_transaction([ADDRESS], lambda: None)
+        assert service.mock_dispatch.call_count == 0
+
+    def test_transactions_without_watched_addresses_are_not_loaded(self, service):
+        service.watch(ADDRESS, RECEIVE, owner='payment1')
+        load = mock.MagicMock()
+        service.on_transaction(['1Sender', '1Receiver'], load)
+        assert load.call_count == 0
+        assert service.transactions == 1
+
+    def test_new_blocks_are_published(self, service):
+        callback = mock.MagicMock()
+        service.event_bus.subscribe(BLOCK, None, subscriber='triggers', callback=callback)
+
+        service.on_block(800000, '00000000abc')
+        service.event_bus._executor.shutdown(wait=True)
+        callback.assert_called_once_with(BLOCK, None, [{'height': 800000, 'hash': '00000000abc'}])
+        assert service.stats()['last_block']['height'] == 800000
+        assert service.stats()['blocks'] == 1
+
+    def test_transactions_of_addresses_on_the_event_bus_are_published(self, service):
+        callback = mock.MagicMock()
+        service.event_bus.subscribe(ADDRESS_TOPIC, ADDRESS, subscriber='trigger:trigger1', callback=callback)
+        assert service.watched_addresses() == [ADDRESS]
+
+        service.on_transaction([OTHER_ADDRESS, ADDRESS], lambda: ('abc123', [OTHER_ADDRESS], [ADDRESS]))
+        service.event_bus._executor.shutdown(wait=True)
+        callback.assert_called_once_with(ADDRESS_TOPIC, ADDRESS, [{'address': ADDRESS, 'event': RECEIVE, 'txid': 'abc123'}])
+        assert service.mock_dispatch.call_count == 0
+
+    def test_every_transaction_is_loaded_while_a_txid_has_subscribers(self, service):
+        callback = mock.MagicMock()
+        service.event_bus.subscribe(TXID, 'abc123', subscriber='trigger:trigger1', callback=callback)
+
+        service.on_transaction(['1Sender', '1Receiver'], lambda: ('abc123', ['1Sender'], ['1Receiver']))
+        service.event_bus._executor.shutdown(wait=True)
+        callback.assert_called_once_with(TXID, 'abc123', [{'txid': 'abc123'}])
+
+    def test_replay_backend(self, tmp_path):
+        filename = tmp_path / 'mempool.txt'
+        filename.write_text('\n'.join([make_message(txid='tx1', outputs=[ADDRESS]),
+                                       simplejson.dumps({'type': 'new-blocks', 'data': {'block_no': 800000, 'block_hash': 'abc'}}),
+                                       make_message(txid='tx2', outputs=[OTHER_ADDRESS])]))
+        callback = mock.MagicMock()
+        block_callback = mock.MagicMock()
+        service = TransactionListenerService(backend=ReplayBackend(url=str(filename)))
+        service.event_bus = EventBus()
+        service.watch(ADDRESS, RECEIVE, owner='payment1', callback=callback)
+        service.event_bus.subscribe(BLOCK, None, subscriber='triggers', callback=block_callback)
+
+        service.start()
+        service._thread.join(timeout=5)
+        service._executor.shutdown(wait=True)
+        service.event_bus._executor.shutdown(wait=True)
+        callback.assert_called_once_with(ADDRESS, 'tx1')
+        block_callback.assert_called_once_with(BLOCK, None, [{'height': 800000, 'hash': 'abc'}])
+        assert service.transactions == 2
+
+    def test_once(self, service):
+        service.watch(ADDRESS, RECEIVE, owner='payment1', once=True)
+        service.process_transaction(txid='tx1', inputs=[], outputs=[ADDRESS, ADDRESS])
+        service.process_transaction(txid='tx2', inputs=[], outputs=[ADDRESS])
+        assert service.mock_dispatch.call_count == 1
+        assert ADDRESS not in service
+
+    def test_expire(self, service):
+        service.watch(ADDRESS, RECEIVE, owner='payment1', timeout=60)
+        service.watch(OTHER_ADDRESS, RECEIVE, owner='payment2')
+
+        assert service.expire(now=time.time()) == 0
+        assert service.expire(now=time.time() + 61) == 1
+        assert ADDRESS not in service
+        assert OTHER_ADDRESS in service
+
+    def test_load_watchlist(self, service, tmp_path):
+        filename = str(tmp_path / 'watchlist.json')
+        with open(filename, 'w') as output_file:
+            simplejson.dump({ADDRESS: {'SEND': 'echo sent', 'RECEIVE': 'echo received'}}, output_file)
+
+        service.watch(OTHER_ADDRESS, RECEIVE, owner='watchlist')
+        service.load_watchlist(filename=filename)
+        assert OTHER_ADDRESS not in service
+        assert sorted(subscription['command'] for subscription in service.subscriptions()[ADDRESS]) == ['echo received', 'echo sent']
+
+    def test_dispatch_command_and_callback(self):
+        service = TransactionListenerService()
+        callback = mock.MagicMock()
+        service.watch(ADDRESS, SEND, owner='payment1', command='notify #txid# #address#', callback=callback)
+
+        with mock.patch.object(service.dispatcher, 'submit') as mock_submit:
+            service.process_transaction(txid='tx1', inputs=[ADDRESS], outputs=[])
+            service._executor.shutdown(wait=True)
+
+        mock_submit.assert_called_once_with(target='notify #txid# #address#', address=ADDRESS, event=SEND, txid='tx1')
+        callback.assert_called_once_with(ADDRESS, 'tx1')
+        assert service.matches == 1
+
+
+class TestMessages(object):
+    def test_extract_addresses(self):
+        assert extract_addresses(make_message(inputs=[ADDRESS], outputs=[OTHER_ADDRESS, ADDRESS])) == [ADDRESS, OTHER_ADDRESS, ADDRESS]
+        assert extract_addresses('{"type": "subscribed"}') == []
+
+    def test_parse_transaction(self):
+        message = make_message(txid='tx1', inputs=[ADDRESS], outputs=[OTHER_ADDRESS, ''])
+        assert parse_transaction(message) == ('tx1', [ADDRESS], [OTHER_ADDRESS])
+        assert parse_transaction('{"type": "subscribed"}') is None
+        assert parse_transaction('not json') is None
+
+
+class TestBloomFilter(object):
+    def test_added_addresses_are_always_found(self):
+        addresses = ['address%s' % i for i in range(1000)]
+        bloom_filter = BloomFilter.from_addresses(addresses, error_rate=0.01)
+        assert all(address in bloom_filter for address in addresses)
+        assert len(bloom_filter) == 1000
+
+    def test_false_positive_rate(self):
+        bloom_filter = BloomFilter.from_addresses(['address%s' % i for i in range(1000)], error_rate=0.01)
+        false_positives = sum('other%s' % i in bloom_filter for i in range(10000))
+        assert false_positives < 300
+
+    def test_size(self):
+        # About 1.8 MB for a million addresses at 0.1%
+        assert 1700000 < len(BloomFilter(capacity=1000000, error_rate=0.001).bits) < 1900000
+
+
+class TestBatchDispatcher(object):
+    def test_commands_are_coalesced(self):
+        events = [{'address': ADDRESS, 'event': RECEIVE, 'txid': 'tx1'},
+                  {'address': ADDRESS, 'event': RECEIVE, 'txid': 'tx1'},
+                  {'address': OTHER_ADDRESS, 'event': RECEIVE, 'txid': 'tx2'}]
+        assert BatchDispatcher.commands('notify #txid#', events) == ['notify tx1', 'notify tx2']
+        assert BatchDispatcher.commands('notify #txids#', events) == ['notify tx1 tx2']
+        assert BatchDispatcher.commands('notify', events) == ['notify']
+
+    @mock.patch.object(BatchDispatcher, 'post_webhook')
+    @mock.patch.object(BatchDispatcher, 'run_command')
+    def test_batch_is_dispatched(self, mock_run_command, mock_post_webhook):
+        dispatcher = BatchDispatcher(batch_window=60)
+        assert dispatcher.submit('notify #txid#', ADDRESS, RECEIVE, 'tx1') is True
+        assert dispatcher.submit('notify #txid#', ADDRESS, RECEIVE, 'tx2') is True
+        assert dispatcher.submit('https://example.com/hook', ADDRESS, RECEIVE, 'tx1') is True
+        assert dispatcher.submit('https://example.com/hook', OTHER_ADDRESS, SEND, 'tx3') is True
+
+        dispatcher.flush()
+        assert sorted(call[0][0] for call in mock_run_command.call_args_list) == ['notify tx1', 'notify tx2']
+        mock_post_webhook.assert_called_once_with('https://example.com/hook', [{'address': ADDRESS, 'event': RECEIVE, 'txid': 'tx1'},
+                                                                               {'address': OTHER_ADDRESS, 'event': SEND, 'txid': 'tx3'}])
+        assert dispatcher.dispatched == 4
+        assert dispatcher.pending == {}
+
+    @mock.patch.object(BatchDispatcher, 'run_command')
+    def test_batch_window(self, mock_run_command):
+        dispatcher = BatchDispatcher(batch_window=0.05)
+        dispatcher.submit('notify #txids#', ADDRESS, RECEIVE, 'tx1')
+        dispatcher.submit('notify #txids#', ADDRESS, RECEIVE, 'tx2')
+
+        for _ in range(100):
+            if mock_run_command.called:
+                break
+            time.sleep(0.05)
+        mock_run_command.assert_called_once_with('notify tx1 tx2')
+
+    def test_events_are_dropped_when_full(self):
+        dispatcher = BatchDispatcher(batch_window=60, max_pending=1)
+        assert dispatcher.submit('notify', ADDRESS, RECEIVE, 'tx1') is True
+        assert dispatcher.submit('notify', ADDRESS, RECEIVE, 'tx2') is False
+        assert dispatcher.dropped == 1
+
+
+class TestRegistrationApi(object):
+    @mock.patch('helpers.listenerhelpers.LISTENER_SERVICE', new_callable=TransactionListenerService)
+    def test_watch_address(self, mock_service):
+        assert 'error' in watch_address(ADDRESS, event=RECEIVE, owner='payment1')
+
+        mock_service.running = True
+        assert 'error' in watch_address(ADDRESS, event='SPEND', owner='payment1')
+        assert 'error' in watch_address(ADDRESS, event=RECEIVE)
+        assert 'error' in watch_address(ADDRESS, event=RECEIVE, owner='payment1', timeout=-1)
+        assert watch_address(ADDRESS, event=RECEIVE, owner='payment1', timeout=900, once=True) is None
+        assert mock_service.subscriptions(ADDRESS)[ADDRESS][0]['once'] is True
+
+        assert unwatch_address(ADDRESS, owner='payment2') == {'error': 'Address %s is not watched' % ADDRESS}
+        assert unwatch_address(ADDRESS, owner='payment1') is None
@@ -1,7 +1,14 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import io
+import json
+import logging
+import os
+from datetime import datetime
 
-from helpers.loghelpers import get_logs, LOG, REQUESTS_LOG
+import pytest
+
+from helpers.loghelpers import get_logs, iter_logs, seek_timestamp, is_timestamp_prefix, LOG, REQUESTS_LOG, AccessLog, AccessLogFormatter
 
 
 class TestLogHelpers(object):
@@ -46,9 +53,9 @@ class TestLogHelpers(object):
         """Test that REQUESTS_LOG has handlers configured"""
         assert len(REQUESTS_LOG.handlers) >= 1  # file handler
 
-    def test_get_logs_returns_sorted(self):
+    def test_get_logs_returns_sorted(self, log_files):
         """Test that get_logs returns sorted results"""
-        logs = get_logs()
+        logs = [line for line in get_logs() if not line.startswith('Traceback')]
         # Verify it's a list (sorting is done internally)
         assert isinstance(logs, list)
         # If there are logs, verify they're sorted
@@ -79,3 +86,131 @@ class TestLogHelpers(object):
         file_count = sum(1 for h in LOG.handlers if isinstance(h, logging.handlers.RotatingFileHandler))
         assert stream_count >= 1
         assert file_count >= 1
+
+
+class TestAccessLog(object):
+    """Tests for the background writer of the requests log"""
+
+    @staticmethod
+    def make_access_log(max_queue=100):
+        stream = io.StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(AccessLogFormatter('%(message)s'))
+        logger = logging.getLogger('test_access_log_%s' % id(stream))
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        return AccessLog(logger=logger, handlers=[handler], max_queue=max_queue), stream
+
+    def test_records_are_written_as_json_by_the_writer_thread(self):
+        access_log, stream = self.make_access_log()
+        access_log.start()
+        access_log.logger.info({'time': datetime(2017, 7, 14, 13, 0), 'status': 200})
+        access_log.logger.info('plain message')
+        access_log.stop()
+
+        lines = stream.getvalue().splitlines()
+        assert json.loads(lines[0]) == {'time': '2017-07-14 13:00:00', 'status': 200}
+        assert lines[1] == 'plain message'
+
+    def test_records_are_dropped_when_the_queue_is_full(self):
+        access_log, stream = self.make_access_log(max_queue=2)
+        for i in range(5):
+            access_log.logger.info({'request': i})
+        assert access_log.dropped == 3
+
+        access_log.start()
+        access_log.stop()
+        assert len(stream.getvalue().splitlines()) == 2
+
+    def test_restart_after_fork(self):
+        access_log, stream = self.make_access_log()
+        access_log.start()
+        old_queue = access_log.queue_handler.queue
+        access_log.restart_after_fork()
+        try:
+            assert access_log.queue_handler.queue is not old_queue
+            assert access_log.listener is not None
+        finally:
+            access_log.stop()
+
+    def test_truncate(self):
+        access_log, _ = self.make_access_log()
+        access_log.configure(max_body=5)
+        assert access_log.truncate('short') == 'short'
+        assert access_log.truncate('much longer') == 'much ...(6 more)'
+
+    def test_sampling(self):
+        access_log, _ = self.make_access_log()
+        access_log.configure(sample_rate=0.0)
+        assert access_log.is_sampled(200) is False
+        assert access_log.is_sampled(500) is True
+        access_log.configure(sample_rate=1.0)
+        assert access_log.is_sampled(200) is True
+
+
+@pytest.fixture
+def log_files(tmp_path, monkeypatch):
+    """A current and two rotated log files, with the messages of consecutive seconds spread over them."""
+    def message(second, level='INFO', text='message'):
+        return '2017-07-14 13:00:%02d,000 | %s | %s %s\n' % (second, level, text, second)
+
+    (tmp_path / 'spellbook.txt.2').write_text(''.join(message(second) for second in range(0, 10)))
+    (tmp_path / 'spellbook.txt.1').write_text(''.join(message(second) for second in range(10, 20)) +
+                                              'Traceback (most recent call last):\n' + message(20, 'ERROR', 'failed'))
+    (tmp_path / 'spellbook.txt').write_text(''.join(message(second) for second in range(21, 30)))
+    monkeypatch.setattr('helpers.loghelpers.logs_dir', str(tmp_path))
+    return tmp_path
+
+
+class TestLogQuery(object):
+    """Tests for querying the log files"""
+
+    def test_files_are_merged_in_order(self, log_files):
+        logs = get_logs()
+        assert len(logs) == 31
+        assert logs[0] == '2017-07-14 13:00:00,000 | INFO | message 0'
+        assert logs[-1] == '2017-07-14 13:00:29,000 | INFO | message 29'
+
+    def test_substring_filter(self, log_files):
+        assert get_logs(filter_string='message 1') == ['2017-07-14 13:00:01,000 | INFO | message 1'] + \
+            ['2017-07-14 13:00:%02d,000 | INFO | message %s' % (second, second) for second in range(10, 20)]
+
+    def test_timestamp_prefix_filter(self, log_files):
+        assert get_logs(filter_string='2017-07-14 13:00:2') == get_logs(start='2017-07-14 13:00:20', end='2017-07-14 13:00:30')
+        assert len(get_logs(filter_string='2017-07-14 13:00:2')) == 10
+
+    def test_time_range(self, log_files):
+        logs = get_logs(start='2017-07-14 13:00:05', end='2017-07-14 13:00:08')
+        assert [line[17:19] for line in logs] == ['05', '06', '07']
+
+    def test_level(self, log_files):
+        assert get_logs(level='warning') == ['2017-07-14 13:00:20,000 | ERROR | failed 20']
+        with pytest.raises(ValueError):
+            get_logs(level='LOUD')
+
+    def test_multi_line_messages_keep_their_timestamp(self, log_files):
+        logs = get_logs(start='2017-07-14 13:00:19', end='2017-07-14 13:00:20')
+        assert logs == ['2017-07-14 13:00:19,000 | INFO | message 19', 'Traceback (most recent call last):']
+
+    def test_limit(self, log_files):
+        assert len(get_logs(limit=3)) == 3
+
+    def test_results_are_streamed(self, log_files):
+        logs = iter_logs()
+        assert next(logs) == '2017-07-14 13:00:00,000 | INFO | message 0'
+
+    def test_seek_timestamp(self, log_files):
+        with open(str(log_files / 'spellbook.txt.2'), 'rb') as log_file:
+            seek_timestamp(log_file, '2017-07-14 13:00:04')
+            assert log_file.readline().startswith(b'2017-07-14 13:00:04')
+
+            seek_timestamp(log_file, '2017-07-14 13:01')
+            assert log_file.readline() == b''
+
+            seek_timestamp(log_file, '2017')
+            assert log_file.readline().startswith(b'2017-07-14 13:00:00')
+
+    def test_is_timestamp_prefix(self):
+        assert is_timestamp_prefix('2019-08-19 21:') is True
+        assert is_timestamp_prefix('ERROR') is False
+        assert is_timestamp_prefix('2019', min_length=7) is False
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import mock
+import pytest
+
+from helpers.scripthelpers import ScriptRegistry
+
+SCRIPT_SOURCE = '''
+class Greeter(object):
+    greeting = %r
+'''
+
+
+@pytest.fixture
+def scripts_dir(tmp_path, monkeypatch):
+    """A package with a single script, used as the only root directory for scripts."""
+    package = tmp_path / 'registryscripts'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    (package / 'Greeter.py').write_text(SCRIPT_SOURCE % 'hello')
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr('helpers.scripthelpers.SCRIPT_ROOT_DIRS', ['registryscripts'])
+    yield package
+    for module_name in ['registryscripts.Greeter', 'registryscripts']:
+        sys.modules.pop(module_name, None)
+
+
+class TestScriptRegistry(object):
+    def test_script_is_imported_once(self, scripts_dir):
+        registry = ScriptRegistry()
+        assert registry.get_class('Greeter.py').greeting == 'hello'
+        with mock.patch('helpers.scripthelpers.os.path.isfile') as mock_isfile:
+            assert registry.get_class('Greeter.py').greeting == 'hello'
+            mock_isfile.assert_not_called()
+        assert registry.imports == 1
+
+    def test_modified_script_is_reloaded(self, scripts_dir):
+        registry = ScriptRegistry()
+        registry.get_class('Greeter.py')
+
+        script_path = scripts_dir / 'Greeter.py'
+        script_path.write_text(SCRIPT_SOURCE % 'hello again')
+        stat = os.stat(script_path)
+        os.utime(script_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        assert registry.get_class('Greeter.py').greeting == 'hello again'
+        assert registry.imports == 2
+
+    def test_unknown_script(self, scripts_dir):
+        assert ScriptRegistry().get_class('Unknown.py') is None
+
+    def test_deleted_script_is_forgotten(self, scripts_dir):
+        registry = ScriptRegistry()
+        registry.get_class('Greeter.py')
+        os.remove(scripts_dir / 'Greeter.py')
+        assert registry.get_class('Greeter.py') is None
+        assert registry.scripts == {}
+
+    def test_preload(self, scripts_dir):
+        registry = ScriptRegistry()
+        assert registry.preload(['Greeter.py', 'Greeter.py', 'Unknown.py']) == 1
+        assert 'Greeter.py' in registry.scripts
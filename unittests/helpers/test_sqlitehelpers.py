@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+
+import mock
+
+from helpers.sqlitehelpers import SQLiteDatabase
+
+
+class ItemsDatabase(SQLiteDatabase):
+    def setup(self, connection):
+        connection.execute('CREATE TABLE IF NOT EXISTS items (name TEXT PRIMARY KEY)')
+
+
+class TestSQLiteDatabase(object):
+    def test_connection_is_reused(self, tmp_path):
+        database = ItemsDatabase(filename=str(tmp_path / 'sub' / 'items.db'))
+        connection = database.connection()
+        assert database.connection() is connection
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+        # The table was created by setup() and the connection is in autocommit mode
+        connection.execute("INSERT INTO items (name) VALUES ('a')")
+        assert ItemsDatabase(filename=database.filename).connection().execute('SELECT name FROM items').fetchall() == [('a',)]
+
+    def test_forked_process_opens_its_own_connection(self, tmp_path):
+        database = ItemsDatabase(filename=str(tmp_path / 'items.db'))
+        connection = database.connection()
+        with mock.patch('helpers.sqlitehelpers.os.getpid', return_value=os.getpid() + 1):
+            assert database.connection() is not connection
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+from helpers.jsonhelpers import save_to_json_file
+from helpers.storagehelpers import DocumentStore, StorageDatabase, TRIGGER_STORE, ACTION_STORE, use_sqlite_storage
+from helpers.triggerhelpers import TriggerRepository
+
+
+@pytest.fixture(params=['files', 'sqlite'])
+def store(request, tmp_path):
+    """A store of the configs of triggers, with each backend."""
+    store = DocumentStore(collection='triggers', directory=str(tmp_path / 'triggers'))
+    if request.param == 'sqlite':
+        store.database = StorageDatabase(filename=str(tmp_path / 'spellbook.db'))
+    return store
+
+
+@pytest.fixture
+def global_stores():
+    """Switch the trigger and action stores back to the json files after a test."""
+    yield
+    TRIGGER_STORE.database = None
+    ACTION_STORE.database = None
+
+
+class TestDocumentStore(object):
+    def test_save_and_load(self, store):
+        store.save('trigger1', {'trigger_type': 'Manual', 'actions': ['action1']})
+        assert store.load('trigger1') == {'trigger_type': 'Manual', 'actions': ['action1']}
+        assert store.exists('trigger1') is True
+        assert store.ids() == ['trigger1']
+
+    def test_unknown_config(self, store):
+        assert store.load('unknown') is None
+        assert store.exists('unknown') is False
+        assert store.version('unknown') is None
+        assert store.ids() == []
+        assert store.versions() == {}
+
+    def test_version_changes_when_saved(self, store):
+        store.save('trigger1', {'status': 'Active'})
+        version = store.version('trigger1')
+        assert store.versions() == {'trigger1': version}
+
+        store.save('trigger1', {'status': 'Succeeded!'})
+        assert store.version('trigger1') != version
+
+    def test_delete(self, store):
+        store.save('trigger1', {'status': 'Active'})
+        assert store.delete('trigger1') is True
+        assert store.delete('trigger1') is False
+        assert store.load('trigger1') is None
+
+    def test_recreated_config_gets_a_new_version(self, tmp_path):
+        store = DocumentStore(collection='triggers', directory=str(tmp_path))
+        store.database = StorageDatabase(filename=str(tmp_path / 'spellbook.db'))
+        store.save('trigger1', {'status': 'Active'})
+        version = store.version('trigger1')
+        store.delete('trigger1')
+        store.save('trigger1', {'status': 'Active'})
+        assert store.version('trigger1') != version
+
+    def test_collections_are_separate(self, tmp_path):
+        database = StorageDatabase(filename=str(tmp_path / 'spellbook.db'))
+        triggers = DocumentStore(collection='triggers', directory=str(tmp_path / 'triggers'))
+        actions = DocumentStore(collection='actions', directory=str(tmp_path / 'actions'))
+        triggers.database = actions.database = database
+
+        triggers.save('same_id', {'trigger_type': 'Manual'})
+        assert actions.load('same_id') is None
+        assert actions.ids() == []
+
+    def test_import_files(self, tmp_path):
+        store = DocumentStore(collection='triggers', directory=str(tmp_path / 'triggers'))
+        save_to_json_file(store.filename('trigger1'), {'status': 'Active'})
+        save_to_json_file(store.filename('trigger2'), {'status': 'Succeeded'})
+
+        store.database = StorageDatabase(filename=str(tmp_path / 'spellbook.db'))
+        store.save('trigger2', {'status': 'Failed'})
+        assert store.import_files() == 1
+        assert store.load('trigger1') == {'status': 'Active'}
+        # A config that is already in the database is not overwritten by its old json file
+        assert store.load('trigger2') == {'status': 'Failed'}
+        assert store.import_files() == 0
+
+
+class TestTriggerRepositoryWithDatabase(object):
+    def test_unchanged_config_is_parsed_once(self, tmp_path):
+        store = DocumentStore(collection='triggers', directory=str(tmp_path))
+        store.database = StorageDatabase(filename=str(tmp_path / 'spellbook.db'))
+        repository = TriggerRepository(store=store)
+
+        store.save('trigger1', {'trigger_type': 'Manual', 'status': 'Active'})
+        for _ in range(5):
+            assert repository.get_trigger_ids(status='Active') == ['trigger1']
+        assert repository.loads == 1
+
+        store.save('trigger1', {'trigger_type': 'Manual', 'status': 'Succeeded'})
+        assert repository.get_config('trigger1')['status'] == 'Succeeded'
+        assert repository.loads == 2
+
+
+class TestUseSqliteStorage(object):
+    def test_triggers_and_actions_are_imported(self, global_stores, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        save_to_json_file(TRIGGER_STORE.filename('trigger1'), {'trigger_type': 'Manual'})
+        save_to_json_file(ACTION_STORE.filename('action1'), {'action_type': 'Command'})
+
+        use_sqlite_storage()
+        assert os.path.isfile('json/public/spellbook.db')
+        assert TRIGGER_STORE.database is ACTION_STORE.database
+        assert TRIGGER_STORE.ids() == ['trigger1']
+        assert ACTION_STORE.load('action1') == {'action_type': 'Command'}
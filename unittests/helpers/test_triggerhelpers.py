@@ -1,5 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import os
+import threading
+import time
+
 import pytest
 import mock
 
@@ -19,144 +23,221 @@ from helpers.triggerhelpers import (
     http_options_request,
     signed_message_request,
     file_download,
+    TriggerRepository,
+    TriggerSnapshot,
+    TriggerScheduler,
+    preload_trigger_scripts,
+    BLOCK_TRIGGER_CHECKS,
+    watch_trigger,
+    watch_triggers,
+    check_trigger_event,
+    check_block_event,
+    check_block_triggers,
+    BLOCK_TRIGGER_TYPES,
+    PENDING_TRIGGERS,
+    PENDING_BLOCKS,
 )
+from helpers.eventbus import EventBus, ADDRESS, TXID, BLOCK
+from helpers.listenerhelpers import RECEIVE
+from helpers.jsonhelpers import save_to_json_file
+from trigger.balancetrigger import BalanceTrigger
+from trigger.blockheighttrigger import BlockHeightTrigger
+from trigger.deadmansswitchtrigger import DeadMansSwitchTrigger
+from trigger.receivedtrigger import ReceivedTrigger
+from trigger.recurringtrigger import RecurringTrigger
+from trigger.senttrigger import SentTrigger
+from trigger.timestamptrigger import TimestampTrigger
+from trigger.txconfirmationtrigger import TxConfirmationTrigger
 from trigger.triggertype import TriggerType
 
 
+@pytest.fixture
+def repository(tmp_path):
+    return TriggerRepository(triggers_dir=str(tmp_path))
+
+
+def write_trigger(repository, trigger_id, **config):
+    save_to_json_file(repository.filename(trigger_id), config)
+
+
+class TestTriggerRepository(object):
+    def test_get_config(self, repository):
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL, status='Active')
+        assert repository.get_config('trigger1') == {'trigger_type': TriggerType.MANUAL, 'status': 'Active'}
+        assert repository.get_config('unknown') is None
+
+    def test_unchanged_file_is_parsed_once(self, repository):
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL)
+        for _ in range(5):
+            repository.get_config('trigger1')
+        assert repository.loads == 1
+
+    def test_changed_file_is_parsed_again(self, repository):
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL, status='Active')
+        repository.get_config('trigger1')
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL, status='Succeeded')
+        assert repository.get_config('trigger1')['status'] == 'Succeeded'
+
+    def test_get_config_returns_a_copy(self, repository):
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL, actions=['action1'])
+        repository.get_config('trigger1')['actions'].append('action2')
+        assert repository.get_config('trigger1')['actions'] == ['action1']
+
+    def test_deleted_file(self, repository):
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL)
+        repository.get_config('trigger1')
+        os.remove(repository.filename('trigger1'))
+        assert repository.exists('trigger1') is False
+        assert repository.get_config('trigger1') is None
+        assert 'trigger1' not in repository.configs
+
+    def test_get_trigger_ids_by_type_and_status(self, repository):
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL, status='Active')
+        write_trigger(repository, 'trigger2', trigger_type=TriggerType.BALANCE, status='Active')
+        write_trigger(repository, 'trigger3', trigger_type=TriggerType.BALANCE, status='Succeeded')
+        assert sorted(repository.get_trigger_ids()) == ['trigger1', 'trigger2', 'trigger3']
+        assert repository.loads == 0
+        assert sorted(repository.get_trigger_ids(trigger_type=TriggerType.BALANCE)) == ['trigger2', 'trigger3']
+        assert repository.get_trigger_ids(trigger_type=TriggerType.BALANCE, status='Active') == ['trigger2']
+        assert sorted(repository.get_trigger_ids(status='Active')) == ['trigger1', 'trigger2']
+        assert repository.loads == 3
+
+    def test_get_trigger_ids_missing_directory(self, tmp_path):
+        assert TriggerRepository(triggers_dir=str(tmp_path / 'missing')).get_trigger_ids() == []
+
+
 class TestTriggerHelpers(object):
     """Tests for trigger helper functions"""
 
-    @mock.patch('helpers.triggerhelpers.glob.glob')
-    def test_get_triggers(self, mock_glob):
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_trigger_ids')
+    def test_get_triggers(self, mock_get_trigger_ids):
         """Test getting list of trigger IDs"""
-        mock_glob.return_value = [
-            'json/public/triggers/trigger1.json',
-            'json/public/triggers/trigger2.json',
-        ]
+        mock_get_trigger_ids.return_value = ['trigger1', 'trigger2']
         result = get_triggers()
         assert 'trigger1' in result
         assert 'trigger2' in result
+        mock_get_trigger_ids.assert_called_once_with(trigger_type=None, status=None)
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_config(self, mock_load):
         """Test getting trigger configuration"""
         mock_load.return_value = {'trigger_type': 'Manual'}
         result = get_trigger_config('test_trigger')
         assert result['trigger_type'] == 'Manual'
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_config_not_found(self, mock_load):
         """Test getting config for non-existent trigger"""
-        mock_load.side_effect = IOError('File not found')
+        mock_load.return_value = None
         result = get_trigger_config('nonexistent')
         assert result == {}
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_manual(self, mock_load):
         """Test getting a Manual trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.MANUAL}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.MANUAL
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_balance(self, mock_load):
         """Test getting a Balance trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.BALANCE}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.BALANCE
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_received(self, mock_load):
         """Test getting a Received trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.RECEIVED}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.RECEIVED
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_sent(self, mock_load):
         """Test getting a Sent trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.SENT}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.SENT
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_block_height(self, mock_load):
         """Test getting a BlockHeight trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.BLOCK_HEIGHT}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.BLOCK_HEIGHT
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_tx_confirmation(self, mock_load):
         """Test getting a TxConfirmation trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.TX_CONFIRMATION}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.TX_CONFIRMATION
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_timestamp(self, mock_load):
         """Test getting a Timestamp trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.TIMESTAMP}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.TIMESTAMP
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_recurring(self, mock_load):
         """Test getting a Recurring trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.RECURRING}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.RECURRING
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_triggerstatus(self, mock_load):
         """Test getting a TriggerStatus trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.TRIGGERSTATUS}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.TRIGGERSTATUS
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_deadmansswitch(self, mock_load):
         """Test getting a DeadMansSwitch trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.DEADMANSSWITCH}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.DEADMANSSWITCH
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_signedmessage(self, mock_load):
         """Test getting a SignedMessage trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.SIGNEDMESSAGE}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.SIGNEDMESSAGE
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_httpget(self, mock_load):
         """Test getting a HTTPGetRequest trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.HTTPGETREQUEST}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.HTTPGETREQUEST
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_httppost(self, mock_load):
         """Test getting a HTTPPostRequest trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.HTTPPOSTREQUEST}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.HTTPPOSTREQUEST
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_httpdelete(self, mock_load):
         """Test getting a HTTPDeleteRequest trigger"""
         mock_load.return_value = {'trigger_type': TriggerType.HTTPDELETEREQUEST}
         trigger = get_trigger('test_trigger')
         assert trigger.trigger_type == TriggerType.HTTPDELETEREQUEST
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_unknown_type(self, mock_load):
         """Test getting a trigger with unknown type raises error"""
         mock_load.return_value = {'trigger_type': 'UnknownType'}
         with pytest.raises(NotImplementedError):
             get_trigger('test_trigger')
 
-    @mock.patch('helpers.triggerhelpers.load_from_json_file')
+    @mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY.get_config')
     def test_get_trigger_with_type_override(self, mock_load):
         """Test getting a trigger with type override"""
         mock_load.return_value = {'trigger_type': TriggerType.MANUAL}
@@ -252,9 +333,9 @@ class TestTriggerHelpers(object):
         mock_trigger.conditions_fulfilled.assert_called_once()
         mock_trigger.activate.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_check_triggers_specific(self, mock_get_trigger, mock_get_triggers):
+    def test_check_triggers_specific(self, mock_get_trigger, mock_trigger_exists):
         """Test checking a specific trigger"""
         mock_trigger = mock.MagicMock()
         mock_trigger.status = 'Active'
@@ -265,15 +346,15 @@ class TestTriggerHelpers(object):
         check_triggers(trigger_id='trigger1')
         mock_trigger.conditions_fulfilled.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
-    def test_check_triggers_unknown(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_check_triggers_unknown(self, mock_trigger_exists):
         """Test checking an unknown trigger"""
         result = check_triggers(trigger_id='unknown')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_get_request(self, mock_get_trigger, mock_get_triggers):
+    def test_http_get_request(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP GET request trigger"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.HTTPGETREQUEST
@@ -284,15 +365,15 @@ class TestTriggerHelpers(object):
         mock_trigger.set_json_data.assert_called_once()
         mock_trigger.activate.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
-    def test_http_get_request_unknown(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_http_get_request_unknown(self, mock_trigger_exists):
         """Test HTTP GET request with unknown trigger"""
         result = http_get_request('unknown')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_get_request_wrong_type(self, mock_get_trigger, mock_get_triggers):
+    def test_http_get_request_wrong_type(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP GET request with wrong trigger type"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.MANUAL
@@ -301,9 +382,9 @@ class TestTriggerHelpers(object):
         result = http_get_request('trigger1')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_post_request(self, mock_get_trigger, mock_get_triggers):
+    def test_http_post_request(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP POST request trigger"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.HTTPPOSTREQUEST
@@ -314,15 +395,15 @@ class TestTriggerHelpers(object):
         mock_trigger.set_json_data.assert_called_once()
         mock_trigger.activate.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
-    def test_http_post_request_unknown(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_http_post_request_unknown(self, mock_trigger_exists):
         """Test HTTP POST request with unknown trigger"""
         result = http_post_request('unknown')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_post_request_wrong_type(self, mock_get_trigger, mock_get_triggers):
+    def test_http_post_request_wrong_type(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP POST request with wrong trigger type"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.MANUAL
@@ -331,9 +412,9 @@ class TestTriggerHelpers(object):
         result = http_post_request('trigger1')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_delete_request(self, mock_get_trigger, mock_get_triggers):
+    def test_http_delete_request(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP DELETE request trigger"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.HTTPDELETEREQUEST
@@ -344,15 +425,15 @@ class TestTriggerHelpers(object):
         mock_trigger.set_json_data.assert_called_once()
         mock_trigger.activate.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
-    def test_http_delete_request_unknown(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_http_delete_request_unknown(self, mock_trigger_exists):
         """Test HTTP DELETE request with unknown trigger"""
         result = http_delete_request('unknown')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_delete_request_wrong_type(self, mock_get_trigger, mock_get_triggers):
+    def test_http_delete_request_wrong_type(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP DELETE request with wrong trigger type"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.MANUAL
@@ -361,9 +442,9 @@ class TestTriggerHelpers(object):
         result = http_delete_request('trigger1')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_signed_message_request(self, mock_get_trigger, mock_get_triggers):
+    def test_signed_message_request(self, mock_get_trigger, mock_trigger_exists):
         """Test SignedMessage request trigger"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.SIGNEDMESSAGE
@@ -373,15 +454,15 @@ class TestTriggerHelpers(object):
         signed_message_request('trigger1', message='test', message_address='addr', message_signature='sig')
         mock_trigger.activate.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
-    def test_signed_message_request_unknown(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_signed_message_request_unknown(self, mock_trigger_exists):
         """Test SignedMessage request with unknown trigger"""
         result = signed_message_request('unknown')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_signed_message_request_wrong_type(self, mock_get_trigger, mock_get_triggers):
+    def test_signed_message_request_wrong_type(self, mock_get_trigger, mock_trigger_exists):
         """Test SignedMessage request with wrong trigger type"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.MANUAL
@@ -390,9 +471,9 @@ class TestTriggerHelpers(object):
         result = signed_message_request('trigger1')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_file_download(self, mock_get_trigger, mock_get_triggers):
+    def test_file_download(self, mock_get_trigger, mock_trigger_exists):
         """Test file download trigger"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.HTTPGETREQUEST
@@ -403,15 +484,15 @@ class TestTriggerHelpers(object):
         mock_trigger.set_json_data.assert_called_once()
         mock_trigger.activate.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
-    def test_file_download_unknown(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_file_download_unknown(self, mock_trigger_exists):
         """Test file download with unknown trigger"""
         result = file_download('unknown')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_file_download_wrong_type(self, mock_get_trigger, mock_get_triggers):
+    def test_file_download_wrong_type(self, mock_get_trigger, mock_trigger_exists):
         """Test file download with wrong trigger type"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.MANUAL
@@ -430,15 +511,15 @@ class TestVerifySignedMessage(object):
         assert 'error' in result
         assert 'required keys' in result['error']
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
-    def test_verify_signed_message_unknown_trigger(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_verify_signed_message_unknown_trigger(self, mock_trigger_exists):
         """Test verify_signed_message with unknown trigger"""
         result = verify_signed_message('unknown', address='addr', message='msg', signature='sig')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_verify_signed_message_wrong_type(self, mock_get_trigger, mock_get_triggers):
+    def test_verify_signed_message_wrong_type(self, mock_get_trigger, mock_trigger_exists):
         """Test verify_signed_message with wrong trigger type"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.MANUAL
@@ -447,9 +528,9 @@ class TestVerifySignedMessage(object):
         result = verify_signed_message('trigger1', address='addr', message='msg', signature='sig')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_verify_signed_message_wrong_address(self, mock_get_trigger, mock_get_triggers):
+    def test_verify_signed_message_wrong_address(self, mock_get_trigger, mock_trigger_exists):
         """Test verify_signed_message with wrong address"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.SIGNEDMESSAGE
@@ -485,7 +566,7 @@ class TestSignMessage(object):
         assert 'too long' in result['error']
 
     @mock.patch('helpers.triggerhelpers.valid_address', return_value=True)
-    @mock.patch('helpers.triggerhelpers.find_address_in_wallet', return_value=(None, None))
+    @mock.patch('helpers.triggerhelpers.find_address_path', return_value=None)
     @mock.patch('helpers.triggerhelpers.find_single_address_in_wallet', return_value=None)
     def test_sign_message_address_not_found(self, mock_find_single, mock_find, mock_valid):
         """Test sign_message when address not in wallet"""
@@ -494,7 +575,7 @@ class TestSignMessage(object):
         assert 'not found in hot wallet' in result['error']
 
     @mock.patch('helpers.triggerhelpers.valid_address', return_value=True)
-    @mock.patch('helpers.triggerhelpers.find_address_in_wallet', return_value=(0, 0))
+    @mock.patch('helpers.triggerhelpers.find_address_path', return_value=(0, 0, 0))
     @mock.patch('helpers.triggerhelpers.get_private_key_from_wallet', return_value={'addr': 'privkey'})
     @mock.patch('helpers.triggerhelpers.sign_and_verify', return_value='signature')
     def test_sign_message_success(self, mock_sign, mock_get_key, mock_find, mock_valid):
@@ -504,7 +585,7 @@ class TestSignMessage(object):
         assert result['signature'] == 'signature'
 
     @mock.patch('helpers.triggerhelpers.valid_address', return_value=True)
-    @mock.patch('helpers.triggerhelpers.find_address_in_wallet', return_value=(None, None))
+    @mock.patch('helpers.triggerhelpers.find_address_path', return_value=None)
     @mock.patch('helpers.triggerhelpers.find_single_address_in_wallet', return_value='privkey')
     @mock.patch('helpers.triggerhelpers.sign_and_verify', return_value='signature')
     def test_sign_message_single_address(self, mock_sign, mock_find_single, mock_find, mock_valid):
@@ -513,7 +594,7 @@ class TestSignMessage(object):
         assert result['success']
 
     @mock.patch('helpers.triggerhelpers.valid_address', return_value=True)
-    @mock.patch('helpers.triggerhelpers.find_address_in_wallet', return_value=(0, 0))
+    @mock.patch('helpers.triggerhelpers.find_address_path', return_value=(0, 0, 0))
     @mock.patch('helpers.triggerhelpers.get_private_key_from_wallet', return_value={'addr': 'privkey'})
     @mock.patch('helpers.triggerhelpers.sign_and_verify', side_effect=Exception('Sign error'))
     def test_sign_message_error(self, mock_sign, mock_get_key, mock_find, mock_valid):
@@ -561,14 +642,38 @@ class TestCheckTriggersAdvanced(object):
         assert mock_delete_action.call_count == 2
         mock_delete_trigger.assert_called_once()
 
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_concurrent_checks_activate_once(self, mock_get_trigger, repository):
+        write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL, status='Active')
+        loaded = threading.Barrier(2)
+
+        def get_loaded_trigger(trigger_id):
+            repository.get_config(trigger_id)
+            loaded.wait(5)
+            return mock_trigger
+
+        mock_trigger = mock.MagicMock(status='Active', self_destruct=None)
+        mock_trigger.conditions_fulfilled.side_effect = lambda: time.sleep(0.1) or True
+        mock_trigger.activate.side_effect = lambda: write_trigger(repository, 'trigger1', trigger_type=TriggerType.MANUAL, status='Succeeded')
+        mock_get_trigger.side_effect = get_loaded_trigger
+
+        with mock.patch('helpers.triggerhelpers.TRIGGER_REPOSITORY', repository):
+            threads = [threading.Thread(target=check_triggers, kwargs={'trigger_id': 'trigger1'}) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(5)
+
+        mock_trigger.activate.assert_called_once()
+
 
 class TestVerifySignedMessageAdvanced(object):
     """Advanced tests for verify_signed_message function"""
 
     @mock.patch('helpers.triggerhelpers.verify_message', return_value=True)
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_verify_signed_message_success(self, mock_get_trigger, mock_get_triggers, mock_verify):
+    def test_verify_signed_message_success(self, mock_get_trigger, mock_trigger_exists, mock_verify):
         """Test successful signature verification"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.SIGNEDMESSAGE
@@ -582,9 +687,9 @@ class TestVerifySignedMessageAdvanced(object):
         mock_trigger.activate.assert_called_once()
 
     @mock.patch('helpers.triggerhelpers.verify_message', return_value=True)
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_verify_signed_message_with_data(self, mock_get_trigger, mock_get_triggers, mock_verify):
+    def test_verify_signed_message_with_data(self, mock_get_trigger, mock_trigger_exists, mock_verify):
         """Test signature verification with additional data"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.SIGNEDMESSAGE
@@ -598,9 +703,9 @@ class TestVerifySignedMessageAdvanced(object):
         mock_trigger.process_message.assert_called_once()
 
     @mock.patch('helpers.triggerhelpers.verify_message', return_value=False)
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_verify_signed_message_invalid_signature(self, mock_get_trigger, mock_get_triggers, mock_verify):
+    def test_verify_signed_message_invalid_signature(self, mock_get_trigger, mock_trigger_exists, mock_verify):
         """Test invalid signature verification"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.SIGNEDMESSAGE
@@ -617,15 +722,15 @@ class TestVerifySignedMessageAdvanced(object):
 class TestHttpOptionsRequest(object):
     """Tests for http_options_request function"""
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
-    def test_http_options_request_unknown(self, mock_get_triggers):
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=False)
+    def test_http_options_request_unknown(self, mock_trigger_exists):
         """Test HTTP OPTIONS request with unknown trigger"""
         result = http_options_request('unknown')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_options_request_wrong_type(self, mock_get_trigger, mock_get_triggers):
+    def test_http_options_request_wrong_type(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP OPTIONS request with wrong trigger type"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.MANUAL
@@ -634,9 +739,9 @@ class TestHttpOptionsRequest(object):
         result = http_options_request('trigger1')
         assert 'error' in result
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_options_request_success(self, mock_get_trigger, mock_get_triggers):
+    def test_http_options_request_success(self, mock_get_trigger, mock_trigger_exists):
         """Test successful HTTP OPTIONS request"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.HTTPOPTIONSREQUEST
@@ -647,9 +752,9 @@ class TestHttpOptionsRequest(object):
         mock_trigger.set_json_data.assert_called_once()
         mock_trigger.activate.assert_called_once()
 
-    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['trigger1'])
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
     @mock.patch('helpers.triggerhelpers.get_trigger')
-    def test_http_options_request_no_data(self, mock_get_trigger, mock_get_triggers):
+    def test_http_options_request_no_data(self, mock_get_trigger, mock_trigger_exists):
         """Test HTTP OPTIONS request without data"""
         mock_trigger = mock.MagicMock()
         mock_trigger.trigger_type = TriggerType.HTTPOPTIONSREQUEST
@@ -659,3 +764,346 @@ class TestHttpOptionsRequest(object):
         http_options_request('trigger1')
         mock_trigger.set_json_data.assert_not_called()
         mock_trigger.activate.assert_called_once()
+
+
+def make_trigger(trigger_class, trigger_id, **config):
+    trigger = trigger_class(trigger_id)
+    trigger.status = 'Active'
+    for key, value in config.items():
+        setattr(trigger, key, value)
+    return trigger
+
+
+class TestTriggerSnapshot(object):
+    def setup_method(self, method):
+        BLOCK_TRIGGER_CHECKS.clear()
+
+    @mock.patch('helpers.triggerhelpers.transaction')
+    @mock.patch('helpers.triggerhelpers.latest_block')
+    @mock.patch('helpers.triggerhelpers.balances')
+    def test_balances_are_fetched_once_per_address(self, mock_balances, mock_latest_block, mock_transaction):
+        mock_balances.return_value = {'balances': {'addr1': {'final': 100, 'received': 300, 'sent': 200}}}
+        triggers = [make_trigger(BalanceTrigger, 'balance', address='addr1', amount=100),
+                    make_trigger(ReceivedTrigger, 'received', address='addr1', amount=400),
+                    make_trigger(SentTrigger, 'sent', address='addr1', amount=200)]
+
+        snapshot = TriggerSnapshot(triggers=triggers)
+        assert [snapshot.conditions_fulfilled(trigger) for trigger in triggers] == [True, False, True]
+        mock_balances.assert_called_once_with(['addr1'])
+        mock_latest_block.assert_not_called()
+        mock_transaction.assert_not_called()
+
+    @mock.patch('helpers.triggerhelpers.balances')
+    def test_balance_error(self, mock_balances):
+        mock_balances.return_value = {'error': 'All explorers are temporarily unavailable'}
+        trigger = make_trigger(BalanceTrigger, 'balance', address='addr1', amount=100)
+        assert TriggerSnapshot(triggers=[trigger]).conditions_fulfilled(trigger) is False
+
+    @mock.patch('helpers.triggerhelpers.transaction')
+    @mock.patch('helpers.triggerhelpers.latest_block')
+    def test_block_data_is_shared(self, mock_latest_block, mock_transaction):
+        mock_latest_block.return_value = {'block': {'height': 110, 'hash': 'tip'}}
+        mock_transaction.return_value = {'transaction': {'confirmations': 3}}
+        triggers = [make_trigger(BlockHeightTrigger, 'height1', block_height=100),
+                    make_trigger(BlockHeightTrigger, 'height2', block_height=120),
+                    make_trigger(TxConfirmationTrigger, 'tx1', txid='abc', confirmations=1),
+                    make_trigger(TxConfirmationTrigger, 'tx2', txid='abc', confirmations=6)]
+
+        snapshot = TriggerSnapshot(triggers=triggers)
+        assert [snapshot.conditions_fulfilled(trigger) for trigger in triggers] == [True, False, True, False]
+        mock_latest_block.assert_called_once_with()
+        mock_transaction.assert_called_once_with(txid='abc')
+
+    @mock.patch('helpers.triggerhelpers.transaction')
+    @mock.patch('helpers.triggerhelpers.latest_block')
+    def test_unchanged_tip_skips_block_triggers(self, mock_latest_block, mock_transaction):
+        mock_latest_block.return_value = {'block': {'height': 110, 'hash': 'tip'}}
+        mock_transaction.return_value = {'transaction': {'confirmations': 3}}
+        triggers = [make_trigger(BlockHeightTrigger, 'height', block_height=120),
+                    make_trigger(TxConfirmationTrigger, 'tx', txid='abc', confirmations=6)]
+
+        snapshot = TriggerSnapshot(triggers=triggers)
+        for trigger in triggers:
+            snapshot.conditions_fulfilled(trigger)
+
+        snapshot = TriggerSnapshot(triggers=triggers)
+        assert snapshot.skipped == {'height', 'tx'}
+        assert mock_transaction.call_count == 1
+
+        # A new block means the triggers must be checked again
+        mock_latest_block.return_value = {'block': {'height': 111, 'hash': 'new_tip'}}
+        assert TriggerSnapshot(triggers=triggers).skipped == set()
+
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
+    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['height'])
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    @mock.patch('helpers.triggerhelpers.latest_block')
+    def test_check_triggers_skips_block_triggers_at_an_unchanged_tip(self, mock_latest_block, mock_get_trigger, mock_get_triggers, mock_trigger_exists):
+        mock_latest_block.return_value = {'block': {'height': 110, 'hash': 'tip'}}
+        trigger = make_trigger(BlockHeightTrigger, 'height', block_height=120, self_destruct=None)
+        mock_get_trigger.return_value = trigger
+
+        with mock.patch.object(BlockHeightTrigger, 'evaluate', return_value=False) as mock_evaluate:
+            check_triggers()
+            check_triggers()
+            assert mock_evaluate.call_count == 1
+
+            # A check of a single trigger is never skipped
+            check_triggers(trigger_id='height')
+            assert mock_evaluate.call_count == 2
+
+    @mock.patch('helpers.triggerhelpers.latest_block')
+    def test_no_skipping_when_forced(self, mock_latest_block):
+        mock_latest_block.return_value = {'block': {'height': 110, 'hash': 'tip'}}
+        trigger = make_trigger(BlockHeightTrigger, 'height', block_height=120)
+        TriggerSnapshot(triggers=[trigger]).conditions_fulfilled(trigger)
+        assert TriggerSnapshot(triggers=[trigger], skip_unchanged=False).skipped == set()
+
+    @mock.patch('helpers.triggerhelpers.latest_block')
+    def test_new_block_of_the_listener_is_the_latest_block(self, mock_latest_block):
+        trigger = make_trigger(BlockHeightTrigger, 'height', block_height=120)
+        snapshot = TriggerSnapshot(triggers=[trigger], block={'height': 120, 'hash': 'new_tip'})
+        assert snapshot.conditions_fulfilled(trigger) is True
+        mock_latest_block.assert_not_called()
+
+    def test_other_triggers_check_their_own_conditions(self):
+        trigger = mock.MagicMock()
+        trigger.trigger_type = TriggerType.MANUAL
+        trigger.conditions_fulfilled.return_value = True
+        assert TriggerSnapshot(triggers=[trigger]).conditions_fulfilled(trigger) is True
+
+
+class TestPreloadTriggerScripts(object):
+    @mock.patch('helpers.triggerhelpers.SCRIPT_REGISTRY')
+    @mock.patch('helpers.triggerhelpers.get_trigger_config')
+    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['t1', 't2', 't3'])
+    def test_preload_trigger_scripts(self, mock_get_triggers, mock_get_trigger_config, mock_registry):
+        configs = {'t1': {'script': 'Echo.py'}, 't2': {'script': None}, 't3': {'script': 'Template.py'}}
+        mock_get_trigger_config.side_effect = lambda trigger_id: configs[trigger_id]
+        mock_registry.preload.return_value = 2
+        assert preload_trigger_scripts() == 2
+        mock_get_triggers.assert_called_once_with(status='Active')
+        mock_registry.preload.assert_called_once_with(['Echo.py', 'Template.py'])
+
+
+class TestTriggerScheduler(object):
+    def test_due_time_timestamp(self):
+        assert TriggerScheduler.get_due_time(make_trigger(TimestampTrigger, 't', timestamp=1000)) == 1000
+        assert TriggerScheduler.get_due_time(make_trigger(TimestampTrigger, 't', timestamp=1000, status='Succeeded')) is None
+        assert TriggerScheduler.get_due_time(make_trigger(TimestampTrigger, 't', timestamp=1000, self_destruct=500)) == 500
+
+    def test_due_time_recurring(self):
+        trigger = make_trigger(RecurringTrigger, 'r', begin_time=1000, interval=100, next_activation=1200)
+        assert TriggerScheduler.get_due_time(trigger) == 1200
+        trigger.end_time = 1100
+        assert TriggerScheduler.get_due_time(trigger) == 1100
+
+    def test_due_time_deadmansswitch(self):
+        trigger = make_trigger(DeadMansSwitchTrigger, 'd', timeout=1000, activation_time=5000, warning_email='a@b.c')
+        assert TriggerScheduler.get_due_time(trigger) is None  # Not armed yet
+        assert [TriggerScheduler.get_due_time(make_trigger(DeadMansSwitchTrigger, 'd', timeout=1000, activation_time=5000, warning_email='a@b.c', phase=phase))
+                for phase in (1, 2, 3, 4, 5)] == [4500, 4750, 4900, 5000, None]
+
+    def test_due_time_other_triggers(self):
+        assert TriggerScheduler.get_due_time(make_trigger(BlockHeightTrigger, 'h', block_height=100)) is None
+        assert TriggerScheduler.get_due_time(make_trigger(BlockHeightTrigger, 'h', block_height=100, self_destruct=700)) == 700
+
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_schedule_and_unschedule(self, mock_get_trigger, mock_trigger_exists):
+        triggers = {'t1': make_trigger(TimestampTrigger, 't1', timestamp=3000),
+                    't2': make_trigger(TimestampTrigger, 't2', timestamp=1000),
+                    't3': make_trigger(TimestampTrigger, 't3', timestamp=2000)}
+        mock_get_trigger.side_effect = lambda trigger_id: triggers[trigger_id]
+        scheduler = TriggerScheduler()
+        for trigger_id in triggers:
+            scheduler.schedule(trigger_id)
+
+        # Rescheduling replaces the previous due time
+        triggers['t1'].timestamp = 1500
+        scheduler.schedule('t1')
+        scheduler.unschedule('t3')
+
+        assert scheduler.due == {'t1': 1500, 't2': 1000}
+        assert scheduler.pop_due(now=5000) == ['t2', 't1']
+        assert scheduler.due == {}
+
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['t1', 't2'])
+    def test_load(self, mock_get_triggers, mock_get_trigger, mock_trigger_exists):
+        triggers = {'t1': make_trigger(TimestampTrigger, 't1', timestamp=1000),
+                    't2': make_trigger(BlockHeightTrigger, 't2', block_height=100)}
+        mock_get_trigger.side_effect = lambda trigger_id: triggers[trigger_id]
+        scheduler = TriggerScheduler()
+        scheduler.load()
+        assert scheduler.due == {'t1': 1000}
+        assert scheduler.pop_due(now=999) == []
+
+    @mock.patch('helpers.triggerhelpers.check_triggers')
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_fire_retries_triggers_that_stay_due(self, mock_get_trigger, mock_trigger_exists, mock_check_triggers):
+        mock_get_trigger.return_value = make_trigger(TimestampTrigger, 't1', timestamp=1000, multi=True)
+        scheduler = TriggerScheduler(retry_interval=60)
+        scheduler.fire('t1')
+        mock_check_triggers.assert_called_once_with(trigger_id='t1')
+        assert scheduler.due['t1'] > 1000 + 60
+
+    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=[])
+    @mock.patch('helpers.triggerhelpers.check_triggers')
+    @mock.patch('helpers.triggerhelpers.trigger_exists')
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_triggers_are_checked_when_due(self, mock_get_trigger, mock_trigger_exists, mock_check_triggers, mock_get_triggers):
+        trigger = make_trigger(TimestampTrigger, 't1', timestamp=time.time() + 0.2)
+        mock_get_trigger.return_value = trigger
+        mock_trigger_exists.return_value = True
+        checked = threading.Event()
+
+        def check(trigger_id):
+            trigger.status = 'Succeeded'
+            checked.set()
+        mock_check_triggers.side_effect = check
+
+        scheduler = TriggerScheduler()
+        scheduler.start()
+        try:
+            scheduler.schedule('t1')
+            assert checked.wait(5)
+            assert trigger.timestamp <= time.time()
+        finally:
+            scheduler.stop()
+
+        assert scheduler.fired == 1
+        assert scheduler.due == {}
+
+    @mock.patch('helpers.triggerhelpers.TRIGGER_SCHEDULER')
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_save_trigger_updates_the_schedule(self, mock_get_trigger, mock_scheduler):
+        mock_scheduler.running = True
+        save_trigger('t1', timestamp=1000)
+        mock_scheduler.schedule.assert_called_once_with('t1')
+
+
+class TestWatchTrigger(object):
+    @mock.patch('helpers.triggerhelpers.EVENT_BUS', new_callable=EventBus)
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_trigger_subscribes_to_its_address(self, mock_get_trigger, mock_trigger_exists, mock_bus):
+        mock_get_trigger.return_value = make_trigger(SentTrigger, 't1', address='1BoatSLRHtKNngkdXEeobR76b53LETtpyT')
+        watch_trigger('t1')
+        assert list(mock_bus.subscribed(ADDRESS)) == ['1BoatSLRHtKNngkdXEeobR76b53LETtpyT']
+        assert mock_bus.subscribers == {'trigger:t1': {(ADDRESS, '1BoatSLRHtKNngkdXEeobR76b53LETtpyT')}}
+
+        # The previous address is no longer subscribed when the trigger changes
+        mock_get_trigger.return_value = make_trigger(BalanceTrigger, 't1', address='1Woutere8RCF82AgbPCc5F4KuYVvS4meW')
+        watch_trigger('t1')
+        assert list(mock_bus.subscribed(ADDRESS)) == ['1Woutere8RCF82AgbPCc5F4KuYVvS4meW']
+
+        mock_get_trigger.return_value.status = 'Succeeded'
+        watch_trigger('t1')
+        assert len(mock_bus) == 0
+
+    @mock.patch('helpers.triggerhelpers.EVENT_BUS', new_callable=EventBus)
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_tx_confirmation_trigger_subscribes_to_its_txid(self, mock_get_trigger, mock_trigger_exists, mock_bus):
+        txid = 'a' * 64
+        mock_get_trigger.return_value = make_trigger(TxConfirmationTrigger, 't1', txid=txid, confirmations=0)
+        watch_trigger('t1')
+        assert list(mock_bus.subscribed(TXID)) == [txid]
+
+        # A trigger that needs confirmations is checked on the new blocks instead
+        mock_get_trigger.return_value = make_trigger(TxConfirmationTrigger, 't1', txid=txid, confirmations=3)
+        watch_trigger('t1')
+        assert len(mock_bus) == 0
+
+    @mock.patch('helpers.triggerhelpers.EVENT_BUS', new_callable=EventBus)
+    @mock.patch('helpers.triggerhelpers.trigger_exists', return_value=True)
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_other_triggers_do_not_subscribe(self, mock_get_trigger, mock_trigger_exists, mock_bus):
+        mock_get_trigger.return_value = make_trigger(TimestampTrigger, 't1', timestamp=1000)
+        watch_trigger('t1')
+        assert len(mock_bus) == 0
+
+    @mock.patch('helpers.triggerhelpers.EVENT_BUS', new_callable=EventBus)
+    @mock.patch('helpers.triggerhelpers.watch_trigger')
+    @mock.patch('helpers.triggerhelpers.get_triggers', return_value=['t1', 't2'])
+    def test_watch_triggers(self, mock_get_triggers, mock_watch_trigger, mock_bus):
+        watch_triggers()
+        assert mock_bus.subscribers == {'triggers': {(BLOCK, None)}}
+        assert mock_watch_trigger.call_count == 2
+
+    @mock.patch.dict('helpers.triggerhelpers.PENDING_TRIGGERS', clear=True)
+    @mock.patch('helpers.triggerhelpers.invalidate_cache')
+    @mock.patch('helpers.triggerhelpers.watch_trigger')
+    @mock.patch('helpers.triggerhelpers.check_triggers')
+    def test_check_trigger_event(self, mock_check_triggers, mock_watch_trigger, mock_invalidate_cache):
+        check_trigger_event('t1', ADDRESS, '1BoatSLRHtKNngkdXEeobR76b53LETtpyT', [{'address': '1BoatSLRHtKNngkdXEeobR76b53LETtpyT', 'event': RECEIVE, 'txid': 'abc123'}])
+        mock_invalidate_cache.assert_called_once_with(query_type='balance', param=['1BoatSLRHtKNngkdXEeobR76b53LETtpyT'])
+        mock_check_triggers.assert_called_once_with(trigger_id='t1')
+        mock_watch_trigger.assert_called_once_with('t1')
+
+        check_trigger_event('t2', TXID, 'abc123', [{'txid': 'abc123'}])
+        assert mock_invalidate_cache.call_args == mock.call(query_type='transaction', param=['abc123'])
+
+        # Only the trigger of the address waits for the transaction to be confirmed
+        assert PENDING_TRIGGERS == {'t1': ('1BoatSLRHtKNngkdXEeobR76b53LETtpyT', PENDING_BLOCKS)}
+
+    @mock.patch('helpers.triggerhelpers.check_block_triggers')
+    def test_check_block_event(self, mock_check_block_triggers):
+        check_block_event(BLOCK, None, [{'height': 800000, 'hash': 'abc'}, {'height': 800001, 'hash': 'def'}])
+        mock_check_block_triggers.assert_called_once_with(height=800001, block_hash='def')
+
+    @mock.patch.dict('helpers.triggerhelpers.PENDING_TRIGGERS', clear=True)
+    @mock.patch('helpers.triggerhelpers.new_block')
+    @mock.patch('helpers.triggerhelpers.check_triggers')
+    def test_check_block_triggers(self, mock_check_triggers, mock_new_block):
+        check_block_triggers(800000, 'abc')
+        mock_new_block.assert_called_once_with(height=800000)
+        mock_check_triggers.assert_called_once_with(trigger_types=BLOCK_TRIGGER_TYPES, block={'height': 800000, 'hash': 'abc'})
+
+        # Without a height the latest block is queried
+        check_block_triggers(None, 'abc')
+        assert mock_check_triggers.call_args[1]['block'] is None
+
+    @mock.patch.dict('helpers.triggerhelpers.PENDING_TRIGGERS', {'t1': ('1BoatSLRHtKNngkdXEeobR76b53LETtpyT', 2)}, clear=True)
+    @mock.patch('helpers.triggerhelpers.invalidate_cache')
+    @mock.patch('helpers.triggerhelpers.new_block')
+    @mock.patch('helpers.triggerhelpers.check_triggers')
+    def test_pending_triggers_are_checked_on_the_next_blocks(self, mock_check_triggers, mock_new_block, mock_invalidate_cache):
+        check_block_triggers(800000, 'abc')
+        assert mock_check_triggers.call_args == mock.call(trigger_ids=['t1'])
+        mock_invalidate_cache.assert_called_once_with(query_type='balance', param=['1BoatSLRHtKNngkdXEeobR76b53LETtpyT'])
+        assert PENDING_TRIGGERS == {'t1': ('1BoatSLRHtKNngkdXEeobR76b53LETtpyT', 1)}
+
+        check_block_triggers(800001, 'def')
+        assert mock_check_triggers.call_args == mock.call(trigger_ids=['t1'])
+        assert PENDING_TRIGGERS == {}
+
+        mock_check_triggers.reset_mock()
+        check_block_triggers(800002, 'ghi')
+        mock_check_triggers.assert_called_once_with(trigger_types=BLOCK_TRIGGER_TYPES, block={'height': 800002, 'hash': 'ghi'})
+
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    @mock.patch('helpers.triggerhelpers.trigger_exists', side_effect=lambda trigger_id: trigger_id != 'deleted')
+    def test_check_triggers_by_id(self, mock_trigger_exists, mock_get_trigger):
+        mock_get_trigger.return_value = mock.MagicMock(status='Succeeded', self_destruct=None)
+        check_triggers(trigger_ids=['t1', 'deleted', 't2'])
+        assert [call[1]['trigger_id'] for call in mock_get_trigger.call_args_list] == ['t1', 't2']
+
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    @mock.patch('helpers.triggerhelpers.get_triggers')
+    def test_check_triggers_of_some_types(self, mock_get_triggers, mock_get_trigger):
+        mock_get_triggers.side_effect = lambda trigger_type=None: {TriggerType.BLOCK_HEIGHT: ['height'], TriggerType.TX_CONFIRMATION: ['tx']}.get(trigger_type, [])
+        mock_get_trigger.return_value = mock.MagicMock(status='Succeeded', self_destruct=None)
+        check_triggers(trigger_types=BLOCK_TRIGGER_TYPES)
+        assert [call[1]['trigger_id'] for call in mock_get_trigger.call_args_list] == ['height', 'tx']
+
+    @mock.patch('helpers.triggerhelpers.LISTENER_SERVICE')
+    @mock.patch('helpers.triggerhelpers.watch_trigger')
+    @mock.patch('helpers.triggerhelpers.get_trigger')
+    def test_save_trigger_updates_the_listener(self, mock_get_trigger, mock_watch_trigger, mock_service):
+        mock_service.running = True
+        save_trigger('t1', address='1BoatSLRHtKNngkdXEeobR76b53LETtpyT')
+        mock_watch_trigger.assert_called_once_with('t1')
@@ -194,9 +194,9 @@ class TestGetProfile:
 
 
 class TestUtxosToSul:
-    @patch('inputs.inputs.data.prime_input_address')
-    def test_single_utxo(self, mock_pia):
-        mock_pia.return_value = {'prime_input_address': VALID_ADDRESS_2}
+    @patch('inputs.inputs.data.prime_input_addresses')
+    def test_single_utxo(self, mock_pias):
+        mock_pias.return_value = {'prime_input_addresses': {'aaa': VALID_ADDRESS_2}}
         utxos = [{'output_hash': 'aaa', 'value': 1000}]
         sul = utxos_to_sul(utxos)
         assert len(sul) == 1
@@ -204,9 +204,9 @@ class TestUtxosToSul:
         assert sul[0][1] == 1000
         assert sul[0][2] == 1.0
 
-    @patch('inputs.inputs.data.prime_input_address')
-    def test_multiple_utxos_same_sender(self, mock_pia):
-        mock_pia.return_value = {'prime_input_address': VALID_ADDRESS_2}
+    @patch('inputs.inputs.data.prime_input_addresses')
+    def test_multiple_utxos_same_sender(self, mock_pias):
+        mock_pias.return_value = {'prime_input_addresses': {'aaa': VALID_ADDRESS_2, 'bbb': VALID_ADDRESS_2}}
         utxos = [
             {'output_hash': 'aaa', 'value': 1000},
             {'output_hash': 'bbb', 'value': 500},
@@ -215,43 +215,56 @@ class TestUtxosToSul:
         assert len(sul) == 1
         assert sul[0][1] == 1500
 
-    @patch('inputs.inputs.data.prime_input_address')
-    def test_multiple_utxos_different_senders(self, mock_pia):
-        mock_pia.side_effect = [
-            {'prime_input_address': VALID_ADDRESS_2},
-            {'prime_input_address': VALID_ADDRESS_3},
-        ]
+    @patch('inputs.inputs.data.prime_input_addresses')
+    def test_multiple_utxos_different_senders(self, mock_pias):
+        mock_pias.return_value = {'prime_input_addresses': {'aaa': VALID_ADDRESS_2, 'bbb': VALID_ADDRESS_3}}
         utxos = [
             {'output_hash': 'aaa', 'value': 1000},
             {'output_hash': 'bbb', 'value': 500},
         ]
         sul = utxos_to_sul(utxos)
+        mock_pias.assert_called_once_with(['aaa', 'bbb'])
         assert len(sul) == 2
         assert sul[0][2] == 1000 / 1500
         assert sul[1][2] == 500 / 1500
 
     @patch('inputs.inputs.data.prime_input_address')
-    def test_prime_input_address_error(self, mock_pia):
+    @patch('inputs.inputs.data.prime_input_addresses')
+    def test_prime_input_address_error(self, mock_pias, mock_pia):
+        mock_pias.return_value = {'error': 'not found'}
         mock_pia.return_value = {'error': 'not found'}
         utxos = [{'output_hash': 'aaa', 'value': 1000}]
         result = utxos_to_sul(utxos)
         assert 'error' in result
 
+    @patch('inputs.inputs.data.prime_input_address')
+    @patch('inputs.inputs.data.prime_input_addresses')
+    def test_batch_error_retries_one_at_a_time(self, mock_pias, mock_pia):
+        mock_pias.return_value = {'error': 'Unable to get the prime input addresses'}
+        mock_pia.side_effect = lambda txid: {'prime_input_address': {'aaa': VALID_ADDRESS_2, 'bbb': VALID_ADDRESS_3}[txid]}
+        utxos = [
+            {'output_hash': 'aaa', 'value': 1000},
+            {'output_hash': 'bbb', 'value': 500},
+        ]
+        sul = utxos_to_sul(utxos)
+        assert mock_pia.call_count == 2
+        assert sul == [[VALID_ADDRESS_2, 1000, 1000 / 1500], [VALID_ADDRESS_3, 500, 500 / 1500]]
+
 
 class TestGetSul:
     @patch('inputs.inputs.data.utxos')
-    @patch('inputs.inputs.data.prime_input_address')
-    def test_valid_address(self, mock_pia, mock_utxos):
+    @patch('inputs.inputs.data.prime_input_addresses')
+    def test_valid_address(self, mock_pias, mock_utxos):
         mock_utxos.return_value = {'utxos': [{'output_hash': 'aaa', 'value': 1000}]}
-        mock_pia.return_value = {'prime_input_address': VALID_ADDRESS_2}
+        mock_pias.return_value = {'prime_input_addresses': {'aaa': VALID_ADDRESS_2}}
         result = get_sul(VALID_ADDRESS)
         assert 'SUL' in result
 
     @patch('inputs.inputs.data.utxos')
-    @patch('inputs.inputs.data.prime_input_address')
-    def test_sul_error(self, mock_pia, mock_utxos):
+    @patch('inputs.inputs.data.prime_input_addresses')
+    def test_sul_error(self, mock_pias, mock_utxos):
         mock_utxos.return_value = {'utxos': [{'output_hash': 'aaa', 'value': 1000}]}
-        mock_pia.return_value = {'error': 'not found'}
+        mock_pias.return_value = {'error': 'not found'}
         result = get_sul(VALID_ADDRESS)
         assert 'error' in result
 
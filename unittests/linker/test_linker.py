@@ -44,20 +44,21 @@ class TestGetLal:
 
 
 class TestGetLbl:
-    @patch('linker.linker.balance')
+    @patch('linker.linker.balances')
     @patch('linker.linker.get_sil')
     @patch('linker.linker.get_addresses_from_xpub')
-    def test_valid_lbl(self, mock_xpub, mock_sil, mock_balance):
+    def test_valid_lbl(self, mock_xpub, mock_sil, mock_balances):
         mock_sil.return_value = {'SIL': [
             [VALID_ADDRESS_2, 1000, 0.6, 500],
             [VALID_ADDRESS_3, 500, 0.4, 510],
         ]}
         mock_xpub.return_value = [VALID_DERIVED_ADDRESS_1, VALID_DERIVED_ADDRESS_2]
-        mock_balance.side_effect = [
-            {'balance': {'final': 500}},
-            {'balance': {'final': 300}},
-        ]
+        mock_balances.return_value = {'balances': {
+            VALID_DERIVED_ADDRESS_1: {'final': 500},
+            VALID_DERIVED_ADDRESS_2: {'final': 300},
+        }}
         result = get_lbl(VALID_ADDRESS, VALID_XPUB)
+        mock_balances.assert_called_once_with([VALID_DERIVED_ADDRESS_1, VALID_DERIVED_ADDRESS_2])
         assert 'LBL' in result
         assert len(result['LBL']) == 2
         assert result['LBL'][0][1] == 500
@@ -65,15 +66,15 @@ class TestGetLbl:
         assert result['LBL'][0][2] == 500 / 800
         assert result['LBL'][1][2] == 300 / 800
 
-    @patch('linker.linker.balance')
+    @patch('linker.linker.balances')
     @patch('linker.linker.get_sil')
     @patch('linker.linker.get_addresses_from_xpub')
-    def test_lbl_balance_error(self, mock_xpub, mock_sil, mock_balance):
+    def test_lbl_balance_error(self, mock_xpub, mock_sil, mock_balances):
         mock_sil.return_value = {'SIL': [
             [VALID_ADDRESS_2, 1000, 0.6, 500],
         ]}
         mock_xpub.return_value = [VALID_DERIVED_ADDRESS_1]
-        mock_balance.return_value = {'error': 'failed'}
+        mock_balances.return_value = {'error': 'failed'}
         result = get_lbl(VALID_ADDRESS, VALID_XPUB)
         assert 'error' in result
 
@@ -85,19 +86,19 @@ class TestGetLbl:
 
 
 class TestGetLrl:
-    @patch('linker.linker.balance')
+    @patch('linker.linker.balances')
     @patch('linker.linker.get_sil')
     @patch('linker.linker.get_addresses_from_xpub')
-    def test_valid_lrl(self, mock_xpub, mock_sil, mock_balance):
+    def test_valid_lrl(self, mock_xpub, mock_sil, mock_balances):
         mock_sil.return_value = {'SIL': [
             [VALID_ADDRESS_2, 1000, 0.6, 500],
             [VALID_ADDRESS_3, 500, 0.4, 510],
         ]}
         mock_xpub.return_value = [VALID_DERIVED_ADDRESS_1, VALID_DERIVED_ADDRESS_2]
-        mock_balance.side_effect = [
-            {'balance': {'received': 2000}},
-            {'balance': {'received': 1000}},
-        ]
+        mock_balances.return_value = {'balances': {
+            VALID_DERIVED_ADDRESS_1: {'received': 2000},
+            VALID_DERIVED_ADDRESS_2: {'received': 1000},
+        }}
         result = get_lrl(VALID_ADDRESS, VALID_XPUB)
         assert 'LRL' in result
         assert len(result['LRL']) == 2
@@ -105,15 +106,15 @@ class TestGetLrl:
         assert result['LRL'][1][1] == 1000
         assert result['LRL'][0][2] == 2000 / 3000
 
-    @patch('linker.linker.balance')
+    @patch('linker.linker.balances')
     @patch('linker.linker.get_sil')
     @patch('linker.linker.get_addresses_from_xpub')
-    def test_lrl_balance_error(self, mock_xpub, mock_sil, mock_balance):
+    def test_lrl_balance_error(self, mock_xpub, mock_sil, mock_balances):
         mock_sil.return_value = {'SIL': [
             [VALID_ADDRESS_2, 1000, 0.6, 500],
         ]}
         mock_xpub.return_value = [VALID_DERIVED_ADDRESS_1]
-        mock_balance.return_value = {'error': 'failed'}
+        mock_balances.return_value = {'error': 'failed'}
         result = get_lrl(VALID_ADDRESS, VALID_XPUB)
         assert 'error' in result
 
@@ -125,19 +126,19 @@ class TestGetLrl:
 
 
 class TestGetLsl:
-    @patch('linker.linker.balance')
+    @patch('linker.linker.balances')
     @patch('linker.linker.get_sil')
     @patch('linker.linker.get_addresses_from_xpub')
-    def test_valid_lsl(self, mock_xpub, mock_sil, mock_balance):
+    def test_valid_lsl(self, mock_xpub, mock_sil, mock_balances):
         mock_sil.return_value = {'SIL': [
             [VALID_ADDRESS_2, 1000, 0.6, 500],
             [VALID_ADDRESS_3, 500, 0.4, 510],
         ]}
         mock_xpub.return_value = [VALID_DERIVED_ADDRESS_1, VALID_DERIVED_ADDRESS_2]
-        mock_balance.side_effect = [
-            {'balance': {'sent': 800}},
-            {'balance': {'sent': 400}},
-        ]
+        mock_balances.return_value = {'balances': {
+            VALID_DERIVED_ADDRESS_1: {'sent': 800},
+            VALID_DERIVED_ADDRESS_2: {'sent': 400},
+        }}
         result = get_lsl(VALID_ADDRESS, VALID_XPUB)
         assert 'LSL' in result
         assert len(result['LSL']) == 2
@@ -145,15 +146,15 @@ class TestGetLsl:
         assert result['LSL'][1][1] == 400
         assert result['LSL'][0][2] == 800 / 1200
 
-    @patch('linker.linker.balance')
+    @patch('linker.linker.balances')
     @patch('linker.linker.get_sil')
     @patch('linker.linker.get_addresses_from_xpub')
-    def test_lsl_balance_error(self, mock_xpub, mock_sil, mock_balance):
+    def test_lsl_balance_error(self, mock_xpub, mock_sil, mock_balances):
         mock_sil.return_value = {'SIL': [
             [VALID_ADDRESS_2, 1000, 0.6, 500],
         ]}
         mock_xpub.return_value = [VALID_DERIVED_ADDRESS_1]
-        mock_balance.return_value = {'error': 'failed'}
+        mock_balances.return_value = {'error': 'failed'}
         result = get_lsl(VALID_ADDRESS, VALID_XPUB)
         assert 'error' in result
 
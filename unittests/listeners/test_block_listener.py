@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import os
+import pytest
 import simplejson
 from unittest.mock import patch, MagicMock
 
@@ -70,9 +71,10 @@ class TestMainBlock:
     """Tests for block_listener __main__ block via runpy"""
 
     @patch("websocket.WebSocketApp")
-    def test_main_block_creates_websocket_and_runs(self, mock_ws_app):
+    def test_main_block_creates_websocket_and_runs(self, mock_ws_app, monkeypatch):
         mock_instance = MagicMock()
         mock_ws_app.return_value = mock_instance
+        monkeypatch.setattr("sys.argv", ["block_listener.py"])
 
         import runpy
         runpy.run_path(
@@ -82,3 +84,19 @@ class TestMainBlock:
 
         mock_ws_app.assert_called_once()
         mock_instance.run_forever.assert_called_once()
+
+    def test_main_replay_backend(self, monkeypatch, tmp_path, capsys):
+        replay_file = tmp_path / "blocks.txt"
+        replay_file.write_text('{"type": "new-blocks", "data": {"block_no": 800000, "block_hash": "abc"}}\n')
+        monkeypatch.setattr("sys.argv", ["block_listener.py", "--backend", "replay", "--url", str(replay_file)])
+
+        import runpy
+        with pytest.raises(SystemExit):
+            runpy.run_path(
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "listeners", "block_listener.py"),
+                run_name="__main__",
+            )
+
+        captured = capsys.readouterr()
+        assert "height: 800000" in captured.out
+        assert "hash: abc" in captured.out
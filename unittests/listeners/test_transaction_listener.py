@@ -8,6 +8,7 @@ from unittest.mock import patch, MagicMock
 from argparse import Namespace
 
 import listeners.transaction_listener as tx_listener
+from helpers.listenerhelpers import BloomFilter
 
 
 @pytest.fixture
@@ -17,8 +18,12 @@ def reset_globals():
     old_exit_on_event = tx_listener.EXIT_ON_EVENT
     old_exit_on_timeout = tx_listener.EXIT_ON_TIMEOUT
     old_args = getattr(tx_listener, "args", None)
+    old_address_filter = tx_listener.ADDRESS_FILTER
+    old_dispatcher = tx_listener.DISPATCHER
 
     tx_listener.WATCHLIST = {}
+    tx_listener.ADDRESS_FILTER = None
+    tx_listener.DISPATCHER = MagicMock()
     tx_listener.EXIT_ON_EVENT = False
     tx_listener.EXIT_ON_TIMEOUT = None
     tx_listener.args = Namespace(send=False, receive=False, testnet=False)
@@ -26,6 +31,8 @@ def reset_globals():
     tx_listener.WATCHLIST = old_watchlist
     tx_listener.EXIT_ON_EVENT = old_exit_on_event
     tx_listener.EXIT_ON_TIMEOUT = old_exit_on_timeout
+    tx_listener.ADDRESS_FILTER = old_address_filter
+    tx_listener.DISPATCHER = old_dispatcher
     if old_args is not None:
         tx_listener.args = old_args
     elif hasattr(tx_listener, "args"):
@@ -74,12 +81,9 @@ class TestOnMessage:
         ws = MagicMock()
         message = make_tx_message(inputs=[{"address": "1AddrIn", "amount": 50000}])
 
-        with patch("listeners.transaction_listener.RunCommandProcess") as mock_proc:
-            tx_listener.on_message(ws, message)
+        tx_listener.on_message(ws, message)
 
-            mock_proc.assert_called_once()
-            call_kwargs = mock_proc.call_args
-            assert "echo abc123" in str(call_kwargs)
+        tx_listener.DISPATCHER.submit.assert_called_once_with(target="echo #txid#", address="1AddrIn", event="SEND", txid="abc123")
 
     def test_receive_watchlist_match_triggers_command(self, reset_globals):
         tx_listener.args.receive = True
@@ -87,12 +91,9 @@ class TestOnMessage:
         ws = MagicMock()
         message = make_tx_message(outputs=[{"address": "1AddrOut", "amount": 40000}])
 
-        with patch("listeners.transaction_listener.RunCommandProcess") as mock_proc:
-            tx_listener.on_message(ws, message)
+        tx_listener.on_message(ws, message)
 
-            mock_proc.assert_called_once()
-            call_kwargs = mock_proc.call_args
-            assert "echo abc123" in str(call_kwargs)
+        tx_listener.DISPATCHER.submit.assert_called_once_with(target="echo #txid#", address="1AddrOut", event="RECEIVE", txid="abc123")
 
     def test_exit_on_event_with_match(self, reset_globals):
         tx_listener.args.send = True
@@ -101,11 +102,32 @@ class TestOnMessage:
         ws = MagicMock()
         message = make_tx_message(inputs=[{"address": "1AddrIn", "amount": 50000}])
 
-        with patch("listeners.transaction_listener.RunCommandProcess"), \
-             pytest.raises(SystemExit):
+        with pytest.raises(SystemExit):
             tx_listener.on_message(ws, message)
 
         ws.send.assert_called_once_with('{"type":"new-transactions", "unsubscribe": true}')
+        tx_listener.DISPATCHER.flush.assert_called_once()
+
+    def test_message_without_watched_address_is_not_parsed(self, reset_globals):
+        tx_listener.args.send = True
+        tx_listener.WATCHLIST = {"1AddrIn": {"SEND": "echo #txid#"}}
+        message = make_tx_message(inputs=[{"address": "1OtherAddr", "amount": 50000}])
+
+        with patch("listeners.transaction_listener.process_transaction") as mock_process:
+            tx_listener.on_message(MagicMock(), message)
+
+        mock_process.assert_not_called()
+
+    def test_address_filter_is_used_as_prefilter(self, reset_globals):
+        tx_listener.args.send = True
+        tx_listener.WATCHLIST = {"1AddrIn": {"SEND": "echo #txid#"}}
+        tx_listener.ADDRESS_FILTER = BloomFilter.from_addresses(["1AddrIn"])
+
+        tx_listener.on_message(MagicMock(), make_tx_message(inputs=[{"address": "1OtherAddr", "amount": 50000}]))
+        tx_listener.DISPATCHER.submit.assert_not_called()
+
+        tx_listener.on_message(MagicMock(), make_tx_message(inputs=[{"address": "1AddrIn", "amount": 50000}]))
+        tx_listener.DISPATCHER.submit.assert_called_once_with(target="echo #txid#", address="1AddrIn", event="SEND", txid="abc123")
 
     def test_exit_on_event_no_match_does_not_exit(self, reset_globals):
         tx_listener.args.send = True
@@ -422,3 +444,40 @@ class TestMainBlock:
         import runpy
         with pytest.raises(Exception, match="does not contain a valid dictionary"):
             runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "listeners", "transaction_listener.py"), run_name="__main__")
+
+    @patch("websocket.WebSocketApp")
+    def test_main_bloom_flag(self, mock_ws_app, monkeypatch, tmp_path):
+        watchlist_file = tmp_path / "watchlist.json"
+        watchlist_file.write_text(simplejson.dumps({"addr1": {"SEND": "echo hi"}}))
+
+        monkeypatch.setattr("sys.argv", [
+            "transaction_listener.py",
+            "-w", str(watchlist_file),
+            "-b",
+        ])
+
+        import runpy
+        result = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "listeners", "transaction_listener.py"), run_name="__main__")
+
+        assert "addr1" in result["ADDRESS_FILTER"]
+        mock_ws_app.assert_called_once()
+
+    @patch("helpers.listenerhelpers.BatchDispatcher.run_command")
+    def test_main_replay_backend(self, mock_run_command, monkeypatch, tmp_path):
+        watchlist_file = tmp_path / "watchlist.json"
+        watchlist_file.write_text(simplejson.dumps({"1AddrOut": {"RECEIVE": "echo #txid#"}}))
+        replay_file = tmp_path / "mempool.txt"
+        replay_file.write_text(make_tx_message(txid="tx1") + "\n" + make_tx_message(txid="tx2", outputs=[{"address": "1Other", "amount": 1}]) + "\n")
+
+        monkeypatch.setattr("sys.argv", [
+            "transaction_listener.py",
+            "-w", str(watchlist_file),
+            "--backend", "replay",
+            "--url", str(replay_file),
+        ])
+
+        import runpy
+        with pytest.raises(SystemExit):
+            runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "listeners", "transaction_listener.py"), run_name="__main__")
+
+        mock_run_command.assert_called_once_with("echo tx1")
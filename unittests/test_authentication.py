@@ -1,5 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import base64
+import io
+import json
+import multiprocessing
+import os
+import threading
+
 import pytest
 import mock
 
@@ -16,6 +23,7 @@ class TestAuthentication(object):
         global NONCE
 
         authentication.load_from_json_file = mock.MagicMock(return_value={'foo': {'secret': 'bar1'}})
+        authentication.API_KEY_STORE.clear()
         self.data = {'test': 'test'}
         NONCE = NONCE + 1
 
@@ -67,6 +75,23 @@ class TestAuthentication(object):
         authentication.load_from_json_file = mock.MagicMock(return_value=None)
         assert authentication.check_authentication(self.headers, self.data) == authentication.AuthenticationStatus.INVALID_JSON_FILE
 
+    def test_check_authentication_with_raw_body_signature(self):
+        body = b'{"test": "test"}'
+        self.headers['API_Sign'] = authentication.body_signature(body, NONCE, 'bar1')
+        self.headers['API_Sign_Version'] = '2'
+        assert authentication.check_authentication(self.headers, None, body=io.BytesIO(body)) == authentication.AuthenticationStatus.OK
+
+    def test_check_authentication_with_raw_body_signature_and_changed_body(self):
+        self.headers['API_Sign'] = authentication.body_signature(b'{"test": "test"}', NONCE, 'bar1')
+        self.headers['API_Sign_Version'] = '2'
+        assert authentication.check_authentication(self.headers, None, body=b'{"test": "else"}') == authentication.AuthenticationStatus.INVALID_SIGNATURE
+
+    def test_check_authentication_with_invalid_signature_does_not_use_up_the_nonce(self):
+        self.headers['API_Sign'] = authentication.signature(self.data, NONCE, 'ABCD')
+        assert authentication.check_authentication(self.headers, self.data) == authentication.AuthenticationStatus.INVALID_SIGNATURE
+        self.headers['API_Sign'] = authentication.signature(self.data, NONCE, 'bar1')
+        assert authentication.check_authentication(self.headers, self.data) == authentication.AuthenticationStatus.OK
+
     def test_check_authentication_with_invalid_nonce_format(self):
         self.headers['API_Nonce'] = 'not_a_number'
         assert authentication.check_authentication(self.headers, self.data) == authentication.AuthenticationStatus.INVALID_NONCE
@@ -168,3 +193,92 @@ class TestInitializeApiKeysFile(object):
         assert 'secret' in saved_data[api_key]
         assert len(saved_data[api_key]['secret']) == 16
         assert saved_data[api_key]['permissions'] == 'all'
+
+
+class TestNonceStore(object):
+    def test_nonce_must_increase(self):
+        nonce_store = authentication.NonceStore()
+        assert nonce_store.update('foo', 5) is True
+        assert nonce_store.update('foo', 5) is False
+        assert nonce_store.update('foo', 4) is False
+        assert nonce_store.update('foo', 6) is True
+        assert nonce_store.update('bar', 1) is True
+
+    def test_concurrent_requests_with_the_same_nonce(self):
+        nonce_store = authentication.NonceStore()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(nonce_store.update('foo', 1))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results.count(True) == 1
+
+
+class TestPersistentNonceStore(object):
+    def test_nonces_survive_a_restart(self, tmp_path):
+        filename = str(tmp_path / 'private' / 'nonces.db')
+        assert authentication.PersistentNonceStore(filename).update('foo', 10) is True
+
+        nonce_store = authentication.PersistentNonceStore(filename)
+        assert nonce_store.update('foo', 10) is False
+        assert nonce_store.update('foo', 9) is False
+        assert nonce_store.update('foo', 11) is True
+        assert nonce_store.update('bar', 1) is True
+
+    def test_nonces_are_shared_with_forked_processes(self, tmp_path):
+        nonce_store = authentication.PersistentNonceStore(str(tmp_path / 'nonces.db'))
+        assert nonce_store.update('foo', 10) is True
+
+        process = multiprocessing.get_context('fork').Process(target=nonce_store.update, args=('foo', 20))
+        process.start()
+        process.join()
+        assert nonce_store.update('foo', 15) is False
+        assert nonce_store.update('foo', 21) is True
+
+    def test_concurrent_requests_with_the_same_nonce(self, tmp_path):
+        nonce_store = authentication.PersistentNonceStore(str(tmp_path / 'nonces.db'))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(nonce_store.update('foo', 1))) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results.count(True) == 1
+
+    def test_nonce_that_is_too_large(self, tmp_path):
+        assert authentication.PersistentNonceStore(str(tmp_path / 'nonces.db')).update('foo', 2 ** 64) is False
+
+    def test_use_persistent_nonces(self, tmp_path):
+        original = authentication.NONCE_STORE
+        try:
+            authentication.use_persistent_nonces(str(tmp_path / 'nonces.db'))
+            assert isinstance(authentication.NONCE_STORE, authentication.PersistentNonceStore)
+        finally:
+            authentication.NONCE_STORE = original
+
+
+class TestApiKeyStore(object):
+    def test_api_keys_are_cached_until_the_file_changes(self, tmp_path):
+        filename = str(tmp_path / 'api_keys.json')
+        with open(filename, 'w') as output_file:
+            json.dump({'foo': {'secret': 'bar1'}}, output_file)
+
+        api_key_store = authentication.ApiKeyStore(filename)
+        with mock.patch('authentication.load_from_json_file', side_effect=lambda f: json.load(open(f))) as mock_load:
+            assert api_key_store.get_api_keys()['foo']['hmac_key'] == base64.b64decode('bar1')
+            api_key_store.get_api_keys()
+            assert mock_load.call_count == 1
+
+            with open(filename, 'w') as output_file:
+                json.dump({'foo': {'secret': 'bar2'}}, output_file)
+            stat = os.stat(filename)
+            os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+            assert api_key_store.get_api_keys()['foo']['secret'] == 'bar2'
+            assert mock_load.call_count == 2
+
+    def test_invalid_secret_is_not_decoded(self):
+        api_key_store = authentication.ApiKeyStore('missing.json')
+        with mock.patch('authentication.load_from_json_file', return_value={'foo': {'secret': 'a'}}):
+            assert 'hmac_key' not in api_key_store.get_api_keys()['foo']
@@ -47,6 +47,19 @@ class TestAuthenticationRequired(object):
         assert 'error' in result
         assert result['error'] == AuthenticationStatus.INVALID_API_KEY
 
+    @mock.patch('decorators.request')
+    @mock.patch('decorators.check_authentication')
+    def test_authentication_with_raw_body_signature(self, mock_check, mock_request):
+        mock_check.return_value = AuthenticationStatus.OK
+        mock_request.headers = {'API_Sign_Version': '2'}
+
+        @authentication_required
+        def test_func():
+            return {'success': True}
+
+        assert test_func() == {'success': True}
+        mock_check.assert_called_once_with(mock_request.headers, None, body=mock_request.body)
+
 
 class TestUseExplorer(object):
     """Tests for use_explorer decorator"""
@@ -82,7 +95,7 @@ class TestUseExplorer(object):
 
         test_func()
         mock_set.assert_not_called()
-        mock_clear.assert_called_once()
+        assert mock_clear.call_count == 2
 
     @mock.patch('decorators.clear_explorer')
     @mock.patch('decorators.get_last_explorer')
@@ -97,6 +110,20 @@ class TestUseExplorer(object):
 
         result = test_func()
         assert result == "string result"
+        assert mock_clear.call_count == 2
+
+    @mock.patch('decorators.clear_explorer')
+    @mock.patch('decorators.set_explorer')
+    @mock.patch('decorators.request')
+    def test_use_explorer_is_cleared_after_an_exception(self, mock_request, mock_set, mock_clear):
+        mock_request.query.explorer = 'blockstream'
+
+        @use_explorer
+        def test_func():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            test_func()
         mock_clear.assert_called_once()
 
 
@@ -875,6 +875,17 @@ class TestGetLogs(object):
         url = get_call_url(mock_get)
         assert '/spellbook/logs/' in url
         assert 'error timeout' in url
+        assert '?' not in url
+
+    @mock.patch('spellbook.do_get_request')
+    def test_get_logs_with_filters(self, mock_get):
+        spellbook.args = make_args(
+            filter_string=['error'], level='WARNING', start='2019-08-19 21:00', end=None, limit=10,
+            explorer=None, api_key='k', api_secret='s'
+        )
+        get_logs()
+        url = get_call_url(mock_get)
+        assert url.endswith('/spellbook/logs/error?level=WARNING&start=2019-08-19+21%3A00&limit=10')
 
 
 class TestGetHivemind(object):
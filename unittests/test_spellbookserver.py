@@ -6,6 +6,7 @@ Tests for spellbookserver.py — the Valyrian Spellbook REST API server (Bottle)
 The SpellbookRESTAPI.__init__ starts a web server via self.run(), so we mock
 that out and test the endpoint callbacks as static methods.
 """
+import io
 import logging
 import sys
 from unittest.mock import patch, MagicMock, mock_open
@@ -30,6 +31,7 @@ from spellbookserver import (  # noqa: E402
     SpellbookRESTAPI,
     convert_aac_to_opus,
 )
+from helpers.loghelpers import AccessLog  # noqa: E402
 
 # Re-enable for individual tests if needed
 _transcribe_patcher.stop()
@@ -43,6 +45,61 @@ def _passthrough_output_json():
         yield
 
 
+@pytest.fixture(autouse=True)
+def mock_preload_scripts():
+    """Keep SpellbookRESTAPI() from reading the preload_scripts option from the configuration file."""
+    with patch('spellbookserver.get_preload_scripts', return_value=False) as mock_get_preload_scripts:
+        yield mock_get_preload_scripts
+
+
+@pytest.fixture(autouse=True)
+def mock_server_workers():
+    """Run SpellbookRESTAPI() with a single process and the default number of threads."""
+    with patch('spellbookserver.get_server_threads', return_value=10), \
+            patch('spellbookserver.get_server_workers', return_value=1) as mock_get_server_workers:
+        yield mock_get_server_workers
+
+
+@pytest.fixture(autouse=True)
+def mock_access_log_settings():
+    """Keep SpellbookRESTAPI() from reading the access log options from the configuration file."""
+    with patch('spellbookserver.get_access_log_verbose', return_value=False), \
+            patch('spellbookserver.get_access_log_body_size', return_value=256), \
+            patch('spellbookserver.get_access_log_sample_rate', return_value=1.0):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def mock_storage_settings():
+    """Keep SpellbookRESTAPI() from reading the storage options from the configuration file."""
+    with patch('spellbookserver.get_storage_backend', return_value='files'), \
+            patch('spellbookserver.get_compact_json', return_value=False), \
+            patch('spellbookserver.get_fsync_policy', return_value='never'), \
+            patch('spellbookserver.configure_json_files'):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def mock_persistent_nonces():
+    """Keep SpellbookRESTAPI() from creating the nonces database."""
+    with patch('spellbookserver.use_persistent_nonces') as mock_use_persistent_nonces:
+        yield mock_use_persistent_nonces
+
+
+@pytest.fixture(autouse=True)
+def mock_listener_settings():
+    """Keep SpellbookRESTAPI() from reading the listener options from the configuration file."""
+    with patch('spellbookserver.get_enable_listener', return_value=False) as mock_get_enable_listener:
+        yield mock_get_enable_listener
+
+
+@pytest.fixture(autouse=True)
+def mock_trigger_scheduler():
+    """Keep SpellbookRESTAPI() from starting the trigger scheduler thread."""
+    with patch('spellbookserver.TRIGGER_SCHEDULER') as mock_scheduler:
+        yield mock_scheduler
+
+
 # --- Fixtures -----------------------------------------------------------------
 @pytest.fixture
 def mock_bottle_request():
@@ -90,8 +147,15 @@ class TestEnableCors:
 
 # --- log_to_logger tests ------------------------------------------------------
 class TestLogToLogger:
+    @pytest.fixture(autouse=True)
+    def access_log(self):
+        """Use access log settings of which changes do not leak into other tests."""
+        access_log = AccessLog(logger=MagicMock(), handlers=[])
+        with patch('spellbookserver.ACCESS_LOG', access_log):
+            yield access_log
+
     def test_log_to_logger_success(self):
-        """Test log_to_logger wrapper logs request and response."""
+        """Test log_to_logger wrapper logs one record per request."""
         with patch('spellbookserver.request') as mock_req, \
              patch('spellbookserver.response') as mock_resp, \
              patch('spellbookserver.REQUESTS_LOG') as mock_req_log, \
@@ -101,17 +165,44 @@ class TestLogToLogger:
             mock_req.url = 'http://localhost/ping'
             mock_req.headers = {'X-Test': 'val'}
             mock_req.json = None
-            mock_resp.status = '200 OK'
+            mock_req.content_length = 0
+            mock_resp.status_code = 200
 
             api = MagicMock(spec=SpellbookRESTAPI)
             # Bypass __init__ which starts the server
             wrapper = SpellbookRESTAPI.log_to_logger(api, lambda: {'ok': True})
             result = wrapper()
             assert result == {'ok': True}
-            assert mock_req_log.info.call_count >= 3
+            mock_req_log.info.assert_called_once()
+            record = mock_req_log.info.call_args[0][0]
+            assert record['url'] == 'http://localhost/ping'
+            assert record['status'] == 200
+            assert 'body' not in record
+
+    def test_log_to_logger_truncates_body(self, access_log):
+        """Test log_to_logger only logs the start of a large body."""
+        access_log.configure(max_body=4)
+        with patch('spellbookserver.request') as mock_req, \
+             patch('spellbookserver.response') as mock_resp, \
+             patch('spellbookserver.REQUESTS_LOG') as mock_req_log, \
+             patch('spellbookserver.LOG'):
+            mock_req.remote_addr = '127.0.0.1'
+            mock_req.method = 'POST'
+            mock_req.url = 'http://localhost/save'
+            mock_req.content_length = 10
+            mock_req.body = io.BytesIO(b'0123456789')
+            mock_resp.status_code = 200
 
-    def test_log_to_logger_with_json_body(self):
-        """Test log_to_logger logs JSON body when present."""
+            api = MagicMock(spec=SpellbookRESTAPI)
+            wrapper = SpellbookRESTAPI.log_to_logger(api, lambda: 'done')
+            wrapper()
+            record = mock_req_log.info.call_args[0][0]
+            assert record['bytes'] == 10
+            assert record['body'] == '0123...(6 more bytes)'
+
+    def test_log_to_logger_verbose(self, access_log):
+        """Test log_to_logger logs headers and JSON body keys in verbose mode."""
+        access_log.configure(verbose=True, max_body=3)
         with patch('spellbookserver.request') as mock_req, \
              patch('spellbookserver.response') as mock_resp, \
              patch('spellbookserver.REQUESTS_LOG') as mock_req_log, \
@@ -119,22 +210,44 @@ class TestLogToLogger:
             mock_req.remote_addr = '127.0.0.1'
             mock_req.method = 'POST'
             mock_req.url = 'http://localhost/save'
-            mock_req.headers = {}
+            mock_req.headers = {'X-Test': 'val'}
             mock_req.json = {'key': 'value'}
-            mock_resp.status = '200 OK'
+            mock_req.content_length = 0
+            mock_resp.status_code = 200
 
             api = MagicMock(spec=SpellbookRESTAPI)
             wrapper = SpellbookRESTAPI.log_to_logger(api, lambda: 'done')
             wrapper()
-            # Should have logged the body key
-            body_calls = [str(c) for c in mock_req_log.info.call_args_list]
-            assert any('BODY' in b for b in body_calls)
+            # Should have logged the headers and the body key
+            calls = [str(c) for c in mock_req_log.info.call_args_list]
+            assert any('HEADERS | X-Test: val' in c for c in calls)
+            assert any('BODY | key: val...(2 more)' in c for c in calls)
+            assert mock_req_log.info.call_count == 4
+
+    def test_log_to_logger_sampling(self, access_log):
+        """Test log_to_logger skips sampled out successful requests but always logs failures."""
+        access_log.configure(sample_rate=0.0)
+        with patch('spellbookserver.request') as mock_req, \
+             patch('spellbookserver.response') as mock_resp, \
+             patch('spellbookserver.REQUESTS_LOG') as mock_req_log, \
+             patch('spellbookserver.LOG'):
+            mock_req.content_length = 0
+            api = MagicMock(spec=SpellbookRESTAPI)
+            wrapper = SpellbookRESTAPI.log_to_logger(api, lambda: 'done')
+
+            mock_resp.status_code = 200
+            wrapper()
+            mock_req_log.info.assert_not_called()
+
+            mock_resp.status_code = 404
+            wrapper()
+            mock_req_log.info.assert_called_once()
 
     def test_log_to_logger_exception(self):
         """Test log_to_logger handles exceptions and logs them."""
         with patch('spellbookserver.request') as mock_req, \
              patch('spellbookserver.response') as mock_resp, \
-             patch('spellbookserver.REQUESTS_LOG'), \
+             patch('spellbookserver.REQUESTS_LOG') as mock_req_log, \
              patch('spellbookserver.LOG') as mock_log, \
              patch('spellbookserver.get_mail_on_exception', return_value=False):
             mock_req.remote_addr = '127.0.0.1'
@@ -142,7 +255,8 @@ class TestLogToLogger:
             mock_req.url = 'http://localhost/bad'
             mock_req.headers = {}
             mock_req.json = None
-            mock_resp.status = '200 OK'
+            mock_req.content_length = 0
+            mock_resp.status_code = 200
 
             def boom():
                 raise ValueError('test error')
@@ -153,6 +267,9 @@ class TestLogToLogger:
             # Should return the default response object, not raise
             assert result is mock_resp
             mock_log.error.assert_called()
+            record = mock_req_log.info.call_args[0][0]
+            assert record['status'] == 500
+            assert record['error'] == 'test error'
 
     def test_log_to_logger_exception_with_mail(self):
         """Test log_to_logger sends mail on exception when enabled."""
@@ -169,7 +286,8 @@ class TestLogToLogger:
             mock_req.url = 'http://localhost/bad'
             mock_req.headers = {}
             mock_req.json = None
-            mock_resp.status = '200 OK'
+            mock_req.content_length = 0
+            mock_resp.status_code = 200
 
             api = MagicMock(spec=SpellbookRESTAPI)
             wrapper = SpellbookRESTAPI.log_to_logger(api, lambda: (_ for _ in ()).throw(ValueError('boom')))
@@ -319,6 +437,86 @@ class TestDeleteExplorer:
             mock_delete.assert_called_once_with('blockstream')
 
 
+class TestQueryCacheEndpoints:
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.cache_stats')
+    def test_get_cache_stats(self, mock_stats, mock_resp):
+        mock_stats.return_value = {'hits': {'balance': 1}, 'misses': {}}
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            result = SpellbookRESTAPI.get_cache_stats()
+            assert result['hits'] == {'balance': 1}
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.invalidate_cache')
+    @patch('spellbookserver.request')
+    def test_invalidate_cache(self, mock_req, mock_invalidate, mock_resp):
+        mock_req.query.query_type = 'balance'
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            result = SpellbookRESTAPI.invalidate_cache()
+            mock_invalidate.assert_called_once_with(query_type='balance')
+            assert result == {'success': True}
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.invalidate_cache')
+    @patch('spellbookserver.request')
+    def test_invalidate_cache_all(self, mock_req, mock_invalidate, mock_resp):
+        mock_req.query.query_type = ''
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            SpellbookRESTAPI.invalidate_cache()
+            mock_invalidate.assert_called_once_with(query_type=None)
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.explorer_stats')
+    def test_get_explorer_stats(self, mock_stats, mock_resp):
+        mock_stats.return_value = {'blockstream.info': {'requests': 1, 'errors': 0}}
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            result = SpellbookRESTAPI.get_explorer_stats()
+            assert result['blockstream.info']['requests'] == 1
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.action_stats')
+    def test_get_action_stats(self, mock_stats, mock_resp):
+        mock_stats.return_value = {'queued': 0, 'running': 1, 'action_types': {'Webhook': {'runs': 3, 'failures': 1}}}
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            result = SpellbookRESTAPI.get_action_stats()
+            assert result['action_types']['Webhook']['failures'] == 1
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.LISTENER_SERVICE')
+    def test_get_listener_stats(self, mock_service, mock_resp):
+        mock_service.stats.return_value = {'running': True, 'watched_addresses': 2}
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            result = SpellbookRESTAPI.get_listener_stats()
+            assert result['watched_addresses'] == 2
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.request')
+    @patch('spellbookserver.watch_address')
+    def test_watch_address(self, mock_watch, mock_req, mock_resp):
+        mock_req.json = {'event': 'RECEIVE', 'owner': 'payment1', 'timeout': 900}
+        mock_watch.return_value = None
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            SpellbookRESTAPI.watch_address('1BoatSLRHtKNngkdXEeobR76b53LETtpyT')
+            mock_watch.assert_called_once_with('1BoatSLRHtKNngkdXEeobR76b53LETtpyT', event='RECEIVE', owner='payment1', timeout=900)
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.request')
+    @patch('spellbookserver.unwatch_address')
+    def test_unwatch_address(self, mock_unwatch, mock_req, mock_resp):
+        mock_req.query = {'owner': 'payment1'}
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            SpellbookRESTAPI.unwatch_address('1BoatSLRHtKNngkdXEeobR76b53LETtpyT')
+            mock_unwatch.assert_called_once_with('1BoatSLRHtKNngkdXEeobR76b53LETtpyT', owner='payment1', event=None)
+
+
 class TestIndexAndFavicon:
     def test_index(self):
         instance = MagicMock(spec=SpellbookRESTAPI)
@@ -429,6 +627,58 @@ class TestBlockchainEndpoints:
         result = SpellbookRESTAPI.get_utxos('1abc')
         assert result[0]['txid'] == 'abc'
 
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.balances')
+    @patch('decorators.get_last_explorer', return_value='blockchain.info')
+    @patch('decorators.clear_explorer')
+    @patch('decorators.set_explorer')
+    @patch('spellbookserver.request')
+    def test_get_balances(self, mock_req, mock_set, mock_clear, mock_last, mock_balances, mock_resp):
+        mock_req.query.explorer = ''
+        mock_req.json = {'addresses': ['1abc', '1def']}
+        mock_balances.return_value = {'balances': {'1abc': {'final': 1}, '1def': {'final': 2}}}
+        result = SpellbookRESTAPI.get_balances()
+        mock_balances.assert_called_once_with(['1abc', '1def'])
+        assert result['balances']['1def']['final'] == 2
+        assert result['explorer'] == 'blockchain.info'
+
+    @patch('spellbookserver.response')
+    @patch('decorators.get_last_explorer', return_value=None)
+    @patch('decorators.clear_explorer')
+    @patch('decorators.set_explorer')
+    @patch('spellbookserver.request')
+    def test_get_balances_without_addresses(self, mock_req, mock_set, mock_clear, mock_last, mock_resp):
+        mock_req.query.explorer = ''
+        mock_req.json = {}
+        result = SpellbookRESTAPI.get_balances()
+        assert 'error' in result
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.utxos_many')
+    @patch('decorators.get_last_explorer', return_value='blockstream')
+    @patch('decorators.clear_explorer')
+    @patch('decorators.set_explorer')
+    @patch('spellbookserver.request')
+    def test_get_utxos_many(self, mock_req, mock_set, mock_clear, mock_last, mock_utxos_many, mock_resp):
+        mock_req.query.explorer = ''
+        mock_req.json = {'addresses': ['1abc'], 'confirmations': 3}
+        mock_utxos_many.return_value = {'utxos': {'1abc': []}}
+        SpellbookRESTAPI.get_utxos_many()
+        mock_utxos_many.assert_called_once_with(['1abc'], 3)
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.prime_input_addresses')
+    @patch('decorators.get_last_explorer', return_value='blockstream')
+    @patch('decorators.clear_explorer')
+    @patch('decorators.set_explorer')
+    @patch('spellbookserver.request')
+    def test_get_prime_input_addresses(self, mock_req, mock_set, mock_clear, mock_last, mock_pias, mock_resp):
+        mock_req.query.explorer = ''
+        mock_req.json = {'txids': ['aaa']}
+        mock_pias.return_value = {'prime_input_addresses': {'aaa': '1abc'}}
+        result = SpellbookRESTAPI.get_prime_input_addresses()
+        assert result['prime_input_addresses'] == {'aaa': '1abc'}
+
 
 class TestInputEndpoints:
     @patch('spellbookserver.response')
@@ -580,14 +830,28 @@ class TestRandomAddressEndpoints:
 class TestTriggerEndpoints:
     @patch('spellbookserver.response')
     @patch('spellbookserver.get_triggers')
-    def test_get_triggers_with_data(self, mock_get, mock_resp):
+    def test_get_triggers_with_data(self, mock_get, mock_resp, mock_bottle_request):
+        mock_bottle_request.query.trigger_type = ''
+        mock_bottle_request.query.status = ''
         mock_get.return_value = {'trig1': {}}
         result = SpellbookRESTAPI.get_triggers()
         assert 'trig1' in result
+        mock_get.assert_called_once_with(trigger_type=None, status=None)
 
     @patch('spellbookserver.response')
     @patch('spellbookserver.get_triggers')
-    def test_get_triggers_none(self, mock_get, mock_resp):
+    def test_get_triggers_filtered(self, mock_get, mock_resp, mock_bottle_request):
+        mock_bottle_request.query.trigger_type = 'Balance'
+        mock_bottle_request.query.status = 'Active'
+        mock_get.return_value = ['trig1']
+        SpellbookRESTAPI.get_triggers()
+        mock_get.assert_called_once_with(trigger_type='Balance', status='Active')
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.get_triggers')
+    def test_get_triggers_none(self, mock_get, mock_resp, mock_bottle_request):
+        mock_bottle_request.query.trigger_type = ''
+        mock_bottle_request.query.status = ''
         mock_get.return_value = None
         result = SpellbookRESTAPI.get_triggers()
         assert 'error' in result
@@ -841,13 +1105,35 @@ class TestActionEndpoints:
 
 class TestLogsEndpoint:
     @patch('spellbookserver.response')
-    @patch('spellbookserver.get_logs')
-    def test_get_logs(self, mock_get_logs, mock_resp):
+    @patch('spellbookserver.request')
+    @patch('spellbookserver.iter_json_list')
+    @patch('spellbookserver.iter_logs')
+    def test_get_logs(self, mock_iter_logs, mock_iter_json_list, mock_req, mock_resp):
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            mock_req.query = MagicMock(level='', start='', end='', limit='')
+            result = SpellbookRESTAPI.get_logs('error')
+            assert result is mock_iter_json_list.return_value
+            mock_iter_json_list.assert_called_once_with(mock_iter_logs.return_value)
+            mock_iter_logs.assert_called_once_with(filter_string='error', level=None, start=None, end=None, limit=None)
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.request')
+    @patch('spellbookserver.iter_logs')
+    def test_get_logs_with_filters(self, mock_iter_logs, mock_req, mock_resp):
         with patch('decorators.check_authentication') as mock_dec:
             mock_dec.return_value = 'OK'
-            mock_get_logs.return_value = ['log1', 'log2']
+            mock_req.query = MagicMock(level='WARNING', start='2017-07-14 13:00', end='2017-07-14 14:00', limit='10')
             SpellbookRESTAPI.get_logs('error')
-            mock_get_logs.assert_called_once_with(filter_string='error')
+            mock_iter_logs.assert_called_once_with(filter_string='error', level='WARNING', start='2017-07-14 13:00', end='2017-07-14 14:00', limit=10)
+
+    @patch('spellbookserver.response')
+    @patch('spellbookserver.request')
+    def test_get_logs_with_unknown_level(self, mock_req, mock_resp):
+        with patch('decorators.check_authentication') as mock_dec:
+            mock_dec.return_value = 'OK'
+            mock_req.query = MagicMock(level='LOUD', start='', end='', limit='')
+            assert SpellbookRESTAPI.get_logs('error') == {'error': 'Unknown log level: LOUD'}
 
 
 class TestFileDownload:
@@ -1269,10 +1555,14 @@ class TestSpellbookInit:
     @patch('spellbookserver.os.path.isfile', return_value=True)
     @patch('bottle.Bottle.run')
     @patch('spellbookserver.LOG')
-    @patch('spellbookserver.get_hot_wallet', side_effect=Exception('decryption failed'))
+    @patch('spellbookserver.WALLET_SESSION')
+    @patch('spellbookserver.ADDRESS_INDEX')
+    @patch('spellbookserver.get_wallet_gap_limit', return_value=20)
+    @patch('spellbookserver.get_wallet_idle_timeout', return_value=300)
     @patch('spellbookserver.get_enable_wallet', return_value=True)
-    def test_init_wallet_decryption_failure(self, mock_wallet, mock_get_wallet, mock_log, mock_run, mock_isfile, mock_port, mock_host, mock_explorers, mock_ssl):
+    def test_init_wallet_decryption_failure(self, mock_wallet, mock_idle_timeout, mock_gap_limit, mock_index, mock_session, mock_log, mock_run, mock_isfile, mock_port, mock_host, mock_explorers, mock_ssl):
         """Test __init__ handles hot wallet decryption failure (lines 120-123)."""
+        mock_session.unlock.side_effect = Exception('decryption failed')
         with pytest.raises(SystemExit) as exc_info:
             SpellbookRESTAPI()
         assert exc_info.value.code == 1
@@ -1290,6 +1580,34 @@ class TestSpellbookInit:
         SpellbookRESTAPI()
         mock_log.warning.assert_called_once_with('No block explorers configured!')
 
+    @patch('spellbookserver.get_enable_ssl', return_value=False)
+    @patch('spellbookserver.get_enable_wallet', return_value=False)
+    @patch('spellbookserver.get_explorers', return_value={'blockstream': {}})
+    @patch('spellbookserver.get_host', return_value='localhost')
+    @patch('spellbookserver.get_port', return_value=8080)
+    @patch('spellbookserver.os.path.isfile', return_value=True)
+    @patch('bottle.Bottle.run')
+    @patch('spellbookserver.LOG')
+    def test_init_starts_trigger_scheduler(self, mock_log, mock_run, mock_isfile, mock_port, mock_host, mock_explorers, mock_wallet, mock_ssl, mock_trigger_scheduler):
+        """Test __init__ starts the trigger scheduler before the webserver."""
+        SpellbookRESTAPI()
+        mock_trigger_scheduler.start.assert_called_once()
+
+    @patch('spellbookserver.get_enable_ssl', return_value=False)
+    @patch('spellbookserver.get_enable_wallet', return_value=False)
+    @patch('spellbookserver.get_explorers', return_value={'blockstream': {}})
+    @patch('spellbookserver.get_host', return_value='localhost')
+    @patch('spellbookserver.get_port', return_value=8080)
+    @patch('spellbookserver.os.path.isfile', return_value=True)
+    @patch('bottle.Bottle.run')
+    @patch('spellbookserver.LOG')
+    @patch('spellbookserver.preload_trigger_scripts')
+    def test_init_preloads_scripts(self, mock_preload, mock_log, mock_run, mock_isfile, mock_port, mock_host, mock_explorers, mock_wallet, mock_ssl, mock_preload_scripts):
+        """Test __init__ imports the scripts of active triggers when preload_scripts is enabled."""
+        mock_preload_scripts.return_value = True
+        SpellbookRESTAPI()
+        mock_preload.assert_called_once()
+
     @patch('spellbookserver.get_enable_ssl', return_value=True)
     @patch('spellbookserver.get_enable_wallet', return_value=False)
     @patch('spellbookserver.get_explorers', return_value={'blockstream': {}})
@@ -1301,7 +1619,7 @@ class TestSpellbookInit:
     def test_init_ssl_enabled(self, mock_log, mock_run, mock_isfile, mock_port, mock_host, mock_explorers, mock_wallet, mock_ssl):
         """Test __init__ starts SSL server when enabled (line 236)."""
         SpellbookRESTAPI()
-        mock_run.assert_called_once_with(host='localhost', port=8080, debug=False, server='sslwebserver')
+        mock_run.assert_called_once_with(host='localhost', port=8080, debug=False, server='sslwebserver', numthreads=10)
 
     @patch('spellbookserver.get_enable_ssl', return_value=False)
     @patch('spellbookserver.get_enable_wallet', return_value=False)
@@ -1335,6 +1653,86 @@ class TestSpellbookInit:
         mock_sendmail.assert_called_once()
 
 
+class TestPreForkMode:
+    """Tests for running the REST API in multiple worker processes."""
+
+    @patch('spellbookserver.get_enable_ssl', return_value=False)
+    @patch('spellbookserver.get_enable_wallet', return_value=False)
+    @patch('spellbookserver.get_explorers', return_value={'blockstream': {}})
+    @patch('spellbookserver.get_host', return_value='localhost')
+    @patch('spellbookserver.get_port', return_value=8080)
+    @patch('spellbookserver.os.path.isfile', return_value=True)
+    @patch('spellbookserver.SpellbookRESTAPI.run_workers')
+    @patch('bottle.Bottle.run')
+    @patch('spellbookserver.LOG')
+    def test_init_with_multiple_workers(self, mock_log, mock_run, mock_run_workers, mock_isfile, mock_port, mock_host, mock_explorers, mock_wallet, mock_ssl,
+                                        mock_server_workers, mock_trigger_scheduler):
+        mock_server_workers.return_value = 4
+        SpellbookRESTAPI()
+        mock_run_workers.assert_called_once_with(workers=4, threads=10)
+        mock_run.assert_not_called()
+        mock_trigger_scheduler.start.assert_not_called()
+
+    @patch('spellbookserver.get_enable_ssl', return_value=False)
+    @patch('spellbookserver.multiprocessing.get_context')
+    def test_run_workers(self, mock_get_context, mock_ssl, mock_trigger_scheduler):
+        context = mock_get_context.return_value
+        instance = MagicMock(spec=SpellbookRESTAPI)
+        instance.host = 'localhost'
+        instance.port = 8080
+
+        SpellbookRESTAPI.run_workers(instance, workers=3, threads=20)
+
+        mock_get_context.assert_called_once_with('fork')
+        assert context.Process.call_count == 3
+        kwargs = context.Process.call_args[1]['kwargs']
+        assert kwargs['numthreads'] == 20
+        assert kwargs['reuse_port'] is True
+        assert context.Process.return_value.start.call_count == 3
+        assert context.Process.return_value.join.call_count == 3
+        mock_trigger_scheduler.start.assert_called_once()
+        mock_trigger_scheduler.stop.assert_called_once()
+
+    @patch('spellbookserver.LISTENER_SERVICE')
+    @patch('spellbookserver.get_enable_ssl', return_value=False)
+    @patch('spellbookserver.multiprocessing.get_context')
+    def test_run_workers_does_not_start_the_listener(self, mock_get_context, mock_ssl, mock_service, mock_trigger_scheduler, mock_listener_settings):
+        mock_listener_settings.return_value = True
+        instance = MagicMock(spec=SpellbookRESTAPI)
+        instance.host = 'localhost'
+        instance.port = 8080
+
+        SpellbookRESTAPI.run_workers(instance, workers=2, threads=10)
+        instance.start_listener.assert_not_called()
+        mock_service.start.assert_not_called()
+
+    @patch('spellbookserver.watch_triggers')
+    @patch('spellbookserver.LISTENER_SERVICE')
+    @patch('spellbookserver.get_listener_backend_url', return_value=None)
+    @patch('spellbookserver.get_listener_backend', return_value='blockio')
+    @patch('spellbookserver.get_use_testnet', return_value=False)
+    @patch('spellbookserver.get_max_watched_addresses', return_value=1000)
+    def test_start_listener(self, mock_max_addresses, mock_testnet, mock_backend, mock_backend_url, mock_service, mock_watch_triggers, mock_listener_settings):
+        SpellbookRESTAPI.start_listener()
+        mock_service.start.assert_not_called()
+
+        mock_listener_settings.return_value = True
+        SpellbookRESTAPI.start_listener()
+        assert mock_service.configure.call_args[1]['max_addresses'] == 1000
+        assert mock_service.configure.call_args[1]['backend'].name == 'blockio'
+        mock_service.start.assert_called_once()
+        mock_watch_triggers.assert_called_once()
+
+    @patch('spellbookserver.LISTENER_SERVICE')
+    @patch('spellbookserver.get_listener_backend_url', return_value=None)
+    @patch('spellbookserver.get_listener_backend', return_value='carrier pigeon')
+    @patch('spellbookserver.get_use_testnet', return_value=False)
+    def test_start_listener_with_unknown_backend(self, mock_testnet, mock_backend, mock_backend_url, mock_service, mock_listener_settings):
+        mock_listener_settings.return_value = True
+        SpellbookRESTAPI.start_listener()
+        mock_service.start.assert_not_called()
+
+
 class TestMainBlock:
     """Tests for the main() function in spellbookserver.py."""
 
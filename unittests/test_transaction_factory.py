@@ -12,7 +12,7 @@ from transactionfactory import (
     num_to_var_int, signature_form, serialize_script, serialize_script_unit,
     der_encode_sig, ecdsa_tx_sign, ecdsa_raw_sign, hash_to_int,
     deterministic_generate_k, bin_txhash, txhash, double_sha256,
-    make_custom_tx, SIGHASH_ALL, SIGHASH_NONE, SIGHASH_SINGLE, SIGHASH_ANYONECANPAY,
+    make_custom_tx, SIGHASH_ALL, SIGHASH_NONE, SIGHASH_SINGLE, SIGHASH_ANYONECANPAY, TransactionBuilder,
 )
 from transactionfactory import is_python2
 from helpers.privatekeyhelpers import privkey_to_pubkey, encode_privkey
@@ -663,3 +663,57 @@ class TestSignatureFormSighashSingleMultiInput:
         # The first output should have been blanked out (value=2**64-1, script="")
         assert result['outs'][0]['value'] == 2**64 - 1
         assert result['outs'][0]['script'] == ""
+
+
+class TestTransactionBuilder:
+    KEYS = [encode_privkey(12345, 'hex'), encode_privkey(67890, 'hex_compressed')]
+    OUTPUTS = [{'address': 'n4KmgAd3J7ubthHpe9vyLy2xyiVZpF7dPa', 'value': 50000},
+               {'address': '3JvL6Ymt8MVWiCNHC7oWU6nLeHNJKLZGLN', 'value': 7000}]
+
+    def setup_method(self):
+        self.outputs = ['%064x:%d' % (i * 7919 + 1, i % 3) for i in range(5)]
+        self.builder = TransactionBuilder()
+        for output in self.outputs:
+            self.builder.add_input(output)
+        for tx_output in self.OUTPUTS:
+            self.builder.add_output(value=tx_output['value'], address=tx_output['address'])
+
+    def legacy_tx(self):
+        return mktx([{'output': output} for output in self.outputs], self.OUTPUTS)
+
+    def test_unsigned_transaction(self):
+        assert self.builder.serialize() == self.legacy_tx()
+        assert len(self.builder) == 5
+
+    @pytest.mark.parametrize('hashcode', [SIGHASH_ALL, SIGHASH_NONE, SIGHASH_SINGLE, SIGHASH_ANYONECANPAY])
+    def test_same_signatures_as_sign(self, hashcode):
+        tx = add_op_return('hello', self.legacy_tx())
+        self.builder.add_op_return('hello')
+
+        # Out of order, so the signature hashes can not all use the carried sha256 state
+        for i in [0, 1, 3, 2, 4]:
+            tx = sign(tx, i, self.KEYS[i % 2], hashcode)
+            self.builder.sign(i, self.KEYS[i % 2], hashcode)
+
+        assert self.builder.serialize() == tx
+
+    def test_signature_hash(self):
+        script = binascii.unhexlify(p2pkh_script('n4KmgAd3J7ubthHpe9vyLy2xyiVZpF7dPa'))
+        for i in range(5):
+            expected = bin_txhash(signature_form(self.legacy_tx(), i, safe_hexlify(script), SIGHASH_ALL), SIGHASH_ALL)
+            assert self.builder.signature_hash(i, script) == expected
+
+    def test_adding_an_output_changes_the_signature_hash(self):
+        script = binascii.unhexlify(p2pkh_script('n4KmgAd3J7ubthHpe9vyLy2xyiVZpF7dPa'))
+        signature_hash = self.builder.signature_hash(0, script)
+        self.builder.add_output(value=1000, script='76a914' + 'b' * 40 + '88ac')
+        assert self.builder.signature_hash(0, script) != signature_hash
+
+    def test_output_without_address_or_script(self):
+        with pytest.raises(Exception, match="Could not find 'address' or 'script'"):
+            self.builder.add_output(value=1000)
+
+    def test_only_one_op_return(self):
+        self.builder.add_op_return('hello')
+        with pytest.raises(Exception):
+            self.builder.add_op_return('world')
@@ -150,6 +150,12 @@ class TestTrigger(object):
         trigger.configure(destruct_actions=True)
         assert trigger.destruct_actions
 
+    def test_trigger_configure_parallel_actions(self):
+        trigger = ConcreteTrigger('test_trigger_id')
+        assert trigger.parallel_actions is False
+        trigger.configure(parallel_actions=True)
+        assert trigger.json_encodable()['parallel_actions'] is True
+
     def test_trigger_json_encodable(self):
         trigger = ConcreteTrigger('test_trigger_id')
         trigger.configure(created=1609459200)
@@ -159,12 +165,12 @@ class TestTrigger(object):
         assert result['trigger_type'] == 'Manual'
         assert result['created'] == 1609459200
 
-    @mock.patch('trigger.trigger.save_to_json_file')
+    @mock.patch('trigger.trigger.TRIGGER_STORE')
     def test_trigger_save(self, mock_save):
         trigger = ConcreteTrigger('test_trigger_id')
         trigger.configure(created=1609459200)
         trigger.save()
-        mock_save.assert_called_once()
+        mock_save.save.assert_called_once_with('test_trigger_id', trigger.json_encodable())
 
     def test_trigger_get_script_variables(self):
         trigger = ConcreteTrigger('test_trigger_id')
@@ -185,7 +191,7 @@ class TestTrigger(object):
         result = trigger.load_script()
         assert result is None
 
-    @mock.patch('trigger.trigger.save_to_json_file')
+    @mock.patch('trigger.trigger.TRIGGER_STORE')
     @mock.patch('trigger.trigger.get_action')
     @mock.patch('trigger.trigger.get_actions', return_value={'action1': {}})
     def test_trigger_activate_success(self, mock_get_actions, mock_get_action, mock_save):
@@ -202,7 +208,7 @@ class TestTrigger(object):
         assert trigger.status == 'Succeeded'
         mock_action.run.assert_called_once()
 
-    @mock.patch('trigger.trigger.save_to_json_file')
+    @mock.patch('trigger.trigger.TRIGGER_STORE')
     @mock.patch('trigger.trigger.get_action')
     @mock.patch('trigger.trigger.get_actions', return_value={'action1': {}})
     def test_trigger_activate_failure(self, mock_get_actions, mock_get_action, mock_save):
@@ -218,7 +224,7 @@ class TestTrigger(object):
         assert trigger.triggered == 1
         assert trigger.status == 'Failed'
 
-    @mock.patch('trigger.trigger.save_to_json_file')
+    @mock.patch('trigger.trigger.TRIGGER_STORE')
     @mock.patch('trigger.trigger.get_action')
     @mock.patch('trigger.trigger.get_actions', return_value={'action1': {}})
     def test_trigger_activate_multi_success(self, mock_get_actions, mock_get_action, mock_save):
@@ -250,7 +256,7 @@ class TestTrigger(object):
         trigger.configure(actions=['action1', 'unknown_action'])
         assert trigger.actions == ['action1', 'unknown_action']
 
-    @mock.patch('trigger.trigger.save_to_json_file')
+    @mock.patch('trigger.trigger.TRIGGER_STORE')
     @mock.patch('trigger.trigger.get_action')
     @mock.patch('trigger.trigger.get_actions', return_value={'action1': {}})
     def test_trigger_activate_with_script(self, mock_get_actions, mock_get_action, mock_save):
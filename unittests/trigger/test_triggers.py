@@ -94,6 +94,15 @@ class TestBalanceTrigger(object):
         trigger.amount = 50000
         assert not trigger.conditions_fulfilled()
 
+    @mock.patch('trigger.balancetrigger.balance')
+    def test_balancetrigger_evaluate_does_not_query(self, mock_balance):
+        trigger = BalanceTrigger('test_balance')
+        trigger.address = '1TestAddress'
+        trigger.amount = 50000
+        assert trigger.evaluate(data={'balance': {'final': 50000}})
+        assert not trigger.evaluate(data=None)
+        mock_balance.assert_not_called()
+
 
 class TestBlockHeightTrigger(object):
     """Tests for BlockHeightTrigger"""
@@ -149,6 +158,13 @@ class TestBlockHeightTrigger(object):
         trigger.block_height = 700000
         assert not trigger.conditions_fulfilled()
 
+    def test_blockheighttrigger_evaluate(self):
+        trigger = BlockHeightTrigger('test_blockheight')
+        trigger.block_height = 700000
+        trigger.confirmations = 6
+        assert trigger.evaluate(data={'block': {'height': 700006}})
+        assert not trigger.evaluate(data={'block': {'height': 700005}})
+
 
 class TestTimestampTrigger(object):
     """Tests for TimestampTrigger"""